@@ -1,10 +1,11 @@
-from flask import Flask, jsonify, request, send_from_directory, send_file
+from flask import Flask, jsonify, request, send_from_directory, send_file, Response, stream_with_context, g
 from flask_cors import CORS
 import sqlite3
 import os
 from datetime import datetime, timedelta
 import calendar
 import io
+from urllib.parse import quote
 from reportlab.lib.pagesizes import A4, letter
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -21,30 +22,277 @@ import numpy as np
 import uuid
 import threading
 import time
+import hmac
+from contextlib import contextmanager
+from functools import wraps
 
 # Import AI analysis services
 from services.config_manager import ConfigManager
 from services.file_handler import FileUploadHandler
 from services.content_extractor import ContentExtractor
-from services.siliconflow_client import SiliconFlowClient
+from services.siliconflow_client import SiliconFlowClient, AnalysisResult
 from services.report_generator import ReportGenerator
+from services.incremental_analyzer import IncrementalAnalyzer
+from services.pagination import encode_cursor, decode_cursor, keyset_condition, nullable_keyset_condition, get_row_count
+from services.analysis_stats import AnalysisStatsRecorder
+from services.search_index import SearchIndex, SearchTimeoutError
+from services.analysis_storage import AnalysisStorage, register_functions as register_storage_functions
+from services.prompt_templates import PromptTemplateRegistry
+from services import structured_output
+from services.data_version import DataVersion
+from services.metrics_ingestor import DuplicateKeysError, InputEncodingError, MetricsIngestor, detect_format
+from services.dashboard_snapshot import DashboardSnapshotManager
+from services.http_compression import compress_response, iter_encoded
+from services.ranking_cache import RankingCache
+from services.json_stream import stream_json_list
+from services.table_export import iter_rows, iter_csv, write_xlsx, iter_file
+from services.json_provider import FastJSONProvider
+from services.response_stats import ResponseStats
+from services.static_assets import StaticAssets
+from services.request_metrics import MetricsRegistry, PROMETHEUS_CONTENT_TYPE
+from services.tracing import Tracer, JsonlSpanExporter, OTLPJsonExporter, span
+from services.profiler import SamplingProfiler, CallProfiler
+from services.memory_monitor import MemoryTracker, MemoryBudget, MemoryBudgetExceeded, current_rss, peak_rss
+from services.worker_pools import WorkerPools, parse_pool_limits, DEFAULT_POOL_LIMITS
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)
 CORS(app)
 
 # 数据库配置
 DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'efficiency.db')
 
+# 写锁被占用时的等待时间（秒）；数据库初始化时切换为WAL模式，读事务不阻塞写入
+DATABASE_BUSY_TIMEOUT = float(os.environ.get('DATABASE_BUSY_TIMEOUT', '30'))
+
+def connect_db():
+    """打开数据库连接（注册全文索引视图所需的decompress_text函数）"""
+    conn = sqlite3.connect(DATABASE_PATH, timeout=DATABASE_BUSY_TIMEOUT)
+    register_storage_functions(conn)
+    return conn
+
+# 前端目录
+FRONTEND_PATH = os.path.join(os.path.dirname(__file__), '..', 'frontend')
+
+# 看板查询使用内存列式快照（DASHBOARD_SNAPSHOT=1 启用，数据版本变化时自动刷新）
+DASHBOARD_SNAPSHOT_ENABLED = os.environ.get('DASHBOARD_SNAPSHOT', '').lower() in ('1', 'true', 'yes', 'on')
+
+# 前端静态资源热更新（调试模式或 STATIC_ASSETS_RELOAD=1 时启用），否则只在启动时生成一次
+STATIC_ASSETS_RELOAD = os.environ.get('STATIC_ASSETS_RELOAD', '').lower() in ('1', 'true', 'yes', 'on')
+
+# 响应压缩（RESPONSE_COMPRESSION=0 关闭），小于阈值的响应体不压缩
+RESPONSE_COMPRESSION_ENABLED = os.environ.get('RESPONSE_COMPRESSION', '1').lower() not in ('0', 'false', 'no', 'off')
+RESPONSE_COMPRESSION_MIN_SIZE = int(os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', '1024'))
+
 # Initialize AI analysis services
 config_manager = ConfigManager()
 file_handler = FileUploadHandler(config_manager)
 content_extractor = ContentExtractor()
 report_generator = ReportGenerator()
+incremental_analyzer = IncrementalAnalyzer(content_extractor)
+stats_recorder = AnalysisStatsRecorder()
+search_index = SearchIndex()
+analysis_storage = AnalysisStorage()
+prompt_templates = PromptTemplateRegistry()
+data_version = DataVersion()
+metrics_ingestor = MetricsIngestor(data_version)
+dashboard_snapshots = (
+    DashboardSnapshotManager(lambda: DATABASE_PATH, data_version) if DASHBOARD_SNAPSHOT_ENABLED else None
+)
+ranking_cache = RankingCache(data_version)
+response_stats = ResponseStats()
+static_assets = StaticAssets(FRONTEND_PATH)
 
-# Initialize SiliconFlow client
-try:
-    siliconflow_config = config_manager.get_siliconflow_config()
-    siliconflow_client = SiliconFlowClient(
+# 请求级指标（Prometheus文本格式，经本机 /metrics 暴露）
+metrics_registry = MetricsRegistry()
+http_request_duration = metrics_registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route', ('method', 'route', 'status')
+)
+http_requests_in_flight = metrics_registry.gauge(
+    'http_requests_in_flight', 'HTTP requests currently being handled', ('route',)
+)
+http_request_errors = metrics_registry.counter(
+    'http_request_errors', 'HTTP responses with status >= 500 or unhandled exceptions', ('method', 'route', 'status')
+)
+analysis_stage_duration = metrics_registry.histogram(
+    'ai_analysis_stage_duration_seconds',
+    'Upload analysis pipeline stage latency (validate, save, extract, ai_call, db_write, report)', ('stage',)
+)
+analysis_failures = metrics_registry.counter(
+    'ai_analysis_failures', 'Upload analyses that failed, by pipeline stage', ('stage',)
+)
+analysis_results_reused = metrics_registry.counter(
+    'ai_analysis_results_reused', 'Template analyses answered from a stored result without a model call',
+    ('template',)
+)
+
+# /metrics 仅允许本机访问
+METRICS_LOCAL_ADDRESSES = ('127.0.0.1', '::1', '::ffff:127.0.0.1')
+
+# 请求追踪：TRACE_EXPORT_PATH 写入JSONL文件，或 TRACE_OTLP_ENDPOINT 发送至OTLP/HTTP收集器；
+# 按 TRACE_SAMPLE_RATE 采样（携带已采样traceparent头的请求总是记录）
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', '0.01'))
+TRACE_EXPORT_PATH = os.environ.get('TRACE_EXPORT_PATH', '').strip()
+TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT', '').strip()
+
+def create_trace_exporter():
+    """根据环境变量创建追踪导出器（均未配置时不记录span）"""
+    if TRACE_OTLP_ENDPOINT:
+        return OTLPJsonExporter(TRACE_OTLP_ENDPOINT)
+    if TRACE_EXPORT_PATH:
+        return JsonlSpanExporter(TRACE_EXPORT_PATH)
+    return None
+
+tracer = Tracer(create_trace_exporter(), sample_rate=TRACE_SAMPLE_RATE)
+
+@contextmanager
+def analysis_stage(stage):
+    """分析流水线的一个阶段：记录耗时直方图并打开追踪span"""
+    with analysis_stage_duration.time(stage=stage), span(f'analysis.{stage}'):
+        yield
+
+# 诊断接口（进程采样分析、单请求cProfile）：仅在设置 DIAGNOSTICS_TOKEN 时启用，
+# 请求需携带 Authorization: Bearer <token> 或 X-Diagnostics-Token 头
+DIAGNOSTICS_TOKEN = os.environ.get('DIAGNOSTICS_TOKEN', '').strip()
+PROFILE_OUTPUT_DIR = os.environ.get('PROFILE_OUTPUT_DIR', 'temp/profiles')
+MAX_SAMPLING_SECONDS = 60
+PROFILE_SORT_KEYS = ('cumulative', 'tottime', 'ncalls', 'filename')
+
+call_profiler = CallProfiler(PROFILE_OUTPUT_DIR)
+sampling_lock = threading.Lock()
+
+def diagnostics_authorized():
+    """请求是否携带正确的诊断令牌（未配置令牌时一律拒绝）"""
+    if not DIAGNOSTICS_TOKEN:
+        return False
+    authorization = request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        supplied = authorization[len('Bearer '):].strip()
+    else:
+        supplied = request.headers.get('X-Diagnostics-Token', '')
+    return hmac.compare_digest(supplied.encode('utf-8'), DIAGNOSTICS_TOKEN.encode('utf-8'))
+
+def require_diagnostics_token(view):
+    """诊断接口装饰器：未启用时返回404，令牌错误时返回401"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not DIAGNOSTICS_TOKEN:
+            return jsonify({'error': '诊断接口未启用'}), 404
+        if not diagnostics_authorized():
+            return jsonify({'error': '诊断令牌无效'}), 401
+        return view(*args, **kwargs)
+    return wrapper
+
+def profiled(view):
+    """
+    单请求cProfile：携带诊断令牌且 ?profile=1（或 X-Profile: 1 头）时，
+    以cProfile运行本次请求，结果经 X-Profile-Id 响应头指向的诊断接口下载
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        flag = request.args.get('profile') or request.headers.get('X-Profile', '')
+        if flag.lower() not in ('1', 'true', 'yes', 'on') or not diagnostics_authorized():
+            return view(*args, **kwargs)
+        response, profile_id = call_profiler.profile(
+            request.endpoint, lambda: app.make_response(view(*args, **kwargs))
+        )
+        response.headers['X-Profile-Id'] = profile_id or 'busy'
+        return response
+    return wrapper
+
+# 内存统计：MEMORY_TRACKING=rss（默认，统计进程常驻内存变化）/ tracemalloc（调试用，精确统计Python分配
+# 峰值及分配位置，直接运行开发服务器时默认启用）/ off
+MEMORY_TRACKING = os.environ.get('MEMORY_TRACKING', '').strip().lower()
+# 内存预算：进程RSS加进行中请求的预估用量超过 MEMORY_BUDGET_MB 时，上传分析及PDF报告请求排队等待，
+# 超过 MEMORY_QUEUE_TIMEOUT 秒仍不足则返回503（0表示不限制）
+MEMORY_BUDGET_MB = float(os.environ.get('MEMORY_BUDGET_MB', '0'))
+MEMORY_QUEUE_TIMEOUT = float(os.environ.get('MEMORY_QUEUE_TIMEOUT', '30'))
+# 预估用量：上传为请求体大小的倍数（提取文本、提示词、AI响应及报告等副本），PDF报告为固定值
+UPLOAD_MEMORY_FACTOR = int(os.environ.get('UPLOAD_MEMORY_FACTOR', '8'))
+REPORT_MEMORY_ESTIMATE_MB = float(os.environ.get('REPORT_MEMORY_ESTIMATE_MB', '64'))
+
+memory_tracker = MemoryTracker(MEMORY_TRACKING or 'rss')
+memory_budget = MemoryBudget(int(MEMORY_BUDGET_MB * 1024 * 1024), MEMORY_QUEUE_TIMEOUT)
+request_peak_memory = metrics_registry.histogram(
+    'http_request_peak_memory_bytes', 'Peak memory growth of memory-tracked requests', ('endpoint',),
+    buckets=(1 << 20, 4 << 20, 16 << 20, 64 << 20, 256 << 20, 1 << 30)
+)
+memory_budget_rejections = metrics_registry.counter(
+    'memory_budget_rejections', 'Requests rejected because the memory budget stayed exhausted', ('endpoint',)
+)
+process_resident_memory = metrics_registry.gauge(
+    'process_resident_memory_bytes', 'Resident memory of the worker process'
+)
+
+def memory_guarded(estimate):
+    """
+    内存预算及统计装饰器：按 estimate() 返回的预估字节数申请内存预算（不足时排队，超时返回503），
+    并记录本次请求的内存峰值
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            try:
+                with memory_budget.admit(estimate()), memory_tracker.track(request.endpoint) as usage:
+                    response = view(*args, **kwargs)
+            except MemoryBudgetExceeded:
+                memory_budget_rejections.inc(endpoint=request.endpoint)
+                retry_after = str(max(1, int(MEMORY_QUEUE_TIMEOUT)))
+                return jsonify({'error': '服务器内存不足，请稍后重试'}), 503, {'Retry-After': retry_after}
+            if memory_tracker.mode != 'off':
+                request_peak_memory.observe(usage.peak_bytes, endpoint=request.endpoint)
+            return response
+        return wrapper
+    return decorator
+
+def upload_memory_estimate():
+    return (request.content_length or 0) * UPLOAD_MEMORY_FACTOR
+
+def report_memory_estimate():
+    return int(REPORT_MEMORY_ESTIMATE_MB * 1024 * 1024)
+
+# 请求分池并发限制（WORKER_POOLS，格式 池=并发数）：耗时较长的AI调用、报告导出与看板查询分别限流，
+# 避免慢请求占满服务线程；池满时最多排队 POOL_QUEUE_TIMEOUT 秒，超时返回503
+WORKER_POOLS = os.environ.get('WORKER_POOLS', DEFAULT_POOL_LIMITS)
+POOL_QUEUE_TIMEOUT = float(os.environ.get('POOL_QUEUE_TIMEOUT', '10'))
+# 接口所属池；未列出的API接口使用dashboard池，页面、静态资源、/metrics 及诊断接口不限流
+POOL_ENDPOINTS = {
+    'upload_and_analyze': 'ai',
+    'test_ai_connection': 'ai',
+    'download_report': 'reports',
+    'export_dashboard_table': 'reports',
+    'export_analysis_report': 'reports'
+}
+UNPOOLED_ENDPOINTS = {
+    'index', 'static_files', 'prometheus_metrics', 'sample_process_profile', 'list_request_profiles',
+    'get_request_profile', 'get_memory_diagnostics', 'mark_memory_baseline'
+}
+
+worker_pools = WorkerPools(parse_pool_limits(WORKER_POOLS), POOL_QUEUE_TIMEOUT)
+worker_pool_in_use = metrics_registry.gauge('worker_pool_in_use', 'Requests running in each worker pool', ('pool',))
+worker_pool_waiting = metrics_registry.gauge('worker_pool_waiting', 'Requests queued for a worker pool slot', ('pool',))
+worker_pool_rejections = metrics_registry.counter(
+    'worker_pool_rejections', 'Requests rejected because their worker pool stayed full', ('pool',)
+)
+
+def request_pool(endpoint):
+    """请求所属的池（None表示不限流）"""
+    if endpoint is None or endpoint in UNPOOLED_ENDPOINTS:
+        return None
+    pool = POOL_ENDPOINTS.get(endpoint, 'dashboard')
+    if pool in worker_pools:
+        return pool
+    return 'dashboard' if 'dashboard' in worker_pools else None
+
+# 配置热更新：后台线程每 CONFIG_WATCH_INTERVAL 秒检查 ai_config.json 的修改时间及数据库中的自定义提示词
+# （其他进程的修改），请求路径只读取内存中的配置快照；0表示不检查
+CONFIG_WATCH_INTERVAL = float(os.environ.get('CONFIG_WATCH_INTERVAL', '2'))
+
+# 变化时需要重建AI客户端的配置项
+SILICONFLOW_CLIENT_SETTINGS = ('api_key', 'base_url', 'model', 'max_tokens', 'temperature', 'timeout')
+
+def create_siliconflow_client(siliconflow_config):
+    return SiliconFlowClient(
         api_key=siliconflow_config['api_key'],
         base_url=siliconflow_config['base_url'],
         model=siliconflow_config['model'],
@@ -52,27 +300,189 @@ try:
         temperature=siliconflow_config.get('temperature', 0.7),
         timeout=siliconflow_config.get('timeout', 120)
     )
+
+def rebuild_siliconflow_client(previous, current):
+    """
+    配置快照更新时，若模型、超时等客户端参数变化，则创建新客户端并整体替换
+    （进行中的请求继续使用旧客户端，新请求使用新客户端；限流状态及用量统计沿用）
+    """
+    global siliconflow_client
+    old_config = previous.config.get('siliconflow', {})
+    new_config = current.config.get('siliconflow', {})
+    if all(old_config.get(key) == new_config.get(key) for key in SILICONFLOW_CLIENT_SETTINGS):
+        return
+    try:
+        client = create_siliconflow_client(new_config)
+    except Exception as e:
+        app.logger.error(f"AI客户端重建失败，继续使用原配置: {e}")
+        return
+    
+    if siliconflow_client is not None:
+        client.adopt_state(siliconflow_client)
+    siliconflow_client = client
+    app.logger.info(f"AI客户端已按配置版本 {current.version} 重建（模型 {client.model}）")
+
+# Initialize SiliconFlow client
+try:
+    siliconflow_client = create_siliconflow_client(config_manager.get_siliconflow_config())
 except Exception as e:
     print(f"Warning: Failed to initialize SiliconFlow client: {e}")
     siliconflow_client = None
+config_manager.subscribe(rebuild_siliconflow_client)
+
+def request_route():
+    """指标使用的路由标签（URL规则而非实际路径，避免标签基数膨胀）"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_timer():
+    """记录请求开始时间并增加进行中请求数"""
+    g.request_start_time = time.perf_counter()
+    g.request_route = request_route()
+    http_requests_in_flight.inc(route=g.request_route)
+    g.trace = tracer.begin(f'{request.method} {g.request_route}', request.headers.get('traceparent'),
+                           **{'http.method': request.method, 'http.route': g.request_route})
+
+@app.before_request
+def watch_configuration():
+    """确保本进程的配置监视线程已启动（gunicorn预加载时在fork后的首个请求中启动）"""
+    config_manager.ensure_watching(CONFIG_WATCH_INTERVAL)
+
+@app.before_request
+def acquire_worker_slot():
+    """占用请求所属池的一个并发名额（在请求计时开始后执行，排队时间计入请求耗时）"""
+    pool = request_pool(request.endpoint)
+    if pool is None:
+        return None
+    if not worker_pools.acquire(pool):
+        worker_pool_rejections.inc(pool=pool)
+        retry_after = str(max(1, int(POOL_QUEUE_TIMEOUT)))
+        return jsonify({'error': '服务繁忙，请稍后重试'}), 503, {'Retry-After': retry_after}
+    g.worker_pool = pool
+    return None
+
+@app.teardown_request
+def release_worker_slot(exc):
+    """请求结束（流式响应在发送完毕后）时释放并发名额"""
+    pool = g.pop('worker_pool', None)
+    if pool is not None:
+        worker_pools.release(pool)
+
+@app.after_request
+def record_response_status(response):
+    g.response_status = response.status_code
+    trace = g.get('trace')
+    if trace is not None:
+        trace.span.set_attribute('http.status_code', response.status_code)
+        response.headers['X-Trace-Id'] = trace.trace_id
+    return response
+
+@app.teardown_request
+def observe_request(exc):
+    """请求结束（流式响应在发送完毕后）时记录耗时、错误数，减少进行中请求数并结束追踪"""
+    trace = g.pop('trace', None)
+    if trace is not None:
+        trace.end(exc)
+    
+    start_time = g.pop('request_start_time', None)
+    if start_time is None:
+        return
+    route = g.pop('request_route')
+    http_requests_in_flight.dec(route=route)
+    
+    status = 500 if exc is not None else g.get('response_status', 500)
+    labels = {'method': request.method, 'route': route, 'status': str(status)}
+    http_request_duration.observe(time.perf_counter() - start_time, **labels)
+    if status >= 500:
+        http_request_errors.inc(**labels)
+
+@app.after_request
+def compress_and_measure(response):
+    """压缩响应体（流式响应边发送边压缩），并按接口记录序列化耗时及传输字节数"""
+    endpoint = request.endpoint or 'unknown'
+    serialize_time = g.get('json_serialize_time', 0.0)
+    
+    def record(raw_bytes, wire_bytes, compress_time=0.0, streamed=False):
+        response_stats.record(endpoint, raw_bytes, wire_bytes, serialize_time=serialize_time,
+                              compress_time=compress_time, encoding=response.headers.get('Content-Encoding'),
+                              streamed=streamed)
+    
+    # 流式响应在发送完毕（或客户端断开）后记录实际字节数
+    def record_stream(raw_bytes, wire_bytes, compress_time):
+        record(raw_bytes, wire_bytes, compress_time, streamed=True)
+    
+    if response.direct_passthrough:
+        record(None, None, streamed=True)
+        return response
+    
+    if response.is_streamed:
+        if RESPONSE_COMPRESSION_ENABLED:
+            compress_response(response, request.headers.get('Accept-Encoding', ''), on_stream_close=record_stream)
+        else:
+            response.response = iter_encoded(response.response, on_close=record_stream)
+        return response
+    
+    raw_bytes = response.content_length
+    compress_time = 0.0
+    if RESPONSE_COMPRESSION_ENABLED:
+        start_time = time.perf_counter()
+        response = compress_response(response, request.headers.get('Accept-Encoding', ''),
+                                     min_size=RESPONSE_COMPRESSION_MIN_SIZE)
+        compress_time = time.perf_counter() - start_time
+    
+    record(raw_bytes, response.content_length, compress_time)
+    return response
+
+# 指纹化静态资源缓存一年（内容变化即文件名变化）；页面及未指纹化路径每次校验ETag
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+def serve_static_asset(asset, cache_control):
+    """返回内存中的静态资源（按Accept-Encoding选择预压缩版本，支持304）"""
+    body, encoding = asset.select(request.headers.get('Accept-Encoding', ''))
+    etag = f'{asset.etag}-{encoding}' if encoding else asset.etag
+    
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
 
 # 静态文件服务
 @app.route('/')
 def index():
-    frontend_path = os.path.join(os.path.dirname(__file__), '..', 'frontend')
-    return send_from_directory(frontend_path, 'index.html')
+    # 开发时源文件有改动则重新生成指纹及预压缩版本；生产环境页面请求不遍历文件系统
+    if app.debug or STATIC_ASSETS_RELOAD:
+        static_assets.refresh()
+    asset = static_assets.get('index.html')
+    if not asset:
+        return send_from_directory(FRONTEND_PATH, 'index.html')
+    return serve_static_asset(asset, REVALIDATE_CACHE_CONTROL)
 
 @app.route('/<path:filename>')
 def static_files(filename):
-    frontend_path = os.path.join(os.path.dirname(__file__), '..', 'frontend')
-    return send_from_directory(frontend_path, filename)
+    asset = static_assets.get(filename)
+    if asset:
+        return serve_static_asset(asset, IMMUTABLE_CACHE_CONTROL if asset.fingerprinted else REVALIDATE_CACHE_CONTROL)
+    return send_from_directory(FRONTEND_PATH, filename)
 
 # 在数据库初始化中添加新的字段
 def init_database():
     """初始化数据库"""
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect_db()
     cursor = conn.cursor()
     
+    # WAL模式（持久保存在数据库文件中）：慢速流式读取期间上传、导入等写入不被阻塞
+    journal_mode = cursor.execute('PRAGMA journal_mode=WAL').fetchone()[0]
+    if journal_mode.lower() != 'wal':
+        app.logger.warning(f"无法启用WAL模式（当前为{journal_mode}），长时间读取会阻塞写入")
+    
     # 创建数据表
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS metrics (
@@ -141,6 +551,25 @@ def init_database():
         )
     ''')
     
+    # 批量导入的唯一索引（upsert目标）及数据版本号；存在重复记录的表不建索引，不在此删除数据
+    metrics_ingestor.create_indexes(cursor)
+    data_version.create_table(cursor)
+    
+    # 排行榜覆盖索引：按月份/部门筛选后直接按指标有序读取，无需回表
+    for field in ('score', 'work_saturation', 'code_equivalent', 'defect_count'):
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_developer_rankings_{field}
+            ON developer_rankings (record_date, department, {field}, name)
+        ''')
+    
+    # 明细排序索引：按月份筛选后按任意可排序列有序读取（rowid作为并列时的次序）
+    for column in ('created_at', 'person_name', 'position_name', 'project_name', 'saturation',
+                   'code_equivalent', 'delivered_requirements', 'total_hours', 'ai_usage_days'):
+        cursor.execute(f'''
+            CREATE INDEX IF NOT EXISTS idx_project_details_{column}
+            ON project_details (record_date, {column})
+        ''')
+    
     # AI Analysis Module Tables
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS ai_analysis_files (
@@ -165,6 +594,115 @@ def init_database():
         )
     ''')
     
+    # 文档版本关联键（用于增量分析）
+    cursor.execute("PRAGMA table_info(ai_analysis_files)")
+    file_columns = [column[1] for column in cursor.fetchall()]
+    if 'document_key' not in file_columns:
+        cursor.execute('ALTER TABLE ai_analysis_files ADD COLUMN document_key TEXT')
+        cursor.execute('UPDATE ai_analysis_files SET document_key = filename')
+    
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ai_analysis_files_document_key
+        ON ai_analysis_files (document_key, upload_timestamp)
+    ''')
+    
+    # 分段分析缓存（增量分析）
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_analysis_sections (
+            file_id TEXT NOT NULL,
+            section_index INTEGER NOT NULL,
+            title TEXT,
+            section_hash TEXT NOT NULL,
+            prompt_hash TEXT NOT NULL,
+            analysis_text TEXT NOT NULL,
+            PRIMARY KEY (file_id, section_index),
+            FOREIGN KEY (file_id) REFERENCES ai_analysis_files (id)
+        )
+    ''')
+    
+    # 分页索引（按时间倒序的游标分页）
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ai_analysis_results_created
+        ON ai_analysis_results (created_at, id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ai_analysis_files_uploaded
+        ON ai_analysis_files (upload_timestamp, id)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_ai_analysis_files_type_uploaded
+        ON ai_analysis_files (file_type, upload_timestamp, id)
+    ''')
+    
+    # 行数计数表，由触发器增量维护，避免每次分页都执行 COUNT(*)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS ai_row_counts (
+            counter_key TEXT PRIMARY KEY,
+            row_count INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_results_count_insert
+        AFTER INSERT ON ai_analysis_results
+        BEGIN
+            INSERT INTO ai_row_counts (counter_key, row_count) VALUES ('ai_analysis_results', 1)
+            ON CONFLICT(counter_key) DO UPDATE SET row_count = row_count + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_results_count_delete
+        AFTER DELETE ON ai_analysis_results
+        BEGIN
+            UPDATE ai_row_counts SET row_count = row_count - 1 WHERE counter_key = 'ai_analysis_results';
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_files_count_insert
+        AFTER INSERT ON ai_analysis_files
+        BEGIN
+            INSERT INTO ai_row_counts (counter_key, row_count) VALUES ('ai_analysis_files', 1)
+            ON CONFLICT(counter_key) DO UPDATE SET row_count = row_count + 1;
+            INSERT INTO ai_row_counts (counter_key, row_count) VALUES ('ai_analysis_files:' || NEW.file_type, 1)
+            ON CONFLICT(counter_key) DO UPDATE SET row_count = row_count + 1;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS trg_ai_analysis_files_count_delete
+        AFTER DELETE ON ai_analysis_files
+        BEGIN
+            UPDATE ai_row_counts SET row_count = row_count - 1
+            WHERE counter_key IN ('ai_analysis_files', 'ai_analysis_files:' || OLD.file_type);
+        END
+    ''')
+    
+    # 启动时按实际数据校准计数
+    cursor.execute('DELETE FROM ai_row_counts')
+    cursor.execute('''
+        INSERT INTO ai_row_counts (counter_key, row_count)
+        SELECT 'ai_analysis_results', COUNT(*) FROM ai_analysis_results
+        UNION ALL
+        SELECT 'ai_analysis_files', COUNT(*) FROM ai_analysis_files
+        UNION ALL
+        SELECT 'ai_analysis_files:' || file_type, COUNT(*) FROM ai_analysis_files GROUP BY file_type
+    ''')
+    
+    # 分析统计表（在写入/删除事务中增量维护）
+    if stats_recorder.create_tables(cursor):
+        stats_recorder.rebuild(cursor)
+    
+    # 提示词去重表及压缩存储列
+    analysis_storage.create_tables(cursor)
+    
+    # 提示词模板库（带版本）及分析结果的模板版本、复用键列
+    prompt_templates.create_tables(cursor)
+    prompt_templates.seed_defaults(cursor)
+    
+    # 一次性迁移旧数据：提示词改为引用，较大的分析文本压缩存储（完成后记录，不再扫描）
+    analysis_storage.migrate(cursor)
+    
+    # 分析历史全文索引（FTS5外部内容表，经视图读取解压后的文本，由触发器同步，不保存副本）
+    search_index.create(cursor)
+    
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS ai_config (
             id INTEGER PRIMARY KEY,
@@ -254,19 +792,11 @@ def get_filter_conditions(department, date_filter):
     where_clause = ' AND '.join(conditions) if conditions else '1=1'
     return where_clause, params
 
-@app.route('/api/dashboard/metrics')
-def get_metrics():
-    """获取指标数据"""
-    department = request.args.get('department', '全部部门')
-    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
-    
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    where_clause, params = get_filter_conditions(department, date_filter)
-    
+def query_metrics_row(cursor, department, date_filter):
+    """查询指标数据（全部部门取平均值，单个部门取最新记录）"""
     if department == '全部部门':
         # 聚合所有部门的数据
+        where_clause, params = get_filter_conditions(None, date_filter)
         query = f'''
             SELECT 
                 AVG(requirement_throughput) as requirement_throughput,
@@ -280,11 +810,10 @@ def get_metrics():
                 AVG(work_saturation) as work_saturation,
                 AVG(code_equivalent) as code_equivalent
             FROM metrics 
-            WHERE {where_clause.replace('department = ?', '1=1') if 'department = ?' in where_clause else where_clause}
+            WHERE {where_clause}
         '''
-        if 'department = ?' in where_clause:
-            params = [p for p in params if p != department]
     else:
+        where_clause, params = get_filter_conditions(department, date_filter)
         query = f'''
             SELECT 
                 requirement_throughput,
@@ -299,16 +828,39 @@ def get_metrics():
                 code_equivalent
             FROM metrics 
             WHERE {where_clause}
-            ORDER BY created_at DESC
+            ORDER BY created_at DESC, id DESC
             LIMIT 1
         '''
     
     cursor.execute(query, params)
-    result = cursor.fetchone()
-    conn.close()
+    return cursor.fetchone()
+
+def get_dashboard_snapshot():
+    """获取内存列式快照（未启用或加载失败时返回None，走SQL查询）"""
+    if not dashboard_snapshots:
+        return None
+    return dashboard_snapshots.get()
+
+@app.route('/api/dashboard/metrics')
+def get_metrics():
+    """获取指标数据"""
+    department = request.args.get('department', '全部部门')
+    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
+    
+    snapshot = get_dashboard_snapshot()
+    if snapshot:
+        result = snapshot.metrics_row(department, date_filter)
+    else:
+        conn = connect_db()
+        result = query_metrics_row(conn.cursor(), department, date_filter)
+        conn.close()
     
+    return jsonify(format_metrics(result))
+
+def format_metrics(result):
+    """格式化指标数据"""
     if result:
-        return jsonify({
+        return {
             'requirementThroughput': int(result[0]) if result[0] else 0,
             'monthlyDeliveredRequirements': int(result[1]) if result[1] else 0,
             'monthlyNewRequirements': int(result[2]) if result[2] else 0,
@@ -319,9 +871,9 @@ def get_metrics():
             'incidentCount': int(result[7]) if result[7] else 0,
             'workSaturation': round(result[8], 1) if result[8] else 0,
             'codeEquivalent': int(result[9]) if result[9] else 0
-        })
+        }
     
-    return jsonify({
+    return {
         'requirementThroughput': 0,
         'monthlyDeliveredRequirements': 0,
         'monthlyNewRequirements': 0,
@@ -332,7 +884,7 @@ def get_metrics():
         'incidentCount': 0,
         'workSaturation': 0,
         'codeEquivalent': 0
-    })
+    }
 
 @app.route('/api/dashboard/trends')
 def get_trends():
@@ -354,27 +906,16 @@ def get_trends():
         }
     })
 
-# 更新排行榜API
-@app.route('/api/dashboard/rankings')
-def get_rankings():
-    department = request.args.get('department', '全部部门')
-    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
-    ranking_type = request.args.get('type', 'score')
-    sort_order = request.args.get('sort', 'desc')
-    
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
-    where_clause, params = get_filter_conditions(department, date_filter)
-    
-    # 根据排行榜类型选择字段（去掉综合评分）
-    field_mapping = {
-        'saturation': 'work_saturation',
-        'code': 'code_equivalent',
-        'defects': 'defect_count'
-    }
-    
-    field = field_mapping.get(ranking_type, 'score')
+# 排行榜类型对应的字段（去掉综合评分）
+RANKING_FIELDS = {
+    'saturation': 'work_saturation',
+    'code': 'code_equivalent',
+    'defects': 'defect_count'
+}
+
+def get_ranking_order(ranking_type, sort_order):
+    """获取排行榜字段及排序方向"""
+    field = RANKING_FIELDS.get(ranking_type, 'score')
     order_direction = 'ASC' if sort_order == 'asc' else 'DESC'
     
     # 对于缺陷数量，默认升序（缺陷越少越好）
@@ -383,87 +924,425 @@ def get_rankings():
     elif ranking_type == 'defects' and sort_order == 'asc':
         order_direction = 'DESC'
     
+    return field, order_direction
+
+def query_ranking_rows(cursor, department, date_filter, field, order_direction,
+                       limit=None, offset=0, after=None):
+    """
+    查询排行榜（全部部门按姓名聚合取平均值）
+    
+    limit/offset为分页参数，after为上一页最后一行的(数值, 姓名)，
+    用于游标分页；不传limit时返回完整排行榜。
+    """
+    descending = order_direction == 'DESC'
     if department == '全部部门':
         # 聚合所有部门的数据
+        where_clause, params = get_filter_conditions(None, date_filter)
+        having_clause, having_params = nullable_keyset_condition('avg_value', 'name', after, descending)
         query = f'''
             SELECT name, AVG({field}) as avg_value
             FROM developer_rankings 
-            WHERE {where_clause.replace('department = ?', '1=1') if 'department = ?' in where_clause else where_clause}
+            WHERE {where_clause}
             GROUP BY name
-            ORDER BY avg_value {order_direction}
+            HAVING {having_clause}
+            ORDER BY avg_value {order_direction}, name
         '''
-        if 'department = ?' in where_clause:
-            params = [p for p in params if p != department]
+        params = params + having_params
     else:
+        where_clause, params = get_filter_conditions(department, date_filter)
+        keyset_clause, keyset_params = nullable_keyset_condition(field, 'name', after, descending)
         query = f'''
             SELECT name, {field} as value
             FROM developer_rankings 
-            WHERE {where_clause}
-            ORDER BY value {order_direction}
+            WHERE {where_clause} AND {keyset_clause}
+            ORDER BY value {order_direction}, name
         '''
+        params = params + keyset_params
+    
+    # 只取需要的一页（Top-K）
+    if limit is not None:
+        query += ' LIMIT ? OFFSET ?'
+        params = params + [limit, offset]
+    elif offset:
+        query += ' LIMIT -1 OFFSET ?'
+        params = params + [offset]
     
     cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
+    return cursor.fetchall()
+
+def fetch_ranking_rows(cursor, department, date_filter, field, order_direction,
+                       limit=None, offset=0, after=None, version=None, snapshot=None):
+    """
+    排行榜统一查询入口（接口、首页聚合接口与PDF报告共用）
+    
+    结果按(指标, 排序方向, 筛选条件, 分页)缓存，并以数据版本号校验；
+    内存快照与数据版本一致时从快照计算，否则查询SQLite。
+    """
+    if version is None:
+        version = data_version.read(cursor)
+    
+    key = (field, order_direction, department, date_filter, limit, offset, after)
+    rows = ranking_cache.get(key, version)
+    if rows is not None:
+        return rows
+    
+    if snapshot is None:
+        snapshot = get_dashboard_snapshot()
+    if snapshot and snapshot.version == version:
+        rows = snapshot.ranking_rows(department, date_filter, field, order_direction == 'DESC',
+                                     limit=limit, offset=offset, after=after)
+    else:
+        rows = query_ranking_rows(cursor, department, date_filter, field, order_direction,
+                                  limit=limit, offset=offset, after=after)
+    
+    ranking_cache.put(key, version, rows)
+    return rows
+
+# 单页条数上限（排行榜、明细）
+MAX_PAGE_LIMIT = 1000
+
+def parse_page_limit(value):
+    """解析分页条数（未传时返回None，表示不分页）"""
+    if value in (None, ''):
+        return None
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit必须为整数')
+    
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        raise ValueError(f'limit必须在1到{MAX_PAGE_LIMIT}之间')
+    return limit
+
+def parse_ranking_page(args):
+    """
+    解析排行榜分页参数
+    
+    Returns:
+        (limit, offset, after)，after为游标解码出的(数值, 姓名)，offset为起始位置
+    
+    Raises:
+        ValueError: 参数不合法
+    """
+    limit = parse_page_limit(args.get('limit'))
+    try:
+        offset = int(args.get('offset') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('offset必须为整数')
+    
+    if offset < 0:
+        raise ValueError('offset不能为负数')
+    
+    after = None
+    cursor_value = args.get('cursor')
+    if cursor_value:
+        # 游标记录上一页最后一行的(数值, 姓名)及下一行的位置，优先于offset
+        position, offset = decode_cursor(cursor_value)
+        if not isinstance(position, list) or len(position) != 2 or not isinstance(offset, int):
+            raise ValueError('Invalid cursor')
+        after = tuple(position)
+    
+    return limit, offset, after
+
+def ranking_page_info(rows, limit, offset):
+    """
+    截取一页排行榜并生成分页信息（rows需多取一行用于判断是否还有下一页）
+    
+    Returns:
+        (当前页数据, 分页信息)
+    """
+    has_more = limit is not None and len(rows) > limit
+    rows = rows[:limit] if limit is not None else rows
+    
+    next_cursor = None
+    if has_more and rows:
+        last_name, last_value = rows[-1][0], rows[-1][1]
+        next_cursor = encode_cursor([last_value, last_name], offset + len(rows))
+    
+    return rows, {
+        'limit': limit,
+        'offset': offset,
+        'hasMore': has_more,
+        'nextCursor': next_cursor
+    }
+
+# 更新排行榜API
+@app.route('/api/dashboard/rankings')
+def get_rankings():
+    department = request.args.get('department', '全部部门')
+    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
+    ranking_type = request.args.get('type', 'score')
+    sort_order = request.args.get('sort', 'desc')
     
+    try:
+        limit, offset, after = parse_ranking_page(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    field, order_direction = get_ranking_order(ranking_type, sort_order)
+    
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN')
+        # 多取一行用于判断是否还有下一页；使用游标时offset只表示起始排名
+        results = fetch_ranking_rows(
+            cursor, department, date_filter, field, order_direction,
+            limit=limit + 1 if limit is not None else None,
+            offset=0 if after is not None else offset,
+            after=after
+        )
+        cursor.execute('COMMIT')
+    finally:
+        conn.close()
+    
+    results, pagination = ranking_page_info(results, limit, offset)
+    return jsonify({
+        'rankings': format_rankings(results, ranking_type, start_rank=offset + 1),
+        'pagination': pagination
+    })
+
+def format_rankings(results, ranking_type, start_rank=1):
+    """格式化排行榜数据"""
     rankings = []
-    for row in results:
+    for rank, row in enumerate(results, start_rank):
         value = row[1]
         if ranking_type == 'saturation':
-            value = round(float(value), 1)
+            value = round(float(value), 1) if value is not None else 0
         elif ranking_type in ['score', 'code', 'defects']:
             value = int(value) if value is not None else 0
-            
+        
         rankings.append({
+            'rank': rank,
             'name': row[0],
             'value': value
         })
     
-    return jsonify({'rankings': rankings})
+    return rankings
 
-@app.route('/api/dashboard/details')
-def get_details():
-    department = request.args.get('department', '全部部门')
-    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
-    
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    
+def query_details_rows(cursor, department, date_filter):
+    """查询项目详情（按创建时间倒序）"""
     where_clause, params = get_filter_conditions(department, date_filter)
     
     query = f'''
         SELECT person_name, position_name, project_name, saturation, code_equivalent, delivered_requirements, total_hours, ai_usage_days
         FROM project_details 
         WHERE {where_clause}
-        ORDER BY created_at DESC
+        ORDER BY created_at DESC, id DESC
     '''
     
     cursor.execute(query, params)
-    results = cursor.fetchall()
-    conn.close()
+    return cursor.fetchall()
+
+def format_rounded(value):
+    """保留一位小数（空值为0）"""
+    return round(value, 1) if value else 0
+
+def format_integer(value):
+    """取整（空值为0）"""
+    return int(value) if value else 0
+
+# 明细数据对外字段：API字段 -> (数据库列, 格式化函数)
+DETAIL_FIELDS = {
+    'personName': ('person_name', None),
+    'positionName': ('position_name', None),
+    'projectName': ('project_name', None),
+    'saturation': ('saturation', format_rounded),
+    'codeEquivalent': ('code_equivalent', format_integer),
+    'deliveredRequirements': ('delivered_requirements', format_integer),
+    'totalHours': ('total_hours', format_rounded),
+    'aiUsageDays': ('ai_usage_days', format_rounded)
+}
+
+# 可排序字段（白名单，均有索引）
+DETAIL_SORT_COLUMNS = {
+    'createdAt': 'created_at',
+    **{name: column for name, (column, _) in DETAIL_FIELDS.items()}
+}
+
+def parse_details_query(args):
+    """
+    解析明细查询参数
+    
+    Returns:
+        (fields, sort_column, descending, limit, after)，after为游标解码出的(排序值, id)
+    
+    Raises:
+        ValueError: 参数不合法
+    """
+    fields_param = args.get('fields')
+    if fields_param:
+        fields = [name.strip() for name in fields_param.split(',') if name.strip()]
+        unknown = [name for name in fields if name not in DETAIL_FIELDS]
+        if unknown or not fields:
+            raise ValueError(f"不支持的字段: {', '.join(unknown)}，可选: {', '.join(DETAIL_FIELDS)}")
+    else:
+        fields = list(DETAIL_FIELDS)
+    
+    sort = args.get('sort', 'createdAt')
+    if sort not in DETAIL_SORT_COLUMNS:
+        raise ValueError(f"不支持的排序字段: {sort}，可选: {', '.join(DETAIL_SORT_COLUMNS)}")
+    
+    order = args.get('order', 'desc').lower()
+    if order not in ('asc', 'desc'):
+        raise ValueError('order必须为asc或desc')
+    
+    limit = parse_page_limit(args.get('limit'))
+    after = decode_cursor(args['cursor']) if args.get('cursor') else None
+    
+    return fields, DETAIL_SORT_COLUMNS[sort], order == 'desc', limit, after
+
+def select_details(cursor, department, date_filter, fields, sort_column='created_at', descending=True,
+                   limit=None, after=None):
+    """
+    按字段投影、排序及游标查询项目详情
+    
+    每行为所选字段的值，末尾附加排序列和id（用于生成下一页游标）；
+    返回已执行的游标，由调用方逐行读取。
+    """
+    where_clause, params = get_filter_conditions(department, date_filter)
+    keyset_clause, keyset_params = nullable_keyset_condition(
+        sort_column, 'id', after, descending, tie_descending=descending
+    )
+    direction = 'DESC' if descending else 'ASC'
+    columns = [DETAIL_FIELDS[name][0] for name in fields] + [sort_column, 'id']
+    
+    query = f'''
+        SELECT {', '.join(columns)}
+        FROM project_details 
+        WHERE {where_clause} AND {keyset_clause}
+        ORDER BY {sort_column} {direction}, id {direction}
+    '''
+    params = params + keyset_params
+    if limit is not None:
+        query += ' LIMIT ?'
+        params.append(limit)
+    
+    cursor.execute(query, params)
+    return cursor
+
+# 不分页读取明细时每批的行数
+DETAILS_BATCH_SIZE = 1000
+
+def iter_detail_batches(conn, department, date_filter, fields, sort_column='created_at', descending=True,
+                        after=None, batch_size=DETAILS_BATCH_SIZE):
+    """
+    按游标分批读取全部明细
     
-    details = [{
-        'personName': row[0],
-        'positionName': row[1],
-        'projectName': row[2],
-        'saturation': round(row[3], 1) if row[3] else 0,
-        'codeEquivalent': int(row[4]) if row[4] else 0,
-        'deliveredRequirements': int(row[5]) if row[5] else 0,
-        'totalHours': round(row[6], 1) if row[6] else 0,
-        'aiUsageDays': round(row[7], 1) if row[7] else 0
-    } for row in results]
+    每批一次读完并结束查询，批与批之间不持有读锁，慢速客户端不会阻塞写入
+    """
+    while True:
+        rows = select_details(conn.cursor(), department, date_filter, fields, sort_column, descending,
+                              limit=batch_size, after=after).fetchall()
+        yield from rows
+        if len(rows) < batch_size:
+            return
+        after = (rows[-1][-2], rows[-1][-1])
+
+def read_details_page(rows, fields, limit):
+    """
+    逐行格式化一页明细（rows需多取一行用于判断是否还有下一页）
+    
+    Returns:
+        (格式化后的行迭代器, 返回分页信息的函数)；分页信息需在迭代结束后获取
+    """
+    state = {'count': 0, 'last': None, 'has_more': False}
+    
+    def items():
+        for row in rows:
+            if limit is not None and state['count'] >= limit:
+                state['has_more'] = True
+                break
+            state['count'] += 1
+            state['last'] = row
+            yield format_detail_row(row, fields)
+    
+    def pagination():
+        last = state['last']
+        return {
+            'limit': limit,
+            'hasMore': state['has_more'],
+            'nextCursor': encode_cursor(last[-2], last[-1]) if state['has_more'] and last else None
+        }
+    
+    return items(), pagination
+
+@app.route('/api/dashboard/details')
+def get_details():
+    """
+    获取项目详情
+    
+    支持 limit/cursor 分页、fields 字段投影、sort/order 排序；
+    响应以流式JSON输出，不在内存中拼装完整结果。
+    """
+    department = request.args.get('department', '全部部门')
+    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
+    
+    try:
+        fields, sort_column, descending, limit, after = parse_details_query(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # 默认查询（全部字段、按创建时间倒序、不分页）可使用内存快照
+    default_query = (fields == list(DETAIL_FIELDS) and sort_column == 'created_at' and descending
+                     and limit is None and after is None)
+    snapshot = get_dashboard_snapshot() if default_query else None
+    
+    if snapshot:
+        rows = snapshot.detail_rows(department, date_filter)
+        items = (format_detail_row(row, fields) for row in rows)
+        trailer = lambda: {'pagination': {'limit': None, 'hasMore': False, 'nextCursor': None}}
+        return Response(stream_json_list('details', items, trailer, dumps=app.json.dumps),
+                        mimetype='application/json')
+    
+    conn = connect_db()
+    try:
+        if limit is not None:
+            rows = select_details(conn.cursor(), department, date_filter, fields, sort_column, descending,
+                                  limit=limit + 1, after=after).fetchall()
+        else:
+            rows = iter_detail_batches(conn, department, date_filter, fields, sort_column, descending, after)
+    except Exception:
+        conn.close()
+        raise
+    
+    items, pagination = read_details_page(rows, fields, limit)
+    
+    def generate():
+        try:
+            yield from stream_json_list('details', items, lambda: {'pagination': pagination()},
+                                        dumps=app.json.dumps)
+        finally:
+            conn.close()
     
-    return jsonify({'details': details})
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+def format_detail_row(row, fields):
+    """按所选字段格式化一行项目详情"""
+    item = {}
+    for name, value in zip(fields, row):
+        formatter = DETAIL_FIELDS[name][1]
+        item[name] = formatter(value) if formatter else value
+    return item
+
+def format_details(results):
+    """格式化项目详情数据"""
+    fields = list(DETAIL_FIELDS)
+    return [format_detail_row(row, fields) for row in results]
 
 @app.route('/api/departments')
 def get_departments():
     """获取部门列表"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = connect_db()
+    departments = query_departments(conn.cursor())
+    conn.close()
     
+    return jsonify({'departments': departments})
+
+def query_departments(cursor):
+    """查询部门列表（"全部部门"在第一位）"""
     cursor.execute('SELECT DISTINCT department FROM metrics ORDER BY department')
     results = cursor.fetchall()
-    conn.close()
     
     departments = [row[0] for row in results]
     # 确保"全部部门"在第一位
@@ -471,17 +1350,21 @@ def get_departments():
         departments.remove('全部部门')
     departments.insert(0, '全部部门')
     
-    return jsonify({'departments': departments})
+    return departments
 
 @app.route('/api/date-range')
 def get_date_range():
     """获取可用的日期范围"""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
+    conn = connect_db()
+    dates = query_dates(conn.cursor())
+    conn.close()
     
+    return jsonify({'dates': dates})
+
+def query_dates(cursor):
+    """查询有数据的月份（倒序）"""
     cursor.execute('SELECT DISTINCT record_date FROM metrics ORDER BY record_date DESC')
     results = cursor.fetchall()
-    conn.close()
     
     dates = [row[0] for row in results if row[0]]
     
@@ -489,14 +1372,17 @@ def get_date_range():
     if not dates:
         dates = [datetime.now().strftime('%Y-%m')]
     
-    return jsonify({'dates': dates})
+    return dates
 
 @app.route('/api/ai-analysis')
 def get_ai_analysis():
     department = request.args.get('department', '全部部门')
     date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
     
-    # 根据筛选条件生成AI分析
+    return jsonify({'analysis': build_ai_analysis(department, date_filter)})
+
+def build_ai_analysis(department, date_filter):
+    """根据筛选条件生成AI分析"""
     dept_text = f"针对{department}" if department != '全部部门' else "针对全部门"
     date_text = f"{date_filter}月份"
     
@@ -510,33 +1396,23 @@ def get_ai_analysis():
         <li>当前筛选条件：部门={department}，时间={date_filter}</li>
     </ul>
     """
-    return jsonify({'analysis': analysis_result})
+    return analysis_result
 
 @app.route('/api/settings', methods=['GET', 'POST'])
 def handle_settings():
     if request.method == 'GET':
-        conn = sqlite3.connect(DATABASE_PATH)
-        cursor = conn.cursor()
-        cursor.execute('SELECT refresh_interval, email_notifications FROM settings ORDER BY updated_at DESC LIMIT 1')
-        result = cursor.fetchone()
+        conn = connect_db()
+        settings = query_settings(conn.cursor())
         conn.close()
         
-        if result:
-            return jsonify({
-                'refreshInterval': result[0],
-                'emailNotifications': bool(result[1])
-            })
-        return jsonify({
-            'refreshInterval': 10,
-            'emailNotifications': False
-        })
+        return jsonify(settings)
     
     elif request.method == 'POST':
         data = request.get_json()
         refresh_interval = data.get('refreshInterval', 10)
         email_notifications = data.get('emailNotifications', False)
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         cursor.execute('''
             INSERT INTO settings (refresh_interval, email_notifications, updated_at)
@@ -547,6 +1423,148 @@ def handle_settings():
         
         return jsonify({'success': True})
 
+def query_settings(cursor):
+    """查询系统设置"""
+    cursor.execute('SELECT refresh_interval, email_notifications FROM settings ORDER BY updated_at DESC LIMIT 1')
+    result = cursor.fetchone()
+    
+    if result:
+        return {
+            'refreshInterval': result[0],
+            'emailNotifications': bool(result[1])
+        }
+    return {
+        'refreshInterval': 10,
+        'emailNotifications': False
+    }
+
+# 首页加载默认的排行榜排序（与前端一致）
+DEFAULT_RANKING_SORTS = {
+    'saturation': 'desc',
+    'code': 'desc',
+    'defects': 'asc'
+}
+
+@app.route('/api/dashboard/bootstrap')
+def get_dashboard_bootstrap():
+    """首页数据聚合接口：一个连接、一个读事务内完成所有首屏查询，保证数据一致"""
+    department = request.args.get('department', '全部部门')
+    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
+    ranking_sorts = {
+        ranking_type: request.args.get(f'{ranking_type}_sort', default_sort)
+        for ranking_type, default_sort in DEFAULT_RANKING_SORTS.items()
+    }
+    
+    # 排行榜只返回前ranking_limit名、明细只返回前details_limit行（不传则返回全部）
+    try:
+        ranking_limit = parse_page_limit(request.args.get('ranking_limit'))
+        details_limit = parse_page_limit(request.args.get('details_limit'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    conn = connect_db()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('BEGIN')
+        version = data_version.read(cursor)
+        
+        # 内存快照与事务读到的数据版本一致时才使用，否则在事务内查询
+        snapshot = get_dashboard_snapshot()
+        if snapshot and snapshot.version != version:
+            snapshot = None
+        
+        if snapshot:
+            metrics_row = snapshot.metrics_row(department, date_filter)
+        else:
+            metrics_row = query_metrics_row(cursor, department, date_filter)
+        
+        if details_limit is not None:
+            fields = list(DETAIL_FIELDS)
+            rows = select_details(cursor, department, date_filter, fields,
+                                  limit=details_limit + 1)
+            detail_items, details_pagination = read_details_page(rows, fields, details_limit)
+            details = list(detail_items)
+            details_pagination = details_pagination()
+        else:
+            detail_rows = (snapshot.detail_rows(department, date_filter) if snapshot
+                           else query_details_rows(cursor, department, date_filter))
+            details = format_details(detail_rows)
+            details_pagination = {'limit': None, 'hasMore': False, 'nextCursor': None}
+        
+        rankings = {}
+        for ranking_type, sort_order in ranking_sorts.items():
+            field, order_direction = get_ranking_order(ranking_type, sort_order)
+            rows = fetch_ranking_rows(cursor, department, date_filter, field, order_direction,
+                                      limit=ranking_limit, version=version, snapshot=snapshot)
+            rankings[ranking_type] = format_rankings(rows, ranking_type)
+        
+        payload = {
+            'departments': query_departments(cursor),
+            'dates': query_dates(cursor),
+            'metrics': format_metrics(metrics_row),
+            'rankings': rankings,
+            'details': details,
+            'detailsPagination': details_pagination,
+            'analysis': build_ai_analysis(department, date_filter),
+            'settings': query_settings(cursor),
+            'dataVersion': version
+        }
+        cursor.execute('COMMIT')
+    finally:
+        conn.close()
+    
+    return jsonify(payload)
+
+@app.route('/api/dashboard/ingest', methods=['POST'])
+def ingest_dashboard_data():
+    """批量导入看板数据（CSV/JSONL，流式校验，分批事务写入）"""
+    table = request.args.get('table', '')
+    dry_run = request.args.get('dry_run', '').lower() in ('1', 'true', 'yes')
+    
+    try:
+        metrics_ingestor.get_schema(table)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # 支持multipart文件上传或直接以请求体流式发送
+    upload = request.files.get('file')
+    if upload:
+        stream = upload.stream
+        filename = upload.filename
+    else:
+        stream = request.stream
+        filename = None
+    
+    data_format = detect_format(request.args.get('format'), filename, request.mimetype)
+    if not data_format:
+        return jsonify({'error': '无法识别数据格式，请指定format=csv或format=jsonl'}), 400
+    
+    conn = connect_db()
+    try:
+        result = metrics_ingestor.ingest(
+            conn,
+            table,
+            metrics_ingestor.iter_records(stream, data_format),
+            dry_run=dry_run
+        )
+    except DuplicateKeysError as e:
+        return jsonify({'error': f'数据表存在重复记录，需先执行去重迁移: {str(e)}'}), 409
+    except InputEncodingError as e:
+        # 此前的批次已提交并通知，返回已写入的部分结果及出错行号，便于从该行续传
+        return jsonify({
+            'success': False,
+            'error': f'第{e.line}行不是UTF-8编码，导入已中止（此前已写入{e.result.rows_written}行）',
+            'line': e.line,
+            **e.result.to_dict()
+        }), 400
+    except Exception as e:
+        print(f"批量导入失败: {str(e)}")
+        return jsonify({'error': f'批量导入失败: {str(e)}'}), 500
+    finally:
+        conn.close()
+    
+    return jsonify({'success': True, **result.to_dict()})
+
 def create_chart_image(chart_type, data, title, width=400, height=300):
     """创建图表图片"""
     plt.figure(figsize=(width/100, height/100))
@@ -628,7 +1646,7 @@ def generate_pdf_report(department, date_filter):
     story.append(Paragraph("1. 数据指标", heading_style))
     
     # 获取指标数据
-    conn = sqlite3.connect(DATABASE_PATH)
+    conn = connect_db()
     cursor = conn.cursor()
     where_clause, params = get_filter_conditions(department, date_filter)
     
@@ -720,28 +1738,8 @@ def generate_pdf_report(department, date_filter):
         
         order_direction = 'ASC' if ranking_type == 'defects' else 'DESC'
         
-        if department == '全部部门':
-            query = f'''
-                SELECT name, AVG({field}) as avg_value
-                FROM developer_rankings 
-                WHERE {where_clause.replace('department = ?', '1=1') if 'department = ?' in where_clause else where_clause}
-                GROUP BY name
-                ORDER BY avg_value {order_direction}
-                LIMIT 10
-            '''
-            query_params = [p for p in params if p != department] if 'department = ?' in where_clause else params
-        else:
-            query = f'''
-                SELECT name, {field} as value
-                FROM developer_rankings 
-                WHERE {where_clause}
-                ORDER BY value {order_direction}
-                LIMIT 10
-            '''
-            query_params = params
-        
-        cursor.execute(query, query_params)
-        ranking_results = cursor.fetchall()
+        # 与排行榜接口共用查询路径（缓存/内存快照/Top-K SQL）
+        ranking_results = fetch_ranking_rows(cursor, department, date_filter, field, order_direction, limit=10)
         
         if ranking_results:
             ranking_data = [['排名', '姓名', '数值']]
@@ -825,6 +1823,8 @@ def generate_pdf_report(department, date_filter):
     return buffer
 
 @app.route('/api/download/report')
+@memory_guarded(report_memory_estimate)
+@profiled
 def download_report():
     """下载PDF报告"""
     try:
@@ -844,17 +1844,244 @@ def download_report():
             download_name=filename,
             mimetype='application/pdf'
         )
-        
+    
     except Exception as e:
         print(f"生成PDF报告失败: {str(e)}")
         return jsonify({'error': '生成PDF报告失败'}), 500
 
+# 可导出的看板原始数据：表名、排序及(列, 表头)
+EXPORT_TABLES = {
+    'details': {
+        'title': '明细数据',
+        'table': 'project_details',
+        'order_by': 'created_at DESC, id DESC',
+        'columns': [
+            ('department', '部门'), ('record_date', '月份'), ('person_name', '人员名称'),
+            ('position_name', '职位名称'), ('project_name', '项目名称'), ('saturation', '饱和度(%)'),
+            ('code_equivalent', '代码当量'), ('delivered_requirements', '交付需求数'),
+            ('total_hours', '总工时(h)'), ('ai_usage_days', 'AI使用人天')
+        ]
+    },
+    'rankings': {
+        'title': '排行榜数据',
+        'table': 'developer_rankings',
+        'order_by': 'department, name, id',
+        'columns': [
+            ('department', '部门'), ('record_date', '月份'), ('name', '姓名'), ('score', '综合评分'),
+            ('work_saturation', '工作饱和度(%)'), ('code_equivalent', '代码当量'), ('defect_count', '缺陷数量')
+        ]
+    }
+}
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+def attachment_headers(filename, fallback):
+    """附件下载响应头（中文文件名使用RFC 5987编码）"""
+    return {'Content-Disposition': f"attachment; filename={fallback}; filename*=UTF-8''{quote(filename)}"}
+
+@app.route('/api/dashboard/export/<table>')
+def export_dashboard_table(table):
+    """
+    导出看板原始数据（details或rankings）
+    
+    format=csv时从SQLite游标分块读取并以分块传输流式输出，客户端接受压缩时
+    由响应压缩边发送边压缩；format=xlsx时使用openpyxl只写模式逐行写入临时文件后流式输出。
+    内存占用与数据行数无关。
+    """
+    spec = EXPORT_TABLES.get(table)
+    if not spec:
+        return jsonify({'error': f"不支持的导出数据: {table}，可选: {', '.join(EXPORT_TABLES)}"}), 400
+    
+    format_type = request.args.get('format', 'csv')
+    if format_type not in EXPORT_MIMETYPES:
+        return jsonify({'error': '不支持的导出格式，可选: csv, xlsx'}), 400
+    
+    department = request.args.get('department', '全部部门')
+    date_filter = request.args.get('date', datetime.now().strftime('%Y-%m'))
+    where_clause, params = get_filter_conditions(department, date_filter)
+    columns = [column for column, _ in spec['columns']]
+    header = [title for _, title in spec['columns']]
+    
+    conn = connect_db()
+    try:
+        cursor = conn.cursor()
+        # 单条查询即一致的读快照；WAL模式下读取期间不阻塞写入
+        cursor.execute(f'''
+            SELECT {', '.join(columns)}
+            FROM {spec['table']}
+            WHERE {where_clause}
+            ORDER BY {spec['order_by']}
+        ''', params)
+        rows = iter_rows(cursor)
+        
+        if format_type == 'xlsx':
+            output = write_xlsx(header, rows, spec['title'])
+            conn.close()
+    except Exception:
+        conn.close()
+        raise
+    
+    filename = f"{spec['title']}_{department}_{date_filter or '全部月份'}.{format_type}"
+    headers = attachment_headers(filename, f"{table}_{date_filter or 'all'}.{format_type}")
+    
+    if format_type == 'xlsx':
+        return Response(iter_file(output), mimetype=EXPORT_MIMETYPES['xlsx'], headers=headers)
+    
+    def generate():
+        try:
+            yield from iter_csv(header, rows)
+        finally:
+            conn.close()
+    
+    # 由响应压缩边发送边压缩
+    return Response(stream_with_context(generate()), mimetype=EXPORT_MIMETYPES['csv'], headers=headers)
+
+@app.route('/api/response-stats', methods=['GET', 'DELETE'])
+def handle_response_stats():
+    """各接口的响应字节数（压缩前/传输）、JSON序列化及压缩耗时；DELETE清零"""
+    if request.method == 'DELETE':
+        response_stats.reset()
+        return jsonify({'success': True})
+    
+    return jsonify({
+        'compression': {
+            'enabled': RESPONSE_COMPRESSION_ENABLED,
+            'minSize': RESPONSE_COMPRESSION_MIN_SIZE
+        },
+        'endpoints': response_stats.snapshot()
+    })
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Prometheus文本格式的请求及分析流水线指标（仅限本机访问）"""
+    if request.remote_addr not in METRICS_LOCAL_ADDRESSES:
+        return jsonify({'error': '仅允许本机访问'}), 403
+    rss = current_rss()
+    if rss is not None:
+        process_resident_memory.set(rss)
+    for pool, stats in worker_pools.get_stats().items():
+        worker_pool_in_use.set(stats['in_use'], pool=pool)
+        worker_pool_waiting.set(stats['waiting'], pool=pool)
+    return Response(metrics_registry.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.route('/api/diagnostics/profile')
+@require_diagnostics_token
+def sample_process_profile():
+    """
+    对整个进程进行采样分析：在 seconds 秒内按 interval 间隔采集所有线程的调用栈，
+    返回折叠栈格式文件（可用 flamegraph.pl / speedscope 生成火焰图）
+    """
+    try:
+        seconds = float(request.args.get('seconds', '10'))
+        interval = float(request.args.get('interval', '0.005'))
+    except ValueError:
+        return jsonify({'error': 'seconds 和 interval 必须为数字'}), 400
+    if not 0 < seconds <= MAX_SAMPLING_SECONDS or not 0.001 <= interval <= 1:
+        return jsonify({'error': f'seconds 取值范围为 (0, {MAX_SAMPLING_SECONDS}]，interval 为 [0.001, 1]'}), 400
+    include_idle = request.args.get('idle', '').lower() in ('1', 'true', 'yes', 'on')
+    
+    # 同一时间只运行一个采样会话
+    if not sampling_lock.acquire(blocking=False):
+        return jsonify({'error': '已有采样分析正在进行'}), 409
+    try:
+        profiler = SamplingProfiler(interval=interval, include_idle=include_idle).run(seconds)
+    finally:
+        sampling_lock.release()
+    
+    filename = f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.folded"
+    response = Response(profiler.collapsed(), content_type='text/plain; charset=utf-8')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['X-Profile-Samples'] = str(profiler.samples)
+    response.headers['X-Profile-Duration'] = f'{profiler.duration:.3f}'
+    return response
+
+@app.route('/api/diagnostics/profiles')
+@require_diagnostics_token
+def list_request_profiles():
+    """已记录的单请求cProfile结果（新的在前）"""
+    return jsonify({'profiles': call_profiler.list_profiles()})
+
+@app.route('/api/diagnostics/profiles/<profile_id>')
+@require_diagnostics_token
+def get_request_profile(profile_id):
+    """下载单请求cProfile结果：format=prof 为原始文件（snakeviz等工具），默认为文本报告"""
+    try:
+        path = call_profiler.path(profile_id)
+    except ValueError:
+        return jsonify({'error': '无效的分析ID'}), 400
+    if not os.path.exists(path):
+        return jsonify({'error': '分析结果不存在'}), 404
+    
+    if request.args.get('format') == 'prof':
+        return send_file(os.path.abspath(path), as_attachment=True, download_name=f'{profile_id}.prof',
+                         mimetype='application/octet-stream')
+    sort = request.args.get('sort', 'cumulative')
+    if sort not in PROFILE_SORT_KEYS:
+        return jsonify({'error': f"sort 仅支持 {', '.join(PROFILE_SORT_KEYS)}"}), 400
+    try:
+        limit = parse_page_limit(request.args.get('limit', '60'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return Response(call_profiler.report(profile_id, sort, limit), content_type='text/plain; charset=utf-8')
+
+@app.route('/api/diagnostics/memory')
+@require_diagnostics_token
+def get_memory_diagnostics():
+    """
+    进程内存、内存预算及各接口内存峰值；tracemalloc模式下附带分配量最大的代码位置
+    （since_baseline=1 时为自上次标记基线以来的增长，用于定位泄漏）
+    """
+    group_by = request.args.get('group_by', 'lineno')
+    if group_by not in ('lineno', 'filename', 'traceback'):
+        return jsonify({'error': 'group_by 仅支持 lineno、filename、traceback'}), 400
+    try:
+        top = parse_page_limit(request.args.get('top', '20'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    since_baseline = request.args.get('since_baseline', '').lower() in ('1', 'true', 'yes', 'on')
+    
+    return jsonify({
+        'mode': memory_tracker.mode,
+        'rssBytes': current_rss(),
+        'peakRssBytes': peak_rss(),
+        'budget': memory_budget.get_stats(),
+        'endpoints': memory_tracker.snapshot(),
+        'topAllocations': memory_tracker.top_allocations(top, group_by, since_baseline)
+    })
+
+@app.route('/api/diagnostics/memory/baseline', methods=['POST'])
+@require_diagnostics_token
+def mark_memory_baseline():
+    """标记当前分配为基线（仅tracemalloc模式）"""
+    if not memory_tracker.mark_baseline():
+        return jsonify({'error': '仅在 MEMORY_TRACKING=tracemalloc 时可用'}), 409
+    return jsonify({'success': True})
+
+def record_analysis_failure(stage):
+    """记录一次分析失败：按阶段的失败指标及统计表中的失败次数（用于统计成功率）"""
+    analysis_failures.inc(stage=stage)
+    conn = connect_db()
+    try:
+        stats_recorder.record_failure(conn.cursor())
+        conn.commit()
+    finally:
+        conn.close()
+
 @app.route('/api/ai-analysis/upload', methods=['POST'])
+@memory_guarded(upload_memory_estimate)
+@profiled
 def upload_and_analyze():
     """上传文件并进行AI分析"""
-    if not siliconflow_client:
+    # 整个请求使用同一个客户端（配置更新时全局客户端可能被替换）
+    client = siliconflow_client
+    if not client:
         return jsonify({'error': 'AI分析服务未初始化'}), 500
     
+    # 当前阶段（用于按阶段统计耗时及失败次数）
+    stage = 'validate'
     try:
         # 检查是否有文件上传
         if 'file' not in request.files:
@@ -866,60 +2093,216 @@ def upload_and_analyze():
         
         # 获取自定义提示词（可选）
         custom_prompt = request.form.get('custom_prompt', '').strip()
-        if not custom_prompt:
+        
+        # 提示词模板（可选）：使用模板当前版本渲染提示词及模板自带的模型参数
+        template_id = request.form.get('template_id', '').strip()
+        template = None
+        template_variables = {}
+        if template_id:
+            if custom_prompt:
+                return jsonify({'error': 'custom_prompt 与 template_id 不能同时使用'}), 400
+            try:
+                template_variables = app.json.loads(request.form.get('variables') or '{}')
+            except ValueError:
+                template_variables = None
+            if not isinstance(template_variables, dict):
+                return jsonify({'error': 'variables 必须是JSON对象'}), 400
+            conn = connect_db()
+            try:
+                template = prompt_templates.get(conn.cursor(), template_id)
+            finally:
+                conn.close()
+            if not template:
+                return jsonify({'error': f'提示词模板不存在: {template_id}'}), 404
+        elif not custom_prompt:
             custom_prompt = config_manager.get_effective_prompt()
         
+        # 增量分析：按文档键（默认为文件名）关联上一版本，仅重新分析变更的章节
+        incremental = request.form.get('incremental', '').lower() in ('1', 'true', 'yes', 'on')
+        document_key = request.form.get('document_key', '').strip() or file.filename
+        
+        # 结构化输出：模型按JSON Schema返回摘要、要点、风险及建议，校验后按JSON列保存
+        structured = request.form.get('structured', '').lower() in ('1', 'true', 'yes', 'on')
+        if structured and incremental:
+            return jsonify({'error': '结构化输出暂不支持增量分析'}), 400
+        
+        # 模板分析默认复用同一文档、同一模板版本的已有结果（reuse=0 强制重新分析）
+        reuse = request.form.get('reuse', '1').lower() not in ('0', 'false', 'no', 'off')
+        
         # 1. 验证文件
-        validation_result = file_handler.validate_file(file)
+        with analysis_stage(stage):
+            validation_result = file_handler.validate_file(file)
         if not validation_result.is_valid:
+            analysis_failures.inc(stage=stage)
             return jsonify({'error': validation_result.error_message}), 400
         
+        analysis_options = {}
+        result_key = None
+        if template:
+            try:
+                custom_prompt = template.render({
+                    'filename': file.filename,
+                    'file_type': validation_result.file_type,
+                    'document_key': document_key,
+                    **template_variables
+                })
+            except ValueError as e:
+                return jsonify({'error': f'提示词模板渲染失败: {e}'}), 400
+            analysis_options = template.options
+            
+            # 复用键：文件内容摘要 + 模板版本 + 渲染后的提示词 + 模型 + 分析方式
+            result_key = prompt_templates.result_key(
+                file_handler.compute_digest(file), template, custom_prompt, client.model,
+                'incremental' if incremental else 'structured' if structured else 'full'
+            )
+            if reuse:
+                conn = connect_db()
+                try:
+                    stored = prompt_templates.find_result(conn.cursor(), result_key)
+                finally:
+                    conn.close()
+                if stored:
+                    # 命中已有结果：不保存文件、不调用模型
+                    analysis_results_reused.inc(template=template.template_id)
+                    analysis_result = AnalysisResult(
+                        success=True,
+                        content=analysis_storage.decode_text(stored['analysis_text'], stored['text_encoding']),
+                        processing_time=stored['processing_time'],
+                        model_used=client.model,
+                        structured=structured_output.loads(stored['analysis_json']),
+                        metadata={
+                            'template_id': template.template_id,
+                            'template_version': template.version,
+                            'reused_from': stored['id'],
+                            'reused_created_at': stored['created_at']
+                        }
+                    )
+                    report = report_generator.generate_report(analysis_result, {
+                        'filename': file.filename,
+                        'file_type': validation_result.file_type,
+                        'file_size': validation_result.file_size,
+                        'upload_time': datetime.now().isoformat(),
+                        'prompt_used': custom_prompt
+                    }, stored['id'])
+                    return jsonify({
+                        'success': True,
+                        'file_id': stored['file_id'],
+                        'analysis_id': stored['id'],
+                        'status': 'completed',
+                        'reused': True,
+                        'report': report_generator.format_json_report(report)
+                    })
+        
         # 2. 保存临时文件
-        file_id, temp_file_path = file_handler.save_temp_file(file)
+        stage = 'save'
+        with analysis_stage(stage):
+            file_id, temp_file_path = file_handler.save_temp_file(file)
         
         try:
             # 3. 提取文件内容
-            extraction_result = content_extractor.extract_content(
-                temp_file_path, 
-                validation_result.file_type
-            )
+            stage = 'extract'
+            with analysis_stage(stage):
+                extraction_result = content_extractor.extract_content(
+                    temp_file_path, 
+                    validation_result.file_type
+                )
             
             if not extraction_result.success:
+                record_analysis_failure(stage)
                 return jsonify({'error': f'文件内容提取失败: {extraction_result.error_message}'}), 422
             
             # 4. AI分析
-            analysis_result = siliconflow_client.analyze_content(
-                extraction_result.content, 
-                custom_prompt
-            )
+            stage = 'ai_call'
+            incremental_result = None
+            with analysis_stage(stage):
+                if incremental:
+                    conn = connect_db()
+                    try:
+                        incremental_result = incremental_analyzer.analyze(
+                            conn.cursor(),
+                            client,
+                            extraction_result.content,
+                            custom_prompt,
+                            document_key,
+                            analysis_options
+                        )
+                    finally:
+                        conn.close()
+                    analysis_result = incremental_result.analysis_result
+                else:
+                    analysis_result = client.analyze_content(
+                        extraction_result.content, 
+                        custom_prompt,
+                        structured=structured,
+                        **analysis_options
+                    )
+            
+            # 提取的全文已不再需要，提前释放（后续只用到提取元数据）
+            extraction_result.content = None
             
             if not analysis_result.success:
+                record_analysis_failure(stage)
                 return jsonify({'error': f'AI分析失败: {analysis_result.error_message}'}), 500
             
             # 5. 生成分析ID并保存到数据库
-            analysis_id = str(uuid.uuid4())
-            
-            # 保存文件信息到数据库
-            conn = sqlite3.connect(DATABASE_PATH)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO ai_analysis_files (id, filename, file_type, file_size, upload_timestamp, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (file_id, file.filename, validation_result.file_type, 
-                  validation_result.file_size, datetime.now(), 'completed'))
-            
-            # 保存分析结果到数据库
-            cursor.execute('''
-                INSERT INTO ai_analysis_results (id, file_id, analysis_text, prompt_used, processing_time, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (analysis_id, file_id, analysis_result.content, custom_prompt,
-                  analysis_result.processing_time, datetime.now()))
-            
-            conn.commit()
-            conn.close()
+            stage = 'db_write'
+            with analysis_stage(stage):
+                analysis_id = str(uuid.uuid4())
+                created_at = datetime.now()
+                
+                # 保存文件信息到数据库
+                conn = connect_db()
+                try:
+                    cursor = conn.cursor()
+                    
+                    cursor.execute('''
+                        INSERT INTO ai_analysis_files (id, filename, file_type, file_size, upload_timestamp, status, document_key)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (file_id, file.filename, validation_result.file_type, 
+                          validation_result.file_size, datetime.now(), 'completed', document_key))
+                    
+                    # 保存分析结果到数据库（提示词按ID引用，分析文本按需压缩；
+                    # 摘要单独保存，结构化结果保存为JSON，列表、筛选及导出无需再解析全文）
+                    stored_text, text_encoding = analysis_storage.encode_text(analysis_result.content)
+                    prompt_id = analysis_storage.intern_prompt(cursor, custom_prompt)
+                    cursor.execute('''
+                        INSERT INTO ai_analysis_results (id, file_id, analysis_text, text_encoding, prompt_id,
+                                                         processing_time, created_at,
+                                                         template_id, template_version, result_key,
+                                                         summary, analysis_json)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    ''', (analysis_id, file_id, stored_text, text_encoding, prompt_id,
+                          analysis_result.processing_time, created_at,
+                          template.template_id if template else None,
+                          template.version if template else None, result_key,
+                          report_generator.summarize(analysis_result.content, analysis_result.structured),
+                          structured_output.dumps(analysis_result.structured)))
+                    
+                    # 更新统计信息（与写入在同一事务中）
+                    stats_recorder.record_analysis(cursor, created_at, analysis_result.processing_time)
+                    
+                    # 保存分段分析结果，供后续版本复用
+                    if incremental_result:
+                        incremental_analyzer.save_sections(cursor, file_id, incremental_result)
+                    
+                    with span('sqlite.commit'):
+                        conn.commit()
+                    
+                    # 全文索引增量合并（小步执行，避免阻塞写入）
+                    try:
+                        search_index.merge(cursor)
+                        conn.commit()
+                    except sqlite3.Error as e:
+                        app.logger.warning(f"全文索引合并失败: {str(e)}")
+                except Exception:
+                    # 写入失败时回滚，释放写锁后再记录失败次数（否则记录会等待本连接的锁直至超时）
+                    conn.rollback()
+                    raise
+                finally:
+                    conn.close()
             
             # 6. 生成报告
+            stage = 'report'
             file_metadata = {
                 'filename': file.filename,
                 'file_type': validation_result.file_type,
@@ -928,12 +2311,19 @@ def upload_and_analyze():
                 'prompt_used': custom_prompt,
                 'extraction_metadata': extraction_result.metadata
             }
+            if template:
+                analysis_result.metadata = {
+                    **(analysis_result.metadata or {}),
+                    'template_id': template.template_id,
+                    'template_version': template.version
+                }
             
-            report = report_generator.generate_report(
-                analysis_result, 
-                file_metadata, 
-                analysis_id
-            )
+            with analysis_stage(stage):
+                report = report_generator.generate_report(
+                    analysis_result, 
+                    file_metadata, 
+                    analysis_id
+                )
             
             # 7. 清理临时文件
             file_handler.cleanup_temp_file(temp_file_path)
@@ -944,15 +2334,20 @@ def upload_and_analyze():
                 'file_id': file_id,
                 'analysis_id': analysis_id,
                 'status': 'completed',
+                'reused': False,
                 'report': report_generator.format_json_report(report)
             })
-            
+        
         finally:
             # 确保清理临时文件
             file_handler.cleanup_temp_file(temp_file_path)
-            
+    
     except Exception as e:
         print(f"AI分析失败: {str(e)}")
+        try:
+            record_analysis_failure(stage)
+        except sqlite3.Error as record_error:
+            app.logger.error(f"记录分析失败次数失败: {record_error}")
         return jsonify({'error': f'AI分析失败: {str(e)}'}), 500
 
 
@@ -960,15 +2355,18 @@ def upload_and_analyze():
 def get_analysis_result(analysis_id):
     """获取分析结果"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         # 获取分析结果和文件信息
         cursor.execute('''
-            SELECT r.id, r.file_id, r.analysis_text, r.prompt_used, r.processing_time, r.created_at,
-                   f.filename, f.file_type, f.file_size, f.upload_timestamp
+            SELECT r.id, r.file_id, r.analysis_text, COALESCE(p.prompt_text, r.prompt_used),
+                   r.processing_time, r.created_at,
+                   f.filename, f.file_type, f.file_size, f.upload_timestamp, r.text_encoding,
+                   r.template_id, r.template_version, r.summary, r.analysis_json
             FROM ai_analysis_results r
             JOIN ai_analysis_files f ON r.file_id = f.id
+            LEFT JOIN ai_prompts p ON r.prompt_id = p.id
             WHERE r.id = ?
         ''', (analysis_id,))
         
@@ -988,16 +2386,20 @@ def get_analysis_result(analysis_id):
                 'upload_time': result[9]
             },
             'analysis': {
-                'content': result[2],
+                'content': analysis_storage.decode_text(result[2], result[10]),
                 'prompt_used': result[3],
                 'processing_time': result[4],
-                'created_at': result[5]
+                'created_at': result[5],
+                'template_id': result[11],
+                'template_version': result[12],
+                'summary': result[13],
+                'structured': structured_output.loads(result[14])
             },
             'status': 'completed'
         }
         
         return jsonify(response_data)
-        
+    
     except Exception as e:
         print(f"获取分析结果失败: {str(e)}")
         return jsonify({'error': f'获取分析结果失败: {str(e)}'}), 500
@@ -1005,32 +2407,60 @@ def get_analysis_result(analysis_id):
 
 @app.route('/api/ai-analysis/history')
 def get_analysis_history():
-    """获取分析历史"""
+    """获取分析历史（支持页码分页和游标分页）"""
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 10))
-        offset = (page - 1) * per_page
+        page_cursor = request.args.get('cursor', '')
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        # 按结构化结果中的风险等级筛选（直接查询JSON列，不解析分析全文）
+        risk_severity = request.args.get('risk_severity', '').strip()
+        if risk_severity and risk_severity not in structured_output.RISK_SEVERITIES:
+            return jsonify({'error': f"risk_severity 取值应为: {'、'.join(structured_output.RISK_SEVERITIES)}"}), 400
+        
+        try:
+            keyset_clause, keyset_params = keyset_condition('r.created_at', 'r.id', page_cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        filter_clause = '1 = 1'
+        filter_params = []
+        if risk_severity:
+            filter_clause = '''EXISTS (
+                SELECT 1 FROM json_each(r.analysis_json, '$.risks') risk
+                WHERE json_extract(risk.value, '$.severity') = ?
+            )'''
+            filter_params = [risk_severity]
+        
+        # 游标分页不使用OFFSET，直接从索引位置继续读取
+        offset = 0 if page_cursor else (page - 1) * per_page
+        
+        conn = connect_db()
         cursor = conn.cursor()
         
-        # 获取总数
-        cursor.execute('SELECT COUNT(*) FROM ai_analysis_results')
-        total = cursor.fetchone()[0]
+        # 获取总数（增量维护的计数；筛选时按条件统计）
+        total = None if risk_severity else get_row_count(cursor, 'ai_analysis_results')
+        if total is None:
+            cursor.execute(f'SELECT COUNT(*) FROM ai_analysis_results r WHERE {filter_clause}', filter_params)
+            total = cursor.fetchone()[0]
         
-        # 获取分页数据
-        cursor.execute('''
+        # 获取分页数据（多取一行用于判断是否还有下一页）
+        cursor.execute(f'''
             SELECT r.id, r.file_id, r.processing_time, r.created_at,
-                   f.filename, f.file_type, f.file_size
+                   f.filename, f.file_type, f.file_size, r.summary, r.analysis_json IS NOT NULL
             FROM ai_analysis_results r
             JOIN ai_analysis_files f ON r.file_id = f.id
-            ORDER BY r.created_at DESC
+            WHERE {keyset_clause} AND {filter_clause}
+            ORDER BY r.created_at DESC, r.id DESC
             LIMIT ? OFFSET ?
-        ''', (per_page, offset))
+        ''', keyset_params + filter_params + [per_page + 1, offset])
         
         results = cursor.fetchall()
         conn.close()
         
+        has_more = len(results) > per_page
+        results = results[:per_page]
+        
         # 构建响应数据
         history_items = []
         for result in results:
@@ -1041,33 +2471,72 @@ def get_analysis_history():
                 'file_type': result[5],
                 'file_size': result[6],
                 'processing_time': result[2],
-                'created_at': result[3]
+                'created_at': result[3],
+                'summary': result[7],
+                'structured': bool(result[8])
             })
         
+        next_cursor = encode_cursor(results[-1][3], results[-1][0]) if has_more and results else None
+        
         return jsonify({
             'items': history_items,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
                 'total': total,
-                'pages': (total + per_page - 1) // per_page
+                'pages': (total + per_page - 1) // per_page,
+                'next_cursor': next_cursor,
+                'has_more': has_more
             }
         })
-        
+    
     except Exception as e:
         print(f"获取分析历史失败: {str(e)}")
         return jsonify({'error': f'获取分析历史失败: {str(e)}'}), 500
 
 
+@app.route('/api/ai-analysis/search')
+def search_analysis_history():
+    """全文搜索分析历史"""
+    try:
+        query = request.args.get('q', '').strip()
+        limit = min(max(int(request.args.get('limit', 20)), 1), 100)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        
+        if not query:
+            return jsonify({'error': '请输入搜索关键词'}), 400
+        
+        conn = connect_db()
+        try:
+            result = search_index.search(conn, query, limit=limit, offset=offset)
+        finally:
+            conn.close()
+        
+        return jsonify({
+            'success': True,
+            'query': query,
+            'mode': result['mode'],
+            'items': result['items'],
+            'limit': limit,
+            'offset': offset
+        })
+    
+    except SearchTimeoutError as e:
+        return jsonify({'error': f'搜索超时，请使用更具体的关键词: {str(e)}'}), 503
+    except Exception as e:
+        print(f"搜索分析历史失败: {str(e)}")
+        return jsonify({'error': f'搜索分析历史失败: {str(e)}'}), 500
+
+
 @app.route('/api/ai-analysis/results/<analysis_id>', methods=['DELETE'])
 def delete_analysis_result(analysis_id):
     """删除分析结果"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         # 检查分析结果是否存在
-        cursor.execute('SELECT file_id FROM ai_analysis_results WHERE id = ?', (analysis_id,))
+        cursor.execute('SELECT file_id, created_at, processing_time FROM ai_analysis_results WHERE id = ?', (analysis_id,))
         result = cursor.fetchone()
         
         if not result:
@@ -1078,6 +2547,7 @@ def delete_analysis_result(analysis_id):
         
         # 删除分析结果
         cursor.execute('DELETE FROM ai_analysis_results WHERE id = ?', (analysis_id,))
+        stats_recorder.remove_analyses(cursor, [(result[1], result[2])])
         
         # 检查是否还有其他分析结果使用同一个文件
         cursor.execute('SELECT COUNT(*) FROM ai_analysis_results WHERE file_id = ?', (file_id,))
@@ -1085,13 +2555,14 @@ def delete_analysis_result(analysis_id):
         
         # 如果没有其他分析结果使用该文件，则删除文件记录
         if count == 0:
+            cursor.execute('DELETE FROM ai_analysis_sections WHERE file_id = ?', (file_id,))
             cursor.execute('DELETE FROM ai_analysis_files WHERE id = ?', (file_id,))
         
         conn.commit()
         conn.close()
         
         return jsonify({'success': True, 'message': '分析结果已删除'})
-        
+    
     except Exception as e:
         print(f"删除分析结果失败: {str(e)}")
         return jsonify({'error': f'删除分析结果失败: {str(e)}'}), 500
@@ -1101,14 +2572,17 @@ def delete_analysis_result(analysis_id):
 def get_ai_config():
     """获取AI分析配置"""
     try:
-        # 获取当前配置
+        # 获取当前配置（单次读取内存快照）
+        snapshot = config_manager.get_snapshot()
+        siliconflow_config = snapshot.config.get('siliconflow', {})
         config_data = {
+            'version': snapshot.version,
             'siliconflow': {
-                'model': config_manager.get_siliconflow_config().get('model', 'Qwen/Qwen2.5-7B-Instruct'),
-                'max_tokens': config_manager.get_siliconflow_config().get('max_tokens', 2000),
-                'temperature': config_manager.get_siliconflow_config().get('temperature', 0.7),
-                'timeout': config_manager.get_siliconflow_config().get('timeout', 120),
-                'base_url': config_manager.get_siliconflow_config().get('base_url', 'https://api.siliconflow.cn/v1')
+                'model': siliconflow_config.get('model', 'Qwen/Qwen2.5-7B-Instruct'),
+                'max_tokens': siliconflow_config.get('max_tokens', 2000),
+                'temperature': siliconflow_config.get('temperature', 0.7),
+                'timeout': siliconflow_config.get('timeout', 120),
+                'base_url': siliconflow_config.get('base_url', 'https://api.siliconflow.cn/v1')
             },
             'file_processing': {
                 'max_file_size': config_manager.get_max_file_size(),
@@ -1124,7 +2598,7 @@ def get_ai_config():
             'success': True,
             'config': config_data
         })
-        
+    
     except Exception as e:
         print(f"获取配置失败: {str(e)}")
         return jsonify({'error': f'获取配置失败: {str(e)}'}), 500
@@ -1150,7 +2624,7 @@ def update_ai_config():
             'success': True,
             'message': '配置更新成功'
         })
-        
+    
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -1180,7 +2654,7 @@ def update_custom_prompt():
             'message': message,
             'effective_prompt': config_manager.get_effective_prompt()
         })
-        
+    
     except ValueError as e:
         return jsonify({'error': str(e)}), 400
     except Exception as e:
@@ -1188,24 +2662,131 @@ def update_custom_prompt():
         return jsonify({'error': f'更新提示词失败: {str(e)}'}), 500
 
 
+@app.route('/api/ai-analysis/templates', methods=['GET'])
+def list_prompt_templates():
+    """获取提示词模板列表（各模板的当前版本）"""
+    try:
+        conn = connect_db()
+        try:
+            templates = prompt_templates.list_templates(conn.cursor())
+        finally:
+            conn.close()
+        
+        return jsonify({'success': True, 'templates': templates})
+    
+    except Exception as e:
+        print(f"获取提示词模板失败: {str(e)}")
+        return jsonify({'error': f'获取提示词模板失败: {str(e)}'}), 500
+
+
+@app.route('/api/ai-analysis/templates/<template_id>', methods=['GET'])
+def get_prompt_template(template_id):
+    """获取提示词模板（默认当前版本，?version= 指定历史版本）及版本列表"""
+    try:
+        version = request.args.get('version', type=int)
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            template = prompt_templates.get(cursor, template_id, version)
+            versions = prompt_templates.list_versions(cursor, template_id) if template else []
+        finally:
+            conn.close()
+        
+        if not template:
+            return jsonify({'error': '提示词模板不存在'}), 404
+        
+        return jsonify({'success': True, 'template': template.to_dict(), 'versions': versions})
+    
+    except Exception as e:
+        print(f"获取提示词模板失败: {str(e)}")
+        return jsonify({'error': f'获取提示词模板失败: {str(e)}'}), 500
+
+
+@app.route('/api/ai-analysis/templates', methods=['POST'])
+@app.route('/api/ai-analysis/templates/<template_id>', methods=['PUT'])
+def save_prompt_template(template_id=None):
+    """创建或更新提示词模板（正文或模型参数变化时生成新版本）"""
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': '没有提供数据'}), 400
+        
+        template_id = template_id or str(data.get('id', '')).strip()
+        conn = connect_db()
+        try:
+            cursor = conn.cursor()
+            previous = prompt_templates.get(cursor, template_id)
+            if request.method == 'POST' and previous:
+                return jsonify({'error': f'提示词模板已存在: {template_id}'}), 409
+            if request.method == 'PUT' and not previous:
+                return jsonify({'error': '提示词模板不存在'}), 404
+            
+            template = prompt_templates.save(
+                cursor,
+                template_id,
+                data.get('name', previous.name if previous else ''),
+                data.get('body', previous.body if previous else ''),
+                description=data.get('description'),
+                max_tokens=data.get('max_tokens', previous.max_tokens if previous else None),
+                temperature=data.get('temperature', previous.temperature if previous else None)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        
+        return jsonify({
+            'success': True,
+            'template': template.to_dict(),
+            'new_version': not previous or template.version != previous.version
+        }), 201 if request.method == 'POST' else 200
+    
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        print(f"保存提示词模板失败: {str(e)}")
+        return jsonify({'error': f'保存提示词模板失败: {str(e)}'}), 500
+
+
+@app.route('/api/ai-analysis/templates/<template_id>', methods=['DELETE'])
+def delete_prompt_template(template_id):
+    """删除提示词模板（已有分析结果保留模板ID及版本号）"""
+    try:
+        conn = connect_db()
+        try:
+            deleted = prompt_templates.delete(conn.cursor(), template_id)
+            conn.commit()
+        finally:
+            conn.close()
+        
+        if not deleted:
+            return jsonify({'error': '提示词模板不存在'}), 404
+        
+        return jsonify({'success': True, 'message': '提示词模板已删除'})
+    
+    except Exception as e:
+        print(f"删除提示词模板失败: {str(e)}")
+        return jsonify({'error': f'删除提示词模板失败: {str(e)}'}), 500
+
+
 @app.route('/api/ai-analysis/config/test', methods=['POST'])
 def test_ai_connection():
     """测试AI服务连接"""
     try:
-        if not siliconflow_client:
+        client = siliconflow_client
+        if not client:
             return jsonify({
                 'success': False,
                 'error': 'AI客户端未初始化'
             }), 500
         
         # 测试连接
-        test_result = siliconflow_client.test_connection()
+        test_result = client.test_connection()
         
         return jsonify({
             'success': test_result['success'],
             'test_result': test_result
         })
-        
+    
     except Exception as e:
         print(f"测试连接失败: {str(e)}")
         return jsonify({
@@ -1224,7 +2805,7 @@ def validate_ai_config():
             'success': True,
             'validation': validation_result
         })
-        
+    
     except Exception as e:
         print(f"配置验证失败: {str(e)}")
         return jsonify({'error': f'配置验证失败: {str(e)}'}), 500
@@ -1232,14 +2813,21 @@ def validate_ai_config():
 
 @app.route('/api/ai-analysis/files')
 def get_analysis_files():
-    """获取分析文件列表"""
+    """获取分析文件列表（支持页码分页和游标分页）"""
     try:
         page = int(request.args.get('page', 1))
         per_page = int(request.args.get('per_page', 20))
         file_type = request.args.get('file_type', '')
-        offset = (page - 1) * per_page
+        page_cursor = request.args.get('cursor', '')
+        
+        try:
+            keyset_clause, keyset_params = keyset_condition('upload_timestamp', 'id', page_cursor)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        offset = 0 if page_cursor else (page - 1) * per_page
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         # 构建查询条件
@@ -1250,22 +2838,28 @@ def get_analysis_files():
             where_clause += " AND file_type = ?"
             params.append(file_type)
         
-        # 获取总数
-        cursor.execute(f'SELECT COUNT(*) FROM ai_analysis_files WHERE {where_clause}', params)
-        total = cursor.fetchone()[0]
+        # 获取总数（增量维护的计数）
+        counter_key = f'ai_analysis_files:{file_type}' if file_type else 'ai_analysis_files'
+        total = get_row_count(cursor, counter_key)
+        if total is None:
+            cursor.execute(f'SELECT COUNT(*) FROM ai_analysis_files WHERE {where_clause}', params)
+            total = cursor.fetchone()[0]
         
         # 获取分页数据
         cursor.execute(f'''
             SELECT id, filename, file_type, file_size, upload_timestamp, status
             FROM ai_analysis_files 
-            WHERE {where_clause}
-            ORDER BY upload_timestamp DESC
+            WHERE {where_clause} AND {keyset_clause}
+            ORDER BY upload_timestamp DESC, id DESC
             LIMIT ? OFFSET ?
-        ''', params + [per_page, offset])
+        ''', params + keyset_params + [per_page + 1, offset])
         
         results = cursor.fetchall()
         conn.close()
         
+        has_more = len(results) > per_page
+        results = results[:per_page]
+        
         # 构建响应数据
         files = []
         for result in results:
@@ -1278,16 +2872,20 @@ def get_analysis_files():
                 'status': result[5]
             })
         
+        next_cursor = encode_cursor(results[-1][4], results[-1][0]) if has_more and results else None
+        
         return jsonify({
             'files': files,
             'pagination': {
                 'page': page,
                 'per_page': per_page,
                 'total': total,
-                'pages': (total + per_page - 1) // per_page
+                'pages': (total + per_page - 1) // per_page,
+                'next_cursor': next_cursor,
+                'has_more': has_more
             }
         })
-        
+    
     except Exception as e:
         print(f"获取文件列表失败: {str(e)}")
         return jsonify({'error': f'获取文件列表失败: {str(e)}'}), 500
@@ -1297,7 +2895,7 @@ def get_analysis_files():
 def delete_analysis_file(file_id):
     """删除分析文件及其相关的所有分析结果"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         # 检查文件是否存在
@@ -1311,8 +2909,14 @@ def delete_analysis_file(file_id):
         filename = result[0]
         
         # 删除相关的分析结果
+        cursor.execute('SELECT created_at, processing_time FROM ai_analysis_results WHERE file_id = ?', (file_id,))
+        deleted_rows = cursor.fetchall()
         cursor.execute('DELETE FROM ai_analysis_results WHERE file_id = ?', (file_id,))
         deleted_results = cursor.rowcount
+        stats_recorder.remove_analyses(cursor, deleted_rows)
+        
+        # 删除分段分析缓存
+        cursor.execute('DELETE FROM ai_analysis_sections WHERE file_id = ?', (file_id,))
         
         # 删除文件记录
         cursor.execute('DELETE FROM ai_analysis_files WHERE id = ?', (file_id,))
@@ -1324,7 +2928,7 @@ def delete_analysis_file(file_id):
             'success': True,
             'message': f'文件 "{filename}" 及其 {deleted_results} 个分析结果已删除'
         })
-        
+    
     except Exception as e:
         print(f"删除文件失败: {str(e)}")
         return jsonify({'error': f'删除文件失败: {str(e)}'}), 500
@@ -1332,44 +2936,26 @@ def delete_analysis_file(file_id):
 
 @app.route('/api/ai-analysis/stats')
 def get_analysis_stats():
-    """获取分析统计信息"""
+    """获取分析统计信息（读取增量维护的统计表）"""
     try:
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
-        # 总文件数
-        cursor.execute('SELECT COUNT(*) FROM ai_analysis_files')
-        total_files = cursor.fetchone()[0]
-        
-        # 总分析数
-        cursor.execute('SELECT COUNT(*) FROM ai_analysis_results')
-        total_analyses = cursor.fetchone()[0]
+        # 总文件数、总分析数
+        total_files = get_row_count(cursor, 'ai_analysis_files') or 0
+        total_analyses = get_row_count(cursor, 'ai_analysis_results') or 0
         
         # 按文件类型统计
         cursor.execute('''
-            SELECT file_type, COUNT(*) 
-            FROM ai_analysis_files 
-            GROUP BY file_type 
-            ORDER BY COUNT(*) DESC
+            SELECT substr(counter_key, length('ai_analysis_files:') + 1), row_count
+            FROM ai_row_counts
+            WHERE counter_key LIKE 'ai_analysis_files:%' AND row_count > 0
+            ORDER BY row_count DESC
         ''')
         file_type_stats = [{'type': row[0], 'count': row[1]} for row in cursor.fetchall()]
         
-        # 最近7天的分析数量
-        cursor.execute('''
-            SELECT DATE(created_at) as date, COUNT(*) as count
-            FROM ai_analysis_results 
-            WHERE created_at >= datetime('now', '-7 days')
-            GROUP BY DATE(created_at)
-            ORDER BY date DESC
-        ''')
-        recent_analyses = [{'date': row[0], 'count': row[1]} for row in cursor.fetchall()]
-        
-        # 平均处理时间
-        cursor.execute('SELECT AVG(processing_time) FROM ai_analysis_results WHERE processing_time IS NOT NULL')
-        avg_processing_time = cursor.fetchone()[0] or 0
-        
-        # 成功率（假设所有记录都是成功的，因为失败的不会保存到数据库）
-        success_rate = 100.0 if total_analyses > 0 else 0
+        # 成功率、平均处理时间、延迟分位数、最近7天的分析数量
+        stats = stats_recorder.read_stats(cursor)
         
         conn.close()
         
@@ -1379,12 +2965,15 @@ def get_analysis_stats():
                 'total_files': total_files,
                 'total_analyses': total_analyses,
                 'file_type_distribution': file_type_stats,
-                'recent_analyses': recent_analyses,
-                'average_processing_time': round(avg_processing_time, 2),
-                'success_rate': success_rate
+                'recent_analyses': stats['recent_analyses'],
+                'average_processing_time': stats['average_processing_time'],
+                'latency_percentiles': stats['latency_percentiles'],
+                'success_rate': stats['success_rate'],
+                'failed_analyses': stats['failed_total'],
+                'prompt_cache': siliconflow_client.get_usage_stats() if siliconflow_client else None
             }
         })
-        
+    
     except Exception as e:
         print(f"获取统计信息失败: {str(e)}")
         return jsonify({'error': f'获取统计信息失败: {str(e)}'}), 500
@@ -1399,15 +2988,18 @@ def export_analysis_report(analysis_id):
         if format_type not in ['html', 'json', 'summary']:
             return jsonify({'error': '不支持的导出格式'}), 400
         
-        conn = sqlite3.connect(DATABASE_PATH)
+        conn = connect_db()
         cursor = conn.cursor()
         
         # 获取分析结果和文件信息
         cursor.execute('''
-            SELECT r.id, r.file_id, r.analysis_text, r.prompt_used, r.processing_time, r.created_at,
-                   f.filename, f.file_type, f.file_size, f.upload_timestamp
+            SELECT r.id, r.file_id, r.analysis_text, COALESCE(p.prompt_text, r.prompt_used),
+                   r.processing_time, r.created_at,
+                   f.filename, f.file_type, f.file_size, f.upload_timestamp, r.text_encoding,
+                   r.analysis_json
             FROM ai_analysis_results r
             JOIN ai_analysis_files f ON r.file_id = f.id
+            LEFT JOIN ai_prompts p ON r.prompt_id = p.id
             WHERE r.id = ?
         ''', (analysis_id,))
         
@@ -1417,12 +3009,12 @@ def export_analysis_report(analysis_id):
         if not result:
             return jsonify({'error': '分析结果不存在'}), 404
         
-        # 构建分析结果对象
-        from services.siliconflow_client import AnalysisResult
+        # 构建分析结果对象（结构化结果直接用于摘要及HTML导出）
         analysis_result = AnalysisResult(
             success=True,
-            content=result[2],
-            processing_time=result[4]
+            content=analysis_storage.decode_text(result[2], result[10]),
+            processing_time=result[4],
+            structured=structured_output.loads(result[11])
         )
         
         # 构建文件元数据
@@ -1459,7 +3051,7 @@ def export_analysis_report(analysis_id):
             )
         
         return response
-        
+    
     except Exception as e:
         print(f"导出报告失败: {str(e)}")
         return jsonify({'error': f'导出报告失败: {str(e)}'}), 500
@@ -1469,4 +3061,9 @@ if __name__ == '__main__':
     # 确保数据库目录存在
     os.makedirs(os.path.dirname(DATABASE_PATH), exist_ok=True)
     init_database()
+    # 启动时生成静态资源指纹及gzip/brotli预压缩版本
+    static_assets.build()
+    # 开发服务器默认使用tracemalloc统计请求内存
+    if not MEMORY_TRACKING:
+        memory_tracker = MemoryTracker('tracemalloc')
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
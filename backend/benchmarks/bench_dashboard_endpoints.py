@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard endpoints through the Flask test client
+
+Builds a synthetic database per row count (rows per person-level table)
+and times every dashboard read endpoint plus ingestion and the exports.
+
+Usage:
+    python benchmarks/bench_dashboard_endpoints.py [--rows 10000,100000] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+from benchmarks import fixtures
+from benchmarks.harness import BenchmarkSuite
+
+DEPARTMENT = '测试部'
+
+
+def endpoint_cases(date):
+    """(name, method, url, body) of the benchmarked requests"""
+    return [
+        ('metrics', 'GET', f'/api/dashboard/metrics?department={DEPARTMENT}&date={date}', None),
+        ('metrics_all', 'GET', f'/api/dashboard/metrics?date={date}', None),
+        ('trends', 'GET', f'/api/dashboard/trends?department={DEPARTMENT}', None),
+        ('rankings', 'GET', f'/api/dashboard/rankings?department={DEPARTMENT}&date={date}', None),
+        ('rankings_all', 'GET', f'/api/dashboard/rankings?date={date}&limit=50', None),
+        ('details_page', 'GET', f'/api/dashboard/details?department={DEPARTMENT}&date={date}&limit=100', None),
+        ('details_full', 'GET', f'/api/dashboard/details?department={DEPARTMENT}&date={date}', None),
+        ('bootstrap', 'GET', f'/api/dashboard/bootstrap?department={DEPARTMENT}&date={date}', None),
+        ('departments', 'GET', '/api/departments', None),
+        ('date_range', 'GET', '/api/date-range', None),
+        ('export_csv', 'GET', f'/api/dashboard/export/details?format=csv&department={DEPARTMENT}&date={date}', None),
+        ('export_xlsx', 'GET', f'/api/dashboard/export/rankings?format=xlsx&department={DEPARTMENT}&date={date}',
+         None),
+        ('ingest_csv', 'POST', '/api/dashboard/ingest?table=metrics&format=csv', ingest_payload(date)),
+    ]
+
+
+def ingest_payload(date):
+    """A small, idempotent CSV upsert of department metrics"""
+    lines = ['department,record_date,requirement_throughput,reopen_rate']
+    for index, department in enumerate(fixtures.DEPARTMENTS):
+        lines.append(f'{department},{date},{100 + index},{index / 3:.3f}')
+    return '\n'.join(lines).encode('utf-8')
+
+
+def run(suite, options):
+    """Time each endpoint against databases of options.rows rows"""
+    client = dashboard_app.app.test_client()
+    for rows in options.rows:
+        path = os.path.join(options.workdir, f'dashboard_{rows}.db')
+        date = fixtures.build_database_rows(path, rows)
+        dashboard_app.DATABASE_PATH = path
+        
+        for name, method, url, body in endpoint_cases(date):
+            def request(method=method, url=url, body=body):
+                response = client.open(url, method=method, data=body,
+                                       headers={'Accept-Encoding': 'gzip'})
+                # Consume streamed bodies so the whole response is timed
+                data = response.get_data()
+                if response.status_code != 200:
+                    raise RuntimeError(f'{url} returned {response.status_code}: {data[:200]!r}')
+            
+            suite.bench(f'dashboard.{name}[rows={rows}]', request, rows=rows)
+
+
+def parse_rows(value):
+    return [int(float(item)) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dashboard endpoints')
+    parser.add_argument('--rows', type=parse_rows, default=[10000, 100000],
+                        help='Comma-separated row counts per table, e.g. 1e4,1e5,1e6')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        args.workdir = directory
+        run(BenchmarkSuite(repeat=args.repeat), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: dashboard queries through SQLite vs. the in-memory columnar snapshot
+
+Usage:
+    python benchmarks/bench_dashboard_snapshot.py [--people 5000] [--months 12] [--repeat 50]
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+from benchmarks.fixtures import build_database, build_database_rows
+from services.dashboard_snapshot import DashboardSnapshot
+
+def measure(function, repeat):
+    """Median wall time of a call in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def query_cases(cursor, snapshot, date):
+    """(name, SQL query, snapshot query) pairs returning the same rows"""
+    return [
+        ('metrics 全部部门', lambda: dashboard_app.query_metrics_row(cursor, '全部部门', date),
+         lambda: snapshot.metrics_row('全部部门', date)),
+        ('metrics 单部门', lambda: dashboard_app.query_metrics_row(cursor, '测试部', date),
+         lambda: snapshot.metrics_row('测试部', date)),
+        ('rankings 全部部门', lambda: dashboard_app.query_ranking_rows(cursor, '全部部门', date, 'score', 'DESC'),
+         lambda: snapshot.ranking_rows('全部部门', date, 'score', True)),
+        ('rankings 单部门', lambda: dashboard_app.query_ranking_rows(cursor, '测试部', date, 'score', 'DESC'),
+         lambda: snapshot.ranking_rows('测试部', date, 'score', True)),
+        ('details 单部门', lambda: dashboard_app.query_details_rows(cursor, '测试部', date),
+         lambda: snapshot.detail_rows('测试部', date)),
+    ]
+
+
+def run(suite, options):
+    """Time SQL and snapshot queries (and the snapshot load) for options.rows rows"""
+    for rows in options.rows:
+        path = os.path.join(options.workdir, f'snapshot_{rows}.db')
+        date = build_database_rows(path, rows)
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        
+        suite.bench(f'snapshot.load[rows={rows}]', lambda: DashboardSnapshot.load(cursor, 0),
+                    repeat=min(suite.repeat, 5), rows=rows)
+        snapshot = DashboardSnapshot.load(cursor, 0)
+        for name, sql_query, snapshot_query in query_cases(cursor, snapshot, date):
+            label = name.replace(' ', '_')
+            suite.bench(f'snapshot.sql.{label}[rows={rows}]', sql_query, rows=rows)
+            suite.bench(f'snapshot.columnar.{label}[rows={rows}]', snapshot_query, rows=rows)
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark SQL vs. columnar snapshot dashboard queries')
+    parser.add_argument('--people', type=int, default=5000)
+    parser.add_argument('--months', type=int, default=12)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'bench.db')
+        build_database(path, args.people, args.months)
+        
+        conn = sqlite3.connect(path)
+        cursor = conn.cursor()
+        
+        start = time.perf_counter()
+        snapshot = DashboardSnapshot.load(cursor, 0)
+        load_ms = (time.perf_counter() - start) * 1000
+        
+        date = f'2024-{args.months:02d}'
+        cases = query_cases(cursor, snapshot, date)
+        
+        print(f"rows per table: {args.people * args.months}, snapshot load: {load_ms:.1f} ms")
+        print(f"{'query':<20}{'sql ms':>10}{'snapshot ms':>14}{'speedup':>10}")
+        for name, sql_query, snapshot_query in cases:
+            if sql_query() != snapshot_query():
+                print(f"warning: {name} results differ")
+            sql_ms = measure(sql_query, args.repeat)
+            snapshot_ms = measure(snapshot_query, args.repeat)
+            print(f"{name:<20}{sql_ms:>10.3f}{snapshot_ms:>14.3f}{sql_ms / snapshot_ms:>9.1f}x")
+        
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
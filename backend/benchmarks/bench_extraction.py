@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ContentExtractor on synthetic PDF, DOCX, XLSX, Markdown and text files
+
+Usage:
+    python benchmarks/bench_extraction.py [--scale small|large] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks import fixtures
+from benchmarks.harness import BenchmarkSuite
+from services.content_extractor import ContentExtractor
+
+SCALES = {
+    'small': {'pdf_pages': 20, 'docx_tables': 20, 'xlsx_rows': 500, 'xlsx_cols': 50, 'paragraphs': 500},
+    'large': {'pdf_pages': 300, 'docx_tables': 200, 'xlsx_rows': 5000, 'xlsx_cols': 200, 'paragraphs': 20000},
+}
+
+
+def run(suite, options):
+    """Generate the documents for options.scale and time each extractor"""
+    scale = SCALES[options.scale]
+    extractor = ContentExtractor()
+    directory = options.workdir
+    
+    pdf_path = os.path.join(directory, 'bench.pdf')
+    fixtures.make_pdf(pdf_path, pages=scale['pdf_pages'])
+    docx_path = os.path.join(directory, 'bench.docx')
+    fixtures.make_docx(docx_path, tables=scale['docx_tables'])
+    xlsx_path = os.path.join(directory, 'bench.xlsx')
+    fixtures.make_xlsx(xlsx_path, rows=scale['xlsx_rows'], cols=scale['xlsx_cols'])
+    text_path = os.path.join(directory, 'bench.txt')
+    fixtures.make_text(text_path, paragraphs=scale['paragraphs'])
+    markdown_path = os.path.join(directory, 'bench.md')
+    fixtures.make_text(markdown_path, paragraphs=scale['paragraphs'])
+    
+    cases = [
+        ('extract_pdf', extractor.extract_pdf, pdf_path, {'pages': scale['pdf_pages']}),
+        ('extract_word', extractor.extract_word, docx_path, {'tables': scale['docx_tables']}),
+        ('extract_excel', extractor.extract_excel, xlsx_path,
+         {'rows': scale['xlsx_rows'], 'cols': scale['xlsx_cols']}),
+        ('extract_text', extractor.extract_text, text_path, {'paragraphs': scale['paragraphs']}),
+        ('extract_markdown', extractor.extract_markdown, markdown_path, {'paragraphs': scale['paragraphs']}),
+    ]
+    for name, extract, path, params in cases:
+        result = extract(path)
+        if not result.success:
+            print(f"warning: {name} failed: {result.error_message}")
+            continue
+        suite.bench(f'extraction.{name}[{options.scale}]', lambda: extract(path),
+                    bytes=os.path.getsize(path), **params)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark document content extraction')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        args.workdir = directory
+        run(BenchmarkSuite(repeat=args.repeat), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF dashboard report and HTML analysis report generation
+
+Usage:
+    python benchmarks/bench_reports.py [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+from benchmarks import fixtures
+from benchmarks.harness import BenchmarkSuite
+from services.report_generator import ReportGenerator
+from services.siliconflow_client import AnalysisResult
+
+
+def analysis_report(generator, sections=40):
+    """A report with a long Markdown analysis"""
+    content = '\n\n'.join(
+        f'## 第{index + 1}部分\n\n{fixtures.PARAGRAPH}\n\n- 建议一：加强评审\n- 建议二：<提升>自动化 & 覆盖率'
+        for index in range(sections)
+    )
+    result = AnalysisResult(success=True, content=content, processing_time=12.5, model_used='mock-model',
+                            tokens_used=4096, metadata={'usage': {'total_tokens': 4096}})
+    return generator.generate_report(result, {'filename': '效能报告.docx', 'file_type': 'docx',
+                                              'file_size': 123456, 'prompt_used': '请分析'})
+
+
+def run(suite, options):
+    """Time generate_pdf_report on the smallest database and format_html_report on a long analysis"""
+    rows = min(options.rows)
+    path = os.path.join(options.workdir, f'reports_{rows}.db')
+    date = fixtures.build_database_rows(path, rows)
+    dashboard_app.DATABASE_PATH = path
+    
+    for department in ('测试部', '全部部门'):
+        suite.bench(f'reports.generate_pdf_report[{department},rows={rows}]',
+                    lambda department=department: dashboard_app.generate_pdf_report(department, date),
+                    repeat=min(suite.repeat, 5), rows=rows)
+    
+    generator = ReportGenerator()
+    for sections in (10, 200):
+        report = analysis_report(generator, sections)
+        suite.bench(f'reports.format_html_report[sections={sections}]',
+                    lambda report=report: generator.format_html_report(report), sections=sections)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark report generation')
+    parser.add_argument('--rows', type=lambda value: [int(float(value))], default=[10000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        args.workdir = directory
+        run(BenchmarkSuite(repeat=args.repeat), args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark: /api/ai-analysis/upload end to end against the local mock SiliconFlow server
+
+The client's rate-limit interval is disabled and the mock answers without
+delay (unless --latency is given), so the timings show the pipeline's own
+cost: validation, saving, extraction, the HTTP round trip, the database
+write and report generation.
+
+Usage:
+    python benchmarks/bench_upload.py [--repeat 20] [--latency 0]
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+from benchmarks import fixtures
+from benchmarks.harness import BenchmarkSuite
+from benchmarks.mock_siliconflow import MockSiliconFlowServer
+from services.siliconflow_client import SiliconFlowClient
+
+
+def run(suite, options):
+    """Upload synthetic documents through the Flask test client"""
+    directory = options.workdir
+    dashboard_app.DATABASE_PATH = os.path.join(directory, 'upload.db')
+    dashboard_app.init_database()
+    
+    documents = []
+    text_path = os.path.join(directory, 'upload.txt')
+    fixtures.make_text(text_path, paragraphs=200)
+    documents.append(('txt', text_path))
+    docx_path = os.path.join(directory, 'upload.docx')
+    fixtures.make_docx(docx_path, tables=10, paragraphs=100)
+    documents.append(('docx', docx_path))
+    
+    original_client = dashboard_app.siliconflow_client
+    with MockSiliconFlowServer(latency=getattr(options, 'latency', 0.0)) as server:
+        client = SiliconFlowClient('bench-key', base_url=server.base_url)
+        client.min_request_interval = 0
+        dashboard_app.siliconflow_client = client
+        try:
+            test_client = dashboard_app.app.test_client()
+            for file_type, path in documents:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                
+                def upload(data=data, filename=os.path.basename(path)):
+                    response = test_client.post('/api/ai-analysis/upload',
+                                                data={'file': (io.BytesIO(data), filename)},
+                                                content_type='multipart/form-data')
+                    if response.status_code != 200:
+                        raise RuntimeError(f'upload returned {response.status_code}: {response.get_data()[:200]!r}')
+                
+                suite.bench(f'upload.{file_type}', upload, bytes=len(data))
+        finally:
+            dashboard_app.siliconflow_client = original_client
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the upload and analysis endpoint')
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.0, help='Mock API latency in seconds')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        args.workdir = directory
+        run(BenchmarkSuite(repeat=args.repeat), args)
+
+
+if __name__ == '__main__':
+    main()
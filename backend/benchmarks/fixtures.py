@@ -0,0 +1,139 @@
+"""
+Synthetic benchmark fixtures: dashboard databases and documents to extract
+
+All generators are seeded, so the same arguments produce the same data and
+timings stay comparable across runs.
+"""
+
+import os
+import random
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+
+DEPARTMENTS = ['前端开发部', '后端开发部', '测试部', '产品部', '运维部', '数据部']
+
+PARAGRAPH = (
+    '本季度研发团队持续推进需求交付流程优化，需求吞吐量较上季度提升，'
+    '交付周期缩短。线上缺陷数量下降，但紧急发布次数仍偏高，需要加强测试覆盖与发布评审。'
+)
+
+
+def month_dates(months):
+    return [f'{2024 + (month - 1) // 12}-{(month - 1) % 12 + 1:02d}' for month in range(1, months + 1)]
+
+
+def build_database(path, people, months):
+    """
+    Create a dashboard database with synthetic data
+    
+    metrics gets one row per department and month; project_details and
+    developer_rankings get people * months rows each. Rows are generated
+    lazily, so 10^7-row databases do not need the rows in memory.
+    """
+    dashboard_app.DATABASE_PATH = path
+    dashboard_app.init_database()
+    
+    rng = random.Random(42)
+    dates = month_dates(months)
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode = OFF')
+    conn.execute('PRAGMA synchronous = OFF')
+    cursor = conn.cursor()
+    cursor.executemany('''
+        INSERT OR REPLACE INTO metrics (department, requirement_throughput, monthly_delivered_requirements,
+            monthly_new_requirements, delivery_cycle_p75, online_defects, reopen_rate, emergency_releases,
+            incident_count, work_saturation, code_equivalent, record_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', [
+        (dept, rng.randint(80, 200), rng.randint(50, 120), rng.randint(50, 150), rng.uniform(3, 15),
+         rng.randint(0, 40), rng.uniform(0, 8), rng.randint(0, 10), rng.randint(0, 6), rng.uniform(60, 110),
+         rng.randint(500, 3000), date)
+        for dept in DEPARTMENTS for date in dates
+    ])
+    cursor.executemany('''
+        INSERT OR REPLACE INTO project_details (department, person_name, position_name, project_name, saturation,
+            code_equivalent, delivered_requirements, total_hours, ai_usage_days, record_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        (DEPARTMENTS[person % len(DEPARTMENTS)], f'员工{person}', '开发工程师', f'项目{person % 97}',
+         rng.uniform(50, 110), rng.randint(100, 3000), rng.randint(0, 30), rng.uniform(80, 200),
+         rng.uniform(0, 22), date)
+        for person in range(people) for date in dates
+    ))
+    cursor.executemany('''
+        INSERT OR REPLACE INTO developer_rankings (department, name, score, work_saturation, code_equivalent,
+            defect_count, record_date)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        (DEPARTMENTS[person % len(DEPARTMENTS)], f'员工{person}', rng.randint(50, 100), rng.uniform(50, 110),
+         rng.randint(100, 3000), rng.randint(0, 15), date)
+        for person in range(people) for date in dates
+    ))
+    conn.commit()
+    conn.execute('ANALYZE')
+    conn.close()
+
+
+def build_database_rows(path, rows, months=12):
+    """Create a dashboard database with about `rows` rows in each per-person table"""
+    build_database(path, max(1, -(-rows // months)), months)
+    return month_dates(months)[-1]
+
+
+def make_pdf(path, pages=100, lines_per_page=40):
+    """Write a text PDF with the given number of pages"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    
+    pdf = canvas.Canvas(path, pagesize=A4)
+    width, height = A4
+    for page in range(pages):
+        text = pdf.beginText(50, height - 50)
+        text.setFont('Helvetica', 9)
+        for line in range(lines_per_page):
+            text.textLine(f'Page {page + 1} line {line + 1}: delivery throughput {page * line % 97} '
+                          f'defects {line % 7} cycle time {page % 13}.{line % 10} days')
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+
+
+def make_docx(path, tables=50, rows=20, cols=6, paragraphs=50):
+    """Write a DOCX document with many paragraphs and tables"""
+    from docx import Document
+    
+    document = Document()
+    document.add_heading('研发效能月报', level=1)
+    for index in range(paragraphs):
+        document.add_paragraph(f'{index + 1}. {PARAGRAPH}')
+    for index in range(tables):
+        table = document.add_table(rows=rows, cols=cols)
+        for row_index, row in enumerate(table.rows):
+            for col_index, cell in enumerate(row.cells):
+                cell.text = f'T{index}R{row_index}C{col_index}'
+    document.save(path)
+
+
+def make_xlsx(path, rows=1000, cols=100, sheets=1):
+    """Write a wide XLSX workbook"""
+    from openpyxl import Workbook
+    
+    rng = random.Random(7)
+    workbook = Workbook(write_only=True)
+    for sheet in range(sheets):
+        worksheet = workbook.create_sheet(title=f'Sheet{sheet + 1}')
+        worksheet.append([f'列{col}' for col in range(cols)])
+        for _ in range(rows):
+            worksheet.append([rng.randint(0, 10000) for _ in range(cols)])
+    workbook.save(path)
+
+
+def make_text(path, paragraphs=2000):
+    """Write a plain text document"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for index in range(paragraphs):
+            f.write(f'{index + 1}. {PARAGRAPH}\n\n')
@@ -0,0 +1,172 @@
+"""
+Minimal benchmark harness: timing, JSON baselines and regression checks
+
+Each bench_*.py module exposes run(suite, options); run_benchmarks.py
+collects the results of all modules into one JSON document that can be
+saved as the baseline and compared against on later runs.
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from dataclasses import dataclass, asdict, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+BASELINE_VERSION = 1
+
+
+@dataclass
+class BenchmarkResult:
+    """Timing statistics of one benchmark in milliseconds"""
+    name: str
+    rounds: int
+    median_ms: float
+    mean_ms: float
+    min_ms: float
+    p95_ms: float
+    params: Dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Regression:
+    """A benchmark whose median got slower than the baseline allows"""
+    name: str
+    baseline_ms: float
+    current_ms: float
+    
+    @property
+    def ratio(self) -> float:
+        return self.current_ms / self.baseline_ms if self.baseline_ms else float('inf')
+
+
+def measure(function: Callable[[], Any], repeat: int = 20, warmup: int = 1,
+            max_seconds: Optional[float] = None) -> List[float]:
+    """
+    Time repeated calls of a function
+    
+    Args:
+        function: Callable to time
+        repeat: Number of timed calls
+        warmup: Untimed calls made first (imports, caches)
+        max_seconds: Stop early once this much time was spent (at least one timed call is made)
+    
+    Returns:
+        Wall times in milliseconds
+    """
+    for _ in range(warmup):
+        function()
+    
+    timings = []
+    deadline = time.perf_counter() + max_seconds if max_seconds else None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+        if deadline is not None and time.perf_counter() > deadline:
+            break
+    return timings
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list (fraction in 0..1)"""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def summarize(name: str, timings: List[float], **params: Any) -> BenchmarkResult:
+    ordered = sorted(timings)
+    return BenchmarkResult(
+        name=name,
+        rounds=len(ordered),
+        median_ms=round(statistics.median(ordered), 4),
+        mean_ms=round(statistics.fmean(ordered), 4),
+        min_ms=round(ordered[0], 4),
+        p95_ms=round(percentile(ordered, 0.95), 4),
+        params=params
+    )
+
+
+class BenchmarkSuite:
+    """Collects benchmark results and prints one line per benchmark"""
+    
+    def __init__(self, repeat: int = 20, max_seconds: float = 10.0, only: Optional[str] = None,
+                 verbose: bool = True):
+        """
+        Args:
+            repeat: Default number of timed calls per benchmark
+            max_seconds: Default time budget per benchmark
+            only: Run only benchmarks whose name contains this substring
+            verbose: Print results as they are measured
+        """
+        self.repeat = repeat
+        self.max_seconds = max_seconds
+        self.only = only
+        self.verbose = verbose
+        self.results: List[BenchmarkResult] = []
+    
+    def bench(self, name: str, function: Callable[[], Any], repeat: Optional[int] = None,
+              warmup: int = 1, **params: Any) -> Optional[BenchmarkResult]:
+        """Measure a function and record the result (skipped if filtered out by `only`)"""
+        if self.only and self.only not in name:
+            return None
+        timings = measure(function, repeat or self.repeat, warmup, self.max_seconds)
+        result = summarize(name, timings, **params)
+        self.results.append(result)
+        if self.verbose:
+            print(f"{name:<60}{result.median_ms:>12.3f} ms  (p95 {result.p95_ms:.3f}, n={result.rounds})")
+        return result
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'version': BASELINE_VERSION,
+            'created': datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'results': {result.name: asdict(result) for result in self.results}
+        }
+
+
+def load_baseline(path: str) -> Optional[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('version') != BASELINE_VERSION:
+        raise ValueError(f"Unsupported baseline version in {path}")
+    return baseline
+
+
+def save_results(path: str, document: Dict[str, Any]) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(document, f, ensure_ascii=False, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+def compare(results: List[BenchmarkResult], baseline: Dict[str, Any], threshold: float = 0.25,
+            min_delta_ms: float = 0.5) -> List[Regression]:
+    """
+    Find benchmarks slower than the baseline
+    
+    A benchmark regresses when its median exceeds the baseline median by more
+    than `threshold` (relative) and `min_delta_ms` (absolute); the absolute
+    floor keeps sub-millisecond benchmarks from flagging timer noise.
+    Benchmarks missing from the baseline are ignored.
+    """
+    regressions = []
+    recorded = baseline.get('results', {})
+    for result in results:
+        previous = recorded.get(result.name)
+        if not previous:
+            continue
+        baseline_ms = previous['median_ms']
+        if (result.median_ms > baseline_ms * (1 + threshold)
+                and result.median_ms - baseline_ms > min_delta_ms):
+            regressions.append(Regression(result.name, baseline_ms, result.median_ms))
+    return regressions
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Load generator for /api/ai-analysis/upload
+
+Sends uploads at a fixed target rate (open loop: requests are scheduled
+on the clock, not after the previous one finishes) and reports the
+throughput, error counts and latency percentiles. Latency is measured
+from each request's scheduled start, so queueing in the generator or the
+server counts against it and a saturated service is not hidden
+(coordinated omission); the service time from actual send is reported
+as well.
+
+Without --url the app is started in-process on a free port with a
+temporary database and the AI client pointed at the local mock server,
+so the whole analysis path can be load-tested offline.
+
+Usage:
+    python benchmarks/load_upload.py --rate 5 --duration 60 --mock-latency lognormal:2,0.4 --mock-errors 429=0.02
+    python benchmarks/load_upload.py --url http://127.0.0.1:5000 --rate 2 --duration 30 --file report.docx
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks import fixtures
+from benchmarks.harness import percentile, save_results
+from benchmarks.mock_siliconflow import MockSiliconFlowServer, parse_error_rates
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class LoadResult:
+    """Thread-safe collection of per-request outcomes"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.service_times = []
+        self.statuses = {}
+        self.errors = {}
+    
+    def record(self, status, latency, service_time, error=None):
+        with self._lock:
+            key = str(status) if status is not None else 'exception'
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            if error:
+                self.errors[error] = self.errors.get(error, 0) + 1
+            if status == 200:
+                self.latencies.append(latency)
+                self.service_times.append(service_time)
+    
+    def summary(self, elapsed, target_rate):
+        def distribution(values):
+            ordered = sorted(values)
+            stats = {f'p{int(fraction * 100)}': round(percentile(ordered, fraction), 2) for fraction in PERCENTILES}
+            stats['max'] = round(ordered[-1], 2) if ordered else 0.0
+            stats['mean'] = round(sum(ordered) / len(ordered), 2) if ordered else 0.0
+            return stats
+        
+        with self._lock:
+            completed = sum(self.statuses.values())
+            succeeded = self.statuses.get('200', 0)
+            return {
+                'targetRate': target_rate,
+                'elapsedSeconds': round(elapsed, 2),
+                'completed': completed,
+                'succeeded': succeeded,
+                'throughput': round(succeeded / elapsed, 3) if elapsed else 0.0,
+                'errorRate': round(1 - succeeded / completed, 4) if completed else 0.0,
+                'statuses': dict(sorted(self.statuses.items())),
+                'errors': dict(sorted(self.errors.items(), key=lambda item: -item[1])[:10]),
+                'latencyMs': distribution(self.latencies),
+                'serviceTimeMs': distribution(self.service_times)
+            }
+
+
+def run_load(url, data, filename, rate, duration, concurrency, timeout, prompt=None):
+    """
+    Upload `data` at `rate` requests per second for `duration` seconds
+    
+    Returns:
+        Summary dictionary (see LoadResult.summary)
+    """
+    upload_url = url.rstrip('/') + '/api/ai-analysis/upload'
+    result = LoadResult()
+    session_local = threading.local()
+    form = {'custom_prompt': prompt} if prompt else {}
+    
+    def send(scheduled):
+        session = getattr(session_local, 'session', None)
+        if session is None:
+            session = session_local.session = requests.Session()
+        started = time.perf_counter()
+        try:
+            response = session.post(upload_url, files={'file': (filename, data)}, data=form, timeout=timeout)
+            status, error = response.status_code, None
+            if status != 200:
+                try:
+                    error = f'{status}: {response.json().get("error", "")[:120]}'
+                except ValueError:
+                    error = f'{status}: {response.text[:120]}'
+        except requests.RequestException as e:
+            status, error = None, type(e).__name__
+        finished = time.perf_counter()
+        result.record(status, (finished - scheduled) * 1000, (finished - started) * 1000, error)
+    
+    total = max(1, int(rate * duration))
+    interval = 1.0 / rate
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for index in range(total):
+            scheduled = start + index * interval
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, scheduled)
+    return result.summary(time.perf_counter() - start, rate)
+
+
+def start_local_app(directory, mock_url, client_interval):
+    """Serve the app in a background thread on a free port, with the AI client pointed at the mock"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+    
+    import app as dashboard_app
+    from services.siliconflow_client import SiliconFlowClient
+    
+    dashboard_app.DATABASE_PATH = os.path.join(directory, 'load.db')
+    dashboard_app.init_database()
+    client = SiliconFlowClient('load-test-key', base_url=mock_url)
+    if client_interval is not None:
+        client.min_request_interval = client_interval
+    dashboard_app.siliconflow_client = client
+    
+    class QuietRequestHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+    
+    server = make_server('127.0.0.1', 0, dashboard_app.app, threaded=True, request_handler=QuietRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+
+def print_summary(summary):
+    print(f"requests: {summary['completed']} completed, {summary['succeeded']} succeeded "
+          f"in {summary['elapsedSeconds']} s (target {summary['targetRate']}/s)")
+    print(f"throughput: {summary['throughput']}/s, error rate: {summary['errorRate']:.2%}, "
+          f"statuses: {summary['statuses']}")
+    for label, key in (('latency', 'latencyMs'), ('service time', 'serviceTimeMs')):
+        stats = summary[key]
+        print(f"{label:<13} ms: " + ', '.join(f'{name} {value}' for name, value in stats.items()))
+    for error, count in summary['errors'].items():
+        print(f"  {count} x {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Drive /api/ai-analysis/upload at a target rate')
+    parser.add_argument('--url', help='Base URL of a running app (default: start one in-process with the mock API)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Target requests per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='Seconds to send requests for')
+    parser.add_argument('--concurrency', type=int, default=64, help='Maximum requests in flight')
+    parser.add_argument('--timeout', type=float, default=180.0, help='Per-request timeout in seconds')
+    parser.add_argument('--file', help='Document to upload (default: a synthetic text file)')
+    parser.add_argument('--prompt', help='custom_prompt form field')
+    parser.add_argument('--mock-latency', default='lognormal:1.5,0.4', help='Mock API latency distribution')
+    parser.add_argument('--mock-errors', default='', help='Mock API error rates, e.g. 429=0.05,503=0.01')
+    parser.add_argument('--mock-tokens', default='200,800', help='Mock completion tokens, fixed or MIN,MAX')
+    parser.add_argument('--client-interval', type=float,
+                        help="Override the AI client's minimum interval between requests (in-process only)")
+    parser.add_argument('--output', help='Write the summary as JSON to this file')
+    args = parser.parse_args()
+    
+    with tempfile.TemporaryDirectory() as directory:
+        if args.file:
+            filename = os.path.basename(args.file)
+            with open(args.file, 'rb') as f:
+                data = f.read()
+        else:
+            filename = 'load.txt'
+            path = os.path.join(directory, filename)
+            fixtures.make_text(path, paragraphs=100)
+            with open(path, 'rb') as f:
+                data = f.read()
+        
+        mock = server = None
+        url = args.url
+        if not url:
+            mock = MockSiliconFlowServer(latency=args.mock_latency, error_rates=parse_error_rates(args.mock_errors),
+                                         completion_tokens=args.mock_tokens).start()
+            server, url = start_local_app(directory, mock.base_url, args.client_interval)
+            print(f"app on {url}, mock API on {mock.base_url} (latency {args.mock_latency})")
+        
+        mock_stats = None
+        try:
+            summary = run_load(url, data, filename, args.rate, args.duration, args.concurrency, args.timeout,
+                               args.prompt)
+        finally:
+            if server is not None:
+                server.shutdown()
+            if mock is not None:
+                mock_stats = mock.get_stats()
+                mock.stop()
+        
+        if mock_stats is not None:
+            summary['mock'] = mock_stats
+        print_summary(summary)
+        if args.output:
+            save_results(args.output, summary)
+
+
+if __name__ == '__main__':
+    main()
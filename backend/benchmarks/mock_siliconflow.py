@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+"""
+Local mock of the SiliconFlow (OpenAI-compatible) chat completions API
+
+Answers POST /chat/completions (with or without a /v1 prefix) with a
+synthetic completion. Latency is drawn from a configurable distribution,
+completion token counts can vary, a fraction of requests can be failed
+with 429/5xx responses, and "stream": true requests are answered with
+server-sent event chunks. Requests with response_format json_object get a
+structured analysis as JSON. GET /mock/stats reports what was served.
+
+Library use:
+    with MockSiliconFlowServer(latency='lognormal:0.5,0.3', error_rates={429: 0.05}) as server:
+        client = SiliconFlowClient('test-key', base_url=server.base_url)
+
+Standalone (point the app's SiliconFlow base_url at http://127.0.0.1:8001/v1):
+    python benchmarks/mock_siliconflow.py --port 8001 --latency uniform:1,3 --errors 429=0.05,503=0.01
+"""
+
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional, Tuple, Union
+
+MOCK_COMPLETION = '## 分析结果\n\n文档结构清晰，主要内容包括研发效能指标与改进建议。'
+
+MOCK_STRUCTURED_COMPLETION = {
+    'summary': '文档结构清晰，主要内容包括研发效能指标与改进建议。',
+    'key_points': ['需求吞吐率保持稳定', '交付周期P75有所缩短'],
+    'risks': [{'description': '线上缺陷数量上升', 'severity': '中', 'mitigation': '加强回归测试'}],
+    'recommendations': ['持续跟踪Reopen率']
+}
+
+ERROR_MESSAGES = {
+    400: 'Bad request',
+    401: 'Invalid API key',
+    429: 'Rate limit exceeded, please retry later',
+    500: 'Internal server error',
+    502: 'Bad gateway',
+    503: 'Service temporarily unavailable',
+    504: 'Gateway timeout',
+}
+
+
+def parse_latency(spec: Union[str, float, int, None]) -> Callable[[random.Random], float]:
+    """
+    Build a latency sampler (seconds) from a distribution spec
+    
+    Specs:
+        0.5 or "fixed:0.5"        constant
+        "uniform:LOW,HIGH"        uniform between LOW and HIGH
+        "normal:MEAN,STDDEV"      normal, clipped at 0
+        "lognormal:MEDIAN,SIGMA"  log-normal with the given median and shape (heavy tail)
+        "exponential:MEAN"        exponential with the given mean
+    """
+    if spec is None:
+        return lambda rng: 0.0
+    if isinstance(spec, (int, float)):
+        value = float(spec)
+        return lambda rng: value
+    
+    kind, _, arguments = str(spec).partition(':')
+    if not arguments:
+        kind, arguments = 'fixed', kind
+    try:
+        values = [float(value) for value in arguments.split(',')]
+    except ValueError:
+        raise ValueError(f"Invalid latency spec: {spec}")
+    
+    kind = kind.strip().lower()
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal' and len(values) == 2 and values[0] > 0:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if kind in ('exponential', 'exp') and len(values) == 1 and values[0] > 0:
+        return lambda rng: rng.expovariate(1.0 / values[0])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def parse_error_rates(spec: Optional[str]) -> Dict[int, float]:
+    """Parse "429=0.05,503=0.01" into {status: probability}"""
+    rates = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        status, _, probability = item.partition('=')
+        rates[int(status)] = float(probability)
+    if sum(rates.values()) > 1:
+        raise ValueError("Error probabilities add up to more than 1")
+    return rates
+
+
+def parse_token_range(spec: Union[str, int, Tuple[int, int]]) -> Tuple[int, int]:
+    """Parse "300" or "200,800" into an inclusive (min, max) completion token range"""
+    if isinstance(spec, int):
+        return spec, spec
+    if isinstance(spec, tuple):
+        return spec
+    low, _, high = str(spec).partition(',')
+    return int(low), int(high or low)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def do_GET(self):
+        path = self.path.rstrip('/')
+        if path == '/mock/stats':
+            self._send_json(200, self.server.mock.get_stats())
+        elif path.endswith('/models'):
+            self._send_json(200, {'object': 'list', 'data': [{'id': self.server.mock.model, 'object': 'model'}]})
+        else:
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+    
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if not self.path.rstrip('/').endswith('/chat/completions'):
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+            return
+        try:
+            payload = json.loads(body or b'{}')
+        except ValueError:
+            self._send_json(400, {'error': {'message': 'Request body is not valid JSON'}})
+            return
+        
+        mock = self.server.mock
+        plan = mock.plan_request(payload)
+        try:
+            if plan['status'] != 200:
+                time.sleep(plan['latency'])
+                headers = {'Retry-After': '1'} if plan['status'] == 429 else None
+                self._send_json(plan['status'], {'error': {
+                    'message': ERROR_MESSAGES.get(plan['status'], 'Injected error'),
+                    'type': 'mock_injected_error',
+                    'code': plan['status']
+                }}, headers)
+            elif payload.get('stream'):
+                self._stream(plan)
+            else:
+                time.sleep(plan['latency'])
+                self._send_json(200, mock.completion_body(plan))
+        finally:
+            mock.finish_request(plan['status'])
+    
+    def _stream(self, plan):
+        """Send the completion as server-sent event chunks, ending with [DONE]"""
+        mock = self.server.mock
+        time.sleep(plan['latency'])
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.close_connection = True
+        
+        def send_event(data):
+            self.wfile.write(f'data: {data}\n\n'.encode('utf-8'))
+            self.wfile.flush()
+        
+        content = plan['content']
+        size = mock.stream_chunk_chars
+        for start in range(0, len(content), size):
+            send_event(json.dumps(mock.chunk_body(plan, {'content': content[start:start + size]}),
+                                  ensure_ascii=False))
+            if mock.stream_chunk_delay:
+                time.sleep(mock.stream_chunk_delay)
+        final = mock.chunk_body(plan, {}, finish_reason='stop')
+        final['usage'] = mock.usage(plan)
+        send_event(json.dumps(final, ensure_ascii=False))
+        send_event('[DONE]')
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Accept bursts of concurrent connections (the socketserver default backlog is 5)
+    request_queue_size = 512
+
+
+class MockSiliconFlowServer:
+    """Threaded mock API server on a local port (a free one by default)"""
+    
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: Union[str, float, None] = 0.0,
+                 error_rates: Optional[Dict[int, float]] = None,
+                 completion_tokens: Union[str, int, Tuple[int, int]] = (64, 64),
+                 stream_chunk_chars: int = 16, stream_chunk_delay: float = 0.0,
+                 model: str = 'mock-model', seed: Optional[int] = None):
+        """
+        Args:
+            host: Interface to listen on
+            port: Port (0 picks a free port)
+            latency: Seconds, or a distribution spec (see parse_latency)
+            error_rates: Probability of answering with each error status, e.g. {429: 0.05, 503: 0.01}
+            completion_tokens: Completion length in tokens, fixed or an inclusive (min, max) range
+            stream_chunk_chars: Characters per streamed chunk
+            stream_chunk_delay: Seconds between streamed chunks
+            model: Model name reported when the request does not name one
+            seed: Random seed for reproducible latency and error sequences
+        """
+        self.latency = parse_latency(latency)
+        self.error_rates = dict(error_rates or {})
+        self.completion_tokens = parse_token_range(completion_tokens)
+        self.stream_chunk_chars = max(1, stream_chunk_chars)
+        self.stream_chunk_delay = stream_chunk_delay
+        self.model = model
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._stats = {'requests': 0, 'in_flight': 0, 'max_in_flight': 0, 'statuses': {}}
+        
+        self._server = _Server((host, port), _Handler)
+        self._server.mock = self
+        self._thread = None
+    
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v1'
+    
+    @property
+    def requests(self) -> int:
+        return self._stats['requests']
+    
+    def plan_request(self, payload: dict) -> dict:
+        """Draw latency, outcome and completion length for one request"""
+        with self._lock:
+            self._stats['requests'] += 1
+            self._stats['in_flight'] += 1
+            self._stats['max_in_flight'] = max(self._stats['max_in_flight'], self._stats['in_flight'])
+            latency = self.latency(self._rng)
+            roll = self._rng.random()
+            tokens = self._rng.randint(*self.completion_tokens)
+        
+        status = 200
+        for error_status, probability in sorted(self.error_rates.items()):
+            if roll < probability:
+                status = error_status
+                break
+            roll -= probability
+        
+        prompt_chars = sum(len(str(message.get('content', ''))) for message in payload.get('messages', []))
+        if (payload.get('response_format') or {}).get('type') == 'json_object':
+            content = json.dumps(MOCK_STRUCTURED_COMPLETION, ensure_ascii=False)
+        else:
+            repeats = tokens * 2 // len(MOCK_COMPLETION) + 1
+            content = (MOCK_COMPLETION * repeats)[:max(1, tokens * 2)]
+        return {
+            'status': status,
+            'latency': latency,
+            'model': payload.get('model') or self.model,
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'prompt_tokens': max(1, prompt_chars // 2),
+            'completion_tokens': tokens,
+            'content': content
+        }
+    
+    def finish_request(self, status: int) -> None:
+        with self._lock:
+            self._stats['in_flight'] -= 1
+            self._stats['statuses'][status] = self._stats['statuses'].get(status, 0) + 1
+    
+    def usage(self, plan: dict) -> dict:
+        return {
+            'prompt_tokens': plan['prompt_tokens'],
+            'completion_tokens': plan['completion_tokens'],
+            'total_tokens': plan['prompt_tokens'] + plan['completion_tokens']
+        }
+    
+    def completion_body(self, plan: dict) -> dict:
+        return {
+            'id': plan['id'],
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': plan['model'],
+            'choices': [{
+                'index': 0,
+                'message': {'role': 'assistant', 'content': plan['content']},
+                'finish_reason': 'stop'
+            }],
+            'usage': self.usage(plan)
+        }
+    
+    def chunk_body(self, plan: dict, delta: dict, finish_reason: Optional[str] = None) -> dict:
+        return {
+            'id': plan['id'],
+            'object': 'chat.completion.chunk',
+            'created': int(time.time()),
+            'model': plan['model'],
+            'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}]
+        }
+    
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['statuses'] = {str(status): count for status, count in sorted(self._stats['statuses'].items())}
+        return stats
+    
+    def start(self) -> 'MockSiliconFlowServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+    
+    def __enter__(self):
+        return self.start()
+    
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a mock OpenAI-compatible chat completions server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', default='0', help='Seconds or distribution, e.g. lognormal:2,0.5')
+    parser.add_argument('--errors', default='', help='Injected error rates, e.g. 429=0.05,503=0.01')
+    parser.add_argument('--tokens', default='64', help='Completion tokens, fixed or MIN,MAX')
+    parser.add_argument('--chunk-chars', type=int, default=16, help='Characters per streamed chunk')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='Seconds between streamed chunks')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    
+    server = MockSiliconFlowServer(args.host, args.port, latency=args.latency,
+                                   error_rates=parse_error_rates(args.errors),
+                                   completion_tokens=parse_token_range(args.tokens),
+                                   stream_chunk_chars=args.chunk_chars, stream_chunk_delay=args.chunk_delay,
+                                   seed=args.seed)
+    print(f"Mock SiliconFlow API listening on {server.base_url} (stats at /mock/stats)")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._server.server_close()
+
+
+if __name__ == '__main__':
+    main()
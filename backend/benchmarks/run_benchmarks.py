@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Run all benchmark modules and compare the results with a JSON baseline
+
+Every benchmarks/bench_*.py module with a run(suite, options) function is
+run. Results are written to --output; with --save-baseline they replace the
+baseline instead. The exit status is 1 when any benchmark is slower than
+the baseline by more than --threshold, so the runner can gate CI.
+
+Usage:
+    python benchmarks/run_benchmarks.py --save-baseline
+    python benchmarks/run_benchmarks.py --rows 1e4,1e5,1e6 --scale large
+    python benchmarks/run_benchmarks.py --modules extraction,upload --filter pdf
+"""
+
+import argparse
+import glob
+import importlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import BenchmarkSuite, compare, load_baseline, save_results
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+
+def discover_modules(selected=None):
+    """Benchmark module names (bench_<name>.py), optionally limited to the selected names"""
+    names = sorted(os.path.basename(path)[len('bench_'):-len('.py')]
+                   for path in glob.glob(os.path.join(BENCHMARK_DIR, 'bench_*.py')))
+    if selected:
+        unknown = set(selected) - set(names)
+        if unknown:
+            raise SystemExit(f"Unknown benchmark modules: {', '.join(sorted(unknown))} (available: {', '.join(names)})")
+        names = [name for name in names if name in selected]
+    return names
+
+
+def parse_rows(value):
+    return [int(float(item)) for item in value.split(',') if item.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the backend benchmark suite')
+    parser.add_argument('--modules', type=lambda value: [item.strip() for item in value.split(',') if item.strip()],
+                        help='Comma-separated module names (e.g. extraction,dashboard_endpoints)')
+    parser.add_argument('--filter', help='Only run benchmarks whose name contains this text')
+    parser.add_argument('--rows', type=parse_rows, default=[10000, 100000],
+                        help='Comma-separated rows per dashboard table, e.g. 1e4,1e5,1e6,1e7')
+    parser.add_argument('--scale', choices=['small', 'large'], default='small', help='Document fixture size')
+    parser.add_argument('--repeat', type=int, default=20, help='Timed calls per benchmark')
+    parser.add_argument('--max-seconds', type=float, default=10.0, help='Time budget per benchmark')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write the results as the new baseline')
+    parser.add_argument('--output', help='Also write the results to this JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative slowdown of the median that counts as a regression')
+    parser.add_argument('--min-delta-ms', type=float, default=0.5,
+                        help='Absolute slowdown below which differences are ignored')
+    args = parser.parse_args()
+    
+    suite = BenchmarkSuite(repeat=args.repeat, max_seconds=args.max_seconds, only=args.filter)
+    with tempfile.TemporaryDirectory() as directory:
+        for name in discover_modules(args.modules):
+            module = importlib.import_module(f'benchmarks.bench_{name}')
+            if not hasattr(module, 'run'):
+                continue
+            print(f"== {name}")
+            options = argparse.Namespace(**vars(args), workdir=os.path.join(directory, name))
+            os.makedirs(options.workdir)
+            module.run(suite, options)
+    
+    document = suite.to_dict()
+    if args.output:
+        save_results(args.output, document)
+    
+    if args.save_baseline:
+        save_results(args.baseline, document)
+        print(f"Baseline written to {args.baseline} ({len(suite.results)} benchmarks)")
+        return 0
+    
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    
+    regressions = compare(suite.results, baseline, args.threshold, args.min_delta_ms)
+    for regression in regressions:
+        print(f"REGRESSION {regression.name}: {regression.baseline_ms:.3f} ms -> "
+              f"{regression.current_ms:.3f} ms ({regression.ratio:.2f}x)")
+    print(f"{len(suite.results)} benchmarks, {len(regressions)} regressions "
+          f"(threshold {args.threshold:.0%}, baseline {baseline.get('created')})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Gunicorn settings: gunicorn -c gunicorn.conf.py wsgi:application
+
+Each worker is a process running gthread worker threads. Requests are split
+into worker pools inside each process (WORKER_POOLS, see
+services/worker_pools.py) so long AI calls and report exports cannot take
+every thread from the dashboard queries; the thread count defaults to the
+sum of the pool limits plus headroom for unpooled requests.
+
+Graceful reload: `kill -HUP <master pid>` starts new workers with the
+reloaded configuration and stops the old ones once their in-flight requests
+finish (up to graceful_timeout). Because the app is preloaded in the master,
+code changes need a binary upgrade (`kill -USR2`, then `kill -QUIT` on the
+old master) or a restart.
+
+Metrics, traces and memory statistics are kept per worker process.
+"""
+
+import multiprocessing
+import os
+
+from services.worker_pools import parse_pool_limits, DEFAULT_POOL_LIMITS
+
+bind = os.environ.get('WEB_BIND', '0.0.0.0:5000')
+
+# Few processes (dashboard queries are CPU-bound but short), many threads (AI calls mostly wait on I/O)
+workers = int(os.environ.get('WEB_WORKERS', min(multiprocessing.cpu_count(), 4)))
+worker_class = 'gthread'
+threads = int(os.environ.get(
+    'WEB_THREADS', sum(parse_pool_limits(os.environ.get('WORKER_POOLS', DEFAULT_POOL_LIMITS)).values()) + 4
+))
+
+# AI calls may take up to the client timeout (120 s) plus retries
+timeout = int(os.environ.get('WEB_TIMEOUT', '300'))
+graceful_timeout = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '150'))
+keepalive = int(os.environ.get('WEB_KEEPALIVE', '5'))
+backlog = int(os.environ.get('WEB_BACKLOG', '1024'))
+
+# Load the app, database schema and static assets once before forking
+preload_app = True
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('WEB_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.environ.get('WEB_MAX_REQUESTS_JITTER', '200'))
+
+# Heartbeat files on tmpfs so a slow disk does not get workers killed
+if os.path.isdir('/dev/shm'):
+    worker_tmp_dir = '/dev/shm'
+
+accesslog = os.environ.get('WEB_ACCESS_LOG') or None
+errorlog = '-'
+loglevel = os.environ.get('WEB_LOG_LEVEL', 'info')
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Bulk import dashboard data (metrics, project_details, developer_rankings)
+
+Usage:
+    python ingest_metrics.py metrics export.csv
+    python ingest_metrics.py project_details export.jsonl --batch-size 10000
+    cat export.csv | python ingest_metrics.py developer_rankings - --format csv
+    python ingest_metrics.py project_details --dedupe --dry-run   # report duplicate keys
+    python ingest_metrics.py project_details --dedupe             # remove them and create the upsert index
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+
+from services.data_version import DataVersion
+from services.metrics_ingestor import (
+    DuplicateKeysError, InputEncodingError, MetricsIngestor, TABLE_SCHEMAS, detect_format
+)
+
+DEFAULT_DATABASE_PATH = os.path.join(os.path.dirname(__file__), '..', 'database', 'efficiency.db')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='批量导入研发效能看板数据')
+    parser.add_argument('table', choices=sorted(TABLE_SCHEMAS), help='目标数据表')
+    parser.add_argument('path', nargs='?', help="CSV/JSONL文件路径，'-'表示标准输入")
+    parser.add_argument('--format', choices=['csv', 'jsonl'], help='数据格式（默认按文件扩展名识别）')
+    parser.add_argument('--batch-size', type=int, default=5000, help='每个事务写入的行数')
+    parser.add_argument('--database', default=DEFAULT_DATABASE_PATH, help='SQLite数据库路径')
+    parser.add_argument('--dry-run', action='store_true', help='仅校验，不写入')
+    parser.add_argument('--dedupe', action='store_true',
+                        help='删除重复键的旧记录（保留最新一行，备份到 <表>_duplicates）并建立唯一索引；'
+                             '配合 --dry-run 仅报告')
+    args = parser.parse_args(argv)
+    
+    if not args.path and not args.dedupe:
+        parser.error('缺少文件路径')
+    
+    data_format = None
+    if args.path:
+        data_format = detect_format(args.format, None if args.path == '-' else args.path)
+        if not data_format:
+            parser.error('无法识别数据格式，请使用 --format 指定')
+    
+    if not os.path.exists(args.database):
+        parser.error(f'数据库不存在: {args.database}（请先启动一次服务完成初始化）')
+    
+    data_version = DataVersion()
+    ingestor = MetricsIngestor(data_version, batch_size=args.batch_size)
+    
+    conn = sqlite3.connect(args.database)
+    try:
+        cursor = conn.cursor()
+        data_version.create_table(cursor)
+        conn.commit()
+        
+        if args.dedupe:
+            report = ingestor.find_duplicates(cursor, args.table)
+            if not args.dry_run:
+                report['rows_deleted'] = ingestor.remove_duplicates(cursor, args.table)
+                report['indexed'] = ingestor.ensure_upsert_index(cursor, args.table)
+                conn.commit()
+            print(json.dumps(report, ensure_ascii=False, indent=2))
+            if not args.path:
+                return 0
+        
+        stream = sys.stdin.buffer if args.path == '-' else open(args.path, 'rb')
+        try:
+            result = ingestor.ingest(conn, args.table, ingestor.iter_records(stream, data_format),
+                                     dry_run=args.dry_run)
+        except DuplicateKeysError as e:
+            print(f'导入失败: {e}', file=sys.stderr)
+            return 2
+        except InputEncodingError as e:
+            print(f'导入中止: 第{e.line}行不是UTF-8编码', file=sys.stderr)
+            print(json.dumps(e.result.to_dict(), ensure_ascii=False, indent=2))
+            return 2
+        finally:
+            if stream is not sys.stdin.buffer:
+                stream.close()
+    finally:
+        conn.close()
+    
+    print(json.dumps(result.to_dict(), ensure_ascii=False, indent=2))
+    return 1 if result.rows_rejected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,267 @@
+import math
+from typing import Optional, Dict, Any, List, Iterable, Tuple
+from datetime import datetime, timedelta
+
+
+class LatencySketch:
+    """
+    Streaming quantile sketch with relative accuracy guarantees
+    
+    Values are mapped to logarithmic buckets (as in DDSketch), so any
+    quantile is estimated within the configured relative error, the number
+    of buckets stays small (a few hundred for seconds-to-hours latencies)
+    and values can be removed again when their source rows are deleted.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01, min_value: float = 0.001):
+        if not 0 < relative_accuracy < 1:
+            raise ValueError("relative_accuracy must be between 0 and 1")
+        
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        self.buckets: Dict[int, int] = {}
+    
+    def bucket_index(self, value: float) -> int:
+        """Get the bucket index for a value"""
+        value = max(value, self.min_value)
+        return int(math.ceil(math.log(value) / self._log_gamma))
+    
+    def bucket_value(self, index: int) -> float:
+        """Get the representative value of a bucket"""
+        return 2 * self.gamma ** index / (self.gamma + 1)
+    
+    def add(self, value: float, count: int = 1) -> None:
+        """Add a value to the sketch"""
+        index = self.bucket_index(value)
+        self.buckets[index] = self.buckets.get(index, 0) + count
+    
+    def remove(self, value: float, count: int = 1) -> None:
+        """Remove a previously added value from the sketch"""
+        index = self.bucket_index(value)
+        remaining = self.buckets.get(index, 0) - count
+        if remaining > 0:
+            self.buckets[index] = remaining
+        else:
+            self.buckets.pop(index, None)
+    
+    @property
+    def count(self) -> int:
+        """Number of values in the sketch"""
+        return sum(self.buckets.values())
+    
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate a quantile
+        
+        Args:
+            q: Quantile between 0 and 1
+        
+        Returns:
+            Estimated value, or None if the sketch is empty
+        """
+        total = self.count
+        if total == 0:
+            return None
+        
+        rank = q * (total - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return self.bucket_value(index)
+        
+        return self.bucket_value(max(self.buckets))
+    
+    @classmethod
+    def from_buckets(cls, buckets: Iterable[Tuple[int, int]], **kwargs) -> 'LatencySketch':
+        """Build a sketch from stored (bucket, count) pairs"""
+        sketch = cls(**kwargs)
+        for index, count in buckets:
+            if count > 0:
+                sketch.buckets[index] = count
+        return sketch
+
+
+class AnalysisStatsRecorder:
+    """
+    Incrementally maintained statistics for the AI analysis module
+    
+    All update methods take the cursor of the caller's transaction, so the
+    counters commit or roll back together with the rows they describe.
+    """
+    
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._sketch = LatencySketch(relative_accuracy)
+    
+    def create_tables(self, cursor) -> bool:
+        """
+        Create statistics tables
+        
+        Returns:
+            True if the tables were newly created and need a backfill
+        """
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'ai_analysis_stats'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_analysis_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                succeeded_total INTEGER NOT NULL DEFAULT 0,
+                failed_total INTEGER NOT NULL DEFAULT 0,
+                processing_time_sum REAL NOT NULL DEFAULT 0,
+                processing_time_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_analysis_daily_stats (
+                day TEXT PRIMARY KEY,
+                analyses INTEGER NOT NULL DEFAULT 0,
+                failures INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_latency_buckets (
+                bucket INTEGER PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO ai_analysis_stats (id) VALUES (1)')
+        
+        return not exists
+    
+    def rebuild(self, cursor) -> None:
+        """Rebuild statistics from the stored analysis results"""
+        cursor.execute('DELETE FROM ai_analysis_daily_stats')
+        cursor.execute('DELETE FROM ai_latency_buckets')
+        cursor.execute('''
+            UPDATE ai_analysis_stats SET
+                succeeded_total = (SELECT COUNT(*) FROM ai_analysis_results),
+                failed_total = 0,
+                processing_time_sum = (SELECT COALESCE(SUM(processing_time), 0) FROM ai_analysis_results),
+                processing_time_count = (SELECT COUNT(processing_time) FROM ai_analysis_results)
+            WHERE id = 1
+        ''')
+        cursor.execute('''
+            INSERT INTO ai_analysis_daily_stats (day, analyses)
+            SELECT DATE(created_at), COUNT(*) FROM ai_analysis_results GROUP BY DATE(created_at)
+        ''')
+        
+        sketch = LatencySketch(self.relative_accuracy)
+        cursor.execute('SELECT processing_time FROM ai_analysis_results WHERE processing_time IS NOT NULL')
+        for (processing_time,) in cursor.fetchall():
+            sketch.add(processing_time)
+        cursor.executemany(
+            'INSERT INTO ai_latency_buckets (bucket, count) VALUES (?, ?)',
+            list(sketch.buckets.items())
+        )
+    
+    def record_analysis(self, cursor, created_at: datetime, processing_time: Optional[float]) -> None:
+        """Record a stored successful analysis"""
+        has_time = processing_time is not None
+        cursor.execute('''
+            UPDATE ai_analysis_stats SET
+                succeeded_total = succeeded_total + 1,
+                processing_time_sum = processing_time_sum + ?,
+                processing_time_count = processing_time_count + ?
+            WHERE id = 1
+        ''', (processing_time if has_time else 0, 1 if has_time else 0))
+        cursor.execute('''
+            INSERT INTO ai_analysis_daily_stats (day, analyses) VALUES (?, 1)
+            ON CONFLICT(day) DO UPDATE SET analyses = analyses + 1
+        ''', (self._day(created_at),))
+        
+        if has_time:
+            cursor.execute('''
+                INSERT INTO ai_latency_buckets (bucket, count) VALUES (?, 1)
+                ON CONFLICT(bucket) DO UPDATE SET count = count + 1
+            ''', (self._sketch.bucket_index(processing_time),))
+    
+    def record_failure(self, cursor, created_at: datetime = None) -> None:
+        """Record a failed analysis (failures are not stored as results)"""
+        cursor.execute('UPDATE ai_analysis_stats SET failed_total = failed_total + 1 WHERE id = 1')
+        cursor.execute('''
+            INSERT INTO ai_analysis_daily_stats (day, failures) VALUES (?, 1)
+            ON CONFLICT(day) DO UPDATE SET failures = failures + 1
+        ''', (self._day(created_at or datetime.now()),))
+    
+    def remove_analyses(self, cursor, rows: List[Tuple[Any, Optional[float]]]) -> None:
+        """
+        Remove deleted analysis results from the statistics
+        
+        The lifetime success/failure totals are kept, so deleting history
+        does not change the success rate.
+        
+        Args:
+            cursor: SQLite cursor
+            rows: List of (created_at, processing_time) of the deleted results
+        """
+        for created_at, processing_time in rows:
+            if processing_time is not None:
+                cursor.execute('''
+                    UPDATE ai_analysis_stats SET
+                        processing_time_sum = processing_time_sum - ?,
+                        processing_time_count = processing_time_count - 1
+                    WHERE id = 1
+                ''', (processing_time,))
+                cursor.execute(
+                    'UPDATE ai_latency_buckets SET count = count - 1 WHERE bucket = ?',
+                    (self._sketch.bucket_index(processing_time),)
+                )
+            cursor.execute(
+                'UPDATE ai_analysis_daily_stats SET analyses = analyses - 1 WHERE day = ?',
+                (self._day(created_at),)
+            )
+        cursor.execute('DELETE FROM ai_latency_buckets WHERE count <= 0')
+    
+    def read_stats(self, cursor, recent_days: int = 7) -> Dict[str, Any]:
+        """
+        Read the maintained statistics
+        
+        Returns:
+            Dictionary with success rate, processing time and latency percentiles
+        """
+        cursor.execute('''
+            SELECT succeeded_total, failed_total, processing_time_sum, processing_time_count
+            FROM ai_analysis_stats WHERE id = 1
+        ''')
+        succeeded, failed, time_sum, time_count = cursor.fetchone() or (0, 0, 0, 0)
+        
+        cursor.execute('SELECT bucket, count FROM ai_latency_buckets')
+        sketch = LatencySketch.from_buckets(cursor.fetchall(), relative_accuracy=self.relative_accuracy)
+        
+        since = (datetime.now() - timedelta(days=recent_days)).strftime('%Y-%m-%d')
+        cursor.execute('''
+            SELECT day, analyses FROM ai_analysis_daily_stats
+            WHERE day >= ? AND analyses > 0
+            ORDER BY day DESC
+        ''', (since,))
+        recent = [{'date': row[0], 'count': row[1]} for row in cursor.fetchall()]
+        
+        attempts = succeeded + failed
+        return {
+            'succeeded_total': succeeded,
+            'failed_total': failed,
+            'success_rate': round(succeeded * 100.0 / attempts, 1) if attempts else 0,
+            'average_processing_time': round(time_sum / time_count, 2) if time_count else 0,
+            'latency_percentiles': {
+                'p50': self._round(sketch.quantile(0.50)),
+                'p95': self._round(sketch.quantile(0.95)),
+                'p99': self._round(sketch.quantile(0.99))
+            },
+            'recent_analyses': recent
+        }
+    
+    @staticmethod
+    def _day(created_at) -> str:
+        """Get the day key for a timestamp (datetime or stored string)"""
+        if isinstance(created_at, datetime):
+            return created_at.strftime('%Y-%m-%d')
+        return str(created_at)[:10]
+    
+    @staticmethod
+    def _round(value: Optional[float]) -> Optional[float]:
+        """Round an optional value for display"""
+        return round(value, 2) if value is not None else None
\ No newline at end of file
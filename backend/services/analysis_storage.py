@@ -0,0 +1,237 @@
+import zlib
+import hashlib
+import logging
+from typing import Optional, Tuple, Union
+
+# Optional faster codec; zlib from the standard library is always available
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+ENCODING_PLAIN = 'plain'
+ENCODING_ZLIB = 'zlib'
+ENCODING_ZSTD = 'zstd'
+
+# Recorded in ai_schema_migrations once legacy rows are converted
+COMPACT_STORAGE_MIGRATION = 'compact_analysis_storage'
+
+
+def compress_text(text: str, threshold: int = 1024, level: int = None) -> Tuple[Union[str, bytes], str]:
+    """
+    Compress text for storage if it is large enough to benefit
+    
+    Args:
+        text: Text to store
+        threshold: Minimum UTF-8 size in bytes before compression is attempted
+        level: Compression level (codec default if None)
+    
+    Returns:
+        Tuple of (stored_value, encoding); short or incompressible text is
+        returned unchanged with encoding 'plain'
+    """
+    raw = (text or '').encode('utf-8')
+    if len(raw) < threshold:
+        return text, ENCODING_PLAIN
+    
+    if zstandard is not None:
+        compressed = zstandard.ZstdCompressor(level=level or 3).compress(raw)
+        encoding = ENCODING_ZSTD
+    else:
+        compressed = zlib.compress(raw, level or 6)
+        encoding = ENCODING_ZLIB
+    
+    if len(compressed) >= len(raw):
+        return text, ENCODING_PLAIN
+    
+    return compressed, encoding
+
+
+def decompress_text(value: Union[str, bytes, None], encoding: Optional[str]) -> str:
+    """
+    Restore text stored by compress_text
+    
+    Args:
+        value: Stored value
+        encoding: Stored encoding ('plain', 'zlib', 'zstd'; None for legacy rows)
+    
+    Returns:
+        Original text
+    
+    Raises:
+        ValueError: If the encoding is unknown or its codec is not installed
+    """
+    if value is None:
+        return ''
+    
+    if encoding in (None, ENCODING_PLAIN):
+        return value.decode('utf-8') if isinstance(value, bytes) else value
+    
+    if encoding == ENCODING_ZLIB:
+        return zlib.decompress(value).decode('utf-8')
+    
+    if encoding == ENCODING_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstandard is required to read zstd-compressed analysis text")
+        return zstandard.ZstdDecompressor().decompress(value).decode('utf-8')
+    
+    raise ValueError(f"Unknown text encoding: {encoding}")
+
+
+def register_functions(connection) -> None:
+    """
+    Make decompress_text(value, encoding) available to SQL on a connection
+    
+    The search index reads analysis text through a view using it, so every
+    connection that writes analysis results needs it registered.
+    """
+    connection.create_function('decompress_text', 2, decompress_text, deterministic=True)
+
+
+class AnalysisStorage:
+    """
+    Compact storage of analysis results
+    
+    Prompts are interned into ai_prompts and referenced by id, and large
+    analysis bodies are stored compressed in analysis_text with their codec
+    recorded in text_encoding. The summary is stored separately, and
+    structured analyses are kept as plain JSON in analysis_json so they can
+    be read and filtered (SQLite JSON functions) without decompressing or
+    scanning the text.
+    """
+    
+    def __init__(self, compression_threshold: int = 1024, compression_level: int = None,
+                 migration_batch_size: int = 500):
+        """
+        Initialize analysis storage
+        
+        Args:
+            compression_threshold: Minimum analysis size in bytes to compress
+            compression_level: Codec compression level (codec default if None)
+            migration_batch_size: Rows rewritten (and committed) per batch during migration
+        """
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.migration_batch_size = migration_batch_size
+        self.logger = logging.getLogger(__name__)
+    
+    def create_tables(self, cursor) -> None:
+        """Create the prompt and migration tables and the storage columns of ai_analysis_results"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_schema_migrations (
+                name TEXT PRIMARY KEY,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_prompts (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                prompt_hash TEXT NOT NULL UNIQUE,
+                prompt_text TEXT NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        
+        cursor.execute("PRAGMA table_info(ai_analysis_results)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'prompt_id' not in columns:
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN prompt_id INTEGER REFERENCES ai_prompts (id)')
+        if 'text_encoding' not in columns:
+            # Left NULL for existing rows so migrate() can find them
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN text_encoding TEXT')
+        if 'summary' not in columns:
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN summary TEXT')
+        if 'analysis_json' not in columns:
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN analysis_json TEXT')
+    
+    def encode_text(self, text: str) -> Tuple[Union[str, bytes], str]:
+        """Encode analysis text for storage"""
+        return compress_text(text, self.compression_threshold, self.compression_level)
+    
+    @staticmethod
+    def decode_text(value: Union[str, bytes, None], encoding: Optional[str]) -> str:
+        """Decode stored analysis text"""
+        return decompress_text(value, encoding)
+    
+    @staticmethod
+    def prompt_hash(prompt: str) -> str:
+        """Digest used to deduplicate prompts"""
+        return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+    
+    def intern_prompt(self, cursor, prompt: Optional[str]) -> Optional[int]:
+        """
+        Get the id of a prompt, storing it on first use
+        
+        Args:
+            cursor: SQLite cursor
+            prompt: Prompt text
+        
+        Returns:
+            Prompt id, or None for an empty prompt
+        """
+        if not prompt:
+            return None
+        
+        prompt_hash = self.prompt_hash(prompt)
+        cursor.execute('''
+            INSERT INTO ai_prompts (prompt_hash, prompt_text) VALUES (?, ?)
+            ON CONFLICT(prompt_hash) DO NOTHING
+        ''', (prompt_hash, prompt))
+        cursor.execute('SELECT id FROM ai_prompts WHERE prompt_hash = ?', (prompt_hash,))
+        return cursor.fetchone()[0]
+    
+    def migrate(self, cursor) -> int:
+        """
+        Convert legacy rows (inline prompt, uncompressed text) once
+        
+        Legacy rows are those without a text_encoding. Each batch is
+        committed on its own, so an interrupted migration resumes where it
+        stopped; completion is recorded in ai_schema_migrations and later
+        calls return immediately. Freed pages are reused by later inserts;
+        run VACUUM (and rebuild the search index, which is keyed by rowid)
+        to shrink the database file.
+        
+        Returns:
+            Number of migrated rows
+        """
+        cursor.execute('SELECT 1 FROM ai_schema_migrations WHERE name = ?', (COMPACT_STORAGE_MIGRATION,))
+        if cursor.fetchone():
+            return 0
+        
+        migrated = 0
+        last_rowid = 0
+        while True:
+            cursor.execute('''
+                SELECT rowid, analysis_text, prompt_used
+                FROM ai_analysis_results
+                WHERE text_encoding IS NULL AND rowid > ?
+                ORDER BY rowid
+                LIMIT ?
+            ''', (last_rowid, self.migration_batch_size))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            
+            updates = []
+            for rowid, analysis_text, prompt_used in rows:
+                value, encoding = self.encode_text(analysis_text)
+                prompt_id = self.intern_prompt(cursor, prompt_used)
+                updates.append((value, encoding, prompt_id, None if prompt_id else prompt_used, rowid))
+            
+            cursor.executemany('''
+                UPDATE ai_analysis_results
+                SET analysis_text = ?, text_encoding = ?, prompt_id = ?, prompt_used = ?
+                WHERE rowid = ?
+            ''', updates)
+            
+            cursor.connection.commit()
+            migrated += len(rows)
+            last_rowid = rows[-1][0]
+        
+        cursor.execute('INSERT INTO ai_schema_migrations (name) VALUES (?)', (COMPACT_STORAGE_MIGRATION,))
+        cursor.connection.commit()
+        if migrated:
+            self.logger.info(f"Migrated {migrated} analysis results to compact storage")
+        
+        return migrated
@@ -1,11 +1,57 @@
 import json
+import logging
 import os
 import sqlite3
-from typing import Optional
+import threading
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Callable, List, Mapping, Optional, Tuple
 from datetime import datetime
 
+
+def _freeze(value: Any) -> Any:
+    """Read-only deep copy of parsed JSON (objects become mapping proxies, arrays tuples)"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _thaw(value: Any) -> Any:
+    """Mutable deep copy of a frozen configuration value"""
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """One consistent version of the configuration file and the stored custom prompt"""
+    version: int
+    config: Mapping[str, Any]
+    custom_prompt: Optional[str] = None
+    file_stamp: Optional[Tuple[int, int]] = None  # (mtime_ns, size) of the file the config was read from
+
+
 class ConfigManager:
-    """Configuration manager for AI analysis module"""
+    """
+    Configuration manager for AI analysis module
+    
+    The configuration file and the custom prompt stored in the database are
+    held as one immutable, versioned snapshot that is replaced as a whole, so
+    concurrent readers never see a half-updated configuration, reads take no
+    lock and no read touches the disk after the first load. Section getters
+    return copies callers may modify freely.
+    
+    Changes are published as new snapshot versions and broadcast to the
+    subscribed listeners: prompt changes made through set_custom_prompt and
+    clear_custom_prompt immediately, edits of the configuration file and
+    prompt changes made by other processes when the background watcher
+    (ensure_watching) notices them.
+    """
     
     def __init__(self, config_file_path: str = None, database_path: str = None):
         self.config_file_path = config_file_path or os.path.join(
@@ -14,19 +60,160 @@ class ConfigManager:
         self.database_path = database_path or os.path.join(
             os.path.dirname(__file__), '..', '..', 'database', 'efficiency.db'
         )
-        self._config_cache = None
+        self._snapshot: Optional[ConfigSnapshot] = None
+        self._lock = threading.RLock()
+        self._listeners: List[Callable[[ConfigSnapshot, ConfigSnapshot], None]] = []
+        self._ensured_dirs = set()
+        self._failed_stamp = None
+        self._watch_pid = None
+        self._watch_stop = threading.Event()
+        self.logger = logging.getLogger(__name__)
+    
+    def _read_config_file(self) -> Tuple[Mapping[str, Any], Tuple[int, int]]:
+        """Parse the configuration file into a frozen mapping and its (mtime_ns, size) stamp"""
+        try:
+            stat = os.stat(self.config_file_path)
+            with open(self.config_file_path, 'r', encoding='utf-8') as f:
+                return _freeze(json.load(f)), (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Configuration file not found: {self.config_file_path}")
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in configuration file: {e}")
+    
+    def _read_custom_prompt(self) -> Optional[str]:
+        """Read the latest custom prompt from the database (raises sqlite3.Error)"""
+        conn = sqlite3.connect(self.database_path)
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                'SELECT custom_prompt FROM ai_config ORDER BY updated_at DESC LIMIT 1'
+            )
+            result = cursor.fetchone()
+        finally:
+            conn.close()
+        return result[0] if result and result[0] else None
+    
+    def get_snapshot(self) -> ConfigSnapshot:
+        """Current configuration snapshot, loaded on first use"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    config, stamp = self._read_config_file()
+                    try:
+                        custom_prompt = self._read_custom_prompt()
+                    except sqlite3.Error:
+                        # Database not initialized yet; the watcher picks the prompt up later
+                        custom_prompt = None
+                    self._snapshot = ConfigSnapshot(1, config, custom_prompt, stamp)
+                snapshot = self._snapshot
+        return snapshot
+    
+    def _load_config_file(self) -> Mapping[str, Any]:
+        """Configuration file contents of the current snapshot (read-only)"""
+        return self.get_snapshot().config
+    
+    def subscribe(self, listener: Callable[[ConfigSnapshot, ConfigSnapshot], None]) -> None:
+        """
+        Register a callback invoked as listener(previous, current) for every new snapshot
+        
+        Listeners run in publish order while the snapshot is being swapped, so
+        they must be quick (e.g. swap a prebuilt object) and must not publish.
+        """
+        self._listeners.append(listener)
+    
+    def _publish(self, **changes: Any) -> ConfigSnapshot:
+        """Swap in a new snapshot version with the given fields changed and notify listeners"""
+        with self._lock:
+            previous = self.get_snapshot()
+            snapshot = replace(previous, version=previous.version + 1, **changes)
+            self._snapshot = snapshot
+            for listener in list(self._listeners):
+                try:
+                    listener(previous, snapshot)
+                except Exception:
+                    self.logger.exception("Configuration listener failed")
+        return snapshot
+    
+    def reload(self) -> ConfigSnapshot:
+        """
+        Re-read the configuration file and publish it as a new snapshot
+        
+        Readers holding the previous snapshot keep a consistent view; the
+        old snapshot stays in place if the file cannot be parsed.
+        """
+        with self._lock:
+            config, stamp = self._read_config_file()
+            return self._publish(config=config, file_stamp=stamp)
     
-    def _load_config_file(self) -> dict:
-        """Load configuration from JSON file"""
-        if self._config_cache is None:
+    def check_for_changes(self) -> bool:
+        """
+        Reload the configuration file if its modification time or size changed,
+        and pick up custom prompt changes made by other processes
+        
+        Returns:
+            True when a new snapshot was published
+        """
+        snapshot = self.get_snapshot()
+        changed = False
+        try:
+            stat = os.stat(self.config_file_path)
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        
+        if stamp is not None and stamp != snapshot.file_stamp and stamp != self._failed_stamp:
             try:
-                with open(self.config_file_path, 'r', encoding='utf-8') as f:
-                    self._config_cache = json.load(f)
-            except FileNotFoundError:
-                raise FileNotFoundError(f"Configuration file not found: {self.config_file_path}")
-            except json.JSONDecodeError as e:
-                raise ValueError(f"Invalid JSON in configuration file: {e}")
-        return self._config_cache
+                self.reload()
+                self._failed_stamp = None
+                changed = True
+            except (FileNotFoundError, ValueError) as e:
+                # Keep serving the last good configuration; report each broken version once
+                self._failed_stamp = stamp
+                self.logger.warning(f"Keeping previous configuration: {e}")
+        
+        # A prompt published while the database is read (set_custom_prompt)
+        # is newer than the value read, so it must not be overwritten
+        version = self.get_snapshot().version
+        try:
+            custom_prompt = self._read_custom_prompt()
+        except sqlite3.Error:
+            return changed
+        with self._lock:
+            current = self.get_snapshot()
+            if current.version == version and custom_prompt != current.custom_prompt:
+                self._publish(custom_prompt=custom_prompt)
+                changed = True
+        return changed
+    
+    def ensure_watching(self, interval: float = 2.0) -> None:
+        """
+        Start the background watcher of this process unless it is running
+        
+        Cheap enough to call on every request. Threads do not survive fork,
+        so a forked worker starts its own watcher on its first call.
+        """
+        if interval <= 0 or self._watch_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watch_pid == os.getpid():
+                return
+            self._watch_pid = os.getpid()
+            self._watch_stop = threading.Event()
+            threading.Thread(target=self._watch, args=(interval, self._watch_stop),
+                             name='config-watcher', daemon=True).start()
+    
+    def stop_watching(self) -> None:
+        with self._lock:
+            self._watch_stop.set()
+            self._watch_pid = None
+    
+    def _watch(self, interval: float, stop: threading.Event) -> None:
+        while not stop.wait(interval):
+            try:
+                self.check_for_changes()
+            except Exception:
+                self.logger.exception("Configuration check failed")
     
     def get_api_key(self) -> str:
         """Get SiliconFlow API key from configuration"""
@@ -44,33 +231,19 @@ class ConfigManager:
     def get_siliconflow_config(self) -> dict:
         """Get complete SiliconFlow configuration"""
         config = self._load_config_file()
-        return config.get('siliconflow', {})
+        return _thaw(config.get('siliconflow', {}))
     
     def get_file_processing_config(self) -> dict:
         """Get file processing configuration"""
         config = self._load_config_file()
-        return config.get('file_processing', {})
+        return _thaw(config.get('file_processing', {}))
     
     def get_custom_prompt(self) -> Optional[str]:
-        """Get custom prompt from database, fallback to config file"""
-        try:
-            conn = sqlite3.connect(self.database_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT custom_prompt FROM ai_config ORDER BY updated_at DESC LIMIT 1'
-            )
-            result = cursor.fetchone()
-            conn.close()
-            
-            if result and result[0]:
-                return result[0]
-        except sqlite3.Error:
-            # If database query fails, fallback to config file
-            pass
-        
-        # Fallback to config file
-        config = self._load_config_file()
-        return config.get('prompts', {}).get('custom')
+        """Get custom prompt stored in the database, fallback to config file"""
+        snapshot = self.get_snapshot()
+        if snapshot.custom_prompt:
+            return snapshot.custom_prompt
+        return snapshot.config.get('prompts', {}).get('custom')
     
     def get_default_prompt(self) -> str:
         """Get default prompt from configuration"""
@@ -123,6 +296,8 @@ class ConfigManager:
             conn.close()
         except sqlite3.Error as e:
             raise RuntimeError(f"Failed to save custom prompt: {e}")
+        
+        self._publish(custom_prompt=prompt.strip())
     
     def clear_custom_prompt(self) -> None:
         """Clear custom prompt (will use default)"""
@@ -138,6 +313,8 @@ class ConfigManager:
             conn.close()
         except sqlite3.Error as e:
             raise RuntimeError(f"Failed to clear custom prompt: {e}")
+        
+        self._publish(custom_prompt=None)
     
     def get_max_file_size(self) -> int:
         """Get maximum file size in bytes"""
@@ -147,16 +324,18 @@ class ConfigManager:
     def get_supported_formats(self) -> list:
         """Get list of supported file formats"""
         config = self._load_config_file()
-        return config.get('file_processing', {}).get('supported_formats', 
-                         ['pdf', 'md', 'xlsx', 'xls', 'docx', 'doc', 'txt'])
+        return list(config.get('file_processing', {}).get('supported_formats', 
+                              ['pdf', 'md', 'xlsx', 'xls', 'docx', 'doc', 'txt']))
     
     def get_temp_dir(self) -> str:
         """Get temporary directory for file uploads"""
         config = self._load_config_file()
         temp_dir = config.get('file_processing', {}).get('temp_dir', 'temp/uploads')
         
-        # Ensure directory exists
-        os.makedirs(temp_dir, exist_ok=True)
+        # Ensure directory exists (once per directory)
+        if temp_dir not in self._ensured_dirs:
+            os.makedirs(temp_dir, exist_ok=True)
+            self._ensured_dirs.add(temp_dir)
         return temp_dir
     
     def _validate_api_key_format(self, api_key: str) -> bool:
@@ -1,8 +1,12 @@
 import os
+import re
+import hashlib
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from dataclasses import dataclass
 
+from services.tracing import traced, set_span_attributes
+
 # File processing libraries
 try:
     import PyPDF2
@@ -36,6 +40,19 @@ class ExtractionResult:
     metadata: Optional[Dict[str, Any]] = None
 
 
+@dataclass
+class ContentSection:
+    """A section of extracted content used for incremental analysis"""
+    title: str
+    content: str
+    digest: str
+
+
+# Section boundaries: page/table/sheet markers emitted by the extractors and
+# Markdown headings
+SECTION_MARKER_PATTERN = re.compile(r'^(--- .+ ---|#{1,6}\s+\S.*)$')
+
+
 class ContentExtractor:
     """Extract text content from various file formats"""
     
@@ -59,6 +76,7 @@ class ContentExtractor:
         if missing_deps:
             self.logger.warning(f"Missing dependencies: {', '.join(missing_deps)}")
     
+    @traced('content.extract')
     def extract_content(self, file_path: str, file_type: str) -> ExtractionResult:
         """
         Extract content from file based on type
@@ -77,6 +95,7 @@ class ContentExtractor:
                 error_message=f"File not found: {file_path}"
             )
         
+        set_span_attributes(file_type=file_type)
         try:
             if file_type == 'pdf':
                 return self.extract_pdf(file_path)
@@ -106,6 +125,7 @@ class ContentExtractor:
                 error_message=f"Extraction failed: {str(e)}"
             )
     
+    @traced('content.extract_pdf')
     def extract_pdf(self, file_path: str) -> ExtractionResult:
         """
         Extract text content from PDF file
@@ -130,6 +150,7 @@ class ContentExtractor:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 metadata["pages"] = len(pdf_reader.pages)
+                set_span_attributes(pages=metadata["pages"])
                 
                 for page_num, page in enumerate(pdf_reader.pages):
                     try:
@@ -142,6 +163,7 @@ class ContentExtractor:
                         continue
             
             content = "\n\n".join(content_parts)
+            set_span_attributes(chars=len(content))
             
             if not content.strip():
                 return ExtractionResult(
@@ -164,6 +186,7 @@ class ContentExtractor:
                 error_message=f"PDF extraction failed: {str(e)}"
             )
     
+    @traced('content.extract_word')
     def extract_word(self, file_path: str) -> ExtractionResult:
         """
         Extract text content from Word document
@@ -234,6 +257,7 @@ class ContentExtractor:
                 error_message=f"Word document extraction failed: {str(e)}"
             )
     
+    @traced('content.extract_excel')
     def extract_excel(self, file_path: str) -> ExtractionResult:
         """
         Extract data from Excel file
@@ -471,4 +495,100 @@ class ContentExtractor:
             True if extraction is supported
         """
         supported = self.get_supported_formats()
-        return supported.get(file_type, False)
\ No newline at end of file
+        return supported.get(file_type, False)
+    
+    def split_sections(self, content: str, min_section_length: int = 200,
+                       max_section_length: int = 6000) -> List[ContentSection]:
+        """
+        Split extracted content into sections for incremental analysis
+        
+        Sections start at the page/table/sheet markers produced by the
+        extractors or at Markdown headings. Very short sections are merged
+        into the following one and very long sections are split on paragraph
+        boundaries, so an edit only changes the digest of the sections it
+        touches.
+        
+        Args:
+            content: Extracted content
+            min_section_length: Sections shorter than this are merged forward
+            max_section_length: Sections longer than this are split
+            
+        Returns:
+            List of ContentSection objects in document order
+        """
+        if not content or not content.strip():
+            return []
+        
+        # Split on markers
+        raw_sections = []
+        title = ''
+        lines = []
+        for line in content.splitlines():
+            stripped = line.strip()
+            if SECTION_MARKER_PATTERN.match(stripped):
+                if any(l.strip() for l in lines):
+                    raw_sections.append((title, '\n'.join(lines).strip()))
+                title = stripped.strip('-# ').strip()
+                lines = [line]
+            else:
+                lines.append(line)
+        if any(l.strip() for l in lines):
+            raw_sections.append((title, '\n'.join(lines).strip()))
+        
+        # Merge short sections forward
+        merged = []
+        pending_title = None
+        pending_parts = []
+        for section_title, text in raw_sections:
+            if pending_title is None:
+                pending_title = section_title
+            pending_parts.append(text)
+            if sum(len(part) for part in pending_parts) >= min_section_length:
+                merged.append((pending_title, '\n\n'.join(pending_parts)))
+                pending_title = None
+                pending_parts = []
+        if pending_parts:
+            if merged:
+                last_title, last_text = merged[-1]
+                merged[-1] = (last_title, '\n\n'.join([last_text] + pending_parts))
+            else:
+                merged.append((pending_title, '\n\n'.join(pending_parts)))
+        
+        # Split long sections on paragraph boundaries
+        sections = []
+        for section_title, text in merged:
+            for index, chunk in enumerate(self._split_long_text(text, max_section_length)):
+                chunk_title = section_title or f"第{len(sections) + 1}部分"
+                if index > 0:
+                    chunk_title = f"{chunk_title} ({index + 1})"
+                sections.append(ContentSection(
+                    title=chunk_title,
+                    content=chunk,
+                    digest=hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+                ))
+        
+        return sections
+    
+    def _split_long_text(self, text: str, max_length: int) -> List[str]:
+        """Split text into chunks of at most max_length on paragraph boundaries"""
+        if len(text) <= max_length:
+            return [text]
+        
+        chunks = []
+        current = ''
+        for paragraph in re.split(r'\n\s*\n', text):
+            while len(paragraph) > max_length:
+                if current:
+                    chunks.append(current)
+                    current = ''
+                chunks.append(paragraph[:max_length])
+                paragraph = paragraph[max_length:]
+            if current and len(current) + len(paragraph) + 2 > max_length:
+                chunks.append(current)
+                current = paragraph
+            else:
+                current = f"{current}\n\n{paragraph}" if current else paragraph
+        if current:
+            chunks.append(current)
+        
+        return chunks
@@ -0,0 +1,335 @@
+import sqlite3
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from services.data_version import DataVersion
+
+
+METRIC_COLUMNS = (
+    'requirement_throughput', 'monthly_delivered_requirements', 'monthly_new_requirements',
+    'delivery_cycle_p75', 'online_defects', 'reopen_rate', 'emergency_releases',
+    'incident_count', 'work_saturation', 'code_equivalent'
+)
+
+DETAIL_TEXT_COLUMNS = ('person_name', 'position_name', 'project_name')
+DETAIL_NUMERIC_COLUMNS = (
+    'saturation', 'code_equivalent', 'delivered_requirements', 'total_hours', 'ai_usage_days'
+)
+
+RANKING_COLUMNS = ('score', 'work_saturation', 'code_equivalent', 'defect_count')
+
+ALL_DEPARTMENTS = '全部部门'
+
+
+class DictionaryColumn:
+    """Dictionary-encoded text column (code -1 is NULL)"""
+    
+    def __init__(self, values: Sequence[Optional[str]]):
+        # Codes follow string order, which matches SQLite's BINARY collation
+        self.values = sorted({value for value in values if value is not None})
+        self.lookup = {value: code for code, value in enumerate(self.values)}
+        self.codes = np.fromiter(
+            (self.lookup[value] if value is not None else -1 for value in values),
+            dtype=np.int32,
+            count=len(values)
+        )
+        # Trailing None so that code -1 decodes to NULL
+        self._decoded = np.array(self.values + [None], dtype=object)
+    
+    def equals(self, value: str) -> np.ndarray:
+        """Boolean mask of rows equal to value"""
+        code = self.lookup.get(value)
+        if code is None:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+    
+    def decode(self, code: int) -> Optional[str]:
+        """Get the value of a code"""
+        return self.values[code] if code >= 0 else None
+    
+    def decode_many(self, codes: np.ndarray) -> List[Optional[str]]:
+        """Get the values of an array of codes"""
+        return self._decoded[codes].tolist()
+
+
+class ColumnarTable:
+    """
+    Read-only columnar copy of a dashboard table
+    
+    Rows are kept in (created_at, id) order, so the row position doubles as
+    the recency rank used by the "latest" and "ORDER BY created_at" queries.
+    """
+    
+    def __init__(self, text_columns: Dict[str, DictionaryColumn], numeric_columns: Dict[str, np.ndarray]):
+        self.text = text_columns
+        self.numeric = numeric_columns
+        self.size = len(next(iter(numeric_columns.values()))) if numeric_columns else 0
+    
+    @classmethod
+    def load(cls, cursor, table: str, text_columns: Sequence[str],
+             numeric_columns: Sequence[str]) -> 'ColumnarTable':
+        """Load a table into columns"""
+        columns = list(text_columns) + list(numeric_columns)
+        cursor.execute(f'SELECT {", ".join(columns)} FROM {table} ORDER BY created_at, id')
+        rows = cursor.fetchall()
+        
+        values = list(zip(*rows)) if rows else [()] * len(columns)
+        text = {
+            column: DictionaryColumn(values[index])
+            for index, column in enumerate(text_columns)
+        }
+        numeric = {
+            column: np.array(values[len(text_columns) + index], dtype=np.float64)
+            for index, column in enumerate(numeric_columns)
+        }
+        return cls(text, numeric)
+    
+    def mask(self, department: Optional[str], date_filter: Optional[str]) -> np.ndarray:
+        """Row mask for the dashboard filters (same semantics as get_filter_conditions)"""
+        mask = np.ones(self.size, dtype=bool)
+        if department and department != ALL_DEPARTMENTS:
+            mask &= self.text['department'].equals(department)
+        if date_filter:
+            mask &= self.text['record_date'].equals(date_filter)
+        return mask
+
+
+def _to_python(value: Any) -> Any:
+    """Convert a NumPy scalar to a JSON-friendly Python value (NaN is NULL)"""
+    if value is None:
+        return None
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def _to_list(values: np.ndarray) -> List[Optional[float]]:
+    """Convert a float array to a list of Python floats (NaN is NULL)"""
+    return [None if value != value else value for value in values.tolist()]
+
+
+class DashboardSnapshot:
+    """In-memory columnar snapshot of metrics, project details and developer rankings"""
+    
+    def __init__(self, version: int, metrics: ColumnarTable, details: ColumnarTable,
+                 rankings: ColumnarTable):
+        self.version = version
+        self.metrics = metrics
+        self.details = details
+        self.rankings = rankings
+        self.loaded_at = time.time()
+    
+    @classmethod
+    def load(cls, cursor, version: int) -> 'DashboardSnapshot':
+        """Load a snapshot of the dashboard tables"""
+        return cls(
+            version,
+            ColumnarTable.load(cursor, 'metrics', ('department', 'record_date'), METRIC_COLUMNS),
+            ColumnarTable.load(cursor, 'project_details', ('department', 'record_date') + DETAIL_TEXT_COLUMNS,
+                               DETAIL_NUMERIC_COLUMNS),
+            ColumnarTable.load(cursor, 'developer_rankings', ('department', 'record_date', 'name'),
+                               RANKING_COLUMNS)
+        )
+    
+    def metrics_row(self, department: str, date_filter: Optional[str]) -> Optional[Tuple[Any, ...]]:
+        """
+        Metric values for the filters
+        
+        Averages over all departments for 全部部门, otherwise the most recent
+        row of the department. Mirrors query_metrics_row.
+        """
+        table = self.metrics
+        if department == ALL_DEPARTMENTS:
+            mask = table.mask(None, date_filter)
+            result = []
+            for column in METRIC_COLUMNS:
+                values = table.numeric[column][mask]
+                values = values[~np.isnan(values)]
+                result.append(float(values.mean()) if len(values) else None)
+            return tuple(result)
+        
+        rows = np.flatnonzero(table.mask(department, date_filter))
+        if not len(rows):
+            return None
+        latest = rows[-1]
+        return tuple(_to_python(table.numeric[column][latest]) for column in METRIC_COLUMNS)
+    
+    def ranking_rows(self, department: str, date_filter: Optional[str], field: str,
+                     descending: bool, limit: Optional[int] = None, offset: int = 0,
+                     after: Optional[Tuple[Any, Any]] = None) -> List[Tuple[str, Optional[float]]]:
+        """
+        Developer ranking for the filters
+        
+        For 全部部门 the values are averaged per developer name. Ties are
+        ordered by name, and NULL values sort first ascending and last
+        descending, as in SQLite. Mirrors query_ranking_rows, including the
+        (value, name) keyset position, offset and limit.
+        """
+        table = self.rankings
+        names = table.text['name']
+        values = table.numeric[field]
+        
+        if department == ALL_DEPARTMENTS:
+            mask = table.mask(None, date_filter)
+            codes = names.codes[mask]
+            selected = values[mask]
+            valid = ~np.isnan(selected) & (codes >= 0)
+            
+            size = len(names.values)
+            sums = np.bincount(codes[valid], weights=selected[valid], minlength=size)
+            counts = np.bincount(codes[valid], minlength=size)
+            
+            # One group per name present (in name order), plus one for NULL names
+            group_codes = np.flatnonzero(np.bincount(codes[codes >= 0], minlength=size))
+            if (codes < 0).any():
+                group_codes = np.concatenate([[-1], group_codes])
+            group_values = np.full(len(group_codes), np.nan)
+            named = group_codes >= 0
+            with np.errstate(invalid='ignore', divide='ignore'):
+                group_values[named] = sums[group_codes[named]] / counts[group_codes[named]]
+            null_group = ~named
+            if null_group.any():
+                null_values = selected[(codes < 0) & ~np.isnan(selected)]
+                group_values[null_group] = null_values.mean() if len(null_values) else np.nan
+        else:
+            rows = np.flatnonzero(table.mask(department, date_filter))
+            # Name order breaks ties, as in query_ranking_rows
+            rows = rows[np.argsort(names.codes[rows], kind='stable')]
+            group_codes = names.codes[rows]
+            group_values = values[rows]
+        
+        order = self._sort_order(group_values, descending)
+        group_codes = group_codes[order]
+        group_values = group_values[order]
+        if after is not None:
+            keep = self._after_mask(group_values, group_codes, names, after, descending)
+            group_codes = group_codes[keep]
+            group_values = group_values[keep]
+        
+        end = None if limit is None else offset + limit
+        group_codes = group_codes[offset:end]
+        group_values = group_values[offset:end]
+        return list(zip(names.decode_many(group_codes), _to_list(group_values)))
+    
+    def detail_rows(self, department: str, date_filter: Optional[str]) -> List[Tuple[Any, ...]]:
+        """Project details for the filters, newest first. Mirrors query_details_rows."""
+        table = self.details
+        rows = np.flatnonzero(table.mask(department, date_filter))[::-1]
+        
+        columns = [table.text[column].decode_many(table.text[column].codes[rows]) for column in DETAIL_TEXT_COLUMNS]
+        columns += [_to_list(table.numeric[column][rows]) for column in DETAIL_NUMERIC_COLUMNS]
+        return list(zip(*columns))
+    
+    @staticmethod
+    def _after_mask(values: np.ndarray, codes: np.ndarray, names: DictionaryColumn,
+                    after: Tuple[Any, Any], descending: bool) -> np.ndarray:
+        """Rows sorting after a (value, name) position (see nullable_keyset_condition)"""
+        value, name = after
+        if name is None:
+            name_after = codes >= 0
+        else:
+            # Codes follow name order, so names after `name` have codes past its insertion point
+            name_after = codes >= np.searchsorted(names.values, name, side='right')
+        
+        missing = np.isnan(values)
+        if value is None:
+            mask = missing & name_after
+            return mask if descending else mask | ~missing
+        
+        with np.errstate(invalid='ignore'):
+            beyond = values < value if descending else values > value
+            mask = beyond | ((values == value) & name_after)
+        return mask | missing if descending else mask
+    
+    @staticmethod
+    def _sort_order(values: np.ndarray, descending: bool) -> np.ndarray:
+        """Stable sort order with SQLite NULL placement"""
+        missing = np.isnan(values)
+        present = np.flatnonzero(~missing)
+        keys = -values[present] if descending else values[present]
+        present = present[np.argsort(keys, kind='stable')]
+        nulls = np.flatnonzero(missing)
+        return np.concatenate([present, nulls]) if descending else np.concatenate([nulls, present])
+
+
+class DashboardSnapshotManager:
+    """
+    Keeps a DashboardSnapshot in sync with the data version
+    
+    In-process writes mark the snapshot stale through a DataVersion
+    listener; writes from other processes are picked up by re-reading the
+    stored version at most every check_interval seconds.
+    """
+    
+    def __init__(self, database_path: Union[str, Callable[[], str]], data_version: DataVersion,
+                 check_interval: float = 1.0):
+        """
+        Initialize snapshot manager
+        
+        Args:
+            database_path: Database path, or a callable returning it
+            data_version: Data version the snapshot is tied to
+            check_interval: Seconds between checks of the stored data version
+        """
+        self._database_path = database_path
+        self.data_version = data_version
+        self.check_interval = check_interval
+        self._snapshot: Optional[DashboardSnapshot] = None
+        self._stale = True
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+        data_version.subscribe(self._on_data_change)
+    
+    @property
+    def database_path(self) -> str:
+        return self._database_path() if callable(self._database_path) else self._database_path
+    
+    def _on_data_change(self, version: Optional[int]) -> None:
+        self._stale = True
+    
+    def invalidate(self) -> None:
+        """Force a reload on next access"""
+        self._stale = True
+    
+    def get(self) -> Optional[DashboardSnapshot]:
+        """
+        Get a current snapshot, reloading it if the data changed
+        
+        Returns:
+            Snapshot, or None if it could not be loaded (callers fall back to SQL)
+        """
+        snapshot = self._snapshot
+        if snapshot and not self._stale and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+        
+        with self._lock:
+            try:
+                conn = sqlite3.connect(self.database_path)
+                try:
+                    cursor = conn.cursor()
+                    # Read the version and the data in one read transaction
+                    cursor.execute('BEGIN')
+                    version = self.data_version.read(cursor)
+                    snapshot = self._snapshot
+                    if snapshot is None or snapshot.version != version or self._stale:
+                        self._stale = False
+                        start_time = time.perf_counter()
+                        snapshot = DashboardSnapshot.load(cursor, version)
+                        self._snapshot = snapshot
+                        self.logger.info(
+                            f"Loaded dashboard snapshot v{version} in {time.perf_counter() - start_time:.3f}s"
+                        )
+                    cursor.execute('COMMIT')
+                finally:
+                    conn.close()
+            except (sqlite3.Error, ValueError, TypeError) as e:
+                self.logger.warning(f"Dashboard snapshot unavailable, using SQL: {e}")
+                self._stale = True
+                return None
+            
+            self._checked_at = time.monotonic()
+            return snapshot
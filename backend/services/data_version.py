@@ -0,0 +1,79 @@
+import logging
+import sqlite3
+import threading
+from typing import Callable, List, Optional
+
+
+class DataVersion:
+    """
+    Version counter of the dashboard data (metrics, project details, rankings)
+    
+    The counter is stored in SQLite so writers in other processes (e.g. the
+    ingestion CLI) are visible to the server. Caches and rollups derived from
+    the dashboard tables compare their version against it, and in-process
+    listeners are notified once per committed write batch.
+    """
+    
+    def __init__(self):
+        self._listeners: List[Callable[[int], None]] = []
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    def create_table(self, cursor) -> None:
+        """Create the version table"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS dashboard_data_version (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                version INTEGER NOT NULL DEFAULT 0,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('INSERT OR IGNORE INTO dashboard_data_version (id) VALUES (1)')
+    
+    def read(self, cursor) -> int:
+        """Read the current data version (0 if the table is missing)"""
+        try:
+            cursor.execute('SELECT version FROM dashboard_data_version WHERE id = 1')
+        except sqlite3.Error:
+            return 0
+        
+        result = cursor.fetchone()
+        return result[0] if result else 0
+    
+    def bump(self, cursor) -> int:
+        """
+        Increment the data version inside the caller's write transaction
+        
+        Call notify() with the returned version after the transaction commits.
+        
+        Returns:
+            New data version
+        """
+        cursor.execute('''
+            UPDATE dashboard_data_version
+            SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+        ''')
+        return self.read(cursor)
+    
+    def subscribe(self, listener: Callable[[int], None]) -> None:
+        """Register a callback invoked with the new version after each committed change"""
+        with self._lock:
+            self._listeners.append(listener)
+    
+    def unsubscribe(self, listener: Callable[[int], None]) -> None:
+        """Remove a previously registered callback"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    def notify(self, version: Optional[int]) -> None:
+        """Notify listeners of a committed data change"""
+        with self._lock:
+            listeners = list(self._listeners)
+        
+        for listener in listeners:
+            try:
+                listener(version)
+            except Exception as e:
+                self.logger.warning(f"Data version listener failed: {e}")
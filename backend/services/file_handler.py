@@ -1,5 +1,6 @@
 import os
 import uuid
+import hashlib
 import mimetypes
 from typing import Optional, Tuple
 from werkzeug.datastructures import FileStorage
@@ -7,6 +8,8 @@ from werkzeug.utils import secure_filename
 from dataclasses import dataclass
 from datetime import datetime
 
+from services.tracing import traced, set_span_attributes
+
 
 @dataclass
 class ValidationResult:
@@ -70,6 +73,7 @@ class FileUploadHandler:
         os.makedirs(temp_dir, exist_ok=True)
         return temp_dir
     
+    @traced('file.validate')
     def validate_file(self, file: FileStorage) -> ValidationResult:
         """
         Validate uploaded file for format and size
@@ -96,6 +100,7 @@ class FileUploadHandler:
         file.seek(0, 2)  # Seek to end
         file_size = file.tell()
         file.seek(0)  # Reset to beginning
+        set_span_attributes(bytes=file_size)
         
         # Validate file size
         if file_size > self.max_file_size:
@@ -115,6 +120,7 @@ class FileUploadHandler:
         
         # Determine file type
         file_type = self._determine_file_type(file)
+        set_span_attributes(file_type=file_type)
         
         if not file_type:
             return ValidationResult(
@@ -167,6 +173,25 @@ class FileUploadHandler:
         
         return None
     
+    def compute_digest(self, file: FileStorage, chunk_size: int = 1024 * 1024) -> str:
+        """
+        SHA-256 digest of the uploaded file contents
+        
+        Args:
+            file: FileStorage object (rewound afterwards)
+            chunk_size: Bytes read per step
+        
+        Returns:
+            Hex digest
+        """
+        digest = hashlib.sha256()
+        file.seek(0)
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+        file.seek(0)
+        return digest.hexdigest()
+    
+    @traced('file.save_temp')
     def save_temp_file(self, file: FileStorage) -> Tuple[str, str]:
         """
         Save file to temporary storage
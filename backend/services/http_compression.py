@@ -0,0 +1,198 @@
+import gzip
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, Optional, Union
+
+# Optional codec; gzip from the standard library is always available
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+# Preferred encodings, best first
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+# Content types worth compressing besides text/*; binary formats such as
+# PDF, XLSX and images are already compressed
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'application/json',
+    'application/javascript',
+    'application/xml',
+    'image/svg+xml'
+})
+
+
+def is_compressible(mimetype: Optional[str]) -> bool:
+    """Check whether a content type is on the compression allow-list"""
+    mimetype = (mimetype or '').lower()
+    return (mimetype.startswith('text/') or mimetype in COMPRESSIBLE_MIMETYPES
+            or mimetype.endswith('+json') or mimetype.endswith('+xml'))
+
+
+def parse_accept_encoding(header: Optional[str]) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header
+    
+    Returns:
+        Mapping of encoding to quality value
+    """
+    encodings = {}
+    for part in (header or '').split(','):
+        part = part.strip()
+        if not part:
+            continue
+        
+        name, _, params = part.partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        encodings[name.strip().lower()] = quality
+    
+    return encodings
+
+
+def choose_encoding(header: Optional[str]) -> Optional[str]:
+    """
+    Choose the best supported encoding accepted by the client
+    
+    Returns:
+        'br', 'gzip', or None to send the body uncompressed
+    """
+    accepted = parse_accept_encoding(header)
+    best = None
+    best_quality = 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    
+    return best
+
+
+def compress_body(data: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    """Compress a response body"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=5 if level is None else level)
+    if encoding == 'gzip':
+        return gzip.compress(data, compresslevel=6 if level is None else level)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def iter_encoded(chunks: Iterable[Union[bytes, str]], encoding: Optional[str] = None,
+                 level: Optional[int] = None,
+                 on_close: Optional[Callable[[int, int, float], None]] = None) -> Iterator[bytes]:
+    """
+    Compress a stream of chunks incrementally and measure it
+    
+    Args:
+        chunks: Body chunks (str chunks are UTF-8 encoded)
+        encoding: 'br', 'gzip', or None to pass chunks through
+        level: Compression level (codec default if None)
+        on_close: Called with (raw_bytes, wire_bytes, compress_seconds) once
+            the stream ends or is closed early; the wrapped iterable is
+            closed as well
+    
+    Yields:
+        Encoded chunks
+    """
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=5 if level is None else level)
+        compress, finish = compressor.process, compressor.finish
+    elif encoding == 'gzip':
+        compressor = zlib.compressobj(6 if level is None else level, zlib.DEFLATED, 31)
+        compress, finish = compressor.compress, compressor.flush
+    elif encoding is None:
+        compress = finish = None
+    else:
+        raise ValueError(f"Unsupported encoding: {encoding}")
+    
+    raw_bytes = wire_bytes = 0
+    compress_time = 0.0
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            raw_bytes += len(chunk)
+            if compress:
+                start_time = time.perf_counter()
+                chunk = compress(chunk)
+                compress_time += time.perf_counter() - start_time
+            if chunk:
+                wire_bytes += len(chunk)
+                yield chunk
+        
+        if finish:
+            start_time = time.perf_counter()
+            chunk = finish()
+            compress_time += time.perf_counter() - start_time
+            wire_bytes += len(chunk)
+            yield chunk
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close:
+            close()
+        if on_close:
+            on_close(raw_bytes, wire_bytes, compress_time)
+
+
+def compress_response(response, accept_encoding: Optional[str], min_size: int = 1024,
+                      level: Optional[int] = None,
+                      on_stream_close: Optional[Callable[[int, int, float], None]] = None):
+    """
+    Compress a Flask response in place if the client accepts it
+    
+    Streamed bodies are compressed chunk by chunk as they are sent (their
+    size is not known up front, so min_size does not apply) and reported to
+    on_stream_close once sent, compressed or not. File responses
+    (direct passthrough), already encoded (e.g. precompressed cache
+    entries), small, non-2xx and non-allow-listed content types are sent
+    unchanged.
+    
+    Args:
+        response: Flask response
+        accept_encoding: Request Accept-Encoding header
+        min_size: Minimum body size in bytes worth compressing
+        level: Compression level (codec default if None)
+        on_stream_close: Called with (raw_bytes, wire_bytes, compress_seconds)
+            after a streamed body has been sent
+    
+    Returns:
+        The response
+    """
+    if response.direct_passthrough:
+        return response
+    
+    eligible = (200 <= response.status_code < 300 and response.status_code != 204
+                and 'Content-Encoding' not in response.headers and is_compressible(response.mimetype))
+    
+    if response.is_streamed:
+        encoding = choose_encoding(accept_encoding) if eligible else None
+        if eligible:
+            response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+            response.headers.pop('Content-Length', None)
+        response.response = iter_encoded(response.response, encoding, level, on_stream_close)
+        return response
+    
+    if not eligible:
+        return response
+    
+    response.vary.add('Accept-Encoding')
+    
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    
+    encoding = choose_encoding(accept_encoding)
+    if not encoding:
+        return response
+    
+    response.set_data(compress_body(data, encoding, level))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,282 @@
+import re
+import hashlib
+import logging
+import time
+from typing import Any, Optional, Dict, List
+from dataclasses import dataclass, field
+
+from services.content_extractor import ContentExtractor, ContentSection
+from services.siliconflow_client import AnalysisResult, DEFAULT_ANALYSIS_PROMPT, MAX_CONTENT_LENGTH
+
+
+# Sections analyzed in one request are numbered with this marker, and the
+# model is asked to start each section's analysis with the same marker
+SECTION_MARKER = '[[章节 {number}]]'
+SECTION_MARKER_PATTERN = re.compile(r'^[#*\s]*\[\[章节\s*(\d+)\]\][*\s]*$', re.MULTILINE)
+
+BATCH_INSTRUCTIONS = (
+    "文档由多个编号章节组成，每个章节以“[[章节 n]]”标记开头。请逐章节分别分析，"
+    "每个章节的分析以单独一行的“[[章节 n]]”开头（n为对应章节编号），按编号顺序输出全部章节，不要遗漏。"
+)
+
+
+@dataclass
+class SectionAnalysis:
+    """Analysis of a single document section"""
+    section: ContentSection
+    analysis_text: str
+    reused: bool
+
+
+@dataclass
+class IncrementalAnalysisResult:
+    """Result of an incremental analysis run"""
+    analysis_result: AnalysisResult
+    sections: List[SectionAnalysis] = field(default_factory=list)
+    prompt_digest: str = ''
+    previous_file_id: Optional[str] = None
+
+
+class IncrementalAnalyzer:
+    """Re-analyze only the sections of a document that changed since its previous version"""
+    
+    def __init__(self, content_extractor: ContentExtractor = None):
+        self.content_extractor = content_extractor or ContentExtractor()
+        self.logger = logging.getLogger(__name__)
+    
+    @staticmethod
+    def prompt_digest(prompt: str) -> str:
+        """Digest of the prompt a section analysis was produced with"""
+        return hashlib.sha256((prompt or '').encode('utf-8')).hexdigest()
+    
+    def find_previous_version(self, cursor, document_key: str) -> Optional[str]:
+        """
+        Find the most recent file with cached section analyses for a document key
+        
+        Args:
+            cursor: SQLite cursor
+            document_key: User-supplied key or filename linking document revisions
+        
+        Returns:
+            File ID of the previous version, or None
+        """
+        cursor.execute('''
+            SELECT f.id
+            FROM ai_analysis_files f
+            WHERE f.document_key = ?
+              AND EXISTS (SELECT 1 FROM ai_analysis_sections s WHERE s.file_id = f.id)
+            ORDER BY f.upload_timestamp DESC
+            LIMIT 1
+        ''', (document_key,))
+        result = cursor.fetchone()
+        return result[0] if result else None
+    
+    def load_section_analyses(self, cursor, file_id: str, prompt_digest: str) -> Dict[str, str]:
+        """
+        Load cached section analyses of a file produced with the same prompt
+        
+        Returns:
+            Mapping of section digest to analysis text
+        """
+        cursor.execute('''
+            SELECT section_hash, analysis_text
+            FROM ai_analysis_sections
+            WHERE file_id = ? AND prompt_hash = ?
+        ''', (file_id, prompt_digest))
+        return {row[0]: row[1] for row in cursor.fetchall()}
+    
+    def pack_sections(self, sections: List[ContentSection],
+                      max_length: int = MAX_CONTENT_LENGTH) -> List[List[ContentSection]]:
+        """
+        Group consecutive sections into batches that fit in one request
+        
+        A section longer than max_length forms a batch of its own.
+        """
+        batches = []
+        batch = []
+        length = 0
+        for section in sections:
+            section_length = len(section.content) + len(SECTION_MARKER) + 2
+            if batch and length + section_length > max_length:
+                batches.append(batch)
+                batch = []
+                length = 0
+            batch.append(section)
+            length += section_length
+        if batch:
+            batches.append(batch)
+        return batches
+    
+    def build_batch_content(self, sections: List[ContentSection]) -> str:
+        """Join sections into one document, each preceded by its numbered marker"""
+        return "\n\n".join(
+            f"{SECTION_MARKER.format(number=number)}\n{section.content}"
+            for number, section in enumerate(sections, start=1)
+        )
+    
+    def build_batch_prompt(self, prompt: str) -> str:
+        """Extend the prompt with the per-section output instructions"""
+        instruction = prompt.strip() if prompt and prompt.strip() else DEFAULT_ANALYSIS_PROMPT
+        return f"{instruction}\n\n{BATCH_INSTRUCTIONS}"
+    
+    def split_batch_analysis(self, text: str, count: int) -> Dict[int, str]:
+        """
+        Split the analysis of a batch at its section markers
+        
+        Returns:
+            Mapping of section index (0-based) to analysis text; sections
+            whose marker is missing or whose analysis is empty are left out
+        """
+        markers = [match for match in SECTION_MARKER_PATTERN.finditer(text or '')]
+        analyses = {}
+        for position, match in enumerate(markers):
+            index = int(match.group(1)) - 1
+            if index < 0 or index >= count or index in analyses:
+                continue
+            end = markers[position + 1].start() if position + 1 < len(markers) else len(text)
+            analysis = text[match.end():end].strip()
+            if analysis:
+                analyses[index] = analysis
+        return analyses
+    
+    def analyze(self, cursor, client, content: str, prompt: str,
+                document_key: str, options: Dict[str, Any] = None) -> IncrementalAnalysisResult:
+        """
+        Analyze content section by section, reusing analyses of unchanged sections
+        
+        Sections that need analysis are packed into as few requests as fit
+        the client's content limit, so a first version (or one analyzed
+        under a new prompt) usually takes a single call; the response is
+        split back into sections at their markers. A section missing from
+        a combined response is analyzed on its own.
+        
+        Args:
+            cursor: SQLite cursor used to look up the previous version
+            client: SiliconFlowClient used for changed sections
+            content: Extracted document content
+            prompt: Effective analysis prompt
+            document_key: Key linking this upload to earlier revisions
+            options: Model parameter overrides passed to the client (max_tokens, temperature)
+        
+        Returns:
+            IncrementalAnalysisResult with the merged analysis
+        """
+        start_time = time.time()
+        sections = self.content_extractor.split_sections(content)
+        prompt_digest = self.prompt_digest(prompt)
+        
+        if not sections:
+            return IncrementalAnalysisResult(
+                analysis_result=AnalysisResult(
+                    success=False,
+                    content="",
+                    error_message="No content provided for analysis"
+                ),
+                prompt_digest=prompt_digest
+            )
+        
+        previous_file_id = self.find_previous_version(cursor, document_key)
+        cached = self.load_section_analyses(cursor, previous_file_id, prompt_digest) if previous_file_id else {}
+        
+        reusable = set(cached)
+        # Identical sections within the same document share one analysis
+        pending = {}
+        for section in sections:
+            if section.digest not in reusable:
+                pending.setdefault(section.digest, section)
+        
+        def failed(message: str) -> IncrementalAnalysisResult:
+            return IncrementalAnalysisResult(
+                analysis_result=AnalysisResult(
+                    success=False,
+                    content="",
+                    error_message=message,
+                    processing_time=time.time() - start_time
+                ),
+                prompt_digest=prompt_digest,
+                previous_file_id=previous_file_id
+            )
+        
+        results = []
+        for batch in self.pack_sections(list(pending.values())):
+            analyses = {}
+            if len(batch) > 1:
+                result = client.analyze_content(
+                    self.build_batch_content(batch), self.build_batch_prompt(prompt), **(options or {})
+                )
+                if not result.success:
+                    return failed(f"Analysis of {len(batch)} sections failed: {result.error_message}")
+                results.append(result)
+                analyses = self.split_batch_analysis(result.content, len(batch))
+                if len(analyses) < len(batch):
+                    self.logger.warning(
+                        f"Combined analysis of '{document_key}' covered {len(analyses)} of {len(batch)} "
+                        f"sections; analyzing the rest separately"
+                    )
+            
+            for position, section in enumerate(batch):
+                if position not in analyses:
+                    result = client.analyze_content(section.content, prompt, **(options or {}))
+                    if not result.success:
+                        return failed(f"Section '{section.title}' failed: {result.error_message}")
+                    results.append(result)
+                    analyses[position] = result.content
+                cached[section.digest] = analyses[position]
+        
+        tokens_used = sum(result.tokens_used or 0 for result in results)
+        cached_tokens = sum(result.cached_tokens or 0 for result in results)
+        model_used = next((result.model_used for result in reversed(results) if result.model_used), None)
+        
+        section_analyses = []
+        analyzed = set()
+        for section in sections:
+            reused = section.digest in reusable or section.digest in analyzed
+            analyzed.add(section.digest)
+            section_analyses.append(SectionAnalysis(section, cached[section.digest], reused=reused))
+        
+        reanalyzed = sum(1 for item in section_analyses if not item.reused)
+        self.logger.info(
+            f"Incremental analysis of '{document_key}': {reanalyzed}/{len(section_analyses)} sections "
+            f"re-analyzed in {len(results)} model calls"
+        )
+        
+        return IncrementalAnalysisResult(
+            analysis_result=AnalysisResult(
+                success=True,
+                content=self.merge_section_analyses(section_analyses),
+                processing_time=time.time() - start_time,
+                model_used=model_used or getattr(client, 'model', None),
+                tokens_used=tokens_used,
+                cached_tokens=cached_tokens or None,
+                metadata={
+                    'incremental': True,
+                    'previous_file_id': previous_file_id,
+                    'sections_total': len(section_analyses),
+                    'sections_reanalyzed': reanalyzed,
+                    'sections_reused': len(section_analyses) - reanalyzed,
+                    'model_calls': len(results)
+                }
+            ),
+            sections=section_analyses,
+            prompt_digest=prompt_digest,
+            previous_file_id=previous_file_id
+        )
+    
+    def merge_section_analyses(self, section_analyses: List[SectionAnalysis]) -> str:
+        """Merge per-section analyses into a single report body"""
+        if len(section_analyses) == 1:
+            return section_analyses[0].analysis_text
+        
+        return "\n\n".join(
+            f"## {item.section.title}\n\n{item.analysis_text}" for item in section_analyses
+        )
+    
+    def save_sections(self, cursor, file_id: str, result: IncrementalAnalysisResult) -> None:
+        """Store section analyses of a file so later revisions can reuse them"""
+        cursor.executemany('''
+            INSERT INTO ai_analysis_sections (file_id, section_index, title, section_hash, prompt_hash, analysis_text)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', [
+            (file_id, index, item.section.title, item.section.digest, result.prompt_digest, item.analysis_text)
+            for index, item in enumerate(result.sections)
+        ])
@@ -0,0 +1,66 @@
+import time
+from typing import Any
+
+from flask import g, has_app_context
+from flask.json.provider import DefaultJSONProvider
+
+# Optional fast serializer; the standard library json module is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider that serializes with orjson when it is installed
+    
+    Output matches DefaultJSONProvider (sorted keys, HTTP dates for datetime
+    values, dataclasses as dicts) except that non-ASCII text is written as
+    UTF-8 instead of \\u escapes. Values or keyword arguments orjson cannot
+    handle fall back to the standard library. The time spent serializing
+    response bodies is accumulated in flask.g.json_serialize_time.
+    """
+    
+    def _orjson_options(self, indent: bool) -> int:
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return options
+    
+    def _encode(self, obj: Any, indent: bool) -> bytes:
+        """Serialize to UTF-8 bytes"""
+        if orjson is not None:
+            try:
+                return orjson.dumps(obj, default=self.default, option=self._orjson_options(indent))
+            except TypeError:
+                # e.g. integers beyond 64 bits
+                pass
+        
+        if indent:
+            return super().dumps(obj, indent=2).encode('utf-8')
+        return super().dumps(obj, separators=(',', ':')).encode('utf-8')
+    
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        """Serialize to a string (keyword arguments other than a compact or 2-space layout use json.dumps)"""
+        indent = kwargs.get('indent')
+        separators = kwargs.get('separators')
+        if (orjson is None or set(kwargs) - {'indent', 'separators'} or indent not in (None, 2)
+                or separators not in (None, (',', ':'))):
+            return super().dumps(obj, **kwargs)
+        
+        return self._encode(obj, indent == 2).decode('utf-8')
+    
+    def response(self, *args: Any, **kwargs: Any):
+        """Serialize the arguments into a JSON response, recording the serialization time"""
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        
+        start_time = time.perf_counter()
+        body = self._encode(obj, indent)
+        if has_app_context():
+            g.json_serialize_time = g.get('json_serialize_time', 0.0) + time.perf_counter() - start_time
+        
+        return self._app.response_class(body + b'\n', mimetype=self.mimetype)
@@ -0,0 +1,46 @@
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
+
+
+def _default_dumps(value: Any) -> str:
+    return json.dumps(value, separators=(',', ':'))
+
+
+def stream_json_list(key: str, items: Iterable[Any],
+                     trailer: Optional[Callable[[], Dict[str, Any]]] = None,
+                     dumps: Callable[[Any], str] = _default_dumps,
+                     chunk_size: int = 200) -> Iterator[str]:
+    """
+    Encode {key: [items...], **trailer()} as a stream of JSON text chunks
+    
+    Items are encoded as they are consumed, so a large result set is never
+    held in memory as one list or one string.
+    
+    Args:
+        key: Name of the list member
+        items: Items to encode (e.g. formatted database rows)
+        trailer: Callable returning extra members, evaluated after all items
+            are consumed (e.g. pagination info that depends on the rows read)
+        dumps: Function encoding one value as JSON
+        chunk_size: Number of items per yielded chunk
+    
+    Yields:
+        JSON text chunks
+    """
+    yield '{' + dumps(key) + ':['
+    
+    buffer = []
+    separator = ''
+    for item in items:
+        buffer.append(dumps(item))
+        if len(buffer) >= chunk_size:
+            yield separator + ','.join(buffer)
+            separator = ','
+            buffer = []
+    if buffer:
+        yield separator + ','.join(buffer)
+    
+    yield ']'
+    for name, value in (trailer() if trailer else {}).items():
+        yield ',' + dumps(name) + ':' + dumps(value)
+    yield '}'
@@ -0,0 +1,289 @@
+import gc
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+TRACKING_MODES = ('off', 'rss', 'tracemalloc')
+
+# Frames of the allocation tracer itself, left out of allocation reports
+_IGNORED_TRACES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>'),
+)
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (None when it cannot be read)"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+def peak_rss() -> Optional[int]:
+    """Highest resident set size of this process so far in bytes"""
+    if resource is None:
+        return psutil.Process().memory_info().peak_wset if psutil is not None else None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == 'Darwin' else peak * 1024
+
+
+@dataclass
+class MemoryUsage:
+    """Memory used by one tracked call, in bytes"""
+    name: str
+    peak_bytes: int = 0
+    retained_bytes: int = 0
+
+
+class MemoryTracker:
+    """
+    Per-request memory accounting
+    
+    In 'tracemalloc' mode (meant for debugging, it slows allocation-heavy code
+    down noticeably) the peak and retained Python allocations of each tracked
+    call are measured exactly, and the top allocation sites can be listed or
+    diffed against a baseline snapshot to find leaks. In 'rss' mode only the
+    process resident size is read before and after the call; the peak is the
+    rise of the process high-water mark during the call, so it is 0 when the
+    call stayed below an earlier peak. Both modes measure the whole process,
+    so concurrent requests are attributed to each other.
+    """
+    
+    def __init__(self, mode: str = 'rss', frames: int = 10):
+        """
+        Args:
+            mode: 'off', 'rss' or 'tracemalloc'
+            frames: Stack frames stored per allocation in tracemalloc mode
+        """
+        if mode not in TRACKING_MODES:
+            raise ValueError(f"Unknown memory tracking mode: {mode} (expected one of {', '.join(TRACKING_MODES)})")
+        self.mode = mode
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._baseline = None
+        if mode == 'tracemalloc' and not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+    
+    @contextmanager
+    def track(self, name: str) -> Iterator[MemoryUsage]:
+        """Measure the memory used while the block runs and record it under `name`"""
+        usage = MemoryUsage(name)
+        if self.mode == 'off':
+            yield usage
+            return
+        
+        if self.mode == 'tracemalloc':
+            start, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+        else:
+            start, start_peak = current_rss() or 0, peak_rss() or 0
+        try:
+            yield usage
+        finally:
+            if self.mode == 'tracemalloc':
+                current, peak = tracemalloc.get_traced_memory()
+                usage.peak_bytes = max(0, peak - start)
+            else:
+                current, peak = current_rss() or 0, peak_rss() or 0
+                usage.peak_bytes = max(0, peak - start) if peak > start_peak else max(0, current - start)
+            usage.retained_bytes = current - start
+            self._record(usage)
+    
+    def _record(self, usage: MemoryUsage) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(usage.name, {
+                'count': 0, 'max_peak_bytes': 0, 'total_peak_bytes': 0, 'total_retained_bytes': 0,
+                'last_peak_bytes': 0, 'last_retained_bytes': 0
+            })
+            stats['count'] += 1
+            stats['max_peak_bytes'] = max(stats['max_peak_bytes'], usage.peak_bytes)
+            stats['total_peak_bytes'] += usage.peak_bytes
+            stats['total_retained_bytes'] += usage.retained_bytes
+            stats['last_peak_bytes'] = usage.peak_bytes
+            stats['last_retained_bytes'] = usage.retained_bytes
+    
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Per-name statistics; a steadily growing total_retained_bytes points at a leak"""
+        with self._lock:
+            result = {}
+            for name, stats in sorted(self._stats.items()):
+                entry = dict(stats)
+                entry['mean_peak_bytes'] = round(stats['total_peak_bytes'] / stats['count'])
+                result[name] = entry
+            return result
+    
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+    
+    def mark_baseline(self) -> bool:
+        """Remember the current allocations so later reports show growth since now"""
+        if not tracemalloc.is_tracing():
+            return False
+        self._baseline = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+        return True
+    
+    def top_allocations(self, limit: int = 20, group_by: str = 'lineno',
+                        since_baseline: bool = False) -> Optional[List[Dict[str, object]]]:
+        """
+        Largest allocation sites (None unless tracemalloc is tracing)
+        
+        Args:
+            limit: Number of sites
+            group_by: 'lineno', 'filename' or 'traceback'
+            since_baseline: Report growth since mark_baseline() instead of totals
+        """
+        if not tracemalloc.is_tracing():
+            return None
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED_TRACES)
+        if since_baseline and self._baseline is not None:
+            stats = snapshot.compare_to(self._baseline, group_by)
+            return [{
+                'site': self._site(stat.traceback),
+                'size_bytes': stat.size,
+                'size_diff_bytes': stat.size_diff,
+                'count': stat.count,
+                'count_diff': stat.count_diff
+            } for stat in stats[:limit]]
+        return [{
+            'site': self._site(stat.traceback),
+            'size_bytes': stat.size,
+            'count': stat.count
+        } for stat in snapshot.statistics(group_by)[:limit]]
+    
+    @staticmethod
+    def _site(traceback) -> str:
+        return ' <- '.join(f'{frame.filename}:{frame.lineno}' for frame in reversed(traceback))
+
+
+class MemoryBudgetExceeded(Exception):
+    """No memory became available for a request within the queue timeout"""
+    pass
+
+
+class MemoryBudget:
+    """
+    Admission control on process memory
+    
+    A request is admitted when the process RSS plus the estimates reserved by
+    requests already running plus its own estimate fits within the limit.
+    Otherwise it waits (queued) until running requests release their
+    reservations or the RSS drops, and is rejected after the queue timeout.
+    Reservations are counted on top of the RSS those requests already hold,
+    which errs on the side of admitting too little.
+    """
+    
+    def __init__(self, limit_bytes: int, queue_timeout: float = 30.0,
+                 rss_reader: Callable[[], Optional[int]] = current_rss, poll_interval: float = 0.5):
+        """
+        Args:
+            limit_bytes: Memory budget of the process (0 disables admission control)
+            queue_timeout: Seconds a request may wait for memory before it is rejected
+            rss_reader: Returns the current process memory in bytes
+            poll_interval: Seconds between RSS re-reads while waiting
+        """
+        self.limit_bytes = limit_bytes
+        self.queue_timeout = queue_timeout
+        self.poll_interval = poll_interval
+        self._rss = rss_reader
+        self._condition = threading.Condition()
+        self._reserved = 0
+        self._running = 0
+        self._waiting = 0
+        self._admitted = 0
+        self._queued = 0
+        self._rejected = 0
+    
+    @property
+    def enabled(self) -> bool:
+        return self.limit_bytes > 0
+    
+    def _fits(self, estimate: int) -> bool:
+        rss = self._rss()
+        if rss is None:
+            return True
+        # A request alone is always admitted when the idle process fits, even if its estimate is large
+        if self._running == 0 and rss <= self.limit_bytes:
+            return True
+        return rss + self._reserved + estimate <= self.limit_bytes
+    
+    @contextmanager
+    def admit(self, estimate: int = 0) -> Iterator[None]:
+        """
+        Reserve `estimate` bytes for the block, waiting for memory if needed
+        
+        Raises:
+            MemoryBudgetExceeded: When memory did not become available in time
+        """
+        if not self.enabled:
+            yield
+            return
+        
+        estimate = max(0, int(estimate))
+        deadline = time.monotonic() + self.queue_timeout
+        with self._condition:
+            if not self._fits(estimate):
+                # Reclaim garbage cycles once before making the request wait
+                gc.collect()
+                if not self._fits(estimate):
+                    self._queued += 1
+                    self._waiting += 1
+                    try:
+                        while not self._fits(estimate):
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                self._rejected += 1
+                                raise MemoryBudgetExceeded(
+                                    f"Memory budget of {self.limit_bytes} bytes exhausted"
+                                )
+                            self._condition.wait(min(remaining, self.poll_interval))
+                    finally:
+                        self._waiting -= 1
+            self._reserved += estimate
+            self._running += 1
+            self._admitted += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._reserved -= estimate
+                self._running -= 1
+                self._condition.notify_all()
+    
+    def get_stats(self) -> Dict[str, object]:
+        with self._condition:
+            return {
+                'enabled': self.enabled,
+                'limit_bytes': self.limit_bytes,
+                'queue_timeout': self.queue_timeout,
+                'rss_bytes': self._rss(),
+                'reserved_bytes': self._reserved,
+                'running': self._running,
+                'waiting': self._waiting,
+                'admitted': self._admitted,
+                'queued': self._queued,
+                'rejected': self._rejected
+            }
@@ -0,0 +1,482 @@
+import os
+import csv
+import json
+import re
+import time
+import codecs
+import logging
+from dataclasses import dataclass, field
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from services.data_version import DataVersion
+
+
+RECORD_DATE_PATTERN = re.compile(r'^\d{4}-(0[1-9]|1[0-2])$')
+
+DEFAULT_DEPARTMENT = '全部部门'
+
+
+@dataclass(frozen=True)
+class TableSchema:
+    """Ingestible columns and upsert key of a dashboard table"""
+    name: str
+    key_columns: Tuple[str, ...]
+    text_columns: Tuple[str, ...]
+    integer_columns: Tuple[str, ...]
+    real_columns: Tuple[str, ...]
+    
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self.key_columns + tuple(
+            column for column in self.text_columns + self.integer_columns + self.real_columns
+            if column not in self.key_columns
+        )
+
+
+TABLE_SCHEMAS = {
+    'metrics': TableSchema(
+        name='metrics',
+        key_columns=('department', 'record_date'),
+        text_columns=('department', 'record_date'),
+        integer_columns=('requirement_throughput', 'monthly_delivered_requirements', 'monthly_new_requirements',
+                         'online_defects', 'emergency_releases', 'incident_count', 'code_equivalent'),
+        real_columns=('delivery_cycle_p75', 'reopen_rate', 'work_saturation')
+    ),
+    'project_details': TableSchema(
+        name='project_details',
+        key_columns=('department', 'record_date', 'person_name', 'project_name'),
+        text_columns=('department', 'record_date', 'person_name', 'position_name', 'project_name'),
+        integer_columns=('code_equivalent', 'delivered_requirements'),
+        real_columns=('saturation', 'total_hours', 'ai_usage_days')
+    ),
+    'developer_rankings': TableSchema(
+        name='developer_rankings',
+        key_columns=('department', 'record_date', 'name'),
+        text_columns=('department', 'record_date', 'name'),
+        integer_columns=('score', 'code_equivalent', 'defect_count'),
+        real_columns=('work_saturation',)
+    )
+}
+
+
+FORMAT_EXTENSIONS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl'
+}
+
+FORMAT_MIMETYPES = {
+    'text/csv': 'csv',
+    'application/x-ndjson': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/x-jsonlines': 'jsonl'
+}
+
+
+def detect_format(explicit: Optional[str] = None, filename: Optional[str] = None,
+                  mimetype: Optional[str] = None) -> Optional[str]:
+    """
+    Determine the input format from an explicit value, file extension or MIME type
+    
+    Returns:
+        'csv', 'jsonl', or None if the format cannot be determined
+    """
+    if explicit:
+        explicit = explicit.lower()
+        return explicit if explicit in ('csv', 'jsonl') else None
+    
+    if filename:
+        extension = os.path.splitext(filename)[1].lower()
+        if extension in FORMAT_EXTENSIONS:
+            return FORMAT_EXTENSIONS[extension]
+    
+    return FORMAT_MIMETYPES.get((mimetype or '').lower())
+
+
+class RowValidationError(ValueError):
+    """Raised when an input row cannot be ingested"""
+    pass
+
+
+class DuplicateKeysError(RuntimeError):
+    """Raised when a table cannot take upserts because rows share a key"""
+    pass
+
+
+class InputEncodingError(ValueError):
+    """
+    Raised when an input line is not valid UTF-8
+    
+    Attributes:
+        line: Number of the offending line
+        result: IngestResult of the rows committed before it (set by ingest)
+    """
+    
+    def __init__(self, line: int):
+        super().__init__(f"Line {line} is not valid UTF-8")
+        self.line = line
+        self.result = None
+
+
+@dataclass
+class IngestResult:
+    """Result of a bulk ingestion run"""
+    table: str
+    rows_received: int = 0
+    rows_written: int = 0
+    rows_rejected: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    data_version: Optional[int] = None
+    dry_run: bool = False
+    errors: List[Dict[str, Any]] = field(default_factory=list)
+    
+    @property
+    def rows_per_second(self) -> float:
+        return round(self.rows_written / self.elapsed, 1) if self.elapsed > 0 else 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'table': self.table,
+            'rows_received': self.rows_received,
+            'rows_written': self.rows_written,
+            'rows_rejected': self.rows_rejected,
+            'batches': self.batches,
+            'elapsed': round(self.elapsed, 3),
+            'rows_per_second': self.rows_per_second,
+            'data_version': self.data_version,
+            'dry_run': self.dry_run,
+            'errors': self.errors
+        }
+
+
+class MetricsIngestor:
+    """Bulk loader for the dashboard tables (metrics, project details, rankings)"""
+    
+    def __init__(self, data_version: DataVersion = None, batch_size: int = 5000, max_errors: int = 100):
+        """
+        Initialize metrics ingestor
+        
+        Args:
+            data_version: Data version bumped once per committed batch
+            batch_size: Rows written per transaction
+            max_errors: Maximum number of row errors kept in the result
+        """
+        self.data_version = data_version or DataVersion()
+        self.batch_size = batch_size
+        self.max_errors = max_errors
+        self.logger = logging.getLogger(__name__)
+    
+    def create_indexes(self, cursor) -> List[str]:
+        """
+        Create the unique indexes used as upsert targets
+        
+        Tables that still hold rows sharing a key are left without an index;
+        nothing is deleted here (see remove_duplicates).
+        
+        Returns:
+            Names of the tables whose index could not be created
+        """
+        return [schema.name for schema in TABLE_SCHEMAS.values()
+                if not self.ensure_upsert_index(cursor, schema.name)]
+    
+    def ensure_upsert_index(self, cursor, table: str) -> bool:
+        """
+        Create the unique index of a table unless duplicate keys prevent it
+        
+        Returns:
+            True if the index exists afterwards
+        """
+        schema = self.get_schema(table)
+        index_name = f'idx_{schema.name}_upsert_key'
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?", (index_name,))
+        if cursor.fetchone():
+            return True
+        
+        duplicates = self.find_duplicates(cursor, table)
+        if duplicates['duplicate_keys']:
+            self.logger.warning(
+                f"{table} has {duplicates['duplicate_keys']} duplicate keys "
+                f"({duplicates['rows_to_delete']} extra rows); bulk ingestion is disabled until "
+                f"'python ingest_metrics.py {table} --dedupe' is run"
+            )
+            return False
+        
+        cursor.execute(f"CREATE UNIQUE INDEX {index_name} ON {schema.name} ({', '.join(schema.key_columns)})")
+        return True
+    
+    def _key_not_null(self, schema: TableSchema) -> str:
+        # NULLs are distinct in a unique index, so rows with a NULL key column never conflict
+        return ' AND '.join(f'{column} IS NOT NULL' for column in schema.key_columns)
+    
+    def find_duplicates(self, cursor, table: str) -> Dict[str, Any]:
+        """
+        Count rows sharing an upsert key
+        
+        Returns:
+            Dict with the number of duplicated keys and of the rows remove_duplicates would delete
+        """
+        schema = self.get_schema(table)
+        cursor.execute(f'''
+            SELECT COUNT(*), COALESCE(SUM(row_count) - COUNT(*), 0) FROM (
+                SELECT COUNT(*) AS row_count FROM {schema.name}
+                WHERE {self._key_not_null(schema)}
+                GROUP BY {', '.join(schema.key_columns)}
+                HAVING COUNT(*) > 1
+            )
+        ''')
+        duplicate_keys, rows_to_delete = cursor.fetchone()
+        return {'table': table, 'duplicate_keys': duplicate_keys, 'rows_to_delete': rows_to_delete}
+    
+    def remove_duplicates(self, cursor, table: str) -> int:
+        """
+        Keep only the most recently inserted row of each duplicated key
+        
+        Deleted rows are copied to <table>_duplicates first so they can be
+        restored. Only run on request (ingest_metrics.py --dedupe).
+        
+        Returns:
+            Number of rows deleted
+        """
+        schema = self.get_schema(table)
+        backup = f'{schema.name}_duplicates'
+        not_null = self._key_not_null(schema)
+        condition = f'''
+            {not_null} AND id NOT IN (
+                SELECT MAX(id) FROM {schema.name} WHERE {not_null} GROUP BY {', '.join(schema.key_columns)}
+            )
+        '''
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {backup} AS SELECT * FROM {schema.name} WHERE 0')
+        cursor.execute(f'INSERT INTO {backup} SELECT * FROM {schema.name} WHERE {condition}')
+        cursor.execute(f'DELETE FROM {schema.name} WHERE {condition}')
+        deleted = cursor.rowcount
+        self.logger.info(f"Removed {deleted} duplicate rows from {table} (copied to {backup})")
+        return deleted
+    
+    def get_schema(self, table: str) -> TableSchema:
+        """
+        Get the schema of an ingestible table
+        
+        Raises:
+            ValueError: If the table is not ingestible
+        """
+        schema = TABLE_SCHEMAS.get(table)
+        if not schema:
+            raise ValueError(f"Unsupported table: {table}. Supported: {', '.join(TABLE_SCHEMAS)}")
+        return schema
+    
+    def iter_records(self, stream: BinaryIO, data_format: str) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Stream records from a CSV or JSONL byte stream
+        
+        Args:
+            stream: Binary input stream
+            data_format: 'csv' or 'jsonl'
+        
+        Yields:
+            Tuples of (line_number, record); malformed JSON lines and JSON
+            lines that are not UTF-8 yield RowValidationError instances
+            instead of records
+        
+        Raises:
+            InputEncodingError: If a CSV line is not UTF-8 (a CSV row may
+                span lines, so reading cannot continue past it)
+        """
+        text = self._iter_lines(stream, strict=data_format == 'csv')
+        
+        if data_format == 'csv':
+            reader = csv.DictReader(text)
+            for record in reader:
+                yield reader.line_num, record
+        elif data_format == 'jsonl':
+            for line_number, line in enumerate(text, start=1):
+                if isinstance(line, InputEncodingError):
+                    yield line_number, RowValidationError(str(line))
+                    continue
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, RowValidationError(f"Invalid JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    yield line_number, RowValidationError("Each JSON line must be an object")
+                    continue
+                yield line_number, record
+        else:
+            raise ValueError(f"Unsupported format: {data_format}")
+    
+    @staticmethod
+    def _iter_lines(stream: BinaryIO, strict: bool) -> Iterator[Any]:
+        """
+        Decode a byte stream line by line so an encoding error names its line
+        
+        Lines that fail to decode raise InputEncodingError when strict and
+        are yielded as InputEncodingError instances otherwise.
+        """
+        for line_number, raw in enumerate(stream, start=1):
+            if line_number == 1 and raw.startswith(codecs.BOM_UTF8):
+                raw = raw[len(codecs.BOM_UTF8):]
+            try:
+                yield raw.decode('utf-8')
+            except UnicodeDecodeError:
+                if strict:
+                    raise InputEncodingError(line_number)
+                yield InputEncodingError(line_number)
+    
+    def validate_record(self, schema: TableSchema, record: Dict[str, Any]) -> Tuple[Any, ...]:
+        """
+        Validate and convert a record to a row in schema column order
+        
+        Raises:
+            RowValidationError: If the record is invalid
+        """
+        row = []
+        for column in schema.columns:
+            value = record.get(column)
+            if isinstance(value, str):
+                value = value.strip()
+            if value == '':
+                value = None
+            
+            if column == 'department' and value is None:
+                value = DEFAULT_DEPARTMENT
+            
+            if column in schema.key_columns and value is None:
+                raise RowValidationError(f"Missing required field '{column}'")
+            
+            if value is not None:
+                try:
+                    if column in schema.integer_columns:
+                        number = float(value)
+                        if not number.is_integer():
+                            raise ValueError("not an integer")
+                        value = int(number)
+                    elif column in schema.real_columns:
+                        value = float(value)
+                    else:
+                        value = str(value)
+                except (TypeError, ValueError):
+                    raise RowValidationError(f"Invalid value for '{column}': {value!r}")
+                
+                if column in schema.integer_columns + schema.real_columns and value < 0:
+                    raise RowValidationError(f"Negative value for '{column}': {value!r}")
+            
+            if column == 'record_date' and not RECORD_DATE_PATTERN.match(value):
+                raise RowValidationError(f"record_date must be YYYY-MM, got {value!r}")
+            
+            row.append(value)
+        
+        return tuple(row)
+    
+    def build_upsert(self, schema: TableSchema) -> str:
+        """Build the upsert statement of a table"""
+        columns = schema.columns
+        updates = [f'{column} = excluded.{column}' for column in columns if column not in schema.key_columns]
+        # Refresh created_at so "latest row" queries see re-imported data
+        updates.append('created_at = CURRENT_TIMESTAMP')
+        return f'''
+            INSERT INTO {schema.name} ({', '.join(columns)})
+            VALUES ({', '.join('?' for _ in columns)})
+            ON CONFLICT({', '.join(schema.key_columns)}) DO UPDATE SET {', '.join(updates)}
+        '''
+    
+    def ingest(self, connection, table: str, records: Iterable[Tuple[int, Any]],
+               dry_run: bool = False) -> IngestResult:
+        """
+        Validate records as they stream in and upsert them in batched transactions
+        
+        Invalid rows are skipped and reported; every batch is committed on
+        its own, bumps the data version once and notifies its listeners once.
+        If the input turns out not to be UTF-8 part way through, the rows
+        read before the offending line are committed as well and the error
+        carries the result, so the caller can report what was written and
+        resume from that line.
+        
+        Args:
+            connection: SQLite connection
+            table: Target table
+            records: Iterable of (line_number, record) as produced by iter_records
+            dry_run: Validate only, without writing
+        
+        Returns:
+            IngestResult with counts, errors and throughput
+        
+        Raises:
+            DuplicateKeysError: If the table holds duplicate keys and has no upsert index
+            InputEncodingError: If a line cannot be decoded; its result holds
+                the rows committed before it
+        """
+        schema = self.get_schema(table)
+        if not dry_run:
+            indexed = self.ensure_upsert_index(connection.cursor(), table)
+            connection.commit()
+            if not indexed:
+                raise DuplicateKeysError(
+                    f"{table} has rows sharing a key; run 'python ingest_metrics.py {table} --dedupe' first"
+                )
+        
+        sql = self.build_upsert(schema)
+        result = IngestResult(table=table, dry_run=dry_run)
+        start_time = time.perf_counter()
+        
+        batch = []
+        try:
+            for line_number, record in records:
+                result.rows_received += 1
+                try:
+                    if isinstance(record, Exception):
+                        raise record
+                    batch.append(self.validate_record(schema, record))
+                except RowValidationError as e:
+                    result.rows_rejected += 1
+                    if len(result.errors) < self.max_errors:
+                        result.errors.append({'line': line_number, 'error': str(e)})
+                    continue
+                
+                if len(batch) >= self.batch_size:
+                    self._write_batch(connection, sql, batch, result)
+                    batch = []
+        except InputEncodingError as e:
+            if batch:
+                self._write_batch(connection, sql, batch, result)
+            result.elapsed = time.perf_counter() - start_time
+            e.result = result
+            self.logger.warning(
+                f"Ingestion into {table} stopped at line {e.line} (not UTF-8) "
+                f"after writing {result.rows_written} rows"
+            )
+            raise
+        
+        if batch:
+            self._write_batch(connection, sql, batch, result)
+        
+        result.elapsed = time.perf_counter() - start_time
+        self.logger.info(
+            f"Ingested {result.rows_written} rows into {table} "
+            f"({result.rows_rejected} rejected, {result.rows_per_second} rows/s)"
+        )
+        return result
+    
+    def _write_batch(self, connection, sql: str, batch: List[Tuple[Any, ...]], result: IngestResult) -> None:
+        """Write one batch in its own transaction"""
+        if result.dry_run:
+            result.rows_written += len(batch)
+            result.batches += 1
+            return
+        
+        cursor = connection.cursor()
+        try:
+            cursor.executemany(sql, batch)
+            version = self.data_version.bump(cursor)
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        
+        result.rows_written += len(batch)
+        result.batches += 1
+        result.data_version = version
+        self.data_version.notify(version)
@@ -0,0 +1,133 @@
+import base64
+import json
+import sqlite3
+from typing import Optional, Tuple, List, Any
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    """
+    Encode the position of the last returned row as an opaque cursor
+    
+    Args:
+        sort_value: Value of the sort column of the last row
+        row_id: Primary key of the last row (tie breaker)
+    
+    Returns:
+        URL-safe cursor string
+    """
+    raw = json.dumps([sort_value, row_id], ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, Any]:
+    """
+    Decode a cursor produced by encode_cursor
+    
+    Args:
+        cursor: Cursor string
+    
+    Returns:
+        Tuple of (sort_value, row_id)
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    
+    if not isinstance(value, list) or len(value) != 2:
+        raise ValueError("Invalid cursor")
+    
+    return value[0], value[1]
+
+
+def keyset_condition(sort_column: str, id_column: str, cursor: Optional[str],
+                     descending: bool = True) -> Tuple[str, List[Any]]:
+    """
+    Build the WHERE fragment that continues after the cursor row
+    
+    The fragment compares (sort_column, id_column) as a row value so SQLite
+    can seek directly in a composite index on the two columns.
+    
+    Args:
+        sort_column: Sort column name
+        id_column: Tie breaker column name
+        cursor: Cursor string, or None for the first page
+        descending: Whether the listing is sorted descending
+    
+    Returns:
+        Tuple of (sql_fragment, params)
+    """
+    if not cursor:
+        return '1=1', []
+    
+    sort_value, row_id = decode_cursor(cursor)
+    operator = '<' if descending else '>'
+    return f'({sort_column}, {id_column}) {operator} (?, ?)', [sort_value, row_id]
+
+
+
+def nullable_keyset_condition(sort_column: str, tie_column: str, after: Optional[Tuple[Any, Any]],
+                              descending: bool = True, tie_descending: bool = False) -> Tuple[str, List[Any]]:
+    """
+    Build the fragment that continues after a (sort value, tie breaker) position
+    
+    Unlike keyset_condition this handles a nullable sort column, with NULL
+    values last when descending and first when ascending (SQLite's NULL
+    ordering), and a tie breaker that may be sorted in the other direction,
+    e.g. rankings ordered by value and then by name ascending.
+    
+    Args:
+        sort_column: Sort column or alias
+        tie_column: Tie breaker column
+        after: (sort value, tie value) of the last returned row, or None for the first page
+        descending: Whether the sort column is sorted descending
+        tie_descending: Whether the tie breaker is sorted descending
+    
+    Returns:
+        Tuple of (sql_fragment, params)
+    """
+    if after is None:
+        return '1=1', []
+    
+    value, tie = after
+    if tie is None:
+        # NULL ties come first ascending and last descending
+        tie_after, tie_params = ('0' if tie_descending else f'{tie_column} IS NOT NULL'), []
+    else:
+        tie_after, tie_params = f'{tie_column} {"<" if tie_descending else ">"} ?', [tie]
+    
+    if value is None:
+        clause = f'({sort_column} IS NULL AND {tie_after})'
+        if not descending:
+            clause = f'({clause} OR {sort_column} IS NOT NULL)'
+        return clause, tie_params
+    
+    operator = '<' if descending else '>'
+    clause = f'{sort_column} {operator} ? OR ({sort_column} = ? AND {tie_after})'
+    if descending:
+        clause += f' OR {sort_column} IS NULL'
+    return f'({clause})', [value, value] + tie_params
+
+
+def get_row_count(cursor, counter_key: str) -> Optional[int]:
+    """
+    Read an incrementally maintained row count
+    
+    Args:
+        cursor: SQLite cursor
+        counter_key: Counter key, e.g. 'ai_analysis_files' or 'ai_analysis_files:pdf'
+    
+    Returns:
+        Row count, or None if the counter table is missing
+    """
+    try:
+        cursor.execute('SELECT row_count FROM ai_row_counts WHERE counter_key = ?', (counter_key,))
+    except sqlite3.Error:
+        return None
+    
+    result = cursor.fetchone()
+    return result[0] if result else 0
\ No newline at end of file
@@ -0,0 +1,187 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+# Leaf frames of threads that are blocked waiting for work (excluded unless include_idle)
+IDLE_FRAMES = {
+    ('threading.py', 'wait'),
+    ('threading.py', '_wait_for_tstate_lock'),
+    ('selectors.py', 'select'),
+    ('socketserver.py', 'serve_forever'),
+    ('queue.py', 'get'),
+    ('socket.py', 'accept'),
+    ('socket.py', 'readinto'),
+    ('ssl.py', 'read'),
+}
+
+
+def _frame_label(code) -> str:
+    # ';' separates frames in the collapsed format
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(';', ':')
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler over all threads of the live process
+    
+    A background loop reads the current stack of every thread
+    (sys._current_frames) at a fixed interval and counts identical stacks.
+    Nothing is hooked into the profiled code, so the overhead is one stack
+    walk per thread per interval. The result is in the collapsed stack
+    format ("thread;file:function;... count" per line) read by flamegraph.pl,
+    speedscope and inferno.
+    """
+    
+    def __init__(self, interval: float = 0.005, include_idle: bool = False, max_depth: int = 128):
+        """
+        Args:
+            interval: Seconds between samples
+            include_idle: Also count threads blocked in waits, selects and queue reads
+            max_depth: Innermost frames kept per stack
+        """
+        self.interval = max(0.001, interval)
+        self.include_idle = include_idle
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self.samples = 0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+    
+    def sample(self, skip_thread_ids=()) -> None:
+        """Record the current stack of every thread once"""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id in skip_thread_ids:
+                continue
+            if not self.include_idle:
+                code = frame.f_code
+                if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                    continue
+            labels = []
+            while frame is not None and len(labels) < self.max_depth:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            labels.append(names.get(thread_id, f'thread-{thread_id}').replace(';', ':').replace(' ', '_'))
+            self.stacks[';'.join(reversed(labels))] += 1
+        self.samples += 1
+    
+    def _run(self) -> None:
+        skip = {threading.get_ident()}
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            self.sample(skip)
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # Fell behind (slow stack walks); do not burst to catch up
+                next_sample = time.perf_counter()
+    
+    def start(self) -> 'SamplingProfiler':
+        if self._thread is not None:
+            raise RuntimeError("Profiler already started")
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> 'SamplingProfiler':
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self.duration = time.perf_counter() - self._started
+        return self
+    
+    def run(self, seconds: float) -> 'SamplingProfiler':
+        """Sample for `seconds` (blocking the calling thread, which is not sampled)"""
+        self.start()
+        try:
+            self._stop.wait(seconds)
+        finally:
+            self.stop()
+        return self
+    
+    def collapsed(self) -> str:
+        """Collapsed stacks, most frequent first"""
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+class CallProfiler:
+    """
+    Runs single calls under cProfile and keeps the output for download
+    
+    cProfile traces every function call of the profiling thread, so it is
+    only meant for individually flagged requests. Only one call is profiled
+    at a time (Python 3.12+ allows a single active profiler per process);
+    concurrent requests run unprofiled.
+    """
+    
+    def __init__(self, output_dir: str, keep: int = 50):
+        """
+        Args:
+            output_dir: Directory for the .prof files
+            keep: Number of most recent profiles kept
+        """
+        self.output_dir = output_dir
+        self.keep = keep
+        self._lock = threading.Lock()
+    
+    def profile(self, name: str, function: Callable[[], Any]) -> Tuple[Any, Optional[str]]:
+        """
+        Call `function` under cProfile
+        
+        Returns:
+            Tuple of (return value, profile id or None when another call is being profiled)
+        """
+        if not self._lock.acquire(blocking=False):
+            return function(), None
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                result = function()
+            finally:
+                profiler.disable()
+            profile_id = f"{name}-{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}"
+            os.makedirs(self.output_dir, exist_ok=True)
+            profiler.dump_stats(self.path(profile_id))
+            self._prune()
+            return result, profile_id
+        finally:
+            self._lock.release()
+    
+    def path(self, profile_id: str) -> str:
+        """File of a profile id (ValueError for ids that are not plain file names)"""
+        if not profile_id or os.path.basename(profile_id) != profile_id or profile_id.startswith('.'):
+            raise ValueError(f"Invalid profile id: {profile_id}")
+        return os.path.join(self.output_dir, f'{profile_id}.prof')
+    
+    def list_profiles(self):
+        if not os.path.isdir(self.output_dir):
+            return []
+        names = [name[:-len('.prof')] for name in os.listdir(self.output_dir) if name.endswith('.prof')]
+        return sorted(names, key=lambda profile_id: os.path.getmtime(self.path(profile_id)), reverse=True)
+    
+    def report(self, profile_id: str, sort: str = 'cumulative', limit: int = 60) -> str:
+        """pstats text report of a stored profile"""
+        output = io.StringIO()
+        stats = pstats.Stats(self.path(profile_id), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+    
+    def _prune(self) -> None:
+        for profile_id in self.list_profiles()[self.keep:]:
+            try:
+                os.remove(self.path(profile_id))
+            except OSError:
+                pass
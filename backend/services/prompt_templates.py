@@ -0,0 +1,402 @@
+import re
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+
+# Placeholders are written as {{name}}; single braces are left alone so
+# prompts can contain JSON examples
+PLACEHOLDER_PATTERN = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+TEMPLATE_ID_PATTERN = re.compile(r'^[a-z0-9][a-z0-9_-]{0,63}$')
+
+MAX_TEMPLATE_LENGTH = 20000
+
+# Standard analysis types, inserted once so later edits are kept
+DEFAULT_TEMPLATES = (
+    {
+        'id': 'risk-review',
+        'name': '风险评审',
+        'description': '识别文档中的技术、进度、资源与合规风险并给出应对建议',
+        'body': (
+            "请对文档《{{filename}}》进行风险评审。\n"
+            "1. 按技术、进度、资源、质量、合规等类别列出识别到的风险；\n"
+            "2. 为每项风险评估可能性和影响（高/中/低）并说明依据；\n"
+            "3. 给出对应的缓解措施和责任建议；\n"
+            "4. 最后总结需要优先关注的三项风险。"
+        ),
+        'temperature': 0.3
+    },
+    {
+        'id': 'requirement-summary',
+        'name': '需求摘要',
+        'description': '提炼需求文档的目标、功能点、约束与待确认事项',
+        'body': (
+            "请为需求文档《{{filename}}》撰写摘要。\n"
+            "1. 用两三句话概括业务目标；\n"
+            "2. 逐条列出功能需求和非功能需求；\n"
+            "3. 列出约束条件、依赖和验收标准；\n"
+            "4. 列出描述不清或相互矛盾、需要与需求方确认的问题。"
+        ),
+        'max_tokens': 1500,
+        'temperature': 0.2
+    },
+    {
+        'id': 'test-plan',
+        'name': '测试计划提取',
+        'description': '从文档中提取测试范围、测试点和测试用例',
+        'body': (
+            "请根据文档《{{filename}}》提取测试计划。\n"
+            "1. 明确测试范围和不在范围内的内容；\n"
+            "2. 按功能模块列出测试点，覆盖正常流程、异常流程和边界条件；\n"
+            "3. 为关键测试点给出用例（前置条件、步骤、预期结果）；\n"
+            "4. 指出需要的测试数据、环境以及性能或安全方面的测试项。"
+        ),
+        'max_tokens': 3000,
+        'temperature': 0.2
+    }
+)
+
+
+@dataclass(frozen=True)
+class CompiledTemplate:
+    """One version of a prompt template, parsed once for fast rendering"""
+    template_id: str
+    version: int
+    name: str
+    body: str
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    # (literal text, variable name or None) pairs in body order
+    parts: Tuple[Tuple[str, Optional[str]], ...] = field(default=(), repr=False)
+    
+    @classmethod
+    def compile(cls, template_id: str, version: int, name: str, body: str,
+                max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> 'CompiledTemplate':
+        pieces = PLACEHOLDER_PATTERN.split(body)
+        # split() alternates literal text and captured names, ending with text
+        parts = tuple(
+            (pieces[index], pieces[index + 1] if index + 1 < len(pieces) else None)
+            for index in range(0, len(pieces), 2)
+        )
+        return cls(template_id, version, name, body, max_tokens, temperature, parts)
+    
+    @property
+    def variables(self) -> List[str]:
+        """Variable names in order of first use"""
+        return list(dict.fromkeys(name for _, name in self.parts if name))
+    
+    @property
+    def options(self) -> Dict[str, Any]:
+        """Model parameters overriding the client defaults"""
+        options = {}
+        if self.max_tokens is not None:
+            options['max_tokens'] = self.max_tokens
+        if self.temperature is not None:
+            options['temperature'] = self.temperature
+        return options
+    
+    def render(self, values: Mapping[str, Any]) -> str:
+        """
+        Substitute variables into the template
+        
+        Raises:
+            ValueError: If a variable used by the template has no value
+        """
+        missing = [name for name in self.variables if values.get(name) is None]
+        if missing:
+            raise ValueError(f"Missing template variables: {', '.join(missing)}")
+        
+        return ''.join(
+            text + str(values[name]) if name else text
+            for text, name in self.parts
+        )
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'id': self.template_id,
+            'version': self.version,
+            'name': self.name,
+            'body': self.body,
+            'variables': self.variables,
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature
+        }
+
+
+class PromptTemplateRegistry:
+    """
+    Named, versioned prompt templates stored in SQLite
+    
+    Saving a template with a changed body or model parameters adds a new
+    version; versions are never modified, so compiled templates are cached
+    by (template id, version) and stay valid across processes. Analysis
+    results record the template version they were produced with, and a
+    result key over the document digest, template version, rendered prompt
+    and model lets repeat analyses be answered from the stored result.
+    """
+    
+    def __init__(self, max_length: int = MAX_TEMPLATE_LENGTH, cache_size: int = 128):
+        """
+        Initialize the registry
+        
+        Args:
+            max_length: Maximum template body length in characters
+            cache_size: Compiled template versions kept in memory
+        """
+        self.max_length = max_length
+        self.cache_size = cache_size
+        self._compiled = OrderedDict()
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    def create_tables(self, cursor) -> None:
+        """Create the template tables and the template columns of ai_analysis_results"""
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_prompt_templates (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                description TEXT,
+                current_version INTEGER NOT NULL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS ai_prompt_template_versions (
+                template_id TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                body TEXT NOT NULL,
+                max_tokens INTEGER,
+                temperature REAL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (template_id, version)
+            )
+        ''')
+        
+        cursor.execute("PRAGMA table_info(ai_analysis_results)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if 'template_id' not in columns:
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN template_id TEXT')
+        if 'template_version' not in columns:
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN template_version INTEGER')
+        if 'result_key' not in columns:
+            cursor.execute('ALTER TABLE ai_analysis_results ADD COLUMN result_key TEXT')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_ai_analysis_results_result_key
+            ON ai_analysis_results (result_key, created_at)
+        ''')
+    
+    def seed_defaults(self, cursor) -> int:
+        """
+        Insert the standard templates that do not exist yet
+        
+        Returns:
+            Number of templates inserted
+        """
+        inserted = 0
+        for template in DEFAULT_TEMPLATES:
+            cursor.execute('SELECT 1 FROM ai_prompt_templates WHERE id = ?', (template['id'],))
+            if cursor.fetchone():
+                continue
+            self.save(cursor, template['id'], template['name'], template['body'],
+                      description=template.get('description'),
+                      max_tokens=template.get('max_tokens'),
+                      temperature=template.get('temperature'))
+            inserted += 1
+        return inserted
+    
+    def validate(self, template_id: str, name: str, body: str,
+                 max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> None:
+        """
+        Check a template definition
+        
+        Raises:
+            ValueError: If a field is missing or out of range
+        """
+        if not template_id or not TEMPLATE_ID_PATTERN.match(template_id):
+            raise ValueError("Template id must be 1-64 lowercase letters, digits, '-' or '_'")
+        if not name or not name.strip():
+            raise ValueError("Template name cannot be empty")
+        if not body or not body.strip():
+            raise ValueError("Template body cannot be empty")
+        if len(body) > self.max_length:
+            raise ValueError(f"Template body is too long (maximum {self.max_length} characters)")
+        if '{{' in PLACEHOLDER_PATTERN.sub('', body):
+            raise ValueError("Template variables must be written as {{name}} with a valid identifier")
+        if max_tokens is not None and (isinstance(max_tokens, bool) or not isinstance(max_tokens, int)
+                                       or not 1 <= max_tokens <= 32768):
+            raise ValueError("max_tokens must be an integer between 1 and 32768")
+        if temperature is not None and (isinstance(temperature, bool) or not isinstance(temperature, (int, float))
+                                        or not 0 <= temperature <= 2):
+            raise ValueError("temperature must be a number between 0 and 2")
+    
+    def save(self, cursor, template_id: str, name: str, body: str, description: Optional[str] = None,
+             max_tokens: Optional[int] = None, temperature: Optional[float] = None) -> CompiledTemplate:
+        """
+        Create a template or update it
+        
+        A new version is added only when the body or the model parameters
+        change; name and description are updated in place (a description of
+        None keeps the current one).
+        
+        Returns:
+            The current version of the template
+        
+        Raises:
+            ValueError: If the definition is invalid
+        """
+        self.validate(template_id, name, body, max_tokens, temperature)
+        if temperature is not None:
+            temperature = float(temperature)
+        
+        current = self.get(cursor, template_id)
+        if current and (current.body, current.max_tokens, current.temperature) == (body, max_tokens, temperature):
+            version = current.version
+        else:
+            version = current.version + 1 if current else 1
+            cursor.execute('''
+                INSERT INTO ai_prompt_template_versions (template_id, version, body, max_tokens, temperature)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (template_id, version, body, max_tokens, temperature))
+        
+        cursor.execute('''
+            INSERT INTO ai_prompt_templates (id, name, description, current_version)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                description = COALESCE(excluded.description, ai_prompt_templates.description),
+                current_version = excluded.current_version,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (template_id, name.strip(), description, version))
+        
+        return self.get(cursor, template_id, version)
+    
+    def get(self, cursor, template_id: str, version: Optional[int] = None) -> Optional[CompiledTemplate]:
+        """
+        Get the compiled current (or a specific) version of a template
+        
+        Returns:
+            CompiledTemplate, or None if the template or version does not exist
+        """
+        cursor.execute('SELECT name, current_version FROM ai_prompt_templates WHERE id = ?', (template_id,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        name, current_version = row
+        version = version or current_version
+        
+        key = (template_id, version)
+        with self._lock:
+            compiled = self._compiled.get(key)
+            if compiled is not None and compiled.name == name:
+                self._compiled.move_to_end(key)
+                return compiled
+        
+        cursor.execute('''
+            SELECT body, max_tokens, temperature
+            FROM ai_prompt_template_versions
+            WHERE template_id = ? AND version = ?
+        ''', key)
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        compiled = CompiledTemplate.compile(template_id, version, name, *row)
+        with self._lock:
+            self._compiled[key] = compiled
+            self._compiled.move_to_end(key)
+            while len(self._compiled) > self.cache_size:
+                self._compiled.popitem(last=False)
+        return compiled
+    
+    def list_templates(self, cursor) -> List[Dict[str, Any]]:
+        """Current version of every template"""
+        cursor.execute('''
+            SELECT t.id, t.name, t.description, t.current_version, t.updated_at,
+                   v.body, v.max_tokens, v.temperature
+            FROM ai_prompt_templates t
+            JOIN ai_prompt_template_versions v
+              ON v.template_id = t.id AND v.version = t.current_version
+            ORDER BY t.id
+        ''')
+        templates = []
+        for template_id, name, description, version, updated_at, body, max_tokens, temperature in cursor.fetchall():
+            template = CompiledTemplate.compile(template_id, version, name, body, max_tokens, temperature).to_dict()
+            template.update(description=description, updated_at=updated_at)
+            templates.append(template)
+        return templates
+    
+    def list_versions(self, cursor, template_id: str) -> List[Dict[str, Any]]:
+        """All versions of a template, newest first"""
+        cursor.execute('''
+            SELECT version, max_tokens, temperature, created_at
+            FROM ai_prompt_template_versions
+            WHERE template_id = ?
+            ORDER BY version DESC
+        ''', (template_id,))
+        return [
+            {'version': row[0], 'max_tokens': row[1], 'temperature': row[2], 'created_at': row[3]}
+            for row in cursor.fetchall()
+        ]
+    
+    def delete(self, cursor, template_id: str) -> bool:
+        """
+        Delete a template and its versions
+        
+        Stored results keep their template id and version; a deleted
+        standard template is seeded again on the next start.
+        
+        Returns:
+            True if the template existed
+        """
+        cursor.execute('DELETE FROM ai_prompt_templates WHERE id = ?', (template_id,))
+        deleted = cursor.rowcount > 0
+        cursor.execute('DELETE FROM ai_prompt_template_versions WHERE template_id = ?', (template_id,))
+        with self._lock:
+            for key in [key for key in self._compiled if key[0] == template_id]:
+                del self._compiled[key]
+        return deleted
+    
+    @staticmethod
+    def result_key(document_digest: str, template: CompiledTemplate, prompt: str,
+                   model: Optional[str], mode: str = 'full') -> str:
+        """
+        Key identifying an analysis result that can be reused
+        
+        Args:
+            document_digest: Digest of the uploaded file
+            template: Template version the prompt was rendered from
+            prompt: Rendered prompt (covers the variable values)
+            model: Model the analysis is requested from
+            mode: Analysis mode ('full' or 'incremental')
+        """
+        key = '\x1f'.join([
+            document_digest, template.template_id, str(template.version),
+            hashlib.sha256(prompt.encode('utf-8')).hexdigest(), model or '', mode
+        ])
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def find_result(self, cursor, result_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Latest stored result with a result key
+        
+        Returns:
+            Dict with id, file_id, analysis_text, text_encoding, analysis_json,
+            processing_time and created_at, or None
+        """
+        cursor.execute('''
+            SELECT id, file_id, analysis_text, text_encoding, analysis_json, processing_time, created_at
+            FROM ai_analysis_results
+            WHERE result_key = ?
+            ORDER BY created_at DESC
+            LIMIT 1
+        ''', (result_key,))
+        row = cursor.fetchone()
+        if not row:
+            return None
+        return dict(zip(
+            ('id', 'file_id', 'analysis_text', 'text_encoding', 'analysis_json', 'processing_time', 'created_at'), row
+        ))
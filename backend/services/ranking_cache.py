@@ -0,0 +1,68 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from services.data_version import DataVersion
+
+
+class RankingCache:
+    """
+    LRU cache of ranking pages tagged with the dashboard data version
+    
+    Entries are keyed by the query (metric, order, filters and page) and
+    only returned while the data version they were computed at is current.
+    In-process writes clear the cache through a DataVersion listener; writes
+    from other processes are caught by the version comparison on lookup.
+    """
+    
+    def __init__(self, data_version: DataVersion = None, max_entries: int = 512):
+        """
+        Initialize ranking cache
+        
+        Args:
+            data_version: Data version whose changes clear the cache
+            max_entries: Maximum number of cached pages
+        """
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if data_version is not None:
+            data_version.subscribe(self._on_data_change)
+    
+    def _on_data_change(self, version: Optional[int]) -> None:
+        self.clear()
+    
+    def get(self, key: Hashable, version: int) -> Optional[Any]:
+        """
+        Get a cached page
+        
+        Returns:
+            Cached rows, or None if missing or computed at another data version
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+    
+    def put(self, key: Hashable, version: int, rows: Any) -> None:
+        """Store a page computed at the given data version"""
+        with self._lock:
+            self._entries[key] = (version, rows)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Drop all cached pages"""
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
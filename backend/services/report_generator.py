@@ -4,6 +4,10 @@ from typing import Dict, Any, Optional
 from dataclasses import dataclass
 from datetime import datetime
 from services.siliconflow_client import AnalysisResult
+from services.tracing import traced
+
+# CSS classes of structured risk severities
+RISK_LEVEL_CLASSES = {'高': 'high', '中': 'medium', '低': 'low'}
 
 
 @dataclass
@@ -26,6 +30,7 @@ class ReportGenerator:
             'json': self._get_json_template()
         }
     
+    @traced('report.generate')
     def generate_report(self, analysis_result: AnalysisResult, file_metadata: Dict[str, Any], 
                        analysis_id: str = None) -> Report:
         """
@@ -59,8 +64,10 @@ class ReportGenerator:
             'processing_time': analysis_result.processing_time,
             'model_used': analysis_result.model_used,
             'tokens_used': analysis_result.tokens_used,
+            'cached_tokens': analysis_result.cached_tokens,
             'prompt_used': file_metadata.get('prompt_used', '默认分析提示'),
-            'created_at': datetime.now().isoformat()
+            'created_at': datetime.now().isoformat(),
+            'structured': analysis_result.structured
         }
         
         # Build metadata section
@@ -247,6 +254,29 @@ class ReportGenerator:
                     max-height: 600px;
                     overflow-y: auto;
                 }}
+                .structured-analysis h3 {{
+                    font-size: 16px;
+                    margin: 20px 0 8px;
+                    color: #2c3e50;
+                }}
+                .structured-analysis h3:first-child {{
+                    margin-top: 0;
+                }}
+                .structured-analysis ul {{
+                    margin: 0;
+                    padding-left: 20px;
+                    line-height: 1.6;
+                }}
+                .risk-level {{
+                    display: inline-block;
+                    padding: 2px 8px;
+                    border-radius: 10px;
+                    font-size: 12px;
+                    font-weight: bold;
+                }}
+                .risk-high {{ background: #f8d7da; color: #721c24; }}
+                .risk-medium {{ background: #fff3cd; color: #856404; }}
+                .risk-low {{ background: #d4edda; color: #155724; }}
                 .error-message {{
                     background: #f8d7da;
                     color: #721c24;
@@ -366,17 +396,49 @@ class ReportGenerator:
     def _format_analysis_content(self, report: Report) -> str:
         """Format the analysis content section"""
         if report.analysis['success']:
+            if report.analysis.get('structured'):
+                return self._format_structured_content(report.analysis['structured'])
             content = report.analysis['content']
             return f'<div class="analysis-content">{html.escape(content)}</div>'
         else:
             error_msg = report.analysis.get('error_message', '未知错误')
             return f'<div class="error-message"><strong>分析失败:</strong> {html.escape(error_msg)}</div>'
     
+    def _format_structured_content(self, structured: Dict[str, Any]) -> str:
+        """Format a structured analysis as sections, lists and a risk table"""
+        parts = ['<div class="structured-analysis">',
+                 f"<h3>摘要</h3><p>{html.escape(structured['summary'])}</p>"]
+        
+        if structured.get('key_points'):
+            items = ''.join(f'<li>{html.escape(item)}</li>' for item in structured['key_points'])
+            parts.append(f'<h3>关键要点</h3><ul>{items}</ul>')
+        
+        if structured.get('risks'):
+            rows = ''.join(
+                f'<tr><td><span class="risk-level risk-{RISK_LEVEL_CLASSES.get(risk["severity"], "medium")}">'
+                f'{html.escape(risk["severity"])}</span></td>'
+                f'<td>{html.escape(risk["description"])}</td>'
+                f'<td>{html.escape(risk.get("mitigation") or "")}</td></tr>'
+                for risk in structured['risks']
+            )
+            parts.append(f'<h3>风险</h3><table class="metadata-table">'
+                         f'<tr><th>等级</th><th>描述</th><th>应对措施</th></tr>{rows}</table>')
+        
+        if structured.get('recommendations'):
+            items = ''.join(f'<li>{html.escape(item)}</li>' for item in structured['recommendations'])
+            parts.append(f'<h3>建议</h3><ul>{items}</ul>')
+        
+        parts.append('</div>')
+        return ''.join(parts)
+    
     def _format_technical_info(self, report: Report) -> str:
         """Format the technical information section"""
         tokens_used = report.analysis.get('tokens_used', 0)
         tokens_str = f"{tokens_used} tokens" if tokens_used else "未知"
         
+        cached_tokens = report.analysis.get('cached_tokens')
+        cached_str = f"{cached_tokens} tokens" if cached_tokens else "无"
+        
         prompt_used = report.analysis.get('prompt_used', '默认分析提示')
         
         return f"""
@@ -389,6 +451,10 @@ class ReportGenerator:
                 <td>使用的Token数量</td>
                 <td>{tokens_str}</td>
             </tr>
+            <tr>
+                <td>命中缓存的提示词Token</td>
+                <td>{cached_str}</td>
+            </tr>
             <tr>
                 <td>分析提示词</td>
                 <td>{html.escape(prompt_used)}</td>
@@ -430,11 +496,12 @@ class ReportGenerator:
         Returns:
             Dictionary with summary information
         """
-        # Extract key insights from analysis content
+        # Structured analyses carry their summary; free text is scanned for one
         content = report.analysis.get('content', '')
-        summary = self._extract_summary(content) if content else '无分析内容'
+        structured = report.analysis.get('structured')
+        summary = self.summarize(content, structured) if content or structured else '无分析内容'
         
-        return {
+        summary_report = {
             'id': report.id,
             'filename': report.file_info['filename'],
             'file_type': report.file_info['file_type'],
@@ -445,6 +512,22 @@ class ReportGenerator:
             'created_at': report.created_at.isoformat(),
             'tokens_used': report.analysis.get('tokens_used', 0)
         }
+        if structured:
+            summary_report.update(
+                key_points=structured['key_points'],
+                risks=structured['risks'],
+                recommendations=structured['recommendations']
+            )
+        return summary_report
+    
+    def summarize(self, content: str, structured: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Summary of an analysis: the structured summary if there is one,
+        otherwise a summary extracted from the text
+        """
+        if structured:
+            return structured['summary']
+        return self._extract_summary(content)
     
     def _extract_summary(self, content: str, max_length: int = 200) -> str:
         """
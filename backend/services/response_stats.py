@@ -0,0 +1,84 @@
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+
+@dataclass
+class EndpointStats:
+    """Accumulated response measurements of one endpoint"""
+    requests: int = 0
+    streamed: int = 0
+    measured: int = 0
+    raw_bytes: int = 0
+    wire_bytes: int = 0
+    serialize_time: float = 0.0
+    compress_time: float = 0.0
+    encodings: Dict[str, int] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'streamed': self.streamed,
+            'rawBytes': self.raw_bytes,
+            'wireBytes': self.wire_bytes,
+            'avgWireBytes': round(self.wire_bytes / self.measured) if self.measured else 0,
+            'compressionRatio': round(self.wire_bytes / self.raw_bytes, 3) if self.raw_bytes else None,
+            'serializeMs': round(self.serialize_time * 1000, 3),
+            'avgSerializeMs': round(self.serialize_time * 1000 / self.requests, 3) if self.requests else 0,
+            'compressMs': round(self.compress_time * 1000, 3),
+            'encodings': dict(self.encodings)
+        }
+
+
+class ResponseStats:
+    """
+    Per-endpoint response size and encoding cost
+    
+    Records the body size before and after compression (bytes on the wire)
+    and the time spent on JSON serialization and compression. Streamed
+    responses are recorded once they have been sent; file responses have
+    no measured size, so only their count is kept.
+    """
+    
+    def __init__(self):
+        self._endpoints: Dict[str, EndpointStats] = {}
+        self._lock = threading.Lock()
+    
+    def record(self, endpoint: str, raw_bytes: Optional[int], wire_bytes: Optional[int],
+               serialize_time: float = 0.0, compress_time: float = 0.0,
+               encoding: Optional[str] = None, streamed: bool = False) -> None:
+        """
+        Record one response
+        
+        Args:
+            endpoint: Endpoint name
+            raw_bytes: Body size before compression (None if unknown)
+            wire_bytes: Body size sent (None if unknown)
+            serialize_time: Seconds spent serializing JSON
+            compress_time: Seconds spent compressing
+            encoding: Content-Encoding of the response
+            streamed: Whether the body was streamed
+        """
+        with self._lock:
+            stats = self._endpoints.setdefault(endpoint, EndpointStats())
+            stats.requests += 1
+            if streamed:
+                stats.streamed += 1
+            if raw_bytes is not None and wire_bytes is not None:
+                stats.measured += 1
+                stats.raw_bytes += raw_bytes
+                stats.wire_bytes += wire_bytes
+            stats.serialize_time += serialize_time
+            stats.compress_time += compress_time
+            encoding = encoding or 'identity'
+            stats.encodings[encoding] = stats.encodings.get(encoding, 0) + 1
+    
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        """Get the statistics of all endpoints"""
+        with self._lock:
+            return {endpoint: stats.to_dict() for endpoint, stats in sorted(self._endpoints.items())}
+    
+    def reset(self) -> None:
+        """Clear all statistics"""
+        with self._lock:
+            self._endpoints.clear()
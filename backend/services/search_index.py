@@ -0,0 +1,311 @@
+import html
+import time
+import sqlite3
+import logging
+from typing import Optional, Dict, Any, List
+
+
+# Markers placed around matches by snippet(); replaced after HTML escaping
+HIGHLIGHT_START = '\x02'
+HIGHLIGHT_END = '\x03'
+
+# The trigram tokenizer can only use the index for terms of 3+ characters
+MIN_INDEXED_TERM_LENGTH = 3
+
+
+class SearchTimeoutError(Exception):
+    """Raised when a search exceeds its time budget"""
+    pass
+
+
+class SearchIndex:
+    """SQLite FTS5 full-text index over analysis history"""
+    
+    def __init__(self, table_name: str = 'ai_analysis_fts', time_budget: float = 2.0,
+                 merge_pages: int = 64):
+        """
+        Initialize search index
+        
+        Args:
+            table_name: Name of the FTS5 virtual table
+            time_budget: Maximum seconds a search query may run
+            merge_pages: Pages merged per incremental merge step
+        """
+        self.table_name = table_name
+        self.time_budget = time_budget
+        self.merge_pages = merge_pages
+        self.available = False
+        self.logger = logging.getLogger(__name__)
+    
+    @property
+    def source_view(self) -> str:
+        """View exposing the decoded text the index is built from"""
+        return f'{self.table_name}_source'
+    
+    def create(self, cursor) -> bool:
+        """
+        Create the FTS5 table and the triggers that keep it in sync
+        
+        The index is an external-content table over a view that decodes the
+        stored (possibly compressed) analysis text with the decompress_text
+        SQL function and resolves the interned prompt, so it holds no copy of
+        either; connections writing analysis results must register that
+        function (see analysis_storage.register_functions). Triggers on
+        ai_analysis_results and ai_analysis_files keep the index in sync
+        (interned prompts are never changed once stored).
+        
+        The index is populated from existing rows the first time it is
+        created. Rows are keyed by the rowid of ai_analysis_results, so the
+        index has to be rebuilt after a VACUUM renumbers that table.
+        
+        Returns:
+            True if the index is available, False if FTS5 is not compiled in
+        """
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (self.table_name,))
+        row = cursor.fetchone()
+        if row and ('content=' not in row[0].replace(' ', '') or 'prompt_used' not in row[0]):
+            # Earlier layouts kept a plain-text copy of every analysis and
+            # prompt, or left the prompt out of the index
+            cursor.execute(f'DROP TABLE {self.table_name}')
+            cursor.execute(f'DROP VIEW IF EXISTS {self.source_view}')
+            row = None
+        exists = row is not None
+        
+        cursor.execute(f'''
+            CREATE VIEW IF NOT EXISTS {self.source_view} AS
+            SELECT r.rowid AS result_rowid,
+                   decompress_text(r.analysis_text, r.text_encoding) AS analysis_text,
+                   COALESCE(p.prompt_text, r.prompt_used) AS prompt_used,
+                   f.filename AS filename
+            FROM ai_analysis_results r
+            LEFT JOIN ai_prompts p ON p.id = r.prompt_id
+            LEFT JOIN ai_analysis_files f ON f.id = r.file_id
+        ''')
+        
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS {self.table_name} USING fts5(
+                    analysis_text,
+                    prompt_used,
+                    filename,
+                    content = '{self.source_view}',
+                    content_rowid = 'result_rowid',
+                    tokenize = 'trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            self.logger.warning(f"Full-text search unavailable: {e}")
+            self.available = False
+            return False
+        
+        self._create_triggers(cursor)
+        
+        # Merge segments in small steps during writes instead of large
+        # stop-the-world merges
+        cursor.execute(f"INSERT INTO {self.table_name} ({self.table_name}, rank) VALUES ('automerge', 8)")
+        cursor.execute(f"INSERT INTO {self.table_name} ({self.table_name}, rank) VALUES ('crisismerge', 32)")
+        
+        self.available = True
+        if not exists:
+            self.rebuild(cursor)
+        
+        return True
+    
+    def _create_triggers(self, cursor) -> None:
+        """
+        Create the sync triggers
+        
+        An external-content row must be removed with the values it was
+        indexed with, so every change removes the row as the view shows it
+        before the change and indexes it again afterwards.
+        """
+        table = self.table_name
+        view = self.source_view
+        columns = 'analysis_text, prompt_used, filename'
+        remove = (f"INSERT INTO {table} ({table}, rowid, {columns}) "
+                  f"SELECT 'delete', result_rowid, {columns} FROM {view} WHERE result_rowid")
+        add = (f"INSERT INTO {table} (rowid, {columns}) "
+               f"SELECT result_rowid, {columns} FROM {view} WHERE result_rowid")
+        indexed = 'analysis_text, text_encoding, prompt_id, prompt_used, file_id'
+        
+        of_file = 'IN (SELECT rowid FROM ai_analysis_results WHERE file_id = OLD.id)'
+        
+        triggers = {
+            'insert': ('AFTER INSERT ON ai_analysis_results', f'{add} = NEW.rowid'),
+            'delete': ('BEFORE DELETE ON ai_analysis_results', f'{remove} = OLD.rowid'),
+            'before_update': (f'BEFORE UPDATE OF {indexed} ON ai_analysis_results', f'{remove} = OLD.rowid'),
+            'after_update': (f'AFTER UPDATE OF {indexed} ON ai_analysis_results', f'{add} = NEW.rowid'),
+            'before_file_update': ('BEFORE UPDATE OF filename ON ai_analysis_files', f'{remove} {of_file}'),
+            'after_file_update': ('AFTER UPDATE OF filename ON ai_analysis_files', f'{add} {of_file}'),
+            'before_file_delete': ('BEFORE DELETE ON ai_analysis_files', f'{remove} {of_file}'),
+            'after_file_delete': ('AFTER DELETE ON ai_analysis_files', f'{add} {of_file}')
+        }
+        
+        # Triggers of earlier layouts wrote the indexed values themselves or
+        # left the prompt out
+        cursor.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger' AND name LIKE ?",
+                       (f'trg_{table}_%',))
+        for name, sql in cursor.fetchall():
+            if view not in sql or 'prompt_used' not in sql:
+                cursor.execute(f'DROP TRIGGER {name}')
+        
+        for name, (event, statement) in triggers.items():
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_{name}
+                {event}
+                BEGIN
+                    {statement};
+                END
+            ''')
+    
+    def rebuild(self, cursor) -> None:
+        """Repopulate the index from the analysis tables"""
+        cursor.execute(f"INSERT INTO {self.table_name} ({self.table_name}) VALUES ('rebuild')")
+    
+    def check(self, cursor) -> None:
+        """
+        Verify that the index matches the analysis tables
+        
+        Raises:
+            sqlite3.DatabaseError: If the index has drifted (rebuild to repair)
+        """
+        cursor.execute(f"INSERT INTO {self.table_name} ({self.table_name}, rank) VALUES ('integrity-check', 1)")
+    
+    def merge(self, cursor, pages: int = None) -> bool:
+        """
+        Run one bounded incremental merge step
+        
+        Args:
+            cursor: SQLite cursor
+            pages: Maximum number of pages to merge (defaults to merge_pages)
+        
+        Returns:
+            True if the step merged anything, False if the index is fully merged
+        """
+        connection = cursor.connection
+        before = connection.total_changes
+        cursor.execute(
+            f"INSERT INTO {self.table_name} ({self.table_name}, rank) VALUES ('merge', ?)",
+            (pages or self.merge_pages,)
+        )
+        # FTS5 reports a change count below 2 when no merge work was done
+        return connection.total_changes - before >= 2
+    
+    def build_match_query(self, query: str) -> Optional[str]:
+        """
+        Build an FTS5 MATCH expression from user input
+        
+        Every whitespace-separated term is quoted (so FTS5 operators in user
+        input are treated literally) and all terms must match.
+        
+        Returns:
+            MATCH expression, or None if no term is long enough for the index
+        """
+        terms = [term for term in query.split() if term]
+        if not terms or any(len(term) < MIN_INDEXED_TERM_LENGTH for term in terms):
+            return None
+        
+        return ' AND '.join('"' + term.replace('"', '""') + '"' for term in terms)
+    
+    def search(self, connection, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        Search analysis history
+        
+        Args:
+            connection: SQLite connection
+            query: User query
+            limit: Maximum number of results
+            offset: Number of results to skip
+        
+        Returns:
+            Dictionary with ranked results and highlighted snippets
+        
+        Raises:
+            SearchTimeoutError: If the query exceeds the time budget
+        """
+        query = (query or '').strip()
+        if not query:
+            return {'items': [], 'mode': 'empty'}
+        
+        # Without FTS5 (see create) every query is answered by the scan
+        match_query = self.build_match_query(query) if self.available else None
+        if match_query:
+            mode = 'fts'
+            sql = f'''
+                SELECT r.id, r.file_id, r.created_at, r.processing_time,
+                       f.filename, f.file_type, f.file_size,
+                       snippet({self.table_name}, -1, ?, ?, '…', 24) AS excerpt,
+                       bm25({self.table_name}) AS score
+                FROM {self.table_name}
+                JOIN ai_analysis_results r ON r.rowid = {self.table_name}.rowid
+                JOIN ai_analysis_files f ON r.file_id = f.id
+                WHERE {self.table_name} MATCH ?
+                ORDER BY score
+                LIMIT ? OFFSET ?
+            '''
+            params = [HIGHLIGHT_START, HIGHLIGHT_END, match_query, limit, offset]
+        else:
+            # Short terms (e.g. two-character Chinese words) and indexes that
+            # could not be created fall back to a substring scan, still
+            # bounded by the time budget
+            mode = 'scan'
+            terms = query.split()
+            conditions = ' AND '.join(
+                "(s.analysis_text LIKE ? ESCAPE '\\' OR s.prompt_used LIKE ? ESCAPE '\\' "
+                "OR s.filename LIKE ? ESCAPE '\\')"
+                for _ in terms
+            )
+            sql = f'''
+                SELECT r.id, r.file_id, r.created_at, r.processing_time,
+                       f.filename, f.file_type, f.file_size,
+                       substr(s.analysis_text, 1, 120) AS excerpt,
+                       0 AS score
+                FROM {self.source_view} s
+                JOIN ai_analysis_results r ON r.rowid = s.result_rowid
+                JOIN ai_analysis_files f ON r.file_id = f.id
+                WHERE {conditions}
+                ORDER BY r.created_at DESC
+                LIMIT ? OFFSET ?
+            '''
+            params = []
+            for term in terms:
+                pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                params.extend([pattern, pattern, pattern])
+            params.extend([limit, offset])
+        
+        deadline = time.monotonic() + self.time_budget
+        connection.set_progress_handler(lambda: 1 if time.monotonic() > deadline else 0, 10000)
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            if 'interrupted' in str(e):
+                raise SearchTimeoutError(f"Search exceeded {self.time_budget:.1f}s time budget")
+            raise
+        finally:
+            connection.set_progress_handler(None, 0)
+        
+        items = []
+        for row in rows:
+            items.append({
+                'id': row[0],
+                'file_id': row[1],
+                'created_at': row[2],
+                'processing_time': row[3],
+                'filename': row[4],
+                'file_type': row[5],
+                'file_size': row[6],
+                'snippet': self._highlight(row[7], terms=None if mode == 'fts' else query.split()),
+                'score': round(-row[8], 4) if mode == 'fts' else None
+            })
+        
+        return {'items': items, 'mode': mode}
+    
+    def _highlight(self, text: Optional[str], terms: List[str] = None) -> str:
+        """Escape snippet text and turn match markers into <mark> tags"""
+        text = text or ''
+        if terms:
+            for term in terms:
+                text = text.replace(term, f"{HIGHLIGHT_START}{term}{HIGHLIGHT_END}")
+        
+        escaped = html.escape(text)
+        return escaped.replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_END, '</mark>')
\ No newline at end of file
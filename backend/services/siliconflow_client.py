@@ -2,10 +2,30 @@ import requests
 import json
 import time
 import logging
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Union
 from dataclasses import dataclass
 from datetime import datetime
 
+from services.tracing import span, traced, set_span_attributes
+from services.structured_output import STRUCTURED_OUTPUT_INSTRUCTIONS, SchemaValidationError, parse_analysis, render_markdown
+
+
+# Stable instructions placed at the very start of every request. Keeping this
+# text (and the effective prompt that follows it) byte-identical across calls
+# lets the provider reuse the cached prefix instead of re-running prefill.
+SYSTEM_INSTRUCTIONS = (
+    "你是一名专业的文档分析助手。请严格依据用户提供的文档内容进行分析，"
+    "使用中文输出结构清晰的分析报告。"
+)
+
+DEFAULT_ANALYSIS_PROMPT = "请分析以下文档内容，提供主要内容总结和关键建议。"
+
+DOCUMENT_HEADER = "以下是需要分析的内容："
+
+# Longer documents are truncated to this many characters before they are sent
+MAX_CONTENT_LENGTH = 8000
+
 
 @dataclass
 class AnalysisResult:
@@ -17,6 +37,8 @@ class AnalysisResult:
     model_used: Optional[str] = None
     tokens_used: Optional[int] = None
     metadata: Optional[Dict[str, Any]] = None
+    cached_tokens: Optional[int] = None
+    structured: Optional[Dict[str, Any]] = None  # Validated analysis in structured output mode
 
 
 class SiliconFlowClient:
@@ -45,9 +67,13 @@ class SiliconFlowClient:
         
         self.logger = logging.getLogger(__name__)
         
-        # Rate limiting
+        # Rate limiting (last_request_time is the start of the latest reserved request slot)
         self.last_request_time = 0
         self.min_request_interval = 0.5  # Reduce interval for faster processing
+        self._rate_lock = threading.Lock()
+        
+        # HTTP sessions are not thread-safe; each thread keeps its own connection pool
+        self._local = threading.local()
         
         # Retry configuration
         self.max_retries = 1  # Further reduce retries to avoid long waits
@@ -57,15 +83,30 @@ class SiliconFlowClient:
         # Timeout optimization
         self.connection_timeout = 15  # Connection timeout
         self.read_timeout = max(self.timeout - 15, 60)  # Read timeout, minimum 60s
+        
+        # Prompt prefix cache accounting
+        self._usage_lock = threading.Lock()
+        self._usage_stats = {
+            'requests': 0,
+            'prompt_tokens': 0,
+            'cached_tokens': 0,
+            'cache_hits': 0
+        }
     
-    def analyze_content(self, content: str, custom_prompt: str = None) -> AnalysisResult:
+    @traced('siliconflow.analyze')
+    def analyze_content(self, content: str, custom_prompt: str = None, max_tokens: int = None,
+                        temperature: float = None, structured: bool = False) -> AnalysisResult:
         """
         Analyze content using SiliconFlow API
         
         Args:
             content: Content to analyze
             custom_prompt: Optional custom prompt for analysis
-            
+            max_tokens: Optional override of the client's max_tokens
+            temperature: Optional override of the client's temperature
+            structured: Request JSON output matching ANALYSIS_SCHEMA; the validated
+                object is returned in `structured` and rendered as markdown in `content`
+        
         Returns:
             AnalysisResult with analysis or error information
         """
@@ -77,19 +118,24 @@ class SiliconFlowClient:
             )
         
         start_time = time.time()
+        set_span_attributes(model=self.model, content_chars=len(content))
         
         try:
-            # Build the prompt
-            prompt = self._build_analysis_prompt(content, custom_prompt)
+            # Build the messages (stable prefix first, document last)
+            messages = self._build_messages(content, custom_prompt, structured)
             
             # Create request payload
-            payload = self._build_request_payload(prompt)
+            payload = self._build_request_payload(messages, max_tokens, temperature)
+            if structured:
+                payload["response_format"] = {"type": "json_object"}
             
             # Make API request with retries
             response_data = self._make_request_with_retry(payload)
             
             # Process response
             result = self._handle_api_response(response_data, start_time)
+            if structured and result.success:
+                self._apply_structured_output(result)
             
             return result
             
@@ -104,50 +150,71 @@ class SiliconFlowClient:
                 processing_time=processing_time
             )
     
-    def _build_analysis_prompt(self, content: str, custom_prompt: str = None) -> str:
+    def _build_system_prompt(self, custom_prompt: str = None, structured: bool = False) -> str:
         """
-        Build analysis prompt combining custom prompt with content
+        Build the stable system message shared by every analysis request
+        
+        Args:
+            custom_prompt: Optional custom prompt (usually the effective prompt)
+            structured: Append the JSON output instructions
+            
+        Returns:
+            System message content
+        """
+        instruction = custom_prompt.strip() if custom_prompt and custom_prompt.strip() else DEFAULT_ANALYSIS_PROMPT
+        if structured:
+            return f"{SYSTEM_INSTRUCTIONS}\n\n{instruction}\n\n{STRUCTURED_OUTPUT_INSTRUCTIONS}"
+        return f"{SYSTEM_INSTRUCTIONS}\n\n{instruction}"
+    
+    def _build_messages(self, content: str, custom_prompt: str = None,
+                        structured: bool = False) -> List[Dict[str, str]]:
+        """
+        Build chat messages with the stable prompt first and the document last
         
         Args:
             content: Content to analyze
             custom_prompt: Optional custom prompt
+            structured: Ask for JSON output matching the analysis schema
             
         Returns:
-            Complete prompt for analysis
+            List of chat messages
         """
         # Limit content length to avoid timeout
-        max_content_length = 8000  # Reduce content length for faster processing
-        if len(content) > max_content_length:
-            content = content[:max_content_length] + "\n\n[内容已截断，以上为文档前半部分]"
+        if len(content) > MAX_CONTENT_LENGTH:
+            content = content[:MAX_CONTENT_LENGTH] + "\n\n[内容已截断，以上为文档前半部分]"
         
-        if custom_prompt:
-            prompt = f"{custom_prompt}\n\n以下是需要分析的内容：\n\n{content}"
-        else:
-            default_prompt = "请简要分析以下文档内容，提供主要内容总结和关键建议。"
-            prompt = f"{default_prompt}\n\n以下是需要分析的内容：\n\n{content}"
-        
-        return prompt
+        return [
+            {
+                "role": "system",
+                "content": self._build_system_prompt(custom_prompt, structured)
+            },
+            {
+                "role": "user",
+                "content": f"{DOCUMENT_HEADER}\n\n{content}"
+            }
+        ]
     
-    def _build_request_payload(self, prompt: str) -> Dict[str, Any]:
+    def _build_request_payload(self, messages: Union[str, List[Dict[str, str]]], max_tokens: int = None,
+                               temperature: float = None) -> Dict[str, Any]:
         """
         Build request payload for SiliconFlow API
         
         Args:
-            prompt: Complete prompt for analysis
-            
+            messages: Chat messages, or a single prompt sent as one user message
+            max_tokens: Maximum tokens in response (client default if None)
+            temperature: Temperature for response generation (client default if None)
+        
         Returns:
             Request payload dictionary
         """
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        
         return {
             "model": self.model,
-            "messages": [
-                {
-                    "role": "user",
-                    "content": prompt
-                }
-            ],
-            "max_tokens": self.max_tokens,
-            "temperature": self.temperature,
+            "messages": messages,
+            "max_tokens": self.max_tokens if max_tokens is None else max_tokens,
+            "temperature": self.temperature if temperature is None else temperature,
             "stream": False
         }
     
@@ -181,16 +248,16 @@ class SiliconFlowClient:
                 
                 # Make request
                 self.logger.info(f"Making API request (attempt {attempt + 1}/{self.max_retries + 1})")
+                set_span_attributes(attempts=attempt + 1)
                 
-                response = requests.post(
-                    url,
-                    headers=headers,
-                    json=payload,
-                    timeout=(self.connection_timeout, self.read_timeout)
-                )
-                
-                # Update last request time
-                self.last_request_time = time.time()
+                with span('siliconflow.http', attempt=attempt + 1) as http_span:
+                    response = self._session().post(
+                        url,
+                        headers=headers,
+                        json=payload,
+                        timeout=(self.connection_timeout, self.read_timeout)
+                    )
+                    http_span.set_attribute('status_code', response.status_code)
                 
                 # Handle response
                 if response.status_code == 200:
@@ -198,7 +265,7 @@ class SiliconFlowClient:
                 elif response.status_code == 429:  # Rate limited
                     self.logger.warning("Rate limited, retrying...")
                     if attempt < self.max_retries:
-                        time.sleep(retry_delay)
+                        self._retry_wait(retry_delay)
                         retry_delay *= self.backoff_multiplier
                         continue
                     else:
@@ -216,7 +283,7 @@ class SiliconFlowClient:
                 last_exception = Exception(f"Request timeout after {self.timeout} seconds")
                 if attempt < self.max_retries:
                     self.logger.warning(f"Request timeout, retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
+                    self._retry_wait(retry_delay)
                     retry_delay *= self.backoff_multiplier
                     continue
                     
@@ -224,7 +291,7 @@ class SiliconFlowClient:
                 last_exception = Exception("Connection error - unable to reach SiliconFlow API")
                 if attempt < self.max_retries:
                     self.logger.warning(f"Connection error, retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
+                    self._retry_wait(retry_delay)
                     retry_delay *= self.backoff_multiplier
                     continue
                     
@@ -232,7 +299,7 @@ class SiliconFlowClient:
                 last_exception = e
                 if attempt < self.max_retries and "rate limit" in str(e).lower():
                     self.logger.warning(f"Error occurred, retrying in {retry_delay} seconds...")
-                    time.sleep(retry_delay)
+                    self._retry_wait(retry_delay)
                     retry_delay *= self.backoff_multiplier
                     continue
                 else:
@@ -245,14 +312,35 @@ class SiliconFlowClient:
             raise Exception("All retry attempts failed")
     
     def _enforce_rate_limit(self):
-        """Enforce rate limiting between requests"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
+        """
+        Enforce the minimum interval between request starts
+        
+        Each caller reserves the next free start slot under the lock and
+        sleeps outside it, so concurrent threads are spaced out instead of
+        all passing the check at once.
+        """
+        with self._rate_lock:
+            current_time = time.time()
+            start_time = max(current_time, self.last_request_time + self.min_request_interval)
+            self.last_request_time = start_time
         
-        if time_since_last_request < self.min_request_interval:
-            sleep_time = self.min_request_interval - time_since_last_request
+        sleep_time = start_time - current_time
+        if sleep_time > 0:
             self.logger.debug(f"Rate limiting: sleeping for {sleep_time:.2f} seconds")
-            time.sleep(sleep_time)
+            with span('siliconflow.rate_limit_wait', seconds=round(sleep_time, 3)):
+                time.sleep(sleep_time)
+    
+    def _session(self) -> requests.Session:
+        """HTTP session of the calling thread"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+    
+    def _retry_wait(self, delay: float):
+        """Sleep before retrying a failed request"""
+        with span('siliconflow.retry_wait', seconds=delay):
+            time.sleep(delay)
     
     def _extract_error_message(self, response: requests.Response) -> str:
         """
@@ -312,8 +400,12 @@ class SiliconFlowClient:
                 )
             
             # Extract usage information
-            usage = response_data.get('usage', {})
+            usage = response_data.get('usage') or {}
             tokens_used = usage.get('total_tokens')
+            cached_tokens = self._extract_cached_tokens(usage)
+            set_span_attributes(tokens=tokens_used, prompt_tokens=usage.get('prompt_tokens'),
+                                cached_tokens=cached_tokens)
+            self._record_usage(usage, cached_tokens)
             
             # Extract model information
             model_used = response_data.get('model', self.model)
@@ -323,6 +415,7 @@ class SiliconFlowClient:
                 'response_id': response_data.get('id'),
                 'created': response_data.get('created'),
                 'usage': usage,
+                'cached_tokens': cached_tokens,
                 'finish_reason': choices[0].get('finish_reason')
             }
             
@@ -332,7 +425,8 @@ class SiliconFlowClient:
                 processing_time=processing_time,
                 model_used=model_used,
                 tokens_used=tokens_used,
-                metadata=metadata
+                metadata=metadata,
+                cached_tokens=cached_tokens
             )
             
         except Exception as e:
@@ -344,6 +438,83 @@ class SiliconFlowClient:
                 processing_time=processing_time
             )
     
+    def _apply_structured_output(self, result: AnalysisResult) -> None:
+        """
+        Validate JSON output against the analysis schema
+        
+        A valid object is stored in result.structured and rendered as markdown
+        in result.content. Invalid output is kept as plain text with the
+        validation error in the metadata, so the analysis is not lost.
+        """
+        try:
+            result.structured = parse_analysis(result.content)
+        except SchemaValidationError as e:
+            self.logger.warning(f"Structured output rejected: {e}")
+            result.metadata = {**(result.metadata or {}), 'structured_error': str(e)}
+            return
+        result.content = render_markdown(result.structured)
+    
+    def _extract_cached_tokens(self, usage: Dict[str, Any]) -> Optional[int]:
+        """
+        Extract the number of prompt tokens served from the provider prefix cache
+        
+        Args:
+            usage: Usage section of the API response
+            
+        Returns:
+            Cached token count, or None if the provider did not report one
+        """
+        details = usage.get('prompt_tokens_details') or {}
+        if isinstance(details, dict) and details.get('cached_tokens') is not None:
+            return int(details['cached_tokens'])
+        
+        # DeepSeek-style field names
+        if usage.get('prompt_cache_hit_tokens') is not None:
+            return int(usage['prompt_cache_hit_tokens'])
+        
+        return None
+    
+    def _record_usage(self, usage: Dict[str, Any], cached_tokens: Optional[int]) -> None:
+        """Accumulate prompt and cached token counts"""
+        with self._usage_lock:
+            self._usage_stats['requests'] += 1
+            self._usage_stats['prompt_tokens'] += int(usage.get('prompt_tokens') or 0)
+            if cached_tokens:
+                self._usage_stats['cached_tokens'] += cached_tokens
+                self._usage_stats['cache_hits'] += 1
+    
+    def adopt_state(self, previous: 'SiliconFlowClient') -> None:
+        """
+        Carry rate limiting and usage accounting over from the client this one replaces
+        
+        The rate limit continues from the last start slot the previous client
+        reserved. The usage counters (and their lock) are shared, so requests
+        still running on the previous client are counted in the totals
+        reported by this one.
+        
+        Args:
+            previous: Client being replaced
+        """
+        with previous._rate_lock:
+            self.min_request_interval = previous.min_request_interval
+            self.last_request_time = previous.last_request_time
+        self._usage_lock = previous._usage_lock
+        self._usage_stats = previous._usage_stats
+    
+    def get_usage_stats(self) -> Dict[str, Any]:
+        """
+        Get accumulated prompt cache statistics
+        
+        Returns:
+            Dictionary with request, prompt token and cached token totals
+        """
+        with self._usage_lock:
+            stats = dict(self._usage_stats)
+        
+        prompt_tokens = stats['prompt_tokens']
+        stats['cached_token_ratio'] = round(stats['cached_tokens'] / prompt_tokens, 4) if prompt_tokens else 0.0
+        return stats
+    
     def test_connection(self) -> Dict[str, Any]:
         """
         Test connection to SiliconFlow API
@@ -374,7 +545,7 @@ class SiliconFlowClient:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(
+            response = self._session().post(
                 f"{self.base_url}/chat/completions",
                 headers=headers,
                 json=test_payload,
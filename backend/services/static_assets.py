@@ -0,0 +1,162 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+from services.http_compression import brotli, parse_accept_encoding
+
+
+@dataclass
+class StaticAsset:
+    """A static file held in memory with its precompressed variants"""
+    path: str
+    data: bytes
+    mimetype: str
+    etag: str
+    fingerprinted: bool = False
+    encodings: Dict[str, bytes] = field(default_factory=dict)
+    
+    def select(self, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Pick the smallest precompressed variant the client accepts
+        
+        Returns:
+            Tuple of (body, content_encoding); content_encoding is None for the plain file
+        """
+        accepted = parse_accept_encoding(accept_encoding)
+        best_body, best_encoding = self.data, None
+        for encoding, body in self.encodings.items():
+            if accepted.get(encoding, accepted.get('*', 0.0)) > 0 and len(body) < len(best_body):
+                best_body, best_encoding = body, encoding
+        return best_body, best_encoding
+
+
+class StaticAssets:
+    """
+    Fingerprinted, precompressed frontend assets
+    
+    JS and CSS files are loaded at build time, named by content hash
+    (js/main.js -> js/main.<hash>.js) and compressed with gzip and, when
+    installed, brotli. The HTML entry page has its asset references
+    rewritten to the fingerprinted names, so the assets can be cached as
+    immutable while the page itself is revalidated by ETag. refresh()
+    rebuilds when a source file changed on disk; it walks the source tree,
+    so it is meant for development only.
+    """
+    
+    FINGERPRINT_EXTENSIONS = ('.js', '.css')
+    HASH_LENGTH = 12
+    
+    def __init__(self, root: str, index_name: str = 'index.html', min_compress_size: int = 256):
+        """
+        Initialize static assets
+        
+        Args:
+            root: Frontend directory
+            index_name: HTML entry page, relative to root
+            min_compress_size: Smallest file worth precompressing
+        """
+        self.root = root
+        self.index_name = index_name
+        self.min_compress_size = min_compress_size
+        self._assets: Dict[str, StaticAsset] = {}
+        self._fingerprints: Dict[str, str] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+    
+    def _source_files(self):
+        """Relative paths of the fingerprinted source files and the index page"""
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(self.FINGERPRINT_EXTENSIONS):
+                    full_path = os.path.join(directory, filename)
+                    yield os.path.relpath(full_path, self.root).replace(os.sep, '/')
+        yield self.index_name
+    
+    def _scan_mtimes(self) -> Dict[str, float]:
+        mtimes = {}
+        for path in self._source_files():
+            try:
+                mtimes[path] = os.stat(os.path.join(self.root, path)).st_mtime
+            except OSError:
+                continue
+        return mtimes
+    
+    def _make_asset(self, path: str, data: bytes, fingerprinted: bool) -> StaticAsset:
+        digest = hashlib.sha256(data).hexdigest()
+        asset = StaticAsset(
+            path=path,
+            data=data,
+            mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream',
+            etag=digest[:32],
+            fingerprinted=fingerprinted
+        )
+        if len(data) >= self.min_compress_size:
+            asset.encodings['gzip'] = gzip.compress(data, compresslevel=9, mtime=0)
+            if brotli is not None:
+                asset.encodings['br'] = brotli.compress(data, quality=11)
+        return asset
+    
+    def fingerprinted_name(self, path: str, data: bytes) -> str:
+        """Insert the content hash before the extension (js/main.js -> js/main.<hash>.js)"""
+        stem, extension = os.path.splitext(path)
+        return f'{stem}.{hashlib.sha256(data).hexdigest()[:self.HASH_LENGTH]}{extension}'
+    
+    def rewrite_html(self, html: str, fingerprints: Dict[str, str]) -> str:
+        """Point src/href attributes at the fingerprinted asset names"""
+        def replace(match):
+            target = fingerprints.get(match.group(3))
+            return f'{match.group(1)}={match.group(2)}{target}{match.group(2)}' if target else match.group(0)
+        
+        return re.sub(r'\b(src|href)=(["\'])([^"\']+)\2', replace, html)
+    
+    def build(self) -> None:
+        """Load, fingerprint and precompress all assets"""
+        mtimes = self._scan_mtimes()
+        assets = {}
+        fingerprints = {}
+        
+        for path in mtimes:
+            if path == self.index_name:
+                continue
+            with open(os.path.join(self.root, path), 'rb') as f:
+                data = f.read()
+            name = self.fingerprinted_name(path, data)
+            fingerprints[path] = name
+            asset = self._make_asset(name, data, fingerprinted=True)
+            assets[name] = asset
+            # The plain name stays available for stale pages, without immutable caching
+            assets[path] = StaticAsset(path=path, data=data, mimetype=asset.mimetype, etag=asset.etag,
+                                       encodings=asset.encodings)
+        
+        index_path = os.path.join(self.root, self.index_name)
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as f:
+                html = self.rewrite_html(f.read(), fingerprints)
+            assets[self.index_name] = self._make_asset(self.index_name, html.encode('utf-8'), fingerprinted=False)
+        
+        with self._lock:
+            self._assets = assets
+            self._fingerprints = fingerprints
+            self._mtimes = mtimes
+        
+        self.logger.info(f"Built {len(fingerprints)} fingerprinted static assets")
+    
+    def refresh(self) -> None:
+        """Rebuild if any source file was added, removed or modified"""
+        if self._scan_mtimes() != self._mtimes:
+            self.build()
+    
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """Get an asset by request path (fingerprinted name, plain name or the index page)"""
+        return self._assets.get(path)
+    
+    def url_for(self, path: str) -> str:
+        """Fingerprinted name of a source path (the path itself if unknown)"""
+        return self._fingerprints.get(path, path)
@@ -0,0 +1,282 @@
+import re
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# Optional compiled validator; the built-in one covers the keywords used below
+try:
+    import fastjsonschema
+except ImportError:
+    fastjsonschema = None
+
+
+RISK_SEVERITIES = ('高', '中', '低')
+
+# Shape of a structured analysis
+ANALYSIS_SCHEMA = {
+    'type': 'object',
+    'required': ['summary', 'key_points', 'risks', 'recommendations'],
+    'properties': {
+        'summary': {'type': 'string', 'minLength': 1, 'maxLength': 2000},
+        'key_points': {
+            'type': 'array',
+            'maxItems': 50,
+            'items': {'type': 'string', 'minLength': 1}
+        },
+        'risks': {
+            'type': 'array',
+            'maxItems': 50,
+            'items': {
+                'type': 'object',
+                'required': ['description', 'severity'],
+                'properties': {
+                    'description': {'type': 'string', 'minLength': 1},
+                    'severity': {'type': 'string', 'enum': list(RISK_SEVERITIES)},
+                    'mitigation': {'type': 'string'}
+                }
+            }
+        },
+        'recommendations': {
+            'type': 'array',
+            'maxItems': 50,
+            'items': {'type': 'string', 'minLength': 1}
+        }
+    }
+}
+
+STRUCTURED_OUTPUT_INSTRUCTIONS = (
+    "只输出一个JSON对象，不要输出Markdown代码块或其他文字。JSON须符合以下JSON Schema："
+    "summary为整体摘要；key_points为关键要点；risks为风险列表，severity取值为“高”“中”“低”，"
+    "mitigation为应对措施；recommendations为改进建议。\n"
+    + json.dumps(ANALYSIS_SCHEMA, ensure_ascii=False, separators=(',', ':'))
+)
+
+# Severity words models commonly answer with instead of the schema values
+SEVERITY_ALIASES = {
+    'high': '高', 'critical': '高', '严重': '高',
+    'medium': '中', 'moderate': '中',
+    'low': '低', 'minor': '低'
+}
+
+SECTION_TITLES = {
+    'summary': '摘要',
+    'key_points': '关键要点',
+    'risks': '风险',
+    'recommendations': '建议'
+}
+
+_CODE_FENCE = re.compile(r'^\s*```(?:json)?\s*(.*?)\s*```\s*$', re.DOTALL | re.IGNORECASE)
+
+
+class SchemaValidationError(ValueError):
+    """Raised when structured output does not match its schema"""
+
+
+_JSON_TYPES = {
+    'object': lambda value: isinstance(value, dict),
+    'array': lambda value: isinstance(value, list),
+    'string': lambda value: isinstance(value, str),
+    'integer': lambda value: isinstance(value, int) and not isinstance(value, bool),
+    'number': lambda value: isinstance(value, (int, float)) and not isinstance(value, bool),
+    'boolean': lambda value: isinstance(value, bool),
+    'null': lambda value: value is None
+}
+
+
+def _compile(schema: Dict[str, Any], path: str) -> Callable[[Any], None]:
+    """Build a checker for one schema node; nested nodes are compiled once up front"""
+    checks: List[Callable[[Any, str], None]] = []
+    
+    if 'type' in schema:
+        type_name = schema['type']
+        is_type = _JSON_TYPES[type_name]
+        
+        def check_type(value, where):
+            if not is_type(value):
+                raise SchemaValidationError(f"{where or 'value'} must be of type {type_name}")
+        checks.append(check_type)
+    
+    if 'enum' in schema:
+        allowed = list(schema['enum'])
+        
+        def check_enum(value, where):
+            if value not in allowed:
+                raise SchemaValidationError(f"{where} must be one of {', '.join(map(str, allowed))}")
+        checks.append(check_enum)
+    
+    if 'minLength' in schema or 'maxLength' in schema:
+        min_length = schema.get('minLength', 0)
+        max_length = schema.get('maxLength')
+        
+        def check_length(value, where):
+            if isinstance(value, str) and (len(value) < min_length
+                                           or (max_length is not None and len(value) > max_length)):
+                raise SchemaValidationError(f"{where} length must be between {min_length} and {max_length or '∞'}")
+        checks.append(check_length)
+    
+    if 'required' in schema or 'properties' in schema:
+        required = list(schema.get('required', ()))
+        properties = {
+            name: _compile(subschema, f'{path}.{name}' if path else name)
+            for name, subschema in schema.get('properties', {}).items()
+        }
+        
+        def check_object(value, where):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    raise SchemaValidationError(f"{where + '.' if where else ''}{name} is required")
+            for name, check in properties.items():
+                if name in value:
+                    check(value[name])
+        checks.append(check_object)
+    
+    if 'items' in schema or 'maxItems' in schema:
+        max_items = schema.get('maxItems')
+        item_check = _compile(schema['items'], f'{path}[]') if 'items' in schema else None
+        
+        def check_array(value, where):
+            if not isinstance(value, list):
+                return
+            if max_items is not None and len(value) > max_items:
+                raise SchemaValidationError(f"{where} may have at most {max_items} items")
+            if item_check:
+                for item in value:
+                    item_check(item)
+        checks.append(check_array)
+    
+    def check(value):
+        for item in checks:
+            item(value, path)
+    return check
+
+
+def compile_validator(schema: Dict[str, Any]) -> Callable[[Any], None]:
+    """
+    Compile a JSON schema into a validating function
+    
+    Uses fastjsonschema when it is installed; otherwise a built-in validator
+    supporting type, enum, required, properties, items, minLength, maxLength
+    and maxItems.
+    
+    Returns:
+        Function that raises SchemaValidationError for invalid data
+    """
+    if fastjsonschema is not None:
+        validate = fastjsonschema.compile(schema)
+        
+        def check(value):
+            try:
+                validate(value)
+            except fastjsonschema.JsonSchemaException as e:
+                raise SchemaValidationError(e.message)
+        return check
+    
+    return _compile(schema, '')
+
+
+_validate_analysis = compile_validator(ANALYSIS_SCHEMA)
+
+
+def _normalize(data: Any) -> Any:
+    """Fix harmless deviations (missing empty lists, severity aliases, padded strings) before validation"""
+    if not isinstance(data, dict):
+        return data
+    
+    normalized = {
+        key: data[key].strip() if isinstance(data[key], str) else data[key]
+        for key in ANALYSIS_SCHEMA['properties'] if key in data
+    }
+    # Empty lists are often left out
+    for key in ('key_points', 'risks', 'recommendations'):
+        normalized.setdefault(key, [])
+    for key in ('key_points', 'recommendations'):
+        if isinstance(normalized.get(key), list):
+            normalized[key] = [item.strip() if isinstance(item, str) else item for item in normalized[key]]
+    
+    if isinstance(normalized.get('risks'), list):
+        risks = []
+        for risk in normalized['risks']:
+            if isinstance(risk, dict):
+                risk = {key: value.strip() if isinstance(value, str) else value for key, value in risk.items()
+                        if key in ('description', 'severity', 'mitigation')}
+                severity = risk.get('severity')
+                if isinstance(severity, str):
+                    risk['severity'] = SEVERITY_ALIASES.get(severity.lower(), severity)
+            risks.append(risk)
+        normalized['risks'] = risks
+    
+    return normalized
+
+
+def validate_analysis(data: Any) -> Dict[str, Any]:
+    """
+    Validate a structured analysis
+    
+    Unknown keys are dropped, omitted lists default to empty and severity
+    aliases are mapped to schema values.
+    
+    Returns:
+        The normalized analysis
+    
+    Raises:
+        SchemaValidationError: If the data does not match ANALYSIS_SCHEMA
+    """
+    normalized = _normalize(data)
+    _validate_analysis(normalized)
+    return normalized
+
+
+def parse_analysis(text: str) -> Dict[str, Any]:
+    """
+    Parse and validate model output produced with STRUCTURED_OUTPUT_INSTRUCTIONS
+    
+    Raises:
+        SchemaValidationError: If the text is not valid JSON or does not match the schema
+    """
+    text = (text or '').strip()
+    fenced = _CODE_FENCE.match(text)
+    if fenced:
+        text = fenced.group(1)
+    
+    try:
+        data = json.loads(text)
+    except ValueError as e:
+        raise SchemaValidationError(f"Output is not valid JSON: {e}")
+    
+    return validate_analysis(data)
+
+
+def render_markdown(data: Dict[str, Any]) -> str:
+    """Render a structured analysis as the markdown text stored in analysis_text"""
+    blocks = [f"## {SECTION_TITLES['summary']}\n\n{data['summary']}"]
+    
+    if data.get('key_points'):
+        blocks.append(f"## {SECTION_TITLES['key_points']}\n\n" + '\n'.join(f"- {item}" for item in data['key_points']))
+    
+    if data.get('risks'):
+        lines = []
+        for risk in data['risks']:
+            line = f"- [{risk['severity']}] {risk['description']}"
+            if risk.get('mitigation'):
+                line += f"（应对：{risk['mitigation']}）"
+            lines.append(line)
+        blocks.append(f"## {SECTION_TITLES['risks']}\n\n" + '\n'.join(lines))
+    
+    if data.get('recommendations'):
+        blocks.append(f"## {SECTION_TITLES['recommendations']}\n\n"
+                      + '\n'.join(f"- {item}" for item in data['recommendations']))
+    
+    return '\n\n'.join(blocks)
+
+
+def dumps(data: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Serialize a structured analysis for the analysis_json column"""
+    if data is None:
+        return None
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def loads(value: Optional[str]) -> Optional[Dict[str, Any]]:
+    """Read the analysis_json column"""
+    return json.loads(value) if value else None
@@ -0,0 +1,101 @@
+import csv
+import io
+import tempfile
+from typing import Any, Iterable, Iterator, Sequence
+
+from openpyxl import Workbook
+
+
+def iter_rows(cursor, chunk_size: int = 1000) -> Iterator[Sequence[Any]]:
+    """
+    Iterate over the rows of an executed SQLite cursor in fetchmany chunks
+    
+    Args:
+        cursor: Executed SQLite cursor
+        chunk_size: Rows fetched per call
+    
+    Yields:
+        Rows
+    """
+    while True:
+        rows = cursor.fetchmany(chunk_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def iter_csv(header: Sequence[str], rows: Iterable[Sequence[Any]], chunk_rows: int = 1000,
+             bom: bool = True) -> Iterator[bytes]:
+    """
+    Encode rows as UTF-8 CSV, yielding one chunk per chunk_rows rows
+    
+    Args:
+        header: Column titles
+        rows: Rows to write
+        chunk_rows: Rows per yielded chunk
+        bom: Prefix a byte order mark so spreadsheet applications detect UTF-8
+    
+    Yields:
+        CSV bytes
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write('\ufeff')
+    writer.writerow(header)
+    
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count >= chunk_rows:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    
+    yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(header: Sequence[str], rows: Iterable[Sequence[Any]], sheet_title: str = 'Sheet1',
+               max_memory_size: int = 8 * 1024 * 1024):
+    """
+    Write rows to an XLSX workbook through openpyxl's write-only mode
+    
+    Rows are streamed into the worksheet as they are read; the finished
+    workbook is kept in memory up to max_memory_size and spills to a
+    temporary file beyond that.
+    
+    Args:
+        header: Column titles
+        rows: Rows to write
+        sheet_title: Worksheet title
+        max_memory_size: Bytes kept in memory before spilling to disk
+    
+    Returns:
+        SpooledTemporaryFile positioned at the start of the workbook
+    """
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(title=sheet_title)
+    worksheet.append(list(header))
+    for row in rows:
+        worksheet.append(list(row))
+    
+    output = tempfile.SpooledTemporaryFile(max_size=max_memory_size)
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+
+def iter_file(fileobj, chunk_size: int = 64 * 1024, close: bool = True) -> Iterator[bytes]:
+    """Read a file object in chunks, closing it at the end"""
+    try:
+        while True:
+            data = fileobj.read(chunk_size)
+            if not data:
+                return
+            yield data
+    finally:
+        if close:
+            fileobj.close()
+
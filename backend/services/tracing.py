@@ -0,0 +1,434 @@
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import requests
+
+
+def _new_trace_id() -> str:
+    return '%032x' % random.getrandbits(128)
+
+
+def _new_span_id() -> str:
+    return '%016x' % random.getrandbits(64)
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """
+    Parse a W3C traceparent header (00-<trace id>-<parent id>-<flags>)
+    
+    Returns:
+        Tuple of (trace_id, parent_span_id, sampled), or None if absent or malformed
+    """
+    if not header:
+        return None
+    parts = header.strip().split('-')
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or len(parts[3]) != 2:
+        return None
+    try:
+        int(parts[1], 16), int(parts[2], 16)
+        flags = int(parts[3], 16)
+    except ValueError:
+        return None
+    if parts[1] == '0' * 32 or parts[2] == '0' * 16:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+class Span:
+    """A timed operation within a sampled trace"""
+    
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'start_time', 'end_time',
+                 'attributes', 'status', 'error', '_trace', '_start_counter')
+    
+    def __init__(self, trace: '_Trace', name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self._trace = trace
+        self.name = name
+        self.trace_id = trace.trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.status = 'ok'
+        self.error: Optional[str] = None
+        # Wall clock for export, monotonic counter for the duration
+        self.start_time = time.time_ns()
+        self._start_counter = time.perf_counter_ns()
+        self.end_time: Optional[int] = None
+    
+    @property
+    def duration_ms(self) -> Optional[float]:
+        if self.end_time is None:
+            return None
+        return (self.end_time - self.start_time) / 1e6
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+    
+    def set_attributes(self, **attributes: Any) -> None:
+        self.attributes.update(attributes)
+    
+    def record_error(self, error: BaseException) -> None:
+        self.status = 'error'
+        self.error = f'{type(error).__name__}: {error}'
+    
+    def end(self) -> None:
+        if self.end_time is None:
+            self.end_time = self.start_time + time.perf_counter_ns() - self._start_counter
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'parentSpanId': self.parent_id,
+            'name': self.name,
+            'startTimeUnixNano': self.start_time,
+            'endTimeUnixNano': self.end_time,
+            'durationMs': round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            'attributes': self.attributes,
+            'status': self.status,
+            'error': self.error
+        }
+
+
+class _NoopSpan:
+    """Stand-in returned when the current request is not sampled"""
+    
+    __slots__ = ()
+    trace_id = None
+    span_id = None
+    
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+    
+    def set_attributes(self, **attributes: Any) -> None:
+        pass
+    
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+# Innermost open span of the sampled trace running in this context
+_current_span: ContextVar[Optional[Span]] = ContextVar('current_span', default=None)
+
+
+class _Trace:
+    """Spans collected for one sampled trace"""
+    
+    def __init__(self, tracer: 'Tracer', trace_id: str):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+    
+    def start_span(self, name: str, parent_id: Optional[str], attributes: Dict[str, Any]) -> Span:
+        span = Span(self, name, parent_id, attributes)
+        with self._lock:
+            if len(self.spans) < self.tracer.max_spans_per_trace:
+                self.spans.append(span)
+            else:
+                self.dropped += 1
+        return span
+
+
+def current_span():
+    """The innermost open span, or a no-op span outside a sampled trace"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Set attributes on the innermost open span (no-op outside a sampled trace)"""
+    span = _current_span.get()
+    if span is not None:
+        span.attributes.update(attributes)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Any]:
+    """
+    Open a child span of the current span for the duration of the with-block
+    
+    Outside a sampled trace this only costs a context variable lookup and
+    yields NOOP_SPAN. Exceptions raised in the block mark the span as failed.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield NOOP_SPAN
+        return
+    
+    child = parent._trace.start_span(name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        child.end()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """Decorator running the function inside span(name); name defaults to the qualified function name"""
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__qualname__
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        
+        return wrapper
+    return decorator
+
+
+class ActiveTrace:
+    """Handle of a started trace; end() closes the root span and queues the trace for export"""
+    
+    def __init__(self, tracer: 'Tracer', trace_id: str, root: Optional[Span], token=None):
+        self.tracer = tracer
+        self.trace_id = trace_id
+        self.root = root
+        self._token = token
+    
+    @property
+    def sampled(self) -> bool:
+        return self.root is not None
+    
+    @property
+    def span(self):
+        return self.root if self.root is not None else NOOP_SPAN
+    
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.root is None or self.root.end_time is not None:
+            return
+        if error is not None:
+            self.root.record_error(error)
+        self.root.end()
+        
+        if self._token is not None:
+            try:
+                _current_span.reset(self._token)
+            except ValueError:
+                # Ended from a different context (e.g. after a streamed response)
+                _current_span.set(None)
+        
+        self.tracer._submit(self.root._trace)
+
+
+class Tracer:
+    """
+    Sampling tracer for request pipelines
+    
+    Every request gets a trace id; a sample_rate fraction of them (plus
+    requests arriving with a sampled W3C traceparent header) record spans.
+    Spans are attached to the request through a context variable, so
+    services open child spans with span()/traced() without being handed
+    a tracer. Finished traces are exported from a background thread so the
+    request never waits on the exporter; when the queue is full traces are
+    dropped rather than blocking.
+    """
+    
+    def __init__(self, exporter=None, sample_rate: float = 0.01, max_queue_size: int = 1000,
+                 max_spans_per_trace: int = 1000):
+        """
+        Initialize tracer
+        
+        Args:
+            exporter: Object with export(spans); no spans are recorded without one
+            sample_rate: Fraction of traces to record (0.0-1.0)
+            max_queue_size: Finished traces buffered for export
+            max_spans_per_trace: Spans kept per trace; further spans are counted as dropped
+        """
+        self.exporter = exporter
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.max_spans_per_trace = max_spans_per_trace
+        self.logger = logging.getLogger(__name__)
+        
+        self._queue: 'queue.Queue[_Trace]' = queue.Queue(maxsize=max_queue_size)
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {'traces': 0, 'sampled': 0, 'exported_spans': 0, 'dropped_traces': 0,
+                       'dropped_spans': 0, 'export_errors': 0}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None and self.sample_rate > 0
+    
+    def _should_sample(self, parent_sampled: Optional[bool]) -> bool:
+        if self.exporter is None:
+            return False
+        if parent_sampled is not None:
+            return parent_sampled
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    
+    def begin(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> ActiveTrace:
+        """
+        Start a trace and make its root span current
+        
+        Args:
+            name: Root span name (e.g. "POST /api/ai-analysis/upload")
+            traceparent: Incoming W3C traceparent header; its trace id and sampled flag are kept
+            **attributes: Root span attributes
+        
+        Returns:
+            ActiveTrace; call end() when the request finishes
+        """
+        parent = parse_traceparent(traceparent)
+        trace_id, parent_id, parent_sampled = parent if parent else (_new_trace_id(), None, None)
+        
+        sampled = self._should_sample(parent_sampled)
+        with self._stats_lock:
+            self._stats['traces'] += 1
+            if sampled:
+                self._stats['sampled'] += 1
+        if not sampled:
+            return ActiveTrace(self, trace_id, None)
+        
+        root = _Trace(self, trace_id).start_span(name, parent_id, attributes)
+        return ActiveTrace(self, trace_id, root, _current_span.set(root))
+    
+    @contextmanager
+    def trace(self, name: str, traceparent: Optional[str] = None, **attributes: Any) -> Iterator[ActiveTrace]:
+        """Run the with-block as a trace (see begin())"""
+        active = self.begin(name, traceparent, **attributes)
+        try:
+            yield active
+        except BaseException as e:
+            active.end(e)
+            raise
+        finally:
+            active.end()
+    
+    def _submit(self, trace: _Trace) -> None:
+        self._ensure_worker()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            with self._stats_lock:
+                self._stats['dropped_traces'] += 1
+    
+    def _ensure_worker(self) -> None:
+        if self._worker is not None:
+            return
+        with self._worker_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True)
+                self._worker.start()
+    
+    def _export_loop(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                spans = [span for span in trace.spans if span.end_time is not None]
+                self.exporter.export(spans)
+                with self._stats_lock:
+                    self._stats['exported_spans'] += len(spans)
+                    self._stats['dropped_spans'] += trace.dropped + len(trace.spans) - len(spans)
+            except Exception as e:
+                with self._stats_lock:
+                    self._stats['export_errors'] += 1
+                self.logger.warning(f"Trace export failed: {str(e)}")
+            finally:
+                self._queue.task_done()
+    
+    def flush(self) -> None:
+        """Wait until all queued traces are exported"""
+        if self._worker is not None:
+            self._queue.join()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Counts of started, sampled and exported traces and spans"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats['sample_rate'] = self.sample_rate
+        stats['enabled'] = self.enabled
+        return stats
+
+
+class JsonlSpanExporter:
+    """Append finished spans to a file, one JSON object per line"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+    
+    def export(self, spans: List[Span]) -> None:
+        lines = ''.join(json.dumps(span.to_dict(), ensure_ascii=False, default=str) + '\n' for span in spans)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class OTLPJsonExporter:
+    """
+    POST finished spans to an OTLP/HTTP collector as JSON (/v1/traces)
+    
+    Only the subset of the OTLP trace format needed by collectors is
+    produced: resource service name, span ids, times, attributes and status.
+    """
+    
+    def __init__(self, endpoint: str, service_name: str = 'efficiency-dashboard', timeout: float = 5.0,
+                 headers: Optional[Dict[str, str]] = None):
+        self.endpoint = endpoint.rstrip('/')
+        if not self.endpoint.endswith('/v1/traces'):
+            self.endpoint += '/v1/traces'
+        self.service_name = service_name
+        self.timeout = timeout
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+    
+    def encode(self, spans: List[Span]) -> Dict[str, Any]:
+        """Build the OTLP ExportTraceServiceRequest body"""
+        otlp_spans = []
+        for span in spans:
+            item = {
+                'traceId': span.trace_id,
+                'spanId': span.span_id,
+                'name': span.name,
+                'kind': 1,
+                'startTimeUnixNano': str(span.start_time),
+                'endTimeUnixNano': str(span.end_time),
+                'attributes': [{'key': key, 'value': _otlp_value(value)} for key, value in span.attributes.items()],
+                'status': {'code': 2, 'message': span.error or ''} if span.status == 'error' else {'code': 1}
+            }
+            if span.parent_id:
+                item['parentSpanId'] = span.parent_id
+            otlp_spans.append(item)
+        
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+                'scopeSpans': [{'scope': {'name': __name__}, 'spans': otlp_spans}]
+            }]
+        }
+    
+    def export(self, spans: List[Span]) -> None:
+        if not spans:
+            return
+        response = requests.post(self.endpoint, json=self.encode(spans), headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Dict, Optional
+
+# Long AI calls, long report/export generation, short dashboard queries
+DEFAULT_POOL_LIMITS = 'ai=8,reports=2,dashboard=16'
+
+
+def parse_pool_limits(spec: str) -> Dict[str, int]:
+    """Parse "ai=8,dashboard=16" into {pool: concurrency limit}"""
+    limits = {}
+    for item in (spec or '').split(','):
+        if not item.strip():
+            continue
+        name, separator, limit = item.partition('=')
+        if not separator or not name.strip():
+            raise ValueError(f"Invalid pool limit '{item}', expected name=limit")
+        limits[name.strip()] = int(limit)
+        if limits[name.strip()] < 1:
+            raise ValueError(f"Pool {name.strip()} needs a limit of at least 1")
+    return limits
+
+
+class _Pool:
+    __slots__ = ('name', 'limit', 'in_use', 'waiting', 'admitted', 'rejected', 'wait_time', 'condition')
+    
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_use = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.wait_time = 0.0
+        self.condition = threading.Condition()
+
+
+class WorkerPools:
+    """
+    Per-class concurrency limits inside one threaded worker process
+    
+    Requests are assigned to a named pool (e.g. long I/O-bound AI calls and
+    short CPU-bound dashboard queries) and hold one of the pool's slots while
+    they run. When a pool is full, further requests of that class wait in
+    the pool's queue up to the queue timeout and are then rejected, so a
+    burst of slow uploads cannot occupy every server thread and starve the
+    dashboard. The server's thread count should be at least the sum of the
+    pool limits.
+    """
+    
+    def __init__(self, limits: Dict[str, int], queue_timeout: float = 10.0):
+        """
+        Args:
+            limits: Concurrency limit per pool name
+            queue_timeout: Seconds a request may wait for a slot before it is rejected
+        """
+        self.queue_timeout = queue_timeout
+        self._pools = {name: _Pool(name, limit) for name, limit in limits.items()}
+    
+    @property
+    def total_limit(self) -> int:
+        return sum(pool.limit for pool in self._pools.values())
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._pools
+    
+    def acquire(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        Take a slot in a pool, waiting for one up to `timeout` (default: the queue timeout)
+        
+        Returns:
+            True when a slot was taken (release it with release()), False when the wait timed out
+        """
+        pool = self._pools[name]
+        timeout = self.queue_timeout if timeout is None else timeout
+        with pool.condition:
+            if pool.in_use < pool.limit:
+                pool.in_use += 1
+                pool.admitted += 1
+                return True
+            
+            started = time.monotonic()
+            deadline = started + timeout
+            pool.waiting += 1
+            try:
+                while pool.in_use >= pool.limit:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        pool.rejected += 1
+                        return False
+                    pool.condition.wait(remaining)
+                pool.in_use += 1
+                pool.admitted += 1
+                pool.wait_time += time.monotonic() - started
+                return True
+            finally:
+                pool.waiting -= 1
+    
+    def release(self, name: str) -> None:
+        pool = self._pools[name]
+        with pool.condition:
+            pool.in_use -= 1
+            pool.condition.notify()
+    
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        stats = {}
+        for name, pool in sorted(self._pools.items()):
+            with pool.condition:
+                stats[name] = {
+                    'limit': pool.limit,
+                    'in_use': pool.in_use,
+                    'waiting': pool.waiting,
+                    'admitted': pool.admitted,
+                    'rejected': pool.rejected,
+                    'wait_seconds': round(pool.wait_time, 3)
+                }
+        return stats
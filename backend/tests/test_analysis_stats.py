@@ -0,0 +1,126 @@
+import unittest
+import sqlite3
+import random
+import os
+import sys
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.analysis_stats import LatencySketch, AnalysisStatsRecorder
+
+
+class TestLatencySketch(unittest.TestCase):
+    
+    def test_quantiles_within_relative_accuracy(self):
+        """Test that quantile estimates stay within the relative error"""
+        rng = random.Random(42)
+        values = [rng.lognormvariate(2, 0.8) for _ in range(5000)]
+        sketch = LatencySketch(relative_accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        
+        ordered = sorted(values)
+        for q in (0.5, 0.95, 0.99):
+            exact = ordered[int(q * (len(ordered) - 1))]
+            self.assertAlmostEqual(sketch.quantile(q) / exact, 1.0, delta=0.011)
+    
+    def test_remove_restores_distribution(self):
+        """Test that removed values no longer affect quantiles"""
+        sketch = LatencySketch()
+        for value in (1.0, 2.0, 3.0):
+            sketch.add(value)
+        sketch.add(100.0)
+        sketch.remove(100.0)
+        
+        self.assertEqual(sketch.count, 3)
+        self.assertLess(sketch.quantile(0.99), 3.1)
+    
+    def test_empty_sketch(self):
+        """Test quantile of an empty sketch"""
+        self.assertIsNone(LatencySketch().quantile(0.5))
+    
+    def test_bucket_count_is_small(self):
+        """Test that the number of buckets stays bounded"""
+        sketch = LatencySketch()
+        for i in range(1, 100001):
+            sketch.add(i / 1000.0)
+        
+        self.assertLess(len(sketch.buckets), 700)
+
+
+class TestAnalysisStatsRecorder(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_results (
+                id TEXT PRIMARY KEY,
+                processing_time REAL,
+                created_at DATETIME
+            )
+        ''')
+        self.recorder = AnalysisStatsRecorder()
+        self.now = datetime.now()
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def test_create_tables_reports_new(self):
+        """Test that table creation reports whether a backfill is needed"""
+        self.assertTrue(self.recorder.create_tables(self.cursor))
+        self.assertFalse(self.recorder.create_tables(self.cursor))
+    
+    def test_record_and_read(self):
+        """Test recording analyses and failures"""
+        self.recorder.create_tables(self.cursor)
+        for processing_time in (1.0, 2.0, 3.0):
+            self.recorder.record_analysis(self.cursor, self.now, processing_time)
+        self.recorder.record_failure(self.cursor, self.now)
+        
+        stats = self.recorder.read_stats(self.cursor)
+        
+        self.assertEqual(stats['succeeded_total'], 3)
+        self.assertEqual(stats['failed_total'], 1)
+        self.assertEqual(stats['success_rate'], 75.0)
+        self.assertEqual(stats['average_processing_time'], 2.0)
+        self.assertAlmostEqual(stats['latency_percentiles']['p50'], 2.0, delta=0.05)
+        self.assertEqual(stats['recent_analyses'], [{'date': self.now.strftime('%Y-%m-%d'), 'count': 3}])
+    
+    def test_remove_analyses(self):
+        """Test that deleted results leave averages and histograms"""
+        self.recorder.create_tables(self.cursor)
+        self.recorder.record_analysis(self.cursor, self.now, 1.0)
+        self.recorder.record_analysis(self.cursor, self.now, 9.0)
+        
+        self.recorder.remove_analyses(self.cursor, [(str(self.now), 9.0)])
+        stats = self.recorder.read_stats(self.cursor)
+        
+        self.assertEqual(stats['average_processing_time'], 1.0)
+        self.assertAlmostEqual(stats['latency_percentiles']['p99'], 1.0, delta=0.02)
+        self.assertEqual(stats['recent_analyses'][0]['count'], 1)
+        # Lifetime totals are kept
+        self.assertEqual(stats['success_rate'], 100.0)
+    
+    def test_rebuild_from_results(self):
+        """Test backfilling statistics from stored results"""
+        self.cursor.executemany(
+            'INSERT INTO ai_analysis_results VALUES (?, ?, ?)',
+            [('a', 2.0, self.now), ('b', 4.0, self.now), ('c', None, self.now)]
+        )
+        self.recorder.create_tables(self.cursor)
+        self.recorder.rebuild(self.cursor)
+        
+        stats = self.recorder.read_stats(self.cursor)
+        
+        self.assertEqual(stats['succeeded_total'], 3)
+        self.assertEqual(stats['average_processing_time'], 3.0)
+        self.assertEqual(stats['recent_analyses'][0]['count'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
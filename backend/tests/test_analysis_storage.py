@@ -0,0 +1,146 @@
+import unittest
+import sqlite3
+import zlib
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.analysis_storage import (
+    AnalysisStorage, compress_text, decompress_text, ENCODING_PLAIN, ENCODING_ZLIB
+)
+
+
+class TestTextCompression(unittest.TestCase):
+    
+    def test_short_text_is_not_compressed(self):
+        """Test that text below the threshold is stored as is"""
+        value, encoding = compress_text('短文本', threshold=1024)
+        
+        self.assertEqual(value, '短文本')
+        self.assertEqual(encoding, ENCODING_PLAIN)
+    
+    def test_round_trip(self):
+        """Test that compressed text decodes to the original"""
+        text = '## 主要内容总结\n该文档描述了系统的性能优化方案。\n' * 100
+        
+        value, encoding = compress_text(text, threshold=64)
+        
+        self.assertIsInstance(value, bytes)
+        self.assertNotEqual(encoding, ENCODING_PLAIN)
+        self.assertLess(len(value), len(text.encode('utf-8')))
+        self.assertEqual(decompress_text(value, encoding), text)
+    
+    def test_decode_legacy_and_zlib(self):
+        """Test decoding of legacy rows and zlib rows"""
+        self.assertEqual(decompress_text('legacy', None), 'legacy')
+        self.assertEqual(decompress_text(None, None), '')
+        self.assertEqual(decompress_text(zlib.compress('文本'.encode('utf-8')), ENCODING_ZLIB), '文本')
+    
+    def test_unknown_encoding(self):
+        """Test that an unknown encoding raises ValueError"""
+        with self.assertRaises(ValueError):
+            decompress_text(b'data', 'lz4')
+
+
+class TestAnalysisStorage(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_results (
+                id TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                analysis_text TEXT NOT NULL,
+                prompt_used TEXT,
+                processing_time REAL,
+                created_at DATETIME
+            )
+        ''')
+        self.storage = AnalysisStorage(compression_threshold=64, migration_batch_size=2)
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def test_create_tables_adds_columns(self):
+        """Test that storage columns are added to an existing table"""
+        self.storage.create_tables(self.cursor)
+        self.storage.create_tables(self.cursor)
+        
+        self.cursor.execute('PRAGMA table_info(ai_analysis_results)')
+        columns = [column[1] for column in self.cursor.fetchall()]
+        
+        self.assertIn('prompt_id', columns)
+        self.assertIn('text_encoding', columns)
+    
+    def test_intern_prompt_deduplicates(self):
+        """Test that identical prompts share one row"""
+        self.storage.create_tables(self.cursor)
+        
+        first = self.storage.intern_prompt(self.cursor, '请分析以下文档内容')
+        second = self.storage.intern_prompt(self.cursor, '请分析以下文档内容')
+        other = self.storage.intern_prompt(self.cursor, '另一个提示词')
+        
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        self.assertIsNone(self.storage.intern_prompt(self.cursor, ''))
+        self.cursor.execute('SELECT COUNT(*) FROM ai_prompts')
+        self.assertEqual(self.cursor.fetchone()[0], 2)
+    
+    def test_migrate_legacy_rows(self):
+        """Test the one-shot migration of existing rows"""
+        long_text = '分析结果正文。' * 100
+        rows = [
+            ('r1', long_text, '默认提示词'),
+            ('r2', 'short', '默认提示词'),
+            ('r3', long_text, None),
+            ('r4', long_text, '自定义提示词'),
+            ('r5', 'short', '默认提示词')
+        ]
+        for result_id, text, prompt in rows:
+            self.cursor.execute(
+                'INSERT INTO ai_analysis_results (id, file_id, analysis_text, prompt_used) VALUES (?, ?, ?, ?)',
+                (result_id, 'f', text, prompt)
+            )
+        self.storage.create_tables(self.cursor)
+        
+        self.assertEqual(self.storage.migrate(self.cursor), 5)
+        self.assertEqual(self.storage.migrate(self.cursor), 0)
+        
+        self.cursor.execute('''
+            SELECT r.id, r.analysis_text, r.text_encoding, r.prompt_used, p.prompt_text
+            FROM ai_analysis_results r LEFT JOIN ai_prompts p ON r.prompt_id = p.id
+            ORDER BY r.id
+        ''')
+        migrated = {row[0]: row[1:] for row in self.cursor.fetchall()}
+        
+        for result_id, text, prompt in rows:
+            stored, encoding, inline_prompt, interned_prompt = migrated[result_id]
+            self.assertEqual(self.storage.decode_text(stored, encoding), text)
+            self.assertIsNone(inline_prompt)
+            self.assertEqual(interned_prompt, prompt)
+        self.assertEqual(migrated['r2'][1], ENCODING_PLAIN)
+        self.assertNotEqual(migrated['r1'][1], ENCODING_PLAIN)
+        
+        self.cursor.execute('SELECT COUNT(*) FROM ai_prompts')
+        self.assertEqual(self.cursor.fetchone()[0], 2)
+
+    def test_migrate_runs_once(self):
+        """Test that a completed migration is recorded and not repeated"""
+        self.storage.create_tables(self.cursor)
+        self.assertEqual(self.storage.migrate(self.cursor), 0)
+        self.cursor.execute(
+            "INSERT INTO ai_analysis_results (id, file_id, analysis_text) VALUES ('late', 'f', 'text')"
+        )
+
+        self.assertEqual(self.storage.migrate(self.cursor), 0)
+        self.cursor.execute("SELECT text_encoding FROM ai_analysis_results WHERE id = 'late'")
+        self.assertIsNone(self.cursor.fetchone()[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+from services.config_manager import ConfigSnapshot
+from services.siliconflow_client import SiliconFlowClient
+
+
+class TestSiliconFlowClientRebuild(unittest.TestCase):
+    """Replacement of the shared AI client on configuration changes"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.settings = {
+            'api_key': 'sk-test',
+            'base_url': 'https://api.example.com/v1',
+            'model': 'model-a',
+            'max_tokens': 2000,
+            'temperature': 0.7,
+            'timeout': 120
+        }
+        self.client = dashboard_app.create_siliconflow_client(self.settings)
+        patcher = patch.object(dashboard_app, 'siliconflow_client', self.client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def _snapshots(self, **changes):
+        previous = ConfigSnapshot(1, {'siliconflow': self.settings})
+        current = ConfigSnapshot(2, {'siliconflow': {**self.settings, **changes}})
+        return previous, current
+    
+    def test_changed_model_swaps_client(self):
+        """Test that a changed model replaces the client and keeps its limiter and usage"""
+        self.client.min_request_interval = 0.25
+        self.client.last_request_time = 1234.5
+        self.client._record_usage({'prompt_tokens': 100}, 40)
+        
+        dashboard_app.rebuild_siliconflow_client(*self._snapshots(model='model-b'))
+        
+        client = dashboard_app.siliconflow_client
+        self.assertIsNot(client, self.client)
+        self.assertIsInstance(client, SiliconFlowClient)
+        self.assertEqual(client.model, 'model-b')
+        self.assertEqual(client.min_request_interval, 0.25)
+        self.assertEqual(client.last_request_time, 1234.5)
+        self.assertEqual(client.get_usage_stats()['cached_tokens'], 40)
+        
+        # Requests finishing on the replaced client are still counted
+        self.client._record_usage({'prompt_tokens': 50}, None)
+        self.assertEqual(client.get_usage_stats()['requests'], 2)
+    
+    def test_unchanged_settings_keep_client(self):
+        """Test that a snapshot without client setting changes keeps the client"""
+        previous, current = self._snapshots()
+        current = ConfigSnapshot(2, current.config, custom_prompt='新的提示词')
+        
+        dashboard_app.rebuild_siliconflow_client(previous, current)
+        
+        self.assertIs(dashboard_app.siliconflow_client, self.client)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+import io
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import app as dashboard_app
+from benchmarks.mock_siliconflow import MockSiliconFlowServer
+from services.siliconflow_client import SiliconFlowClient
+
+
+class TestUploadFailures(unittest.TestCase):
+    """Failure handling of the upload and analysis endpoint"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.patches = [
+            patch.object(dashboard_app, 'DATABASE_PATH', os.path.join(self.temp_dir, 'test.db')),
+            patch.object(dashboard_app, 'DATABASE_BUSY_TIMEOUT', 2.0),
+            # No configuration watcher thread for the test client
+            patch.object(dashboard_app, 'CONFIG_WATCH_INTERVAL', 0)
+        ]
+        for active in self.patches:
+            active.start()
+        dashboard_app.init_database()
+        
+        self.server = MockSiliconFlowServer().start()
+        client = SiliconFlowClient('test-key', base_url=self.server.base_url)
+        client.min_request_interval = 0
+        self.patches.append(patch.object(dashboard_app, 'siliconflow_client', client))
+        self.patches[-1].start()
+        self.client = dashboard_app.app.test_client()
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        for active in reversed(self.patches):
+            active.stop()
+        self.server.stop()
+        shutil.rmtree(self.temp_dir)
+    
+    def _upload(self, text):
+        return self.client.post('/api/ai-analysis/upload',
+                                data={'file': (io.BytesIO(text.encode('utf-8')), 'report.txt')},
+                                content_type='multipart/form-data')
+    
+    def test_failed_write_is_rolled_back_and_counted(self):
+        """Test that a failed write releases its lock so the failure is recorded at once"""
+        with patch.object(dashboard_app.stats_recorder, 'record_analysis',
+                          side_effect=sqlite3.OperationalError('disk I/O error')):
+            start = time.perf_counter()
+            response = self._upload('季度性能分析报告正文 ' * 50)
+            elapsed = time.perf_counter() - start
+        
+        self.assertEqual(response.status_code, 500)
+        self.assertLess(elapsed, dashboard_app.DATABASE_BUSY_TIMEOUT)
+        conn = sqlite3.connect(dashboard_app.DATABASE_PATH)
+        try:
+            self.assertEqual(conn.execute('SELECT failed_total FROM ai_analysis_stats').fetchone()[0], 1)
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM ai_analysis_files').fetchone()[0], 0)
+        finally:
+            conn.close()
+        
+        # The next upload is not blocked by the failed one
+        self.assertEqual(self._upload('另一份报告正文 ' * 50).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.harness import BenchmarkSuite, summarize, compare, load_baseline, save_results
+
+
+class TestBenchmarkHarness(unittest.TestCase):
+    
+    def test_summarize(self):
+        """Test timing statistics"""
+        result = summarize('case', [5.0, 1.0, 3.0, 2.0, 4.0], rows=10)
+        self.assertEqual(result.rounds, 5)
+        self.assertEqual(result.median_ms, 3.0)
+        self.assertEqual(result.min_ms, 1.0)
+        self.assertEqual(result.p95_ms, 5.0)
+        self.assertEqual(result.params, {'rows': 10})
+    
+    def test_suite_filter(self):
+        """Test benchmarks not matching the filter are skipped"""
+        suite = BenchmarkSuite(repeat=2, only='pdf', verbose=False)
+        calls = []
+        self.assertIsNone(suite.bench('extract_word', lambda: calls.append(1)))
+        self.assertIsNotNone(suite.bench('extract_pdf', lambda: calls.append(1)))
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([result.name for result in suite.results], ['extract_pdf'])
+    
+    def test_compare_flags_regressions(self):
+        """Test only slowdowns beyond both thresholds are regressions"""
+        baseline = {'results': {
+            'slow': {'median_ms': 10.0},
+            'noise': {'median_ms': 0.1},
+            'fast': {'median_ms': 10.0}
+        }}
+        results = [
+            summarize('slow', [14.0]),
+            summarize('noise', [0.3]),
+            summarize('fast', [11.0]),
+            summarize('new', [100.0])
+        ]
+        regressions = compare(results, baseline, threshold=0.25, min_delta_ms=0.5)
+        self.assertEqual([regression.name for regression in regressions], ['slow'])
+        self.assertAlmostEqual(regressions[0].ratio, 1.4)
+    
+    def test_baseline_round_trip(self):
+        """Test results saved as a baseline load back"""
+        suite = BenchmarkSuite(repeat=1, verbose=False)
+        suite.bench('case', lambda: None)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'nested', 'baseline.json')
+            self.assertIsNone(load_baseline(path))
+            save_results(path, suite.to_dict())
+            baseline = load_baseline(path)
+        self.assertIn('case', baseline['results'])
+        self.assertEqual(compare(suite.results, baseline), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -220,7 +220,90 @@ class TestConfigManager(unittest.TestCase):
         
         self.assertFalse(result['valid'])
         self.assertTrue(any('API key' in error for error in result['errors']))
-
+    
+    def _edit_config(self, **siliconflow):
+        """Rewrite the config file with changed siliconflow settings and a newer mtime"""
+        self.test_config['siliconflow'].update(siliconflow)
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            json.dump(self.test_config, f, ensure_ascii=False, indent=2)
+        stat = os.stat(self.config_file)
+        os.utime(self.config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    
+    def test_check_for_changes_reloads_edited_file(self):
+        """Test an edited config file is published as a new snapshot version"""
+        first = self.config_manager.get_snapshot()
+        self.assertFalse(self.config_manager.check_for_changes())
+        
+        self._edit_config(model='other-model')
+        self.assertTrue(self.config_manager.check_for_changes())
+        
+        current = self.config_manager.get_snapshot()
+        self.assertGreater(current.version, first.version)
+        self.assertEqual(self.config_manager.get_siliconflow_config()['model'], 'other-model')
+        self.assertEqual(first.config['siliconflow']['model'], 'gpt-3.5-turbo')
+    
+    def test_check_for_changes_keeps_last_good_config(self):
+        """Test a broken config file does not replace the current snapshot"""
+        version = self.config_manager.get_snapshot().version
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write('{ invalid')
+        
+        with self.assertLogs('services.config_manager', level='WARNING'):
+            self.assertFalse(self.config_manager.check_for_changes())
+        # The same broken file is not retried
+        self.assertFalse(self.config_manager.check_for_changes())
+        self.assertEqual(self.config_manager.get_snapshot().version, version)
+        self.assertEqual(self.config_manager.get_siliconflow_config()['model'], 'gpt-3.5-turbo')
+    
+    def test_prompt_changes_are_broadcast(self):
+        """Test subscribers receive every prompt change with both snapshots"""
+        changes = []
+        self.config_manager.subscribe(lambda previous, current: changes.append(
+            (previous.custom_prompt, current.custom_prompt, current.version - previous.version)
+        ))
+        self.config_manager.set_custom_prompt("新的提示词")
+        self.config_manager.clear_custom_prompt()
+        self.assertEqual(changes, [(None, "新的提示词", 1), ("新的提示词", None, 1)])
+    
+    def test_prompt_changed_by_other_process_is_picked_up(self):
+        """Test a prompt saved through another manager reaches this one on the next check"""
+        self.assertIsNone(self.config_manager.get_custom_prompt())
+        ConfigManager(self.config_file, self.db_file).set_custom_prompt("其他进程的提示词")
+        
+        self.assertIsNone(self.config_manager.get_custom_prompt())
+        self.assertTrue(self.config_manager.check_for_changes())
+        self.assertEqual(self.config_manager.get_custom_prompt(), "其他进程的提示词")
+    
+    def test_check_does_not_publish_stale_prompt(self):
+        """Test a prompt read before a concurrent save does not replace the saved one"""
+        self.config_manager.get_snapshot()
+        read_prompt = self.config_manager._read_custom_prompt
+        
+        def read_then_save():
+            stale = read_prompt()
+            self.config_manager.set_custom_prompt("同时保存的提示词")
+            return stale
+        
+        with patch.object(self.config_manager, '_read_custom_prompt', side_effect=read_then_save):
+            self.assertFalse(self.config_manager.check_for_changes())
+        self.assertEqual(self.config_manager.get_custom_prompt(), "同时保存的提示词")
+    
+    def test_ensure_watching_starts_one_watcher(self):
+        """Test the background watcher is started once and applies file edits"""
+        import threading
+        import time
+        self.config_manager.get_snapshot()
+        self.addCleanup(self.config_manager.stop_watching)
+        for _ in range(3):
+            self.config_manager.ensure_watching(0.02)
+        watchers = [thread for thread in threading.enumerate() if thread.name == 'config-watcher']
+        self.assertEqual(len(watchers), 1)
+        
+        self._edit_config(model='watched-model')
+        deadline = time.monotonic() + 2
+        while self.config_manager.get_siliconflow_config()['model'] != 'watched-model':
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -232,6 +232,40 @@ class TestContentExtractor(unittest.TestCase):
         self.assertTrue(result.success)
         self.assertIn('encoding', result.metadata)
 
+    
+    def test_split_sections_by_markers(self):
+        """Test splitting content on page markers and headings"""
+        content = "--- Page 1 ---\n" + "a" * 300 + "\n\n# Heading\n" + "b" * 300
+        
+        sections = self.extractor.split_sections(content)
+        
+        self.assertEqual([section.title for section in sections], ["Page 1", "Heading"])
+        self.assertIn("a" * 300, sections[0].content)
+        self.assertNotEqual(sections[0].digest, sections[1].digest)
+    
+    def test_split_sections_merges_short_and_splits_long(self):
+        """Test that short sections merge forward and long ones are split"""
+        content = "# A\nshort\n\n# B\n" + "b" * 300 + "\n\n# C\n" + ("c" * 100 + "\n\n") * 10
+        
+        sections = self.extractor.split_sections(content, max_section_length=500)
+        
+        self.assertEqual(sections[0].title, "A")
+        self.assertIn("short", sections[0].content)
+        self.assertIn("b" * 300, sections[0].content)
+        self.assertTrue(all(len(section.content) <= 500 for section in sections))
+        self.assertEqual(sections[2].title, "C (2)")
+    
+    def test_split_sections_stable_digest(self):
+        """Test that editing one section leaves other digests unchanged"""
+        base = "# A\n" + "a" * 300 + "\n\n# B\n" + "b" * 300
+        edited = "# A\n" + "a" * 300 + "\n\n# B\n" + "x" * 300
+        
+        before = self.extractor.split_sections(base)
+        after = self.extractor.split_sections(edited)
+        
+        self.assertEqual(before[0].digest, after[0].digest)
+        self.assertNotEqual(before[1].digest, after[1].digest)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,228 @@
+import unittest
+import sqlite3
+import tempfile
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.dashboard_snapshot import DashboardSnapshot, DashboardSnapshotManager, METRIC_COLUMNS
+from services.data_version import DataVersion
+from services.pagination import nullable_keyset_condition
+
+
+def create_tables(cursor):
+    """Create the dashboard tables"""
+    cursor.execute(f'''
+        CREATE TABLE metrics (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, department TEXT, record_date TEXT,
+            {', '.join(f'{column} REAL' for column in METRIC_COLUMNS)},
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE project_details (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, department TEXT, person_name TEXT, position_name TEXT,
+            project_name TEXT, saturation REAL, code_equivalent INTEGER, delivered_requirements INTEGER,
+            total_hours REAL, ai_usage_days REAL, record_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE developer_rankings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, department TEXT, name TEXT, score INTEGER,
+            work_saturation REAL, code_equivalent INTEGER, defect_count INTEGER, record_date TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+class TestDashboardSnapshot(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        create_tables(self.cursor)
+        self.cursor.executemany(
+            'INSERT INTO metrics (department, record_date, requirement_throughput, reopen_rate, created_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            [
+                ('测试部', '2024-01', 100, 2.5, '2024-01-01 10:00:00'),
+                ('产品部', '2024-01', 120, None, '2024-01-01 10:00:00'),
+                ('测试部', '2024-01', 110, 3.5, '2024-01-02 10:00:00'),
+                ('测试部', '2024-02', 130, 1.0, '2024-02-01 10:00:00')
+            ]
+        )
+        self.cursor.executemany(
+            'INSERT INTO developer_rankings (department, name, score, record_date, created_at) VALUES (?, ?, ?, ?, ?)',
+            [
+                ('测试部', '张三', 90, '2024-01', '2024-01-01'),
+                ('产品部', '张三', 80, '2024-01', '2024-01-01'),
+                ('测试部', '李四', 85, '2024-01', '2024-01-01'),
+                ('测试部', '王五', None, '2024-01', '2024-01-01'),
+                ('产品部', '赵六', 85, '2024-01', '2024-01-01')
+            ]
+        )
+        self.cursor.executemany(
+            'INSERT INTO project_details (department, person_name, project_name, saturation, record_date, created_at) '
+            'VALUES (?, ?, ?, ?, ?, ?)',
+            [
+                ('测试部', '张三', '项目A', 85.5, '2024-01', '2024-01-01'),
+                ('测试部', '李四', '项目B', None, '2024-01', '2024-01-01'),
+                ('产品部', '赵六', '项目C', 70.0, '2024-01', '2024-01-03')
+            ]
+        )
+        self.snapshot = DashboardSnapshot.load(self.cursor, 0)
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def test_metrics_latest_row_for_department(self):
+        """Test that a department gets its most recent row"""
+        row = self.snapshot.metrics_row('测试部', '2024-01')
+        
+        self.assertEqual(row[0], 110)
+        self.assertEqual(row[5], 3.5)
+        self.assertIsNone(row[1])
+        self.assertIsNone(self.snapshot.metrics_row('运维部', '2024-01'))
+    
+    def test_metrics_average_for_all_departments(self):
+        """Test that 全部部门 averages non-NULL values like SQL AVG"""
+        row = self.snapshot.metrics_row('全部部门', '2024-01')
+        
+        self.assertAlmostEqual(row[0], 110)
+        self.assertAlmostEqual(row[5], 3.0)
+        self.assertIsNone(row[1])
+        self.assertEqual(self.snapshot.metrics_row('全部部门', '2030-01'), (None,) * len(METRIC_COLUMNS))
+    
+    def test_rankings_match_sql(self):
+        """Test rankings against the equivalent SQL queries"""
+        self.cursor.execute('''
+            SELECT name, AVG(score) AS avg_value FROM developer_rankings
+            WHERE record_date = ? GROUP BY name ORDER BY avg_value DESC, name
+        ''', ('2024-01',))
+        expected = self.cursor.fetchall()
+        
+        self.assertEqual(self.snapshot.ranking_rows('全部部门', '2024-01', 'score', True), expected)
+        
+        self.cursor.execute('''
+            SELECT name, score AS value FROM developer_rankings
+            WHERE department = ? AND record_date = ? ORDER BY value ASC, name
+        ''', ('测试部', '2024-01'))
+        expected = self.cursor.fetchall()
+        
+        self.assertEqual(self.snapshot.ranking_rows('测试部', '2024-01', 'score', False), expected)
+    
+    def test_ranking_null_placement(self):
+        """Test that NULL values sort last descending and first ascending"""
+        descending = self.snapshot.ranking_rows('测试部', '2024-01', 'score', True)
+        ascending = self.snapshot.ranking_rows('测试部', '2024-01', 'score', False)
+        
+        self.assertEqual(descending[-1], ('王五', None))
+        self.assertEqual(ascending[0], ('王五', None))
+    
+    def test_ranking_pages_match_sql(self):
+        """Test keyset and offset pages against the equivalent SQL queries"""
+        for descending in (True, False):
+            direction = 'DESC' if descending else 'ASC'
+            full = self.snapshot.ranking_rows('测试部', '2024-01', 'score', descending)
+            
+            after = None
+            pages = []
+            while True:
+                clause, params = nullable_keyset_condition('score', 'name', after, descending)
+                self.cursor.execute(f'''
+                    SELECT name, score AS value FROM developer_rankings
+                    WHERE department = ? AND record_date = ? AND {clause}
+                    ORDER BY value {direction}, name LIMIT 2
+                ''', ['测试部', '2024-01'] + params)
+                expected = self.cursor.fetchall()
+                page = self.snapshot.ranking_rows('测试部', '2024-01', 'score', descending, limit=2, after=after)
+                self.assertEqual(page, expected)
+                if not page:
+                    break
+                pages.extend(page)
+                after = (page[-1][1], page[-1][0])
+            
+            self.assertEqual(pages, full)
+            self.assertEqual(
+                self.snapshot.ranking_rows('全部部门', '2024-01', 'score', descending, limit=2, offset=1),
+                self.snapshot.ranking_rows('全部部门', '2024-01', 'score', descending)[1:3]
+            )
+    
+    def test_details_newest_first(self):
+        """Test project details filtering and order"""
+        rows = self.snapshot.detail_rows('全部部门', '2024-01')
+        
+        self.assertEqual([row[0] for row in rows], ['赵六', '李四', '张三'])
+        self.assertIsNone(rows[1][3])
+        self.assertEqual(rows[2][3], 85.5)
+        self.assertEqual(self.snapshot.detail_rows('测试部', '2099-01'), [])
+
+
+class TestDashboardSnapshotManager(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'test.db')
+        conn = sqlite3.connect(self.db_path)
+        create_tables(conn.cursor())
+        self.data_version = DataVersion()
+        self.data_version.create_table(conn.cursor())
+        conn.commit()
+        conn.close()
+        self.manager = DashboardSnapshotManager(self.db_path, self.data_version, check_interval=60)
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        import shutil
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+    
+    def _insert_detail(self, person_name):
+        """Insert a project detail row and bump the data version"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "INSERT INTO project_details (department, person_name, record_date) VALUES ('测试部', ?, '2024-01')",
+            (person_name,)
+        )
+        version = self.data_version.bump(cursor)
+        conn.commit()
+        conn.close()
+        return version
+    
+    def test_reload_on_data_change(self):
+        """Test that the snapshot is reused until the data version changes"""
+        first = self.manager.get()
+        self.assertIs(self.manager.get(), first)
+        
+        self.data_version.notify(self._insert_detail('张三'))
+        second = self.manager.get()
+        
+        self.assertIsNot(second, first)
+        self.assertEqual(second.version, 1)
+        self.assertEqual(len(second.detail_rows('测试部', '2024-01')), 1)
+    
+    def test_external_change_detected_after_interval(self):
+        """Test that changes from other processes are picked up by version checks"""
+        first = self.manager.get()
+        self._insert_detail('李四')
+        
+        self.assertIs(self.manager.get(), first)
+        
+        self.manager.check_interval = 0
+        self.assertEqual(self.manager.get().version, 1)
+    
+    def test_unavailable_database(self):
+        """Test that load failures return None so callers fall back to SQL"""
+        manager = DashboardSnapshotManager(os.path.join(self.temp_dir, 'missing.db'), DataVersion())
+        
+        self.assertIsNone(manager.get())
+
+
+if __name__ == '__main__':
+    unittest.main()
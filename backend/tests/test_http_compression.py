@@ -0,0 +1,129 @@
+import unittest
+import gzip
+import os
+import sys
+
+from flask import Flask, Response
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.http_compression import (
+    parse_accept_encoding, choose_encoding, compress_response, is_compressible, iter_encoded, SUPPORTED_ENCODINGS
+)
+
+
+class TestHttpCompression(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = Flask(__name__)
+        self.body = ('{"metrics": "研发效能数据"}' * 200).encode('utf-8')
+    
+    def test_parse_accept_encoding(self):
+        """Test Accept-Encoding parsing with quality values"""
+        parsed = parse_accept_encoding('gzip;q=0.8, br, identity;q=0, bogus;q=x')
+        
+        self.assertEqual(parsed['gzip'], 0.8)
+        self.assertEqual(parsed['br'], 1.0)
+        self.assertEqual(parsed['identity'], 0.0)
+        self.assertEqual(parsed['bogus'], 0.0)
+        self.assertEqual(parse_accept_encoding(None), {})
+    
+    def test_choose_encoding(self):
+        """Test encoding negotiation"""
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertIsNone(choose_encoding('deflate'))
+        self.assertIsNone(choose_encoding('gzip;q=0'))
+        self.assertIsNone(choose_encoding(''))
+        self.assertEqual(choose_encoding('*'), SUPPORTED_ENCODINGS[0])
+    
+    def test_compress_response_gzip(self):
+        """Test that large responses are gzip compressed"""
+        with self.app.app_context():
+            response = compress_response(Response(self.body, mimetype='application/json'), 'gzip')
+        
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertEqual(gzip.decompress(response.get_data()), self.body)
+        self.assertEqual(int(response.headers['Content-Length']), len(response.get_data()))
+    
+    def test_small_response_not_compressed(self):
+        """Test that small bodies are sent as is"""
+        response = compress_response(Response(b'{}', mimetype='application/json'), 'gzip')
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data(), b'{}')
+    
+    def test_skip_errors_and_encoded_responses(self):
+        """Test that error and already encoded responses are left unchanged"""
+        error = compress_response(Response(self.body, status=500), 'gzip')
+        encoded = Response(self.body, headers={'Content-Encoding': 'br'})
+        encoded = compress_response(encoded, 'gzip')
+        
+        self.assertNotIn('Content-Encoding', error.headers)
+        self.assertEqual(encoded.headers['Content-Encoding'], 'br')
+        self.assertEqual(encoded.get_data(), self.body)
+    
+    def test_content_type_allow_list(self):
+        """Test that only allow-listed content types are compressed"""
+        self.assertTrue(is_compressible('application/json'))
+        self.assertTrue(is_compressible('text/csv'))
+        self.assertTrue(is_compressible('application/problem+json'))
+        self.assertFalse(is_compressible('application/pdf'))
+        self.assertFalse(is_compressible(None))
+        
+        response = compress_response(Response(self.body, mimetype='application/pdf'), 'gzip')
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.get_data(), self.body)
+    
+    def test_streamed_response_compressed_incrementally(self):
+        """Test that streamed bodies are compressed chunk by chunk and measured once sent"""
+        sizes = []
+        chunks = ['{"details":[', '{"name":"研发"},' * 300, '{}]}']
+        response = compress_response(Response(iter(chunks), mimetype='application/json'), 'gzip',
+                                     on_stream_close=lambda *args: sizes.append(args))
+        
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.vary)
+        self.assertEqual(sizes, [])
+        
+        body = b''.join(response.response)
+        
+        raw = ''.join(chunks).encode('utf-8')
+        self.assertEqual(gzip.decompress(body), raw)
+        self.assertEqual(sizes[0][:2], (len(raw), len(body)))
+    
+    def test_streamed_response_without_encoding_is_measured(self):
+        """Test that streamed bodies the client cannot decode are passed through and still measured"""
+        sizes = []
+        response = compress_response(Response(iter([self.body])), 'identity',
+                                     on_stream_close=lambda *args: sizes.append(args))
+        
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(b''.join(response.response), self.body)
+        self.assertEqual(sizes[0][:2], (len(self.body), len(self.body)))
+    
+    def test_iter_encoded_closes_source(self):
+        """Test that closing the encoded stream early closes the source and reports the bytes sent"""
+        closed = []
+        sizes = []
+        
+        def source():
+            try:
+                yield b'a' * 100
+                yield b'b' * 100
+            finally:
+                closed.append(True)
+        
+        stream = iter_encoded(source(), on_close=lambda *args: sizes.append(args))
+        next(stream)
+        stream.close()
+        
+        self.assertEqual(closed, [True])
+        self.assertEqual(sizes[0][:2], (100, 100))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import unittest
+import tempfile
+import os
+import re
+import shutil
+import sqlite3
+from unittest.mock import Mock
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.incremental_analyzer import IncrementalAnalyzer
+from services.siliconflow_client import AnalysisResult
+
+
+class TestIncrementalAnalyzer(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_file = os.path.join(self.temp_dir, 'test.db')
+        self.conn = sqlite3.connect(self.db_file)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_files (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                upload_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                document_key TEXT
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_sections (
+                file_id TEXT NOT NULL,
+                section_index INTEGER NOT NULL,
+                title TEXT,
+                section_hash TEXT NOT NULL,
+                prompt_hash TEXT NOT NULL,
+                analysis_text TEXT NOT NULL,
+                PRIMARY KEY (file_id, section_index)
+            )
+        ''')
+        self.analyzer = IncrementalAnalyzer()
+        self.client = Mock()
+        self.client.model = "test-model"
+        self.client.analyze_content.side_effect = self._fake_analysis
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def _fake_analysis(self, content, prompt):
+        """Answer like the model: one marked analysis per marked section"""
+        blocks = re.split(r'^(\[\[章节 \d+\]\])$', content, flags=re.MULTILINE)
+        if len(blocks) == 1:
+            text = f"analysis of {content.splitlines()[0]}"
+        else:
+            text = "\n\n".join(
+                f"{marker}\nanalysis of {body.strip().splitlines()[0]}"
+                for marker, body in zip(blocks[1::2], blocks[2::2])
+            )
+        return AnalysisResult(success=True, content=text, tokens_used=10)
+    
+    def _document(self, chapter_two: str) -> str:
+        """Build a three-chapter markdown document"""
+        return "\n\n".join([
+            "# Chapter 1\n" + "first chapter text " * 20,
+            "# Chapter 2\n" + chapter_two * 80,
+            "# Chapter 3\n" + "third chapter text " * 20
+        ])
+    
+    def _store(self, file_id: str, timestamp: str, result) -> None:
+        """Store a file row and its section analyses"""
+        self.cursor.execute(
+            'INSERT INTO ai_analysis_files (id, filename, upload_timestamp, document_key) VALUES (?, ?, ?, ?)',
+            (file_id, 'spec.md', timestamp, 'spec.md')
+        )
+        self.analyzer.save_sections(self.cursor, file_id, result)
+        self.conn.commit()
+    
+    def test_first_version_analyzes_all_sections(self):
+        """Test that a document without previous version is analyzed in one call"""
+        result = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "prompt", "spec.md")
+        
+        self.assertTrue(result.analysis_result.success)
+        self.assertIsNone(result.previous_file_id)
+        self.assertEqual(self.client.analyze_content.call_count, 1)
+        self.assertEqual(result.analysis_result.metadata['sections_reanalyzed'], 3)
+        self.assertEqual(result.analysis_result.metadata['model_calls'], 1)
+        self.assertIn("## Chapter 2", result.analysis_result.content)
+        self.assertEqual([item.analysis_text for item in result.sections],
+                         [f"analysis of # Chapter {number}" for number in (1, 2, 3)])
+    
+    def test_missing_sections_are_analyzed_separately(self):
+        """Test that sections missing from a combined response get their own call"""
+        def drop_last(content, prompt):
+            result = self._fake_analysis(content, prompt)
+            result.content = result.content.split("\n\n[[章节 3]]")[0]
+            return result
+        self.client.analyze_content.side_effect = drop_last
+        
+        result = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "prompt", "spec.md")
+        
+        self.assertEqual(self.client.analyze_content.call_count, 2)
+        self.assertEqual(result.sections[2].analysis_text, "analysis of # Chapter 3")
+        self.assertEqual(result.analysis_result.tokens_used, 20)
+    
+    def test_pack_sections_respects_length(self):
+        """Test that sections are batched within the content limit"""
+        sections = self.analyzer.content_extractor.split_sections(self._document("v1 "))
+        
+        self.assertEqual(len(self.analyzer.pack_sections(sections)), 1)
+        self.assertEqual([len(batch) for batch in self.analyzer.pack_sections(sections, max_length=400)], [1, 1, 1])
+    
+    def test_revision_reanalyzes_only_changed_sections(self):
+        """Test that unchanged sections are reused from the previous version"""
+        first = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "prompt", "spec.md")
+        self._store('file-1', '2024-01-01 10:00:00', first)
+        self.client.analyze_content.reset_mock()
+        
+        second = self.analyzer.analyze(self.cursor, self.client, self._document("v2 "), "prompt", "spec.md")
+        
+        self.assertEqual(second.previous_file_id, 'file-1')
+        self.assertEqual(self.client.analyze_content.call_count, 1)
+        self.assertEqual(second.analysis_result.metadata['sections_reused'], 2)
+        self.assertEqual(second.analysis_result.tokens_used, 10)
+        self.assertEqual([item.reused for item in second.sections], [True, False, True])
+    
+    def test_changed_prompt_invalidates_cache(self):
+        """Test that cached sections are not reused under a different prompt"""
+        first = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "prompt", "spec.md")
+        self._store('file-1', '2024-01-01 10:00:00', first)
+        self.client.analyze_content.reset_mock()
+        
+        result = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "other prompt", "spec.md")
+        
+        self.assertEqual(self.client.analyze_content.call_count, 1)
+        self.assertEqual(result.analysis_result.metadata['sections_reused'], 0)
+    
+    def test_section_failure_fails_analysis(self):
+        """Test that a failed section analysis fails the whole run"""
+        self.client.analyze_content.side_effect = None
+        self.client.analyze_content.return_value = AnalysisResult(
+            success=False, content="", error_message="API error"
+        )
+        
+        result = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "prompt", "spec.md")
+        
+        self.assertFalse(result.analysis_result.success)
+        self.assertIn("API error", result.analysis_result.error_message)
+    
+    def test_find_previous_version_latest(self):
+        """Test that the latest version with sections is selected"""
+        first = self.analyzer.analyze(self.cursor, self.client, self._document("v1 "), "prompt", "spec.md")
+        self._store('file-1', '2024-01-01 10:00:00', first)
+        self._store('file-2', '2024-01-02 10:00:00', first)
+        
+        self.assertEqual(self.analyzer.find_previous_version(self.cursor, 'spec.md'), 'file-2')
+        self.assertIsNone(self.analyzer.find_previous_version(self.cursor, 'other.md'))
+
+
+if __name__ == '__main__':
+    unittest.main()
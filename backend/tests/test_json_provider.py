@@ -0,0 +1,60 @@
+import unittest
+import json
+import os
+import sys
+from dataclasses import dataclass
+from datetime import datetime
+
+from flask import Flask, g
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.json_provider import FastJSONProvider
+
+
+@dataclass
+class Item:
+    name: str
+    value: float
+
+
+class TestFastJSONProvider(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.app = Flask(__name__)
+        self.app.json = FastJSONProvider(self.app)
+        self.default_app = Flask(__name__)
+        self.payload = {
+            'b': [1, 2.5, None, True],
+            'a': '研发效能',
+            'created': datetime(2024, 1, 2, 3, 4, 5),
+            'item': Item('张三', 85.5),
+            'big': 2 ** 70
+        }
+    
+    def test_matches_default_provider(self):
+        """Test that decoded output matches Flask's default provider"""
+        fast = self.app.json.dumps(self.payload)
+        default = self.default_app.json.dumps(self.payload)
+        
+        self.assertEqual(json.loads(fast), json.loads(default))
+        self.assertEqual(list(json.loads(fast)), ['a', 'b', 'big', 'created', 'item'])
+    
+    def test_response_records_serialize_time(self):
+        """Test JSON responses and the accumulated serialization time"""
+        with self.app.test_request_context():
+            response = self.app.json.response({'rankings': [{'name': '张三', 'value': 90}]})
+            
+            self.assertEqual(response.mimetype, 'application/json')
+            self.assertEqual(json.loads(response.get_data()), {'rankings': [{'name': '张三', 'value': 90}]})
+            self.assertGreater(g.json_serialize_time, 0)
+    
+    def test_unsupported_arguments_use_json_module(self):
+        """Test that other json.dumps arguments are honoured"""
+        self.assertEqual(self.app.json.dumps({'a': 'é'}, ensure_ascii=True, indent=4), '{\n    "a": "\\u00e9"\n}')
+
+
+if __name__ == '__main__':
+    unittest.main()
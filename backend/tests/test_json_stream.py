@@ -0,0 +1,47 @@
+import unittest
+import json
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.json_stream import stream_json_list
+
+
+class TestStreamJsonList(unittest.TestCase):
+    
+    def test_output_is_valid_json(self):
+        """Test that the chunks join into the expected document"""
+        items = [{'name': f'员工{i}', 'value': i / 3} for i in range(7)]
+        
+        chunks = list(stream_json_list('details', iter(items), lambda: {'pagination': {'hasMore': False}},
+                                       chunk_size=3))
+        
+        self.assertEqual(json.loads(''.join(chunks)), {'details': items, 'pagination': {'hasMore': False}})
+        # Opening, three item chunks, closing bracket, trailer member, closing brace
+        self.assertEqual(len(chunks), 7)
+    
+    def test_empty_list_without_trailer(self):
+        """Test an empty result"""
+        self.assertEqual(json.loads(''.join(stream_json_list('details', []))), {'details': []})
+    
+    def test_items_consumed_lazily(self):
+        """Test that items are encoded as they are consumed and the trailer runs last"""
+        consumed = []
+        
+        def items():
+            for i in range(4):
+                consumed.append(i)
+                yield i
+        
+        stream = stream_json_list('rows', items(), lambda: {'count': len(consumed)}, chunk_size=2)
+        self.assertEqual(next(stream), '{"rows":[')
+        self.assertEqual(next(stream), '0,1')
+        self.assertEqual(consumed, [0, 1])
+        
+        self.assertEqual(json.loads('{"rows":[0,1' + ''.join(stream)), {'rows': [0, 1, 2, 3], 'count': 4})
+
+
+if __name__ == '__main__':
+    unittest.main()
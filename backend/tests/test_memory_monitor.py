@@ -0,0 +1,124 @@
+import unittest
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.memory_monitor import MemoryTracker, MemoryBudget, MemoryBudgetExceeded, current_rss
+
+
+class TestMemoryTracker(unittest.TestCase):
+    
+    def tearDown(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+    
+    def test_tracemalloc_peak_and_retained(self):
+        """Test tracemalloc mode measures peak and retained allocations"""
+        tracker = MemoryTracker('tracemalloc')
+        kept = []
+        with tracker.track('upload') as usage:
+            temporary = bytearray(4 * 1024 * 1024)
+            del temporary
+            kept.append(bytearray(1024 * 1024))
+        
+        self.assertGreaterEqual(usage.peak_bytes, 4 * 1024 * 1024)
+        self.assertGreaterEqual(usage.retained_bytes, 1024 * 1024)
+        self.assertLess(usage.retained_bytes, 2 * 1024 * 1024)
+        stats = tracker.snapshot()['upload']
+        self.assertEqual(stats['count'], 1)
+        self.assertEqual(stats['max_peak_bytes'], usage.peak_bytes)
+    
+    def test_top_allocations_since_baseline(self):
+        """Test allocation sites report growth since the baseline"""
+        tracker = MemoryTracker('tracemalloc')
+        self.assertTrue(tracker.mark_baseline())
+        leaked = [bytearray(512 * 1024) for _ in range(4)]
+        top = tracker.top_allocations(limit=5, since_baseline=True)
+        self.assertIn(os.path.basename(__file__), top[0]['site'])
+        self.assertGreaterEqual(top[0]['size_diff_bytes'], 2 * 1024 * 1024)
+        self.assertEqual(len(leaked), 4)
+    
+    def test_rss_and_off_modes(self):
+        """Test rss mode records calls and off mode records nothing"""
+        self.assertGreater(current_rss(), 0)
+        tracker = MemoryTracker('rss')
+        with tracker.track('report'):
+            pass
+        self.assertEqual(tracker.snapshot()['report']['count'], 1)
+        self.assertIsNone(tracker.top_allocations())
+        
+        tracker = MemoryTracker('off')
+        with tracker.track('report'):
+            pass
+        self.assertEqual(tracker.snapshot(), {})
+        with self.assertRaises(ValueError):
+            MemoryTracker('heap')
+
+
+class TestMemoryBudget(unittest.TestCase):
+    
+    def test_disabled_budget_admits(self):
+        """Test a zero limit does not restrict anything"""
+        budget = MemoryBudget(0, rss_reader=lambda: 10 ** 12)
+        with budget.admit(10 ** 12):
+            pass
+        self.assertFalse(budget.get_stats()['enabled'])
+    
+    def test_rejects_when_exhausted(self):
+        """Test requests are rejected after the queue timeout"""
+        budget = MemoryBudget(1000, queue_timeout=0.05, rss_reader=lambda: 2000, poll_interval=0.01)
+        with self.assertRaises(MemoryBudgetExceeded):
+            with budget.admit(10):
+                pass
+        stats = budget.get_stats()
+        self.assertEqual(stats['rejected'], 1)
+        self.assertEqual(stats['running'], 0)
+    
+    def test_single_request_admitted_when_idle(self):
+        """Test a large estimate is admitted when nothing else runs"""
+        budget = MemoryBudget(1000, queue_timeout=0, rss_reader=lambda: 500)
+        with budget.admit(5000):
+            self.assertEqual(budget.get_stats()['reserved_bytes'], 5000)
+        self.assertEqual(budget.get_stats()['reserved_bytes'], 0)
+    
+    def test_queued_until_reservation_released(self):
+        """Test a request waits for a running one to release its reservation"""
+        budget = MemoryBudget(1000, queue_timeout=5, rss_reader=lambda: 500, poll_interval=1)
+        entered = threading.Event()
+        release = threading.Event()
+        admitted_at = []
+        
+        def first():
+            with budget.admit(400):
+                entered.set()
+                release.wait()
+        
+        def second():
+            with budget.admit(400):
+                admitted_at.append(time.monotonic())
+        
+        worker = threading.Thread(target=first)
+        worker.start()
+        entered.wait()
+        waiter = threading.Thread(target=second)
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(admitted_at, [])
+        self.assertEqual(budget.get_stats()['waiting'], 1)
+        released_at = time.monotonic()
+        release.set()
+        worker.join()
+        waiter.join()
+        
+        self.assertEqual(len(admitted_at), 1)
+        self.assertLess(admitted_at[0] - released_at, 0.5)
+        self.assertEqual(budget.get_stats()['queued'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
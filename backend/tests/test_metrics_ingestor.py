@@ -0,0 +1,252 @@
+import unittest
+import sqlite3
+import io
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.data_version import DataVersion
+from services.metrics_ingestor import (
+    DuplicateKeysError, InputEncodingError, MetricsIngestor, RowValidationError, TABLE_SCHEMAS, detect_format
+)
+
+
+class TestMetricsIngestor(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        cursor = self.conn.cursor()
+        cursor.execute('''
+            CREATE TABLE metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                department TEXT DEFAULT '全部部门',
+                requirement_throughput INTEGER,
+                monthly_delivered_requirements INTEGER,
+                monthly_new_requirements INTEGER,
+                delivery_cycle_p75 REAL,
+                online_defects INTEGER,
+                reopen_rate REAL,
+                emergency_releases INTEGER,
+                incident_count INTEGER,
+                work_saturation REAL,
+                code_equivalent INTEGER,
+                record_date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE project_details (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                department TEXT DEFAULT '全部部门',
+                person_name TEXT,
+                position_name TEXT,
+                project_name TEXT,
+                saturation REAL,
+                code_equivalent INTEGER,
+                delivered_requirements INTEGER,
+                total_hours REAL,
+                ai_usage_days REAL,
+                record_date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE developer_rankings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                department TEXT DEFAULT '全部部门',
+                name TEXT,
+                score INTEGER,
+                work_saturation REAL,
+                code_equivalent INTEGER,
+                defect_count INTEGER,
+                record_date TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self.data_version = DataVersion()
+        self.data_version.create_table(cursor)
+        self.ingestor = MetricsIngestor(self.data_version, batch_size=2)
+        self.ingestor.create_indexes(cursor)
+        self.conn.commit()
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def _ingest(self, table, text, data_format='csv', **kwargs):
+        """Ingest text through the streaming reader"""
+        records = self.ingestor.iter_records(io.BytesIO(text.encode('utf-8')), data_format)
+        return self.ingestor.ingest(self.conn, table, records, **kwargs)
+    
+    def test_csv_ingest_in_batches(self):
+        """Test that CSV rows are written in batches with one version bump each"""
+        notified = []
+        self.data_version.subscribe(notified.append)
+        text = 'department,record_date,name,score\n' + '\n'.join(
+            f'后端开发部,2024-01,开发者{i},{80 + i}' for i in range(5)
+        )
+        
+        result = self._ingest('developer_rankings', text)
+        
+        self.assertEqual(result.rows_written, 5)
+        self.assertEqual(result.batches, 3)
+        self.assertEqual(notified, [1, 2, 3])
+        self.assertEqual(result.data_version, 3)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM developer_rankings').fetchone()[0], 5)
+    
+    def test_upsert_updates_existing_rows(self):
+        """Test that re-importing a key updates the row instead of duplicating it"""
+        self._ingest('metrics', 'department,record_date,requirement_throughput\n测试部,2024-02,100\n')
+        self._ingest('metrics', 'department,record_date,requirement_throughput\n测试部,2024-02,150\n')
+        
+        rows = self.conn.execute('SELECT requirement_throughput FROM metrics').fetchall()
+        self.assertEqual(rows, [(150,)])
+    
+    def test_invalid_rows_are_reported(self):
+        """Test that invalid rows are skipped with line numbers"""
+        text = (
+            'department,record_date,person_name,project_name,saturation\n'
+            '产品部,2024-03,张三,项目A,85.5\n'
+            '产品部,2024-3,李四,项目B,80\n'
+            '产品部,2024-03,,项目C,80\n'
+            '产品部,2024-03,王五,项目D,abc\n'
+        )
+        
+        result = self._ingest('project_details', text)
+        
+        self.assertEqual(result.rows_written, 1)
+        self.assertEqual(result.rows_rejected, 3)
+        self.assertEqual([error['line'] for error in result.errors], [3, 4, 5])
+    
+    def test_jsonl_ingest(self):
+        """Test JSONL input including malformed lines"""
+        text = (
+            '{"record_date": "2024-04", "name": "赵六", "score": 90, "work_saturation": 88.2}\n'
+            '\n'
+            '{not json}\n'
+            '["array"]\n'
+        )
+        
+        result = self._ingest('developer_rankings', text, data_format='jsonl')
+        
+        self.assertEqual(result.rows_written, 1)
+        self.assertEqual(result.rows_rejected, 2)
+        row = self.conn.execute('SELECT department, score, work_saturation FROM developer_rankings').fetchone()
+        self.assertEqual(row, ('全部部门', 90, 88.2))
+    
+    def test_csv_encoding_error_reports_partial_result(self):
+        """Test that a non-UTF-8 line stops the import with the rows already written"""
+        notified = []
+        self.data_version.subscribe(notified.append)
+        lines = ['\ufeffdepartment,record_date,name,score'] + [f'测试部,2024-01,开发者{i},{i}' for i in range(3)]
+        data = '\n'.join(lines).encode('utf-8') + '\n测试部,2024-01,开发者9,9\n'.encode('gbk')
+        records = self.ingestor.iter_records(io.BytesIO(data), 'csv')
+        
+        with self.assertRaises(InputEncodingError) as context:
+            self.ingestor.ingest(self.conn, 'developer_rankings', records)
+        
+        self.assertEqual(context.exception.line, 5)
+        self.assertEqual(context.exception.result.rows_written, 3)
+        self.assertEqual(context.exception.result.batches, 2)
+        self.assertEqual(notified, [1, 2])
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM developer_rankings').fetchone()[0], 3)
+    
+    def test_jsonl_encoding_error_rejects_line(self):
+        """Test that a non-UTF-8 JSON line is rejected like a malformed one"""
+        data = (
+            '{"record_date": "2024-04", "name": "赵六"}\n'.encode('utf-8')
+            + '{"record_date": "2024-04", "name": "钱七"}\n'.encode('gbk')
+            + '{"record_date": "2024-04", "name": "孙八"}\n'.encode('utf-8')
+        )
+        records = self.ingestor.iter_records(io.BytesIO(data), 'jsonl')
+        
+        result = self.ingestor.ingest(self.conn, 'developer_rankings', records)
+        
+        self.assertEqual(result.rows_written, 2)
+        self.assertEqual(result.errors, [{'line': 2, 'error': 'Line 2 is not valid UTF-8'}])
+    
+    def test_dry_run_does_not_write(self):
+        """Test that a dry run validates without writing or bumping the version"""
+        result = self._ingest('metrics', 'department,record_date\n测试部,2024-02\n', dry_run=True)
+        
+        self.assertEqual(result.rows_written, 1)
+        self.assertEqual(self.conn.execute('SELECT COUNT(*) FROM metrics').fetchone()[0], 0)
+        self.assertEqual(self.data_version.read(self.conn.cursor()), 0)
+    
+    def test_validate_record_types(self):
+        """Test type conversion and validation of single records"""
+        schema = TABLE_SCHEMAS['metrics']
+        row = dict(zip(schema.columns, self.ingestor.validate_record(schema, {
+            'department': '测试部', 'record_date': '2024-05', 'online_defects': '12', 'reopen_rate': '3.5'
+        })))
+        
+        self.assertEqual(row['online_defects'], 12)
+        self.assertEqual(row['reopen_rate'], 3.5)
+        self.assertIsNone(row['incident_count'])
+        
+        with self.assertRaises(RowValidationError):
+            self.ingestor.validate_record(schema, {'record_date': '2024-05', 'online_defects': '1.5'})
+        with self.assertRaises(RowValidationError):
+            self.ingestor.validate_record(schema, {'record_date': '2024-05', 'incident_count': '-1'})
+    
+    def _duplicated_database(self):
+        """Create tables holding duplicate and NULL keys, without upsert indexes"""
+        conn = sqlite3.connect(':memory:')
+        for schema in TABLE_SCHEMAS.values():
+            columns = ', '.join(f'{column} TEXT' for column in schema.columns)
+            conn.execute(f'CREATE TABLE {schema.name} (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns}, created_at TEXT)')
+        conn.executemany(
+            'INSERT INTO metrics (department, record_date, requirement_throughput) VALUES (?, ?, ?)',
+            [('A', '2024-01', '1'), ('A', '2024-01', '2'), ('B', '2024-01', '3'),
+             ('C', None, '4'), ('C', None, '5')]
+        )
+        return conn
+    
+    def test_create_indexes_keeps_duplicates(self):
+        """Test that duplicate keys block the index instead of being deleted"""
+        conn = self._duplicated_database()
+        
+        blocked = self.ingestor.create_indexes(conn.cursor())
+        
+        self.assertEqual(blocked, ['metrics'])
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM metrics').fetchone()[0], 5)
+        self.assertEqual(
+            self.ingestor.find_duplicates(conn.cursor(), 'metrics'),
+            {'table': 'metrics', 'duplicate_keys': 1, 'rows_to_delete': 1}
+        )
+        with self.assertRaises(DuplicateKeysError):
+            self.ingestor.ingest(conn, 'metrics', [(2, {'department': 'A', 'record_date': '2024-01'})])
+        conn.close()
+    
+    def test_remove_duplicates(self):
+        """Test that explicit deduplication keeps the newest row, backs up the rest and skips NULL keys"""
+        conn = self._duplicated_database()
+        
+        self.assertEqual(self.ingestor.remove_duplicates(conn.cursor(), 'metrics'), 1)
+        self.assertTrue(self.ingestor.ensure_upsert_index(conn.cursor(), 'metrics'))
+        
+        rows = conn.execute('SELECT department, requirement_throughput FROM metrics ORDER BY id').fetchall()
+        self.assertEqual(rows, [('A', '2'), ('B', '3'), ('C', '4'), ('C', '5')])
+        backup = conn.execute('SELECT department, requirement_throughput FROM metrics_duplicates').fetchall()
+        self.assertEqual(backup, [('A', '1')])
+        conn.close()
+    
+    def test_unsupported_table(self):
+        """Test that unknown tables are rejected"""
+        with self.assertRaises(ValueError):
+            self._ingest('settings', 'id\n1\n')
+    
+    def test_detect_format(self):
+        """Test input format detection"""
+        self.assertEqual(detect_format('CSV'), 'csv')
+        self.assertIsNone(detect_format('xml'))
+        self.assertEqual(detect_format(None, 'export.ndjson'), 'jsonl')
+        self.assertEqual(detect_format(None, None, 'text/csv'), 'csv')
+        self.assertIsNone(detect_format(None, 'export.txt', 'text/plain'))
+
+
+if __name__ == '__main__':
+    unittest.main()
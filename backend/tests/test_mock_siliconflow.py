@@ -0,0 +1,70 @@
+import unittest
+import json
+import os
+import random
+import sys
+
+import requests
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.mock_siliconflow import MockSiliconFlowServer, parse_latency, parse_error_rates, parse_token_range
+from services.siliconflow_client import SiliconFlowClient
+
+
+class TestMockSiliconFlow(unittest.TestCase):
+    
+    def test_parse_specs(self):
+        """Test latency, error rate and token range specs"""
+        rng = random.Random(1)
+        self.assertEqual(parse_latency('0.25')(rng), 0.25)
+        self.assertEqual(parse_latency(0.5)(rng), 0.5)
+        for _ in range(20):
+            self.assertTrue(1 <= parse_latency('uniform:1,2')(rng) <= 2)
+            self.assertGreaterEqual(parse_latency('normal:0,1')(rng), 0)
+        with self.assertRaises(ValueError):
+            parse_latency('lognormal:1')
+        self.assertEqual(parse_error_rates('429=0.05, 503=0.01'), {429: 0.05, 503: 0.01})
+        with self.assertRaises(ValueError):
+            parse_error_rates('429=0.8,503=0.5')
+        self.assertEqual(parse_token_range('200,800'), (200, 800))
+        self.assertEqual(parse_token_range(64), (64, 64))
+    
+    def test_error_injection(self):
+        """Test injected errors and the served statistics"""
+        with MockSiliconFlowServer(error_rates={429: 1.0}) as server:
+            response = requests.post(f'{server.base_url}/chat/completions', json={'messages': []}, timeout=5)
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('Retry-After', response.headers)
+            stats = requests.get(server.base_url.replace('/v1', '/mock/stats'), timeout=5).json()
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['statuses'], {'429': 1})
+        self.assertEqual(stats['in_flight'], 0)
+    
+    def test_streaming(self):
+        """Test stream requests are answered with SSE chunks ending in [DONE]"""
+        payload = {'model': 'm', 'messages': [{'role': 'user', 'content': 'hi'}], 'stream': True}
+        with MockSiliconFlowServer(completion_tokens=20, stream_chunk_chars=8) as server:
+            response = requests.post(f'{server.base_url}/chat/completions', json=payload, timeout=5)
+        events = [line[len('data: '):] for line in response.text.splitlines() if line.startswith('data: ')]
+        self.assertEqual(events[-1], '[DONE]')
+        chunks = [json.loads(event) for event in events[:-1]]
+        content = ''.join(chunk['choices'][0]['delta'].get('content', '') for chunk in chunks if chunk['choices'])
+        self.assertEqual(len(content), 40)
+        self.assertEqual(chunks[-1]['usage']['completion_tokens'], 20)
+    
+    def test_client_against_mock(self):
+        """Test the SiliconFlow client analyzes content through the mock"""
+        with MockSiliconFlowServer(completion_tokens=32, seed=7) as server:
+            client = SiliconFlowClient('test-key', base_url=server.base_url)
+            client.min_request_interval = 0
+            result = client.analyze_content('测试内容')
+        self.assertTrue(result.success)
+        self.assertIn('分析结果', result.content)
+        self.assertGreater(result.tokens_used, 32)
+        self.assertEqual(server.requests, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
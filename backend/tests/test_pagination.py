@@ -0,0 +1,143 @@
+import unittest
+import sqlite3
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.pagination import (
+    encode_cursor, decode_cursor, keyset_condition, nullable_keyset_condition, get_row_count
+)
+
+
+class TestPagination(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('CREATE TABLE items (id TEXT PRIMARY KEY, created_at TEXT)')
+        self.cursor.execute('CREATE INDEX idx_items_created ON items (created_at, id)')
+        # Several rows share a timestamp so the id tie breaker matters
+        rows = [(f'id-{i:02d}', f'2024-01-{1 + i // 3:02d} 10:00:00') for i in range(10)]
+        self.cursor.executemany('INSERT INTO items VALUES (?, ?)', rows)
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def _page(self, cursor, per_page=4):
+        """Fetch one keyset page"""
+        clause, params = keyset_condition('created_at', 'id', cursor)
+        self.cursor.execute(f'''
+            SELECT id, created_at FROM items
+            WHERE {clause}
+            ORDER BY created_at DESC, id DESC
+            LIMIT ?
+        ''', params + [per_page])
+        return self.cursor.fetchall()
+    
+    def test_cursor_round_trip(self):
+        """Test encoding and decoding a cursor"""
+        cursor = encode_cursor('2024-01-01 10:00:00.123456', 'abc-123')
+        
+        self.assertEqual(decode_cursor(cursor), ('2024-01-01 10:00:00.123456', 'abc-123'))
+    
+    def test_decode_invalid_cursor(self):
+        """Test that malformed cursors raise ValueError"""
+        with self.assertRaises(ValueError):
+            decode_cursor('not-a-cursor!')
+        
+        with self.assertRaises(ValueError):
+            decode_cursor(encode_cursor('a', 'b')[:-3] + 'xyz')
+    
+    def test_keyset_pages_match_offset_pages(self):
+        """Test that walking cursors yields the same rows as OFFSET pagination"""
+        self.cursor.execute('SELECT id, created_at FROM items ORDER BY created_at DESC, id DESC')
+        expected = self.cursor.fetchall()
+        
+        seen = []
+        cursor = None
+        while True:
+            page = self._page(cursor)
+            if not page:
+                break
+            seen.extend(page)
+            cursor = encode_cursor(page[-1][1], page[-1][0])
+        
+        self.assertEqual(seen, expected)
+    
+    def test_keyset_condition_first_page(self):
+        """Test that no cursor yields an always-true condition"""
+        self.assertEqual(keyset_condition('created_at', 'id', None), ('1=1', []))
+    
+    def test_ranking_keyset_walks_grouped_ranking(self):
+        """Test ranking keyset pages over averages with NULLs and ties in both directions"""
+        self.cursor.execute('CREATE TABLE scores (name TEXT, value REAL)')
+        self.cursor.executemany('INSERT INTO scores VALUES (?, ?)', [
+            ('a', 1), ('a', 3), ('b', 2), ('c', None), ('d', 2), ('e', None), ('f', 5), ('g', 2)
+        ])
+        
+        for direction in ('DESC', 'ASC'):
+            query = f'''
+                SELECT name, AVG(value) AS avg_value FROM scores
+                GROUP BY name HAVING {{}}
+                ORDER BY avg_value {direction}, name
+            '''
+            self.cursor.execute(query.format('1=1'))
+            expected = self.cursor.fetchall()
+            
+            seen = []
+            after = None
+            while True:
+                clause, params = nullable_keyset_condition('avg_value', 'name', after, direction == 'DESC')
+                self.cursor.execute(query.format(clause) + ' LIMIT 2', params)
+                page = self.cursor.fetchall()
+                if not page:
+                    break
+                seen.extend(page)
+                after = (page[-1][1], page[-1][0])
+            
+            self.assertEqual(seen, expected)
+    
+    def test_nullable_keyset_with_descending_tie_breaker(self):
+        """Test keyset pages over a nullable column with the id tie breaker in the same direction"""
+        self.cursor.execute('CREATE TABLE details (id INTEGER PRIMARY KEY, saturation REAL)')
+        self.cursor.executemany('INSERT INTO details VALUES (?, ?)', [
+            (1, 80.0), (2, None), (3, 80.0), (4, 95.5), (5, None), (6, 60.0), (7, 80.0)
+        ])
+        
+        for direction in ('DESC', 'ASC'):
+            descending = direction == 'DESC'
+            query = f'SELECT saturation, id FROM details WHERE {{}} ORDER BY saturation {direction}, id {direction}'
+            self.cursor.execute(query.format('1=1'))
+            expected = self.cursor.fetchall()
+            
+            seen = []
+            after = None
+            while True:
+                clause, params = nullable_keyset_condition('saturation', 'id', after, descending,
+                                                           tie_descending=descending)
+                self.cursor.execute(query.format(clause) + ' LIMIT 3', params)
+                page = self.cursor.fetchall()
+                if not page:
+                    break
+                seen.extend(page)
+                after = page[-1]
+            
+            self.assertEqual(seen, expected)
+    
+    def test_get_row_count(self):
+        """Test reading maintained row counts"""
+        self.assertIsNone(get_row_count(self.cursor, 'items'))
+        
+        self.cursor.execute('CREATE TABLE ai_row_counts (counter_key TEXT PRIMARY KEY, row_count INTEGER)')
+        self.cursor.execute("INSERT INTO ai_row_counts VALUES ('items', 10)")
+        
+        self.assertEqual(get_row_count(self.cursor, 'items'), 10)
+        self.assertEqual(get_row_count(self.cursor, 'missing'), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
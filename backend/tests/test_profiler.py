@@ -0,0 +1,100 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.profiler import SamplingProfiler, CallProfiler
+
+
+def busy_loop(stop):
+    total = 0
+    while not stop.is_set():
+        total += sum(range(200))
+    return total
+
+
+class TestSamplingProfiler(unittest.TestCase):
+    
+    def test_samples_busy_thread(self):
+        """Test a busy thread shows up in the collapsed stacks"""
+        stop = threading.Event()
+        worker = threading.Thread(target=busy_loop, args=(stop,), name='busy worker')
+        worker.start()
+        try:
+            profiler = SamplingProfiler(interval=0.002).run(0.2)
+        finally:
+            stop.set()
+            worker.join()
+        
+        self.assertGreater(profiler.samples, 10)
+        lines = profiler.collapsed().splitlines()
+        busy = [line for line in lines if line.startswith('busy_worker;')]
+        self.assertTrue(busy)
+        stack, count = busy[0].rsplit(' ', 1)
+        self.assertIn('test_profiler.py:busy_loop', stack.split(';'))
+        self.assertGreater(int(count), 0)
+        # The thread waiting in run() is idle and the sampler skips itself
+        self.assertFalse(any('sampling-profiler' in line for line in lines))
+    
+    def test_idle_threads_excluded(self):
+        """Test threads blocked on a wait are only counted with include_idle"""
+        stop = threading.Event()
+        waiter = threading.Thread(target=stop.wait, name='waiter')
+        waiter.start()
+        try:
+            quiet = SamplingProfiler(interval=0.002).run(0.05)
+            everything = SamplingProfiler(interval=0.002, include_idle=True).run(0.05)
+        finally:
+            stop.set()
+            waiter.join()
+        
+        self.assertFalse(any(stack.startswith('waiter;') for stack in quiet.stacks))
+        self.assertTrue(any(stack.startswith('waiter;') for stack in everything.stacks))
+
+
+class TestCallProfiler(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.profiler = CallProfiler(os.path.join(self.temp_dir.name, 'profiles'), keep=2)
+    
+    def tearDown(self):
+        self.temp_dir.cleanup()
+    
+    def test_profile_and_report(self):
+        """Test a profiled call returns its value and a readable report"""
+        result, profile_id = self.profiler.profile('upload', lambda: sorted(range(1000), reverse=True)[0])
+        self.assertEqual(result, 999)
+        self.assertTrue(profile_id.startswith('upload-'))
+        self.assertTrue(os.path.exists(self.profiler.path(profile_id)))
+        self.assertIn('sorted', self.profiler.report(profile_id))
+    
+    def test_keeps_recent_profiles(self):
+        """Test old profiles are pruned"""
+        ids = [self.profiler.profile('call', lambda: None)[1] for _ in range(3)]
+        self.assertEqual(len(self.profiler.list_profiles()), 2)
+        self.assertNotIn(ids[0], self.profiler.list_profiles())
+    
+    def test_concurrent_call_unprofiled(self):
+        """Test a call made while another is profiled runs without profiling"""
+        inner = []
+        
+        def outer():
+            inner.append(self.profiler.profile('inner', lambda: 'value'))
+        
+        self.profiler.profile('outer', outer)
+        self.assertEqual(inner, [('value', None)])
+    
+    def test_rejects_path_ids(self):
+        """Test profile ids cannot point outside the output directory"""
+        for profile_id in ('../secret', '', '.hidden', 'a/b'):
+            with self.assertRaises(ValueError):
+                self.profiler.path(profile_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+import unittest
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.prompt_templates import PromptTemplateRegistry, CompiledTemplate, DEFAULT_TEMPLATES
+
+
+class TestCompiledTemplate(unittest.TestCase):
+    
+    def test_render_substitutes_variables(self):
+        """Test variables are substituted and single braces are kept"""
+        template = CompiledTemplate.compile('t', 1, 'T', '分析《{{ filename }}》中的{{topic}}，输出 {"risk": ...}；{{topic}}优先')
+        
+        self.assertEqual(template.variables, ['filename', 'topic'])
+        self.assertEqual(
+            template.render({'filename': 'spec.md', 'topic': '风险'}),
+            '分析《spec.md》中的风险，输出 {"risk": ...}；风险优先'
+        )
+    
+    def test_render_missing_variable(self):
+        """Test rendering fails when a variable has no value"""
+        template = CompiledTemplate.compile('t', 1, 'T', '{{a}} and {{b}}')
+        with self.assertRaisesRegex(ValueError, 'b'):
+            template.render({'a': 1})
+    
+    def test_options(self):
+        """Test only the parameters set on the template are overridden"""
+        self.assertEqual(CompiledTemplate.compile('t', 1, 'T', 'x', temperature=0.2).options, {'temperature': 0.2})
+        self.assertEqual(CompiledTemplate.compile('t', 1, 'T', 'x').options, {})
+
+
+class TestPromptTemplateRegistry(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.conn = sqlite3.connect(os.path.join(self.temp_dir, 'test.db'))
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_results (
+                id TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                analysis_text TEXT NOT NULL,
+                text_encoding TEXT,
+                analysis_json TEXT,
+                processing_time REAL,
+                created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        self.registry = PromptTemplateRegistry()
+        self.registry.create_tables(self.cursor)
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+        shutil.rmtree(self.temp_dir)
+    
+    def test_seed_defaults_once(self):
+        """Test the standard templates are inserted once and edits survive reseeding"""
+        self.assertEqual(self.registry.seed_defaults(self.cursor), len(DEFAULT_TEMPLATES))
+        self.registry.save(self.cursor, 'risk-review', '风险评审', '新的正文')
+        
+        self.assertEqual(self.registry.seed_defaults(self.cursor), 0)
+        self.assertEqual(self.registry.get(self.cursor, 'risk-review').body, '新的正文')
+        self.assertEqual(len(self.registry.list_templates(self.cursor)), len(DEFAULT_TEMPLATES))
+    
+    def test_versions(self):
+        """Test body and parameter changes add versions while metadata changes do not"""
+        first = self.registry.save(self.cursor, 'review', 'Review', 'Review {{filename}}', max_tokens=1000)
+        same = self.registry.save(self.cursor, 'review', 'Renamed', 'Review {{filename}}', max_tokens=1000)
+        changed = self.registry.save(self.cursor, 'review', 'Renamed', 'Review {{filename}}', max_tokens=2000)
+        
+        self.assertEqual((first.version, same.version, changed.version), (1, 1, 2))
+        self.assertEqual(same.name, 'Renamed')
+        self.assertEqual(self.registry.get(self.cursor, 'review', 1).max_tokens, 1000)
+        self.assertEqual([v['version'] for v in self.registry.list_versions(self.cursor, 'review')], [2, 1])
+    
+    def test_new_version_seen_by_other_registry(self):
+        """Test a cached template is not served after another process saved a new version"""
+        other = PromptTemplateRegistry()
+        self.registry.save(self.cursor, 'review', 'Review', 'v1')
+        self.assertEqual(other.get(self.cursor, 'review').body, 'v1')
+        
+        self.registry.save(self.cursor, 'review', 'Review', 'v2')
+        self.assertEqual(other.get(self.cursor, 'review').body, 'v2')
+    
+    def test_validation(self):
+        """Test invalid definitions are rejected"""
+        invalid = [
+            ('Bad Id', 'Name', 'body', {}),
+            ('ok', '', 'body', {}),
+            ('ok', 'Name', 'x' * 20001, {}),
+            ('ok', 'Name', 'broken {{ 1x }}', {}),
+            ('ok', 'Name', 'body', {'max_tokens': 0}),
+            ('ok', 'Name', 'body', {'temperature': 3})
+        ]
+        for template_id, name, body, options in invalid:
+            with self.assertRaises(ValueError):
+                self.registry.save(self.cursor, template_id, name, body, **options)
+        self.assertIsNone(self.registry.get(self.cursor, 'ok'))
+    
+    def test_result_reuse(self):
+        """Test results are found by key and keys change with template version, prompt and model"""
+        template = self.registry.save(self.cursor, 'review', 'Review', 'Review {{filename}}')
+        key = self.registry.result_key('digest', template, 'Review a.md', 'model-a')
+        self.cursor.execute('''
+            INSERT INTO ai_analysis_results (id, file_id, analysis_text, text_encoding, processing_time,
+                                             template_id, template_version, result_key)
+            VALUES ('r1', 'f1', 'stored', 'plain', 1.5, 'review', 1, ?)
+        ''', (key,))
+        
+        self.assertEqual(self.registry.find_result(self.cursor, key)['id'], 'r1')
+        newer = self.registry.save(self.cursor, 'review', 'Review', 'Check {{filename}}')
+        other_keys = [
+            self.registry.result_key('digest', newer, 'Review a.md', 'model-a'),
+            self.registry.result_key('digest', template, 'Review b.md', 'model-a'),
+            self.registry.result_key('digest', template, 'Review a.md', 'model-b'),
+            self.registry.result_key('digest', template, 'Review a.md', 'model-a', 'incremental'),
+            self.registry.result_key('other', template, 'Review a.md', 'model-a')
+        ]
+        self.assertNotIn(key, other_keys)
+        self.assertIsNone(self.registry.find_result(self.cursor, other_keys[0]))
+    
+    def test_delete(self):
+        """Test deleting a template removes it and its versions"""
+        self.registry.save(self.cursor, 'review', 'Review', 'v1')
+        self.assertTrue(self.registry.delete(self.cursor, 'review'))
+        self.assertFalse(self.registry.delete(self.cursor, 'review'))
+        self.assertIsNone(self.registry.get(self.cursor, 'review'))
+        self.assertEqual(self.registry.list_versions(self.cursor, 'review'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.ranking_cache import RankingCache
+from services.data_version import DataVersion
+
+
+class TestRankingCache(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.data_version = DataVersion()
+        self.cache = RankingCache(self.data_version, max_entries=2)
+    
+    def test_hit_requires_same_version(self):
+        """Test that entries are only returned for the version they were computed at"""
+        self.cache.put(('score', 'DESC'), 3, [('张三', 90)])
+        
+        self.assertEqual(self.cache.get(('score', 'DESC'), 3), [('张三', 90)])
+        self.assertIsNone(self.cache.get(('score', 'DESC'), 4))
+        self.assertIsNone(self.cache.get(('score', 'ASC'), 3))
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 2))
+    
+    def test_least_recently_used_evicted(self):
+        """Test LRU eviction at max_entries"""
+        self.cache.put('a', 1, [])
+        self.cache.put('b', 1, [])
+        self.cache.get('a', 1)
+        self.cache.put('c', 1, [])
+        
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNotNone(self.cache.get('a', 1))
+        self.assertIsNone(self.cache.get('b', 1))
+    
+    def test_cleared_on_data_change(self):
+        """Test that a data version notification clears the cache"""
+        self.cache.put('a', 1, [])
+        
+        self.data_version.notify(2)
+        
+        self.assertEqual(len(self.cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -180,6 +180,27 @@ class TestReportGenerator(unittest.TestCase):
         self.assertIn('summary', summary_output)
         self.assertTrue(len(summary_output['summary']) > 0)
     
+    def test_structured_report(self):
+        """Test structured analyses supply the summary and sections without text scanning"""
+        structured = {
+            'summary': '结构化摘要',
+            'key_points': ['要点一'],
+            'risks': [{'description': '<进度>风险', 'severity': '高', 'mitigation': '增加人手'}],
+            'recommendations': ['建议一']
+        }
+        analysis = AnalysisResult(success=True, content="## 摘要\n\n结构化摘要", structured=structured)
+        report = self.generator.generate_report(analysis, self.file_metadata, "test-structured")
+        
+        summary_output = self.generator.format_summary_report(report)
+        self.assertEqual(summary_output['summary'], '结构化摘要')
+        self.assertEqual(summary_output['risks'], structured['risks'])
+        self.assertEqual(self.generator.summarize("任意文本内容", structured), '结构化摘要')
+        
+        html_output = self.generator.format_html_report(report)
+        self.assertIn('risk-high', html_output)
+        self.assertIn('&lt;进度&gt;风险', html_output)
+        self.assertIn('<li>建议一</li>', html_output)
+    
     def test_extract_summary_short_content(self):
         """Test summary extraction from short content"""
         short_content = "这是一个简短的分析结果。"
@@ -0,0 +1,79 @@
+import unittest
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.request_metrics import MetricsRegistry, Histogram
+
+
+class TestRequestMetrics(unittest.TestCase):
+    
+    def setUp(self):
+        self.registry = MetricsRegistry()
+    
+    def test_counter_render(self):
+        """Test counters render with a _total suffix and escaped labels"""
+        counter = self.registry.counter('errors', 'Error count', ('route',))
+        counter.inc(route='/api/a')
+        counter.inc(2, route='/api/"b"')
+        
+        self.assertEqual(counter.value(route='/api/a'), 1)
+        text = self.registry.render()
+        self.assertIn('# TYPE errors counter', text)
+        self.assertIn('errors_total{route="/api/a"} 1', text)
+        self.assertIn('errors_total{route="/api/\\"b\\""} 2', text)
+        
+        with self.assertRaises(ValueError):
+            counter.inc(-1, route='/api/a')
+    
+    def test_gauge(self):
+        """Test gauge increments, decrements and sets"""
+        gauge = self.registry.gauge('in_flight', 'Requests in flight', ('route',))
+        gauge.inc(route='/')
+        gauge.inc(route='/')
+        gauge.dec(route='/')
+        self.assertEqual(gauge.value(route='/'), 1)
+        gauge.set(5, route='/')
+        self.assertIn('in_flight{route="/"} 5', self.registry.render())
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Test bucket boundaries are inclusive and counts cumulative"""
+        histogram = self.registry.histogram('latency_seconds', 'Latency', ('stage',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, stage='extract')
+        
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{stage="extract",le="0.1"} 2', text)
+        self.assertIn('latency_seconds_bucket{stage="extract",le="1"} 3', text)
+        self.assertIn('latency_seconds_bucket{stage="extract",le="+Inf"} 4', text)
+        self.assertIn('latency_seconds_count{stage="extract"} 4', text)
+        self.assertAlmostEqual(histogram.sum(stage='extract'), 3.65)
+    
+    def test_histogram_time_records_on_exception(self):
+        """Test the timer context manager observes even when the block raises"""
+        histogram = Histogram('stage_seconds', 'Stage latency', ('stage',))
+        with self.assertRaises(RuntimeError):
+            with histogram.time(stage='ai_call'):
+                raise RuntimeError('boom')
+        self.assertEqual(histogram.count(stage='ai_call'), 1)
+    
+    def test_labels_must_match(self):
+        """Test missing or extra labels are rejected"""
+        counter = self.registry.counter('requests', 'Requests', ('method', 'route'))
+        with self.assertRaises(ValueError):
+            counter.inc(method='GET')
+        with self.assertRaises(ValueError):
+            self.registry.histogram('bad', 'Bad', ('le',))
+    
+    def test_register_returns_existing(self):
+        """Test registering a name twice returns the same metric unless the type differs"""
+        first = self.registry.counter('uploads', 'Uploads')
+        self.assertIs(self.registry.counter('uploads', 'Uploads'), first)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('uploads', 'Uploads')
+
+
+if __name__ == '__main__':
+    unittest.main()
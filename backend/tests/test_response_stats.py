@@ -0,0 +1,40 @@
+import unittest
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.response_stats import ResponseStats
+
+
+class TestResponseStats(unittest.TestCase):
+    
+    def test_record_and_snapshot(self):
+        """Test per-endpoint aggregation of sizes, timings and encodings"""
+        stats = ResponseStats()
+        stats.record('get_details', 10000, 2000, serialize_time=0.004, compress_time=0.001, encoding='gzip')
+        stats.record('get_details', 6000, 6000, serialize_time=0.002)
+        stats.record('get_details', 30000, 3000, encoding='gzip', streamed=True)
+        stats.record('export_dashboard_table', None, None, streamed=True)
+        stats.record('get_metrics', 300, 300)
+        
+        snapshot = stats.snapshot()
+        
+        details = snapshot['get_details']
+        self.assertEqual(details['requests'], 3)
+        self.assertEqual(details['streamed'], 1)
+        self.assertEqual((details['rawBytes'], details['wireBytes']), (46000, 11000))
+        self.assertEqual(details['avgWireBytes'], 3667)
+        self.assertEqual(details['compressionRatio'], 0.239)
+        self.assertEqual(details['serializeMs'], 6.0)
+        self.assertEqual(details['encodings'], {'gzip': 2, 'identity': 1})
+        self.assertEqual(snapshot['export_dashboard_table']['wireBytes'], 0)
+        self.assertEqual(list(snapshot), ['export_dashboard_table', 'get_details', 'get_metrics'])
+        
+        stats.reset()
+        self.assertEqual(stats.snapshot(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+import unittest
+import sqlite3
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.search_index import SearchIndex, SearchTimeoutError
+from services.analysis_storage import AnalysisStorage, register_functions
+
+
+class TestSearchIndex(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        register_functions(self.conn)
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_files (
+                id TEXT PRIMARY KEY,
+                filename TEXT NOT NULL,
+                file_type TEXT NOT NULL,
+                file_size INTEGER NOT NULL
+            )
+        ''')
+        self.cursor.execute('''
+            CREATE TABLE ai_analysis_results (
+                id TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                analysis_text TEXT NOT NULL,
+                prompt_used TEXT,
+                processing_time REAL,
+                created_at DATETIME
+            )
+        ''')
+        self.storage = AnalysisStorage(compression_threshold=64)
+        self.storage.create_tables(self.cursor)
+        self.index = SearchIndex()
+        self.assertTrue(self.index.create(self.cursor))
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def _add(self, result_id, filename, text, prompt='请分析', created_at='2024-01-01 10:00:00'):
+        """Insert a file and its analysis result the way the upload endpoint does"""
+        file_id = f'file-{result_id}'
+        self.cursor.execute('INSERT INTO ai_analysis_files VALUES (?, ?, ?, ?)', (file_id, filename, 'md', 100))
+        stored_text, encoding = self.storage.encode_text(text)
+        self.cursor.execute('''
+            INSERT INTO ai_analysis_results (id, file_id, analysis_text, text_encoding, prompt_id,
+                                             processing_time, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (result_id, file_id, stored_text, encoding, self.storage.intern_prompt(self.cursor, prompt),
+              1.0, created_at))
+    
+    def test_trigger_indexes_new_results(self):
+        """Test that inserted results are searchable"""
+        self._add('r1', '登录需求.md', '登录模块存在性能风险，建议增加缓存')
+        
+        result = self.index.search(self.conn, '性能风险')
+        
+        self.assertEqual(result['mode'], 'fts')
+        self.assertEqual([item['id'] for item in result['items']], ['r1'])
+        self.assertIn('<mark>性能风险</mark>', result['items'][0]['snippet'])
+    
+    def test_search_filename_and_prompt(self):
+        """Test that the filename and the interned prompt are searchable"""
+        self._add('r1', 'quarterly-report.pdf', 'content', prompt='risk review template')
+        
+        self.assertEqual(len(self.index.search(self.conn, 'quarterly')['items']), 1)
+        result = self.index.search(self.conn, 'review')
+        self.assertEqual(result['mode'], 'fts')
+        self.assertEqual([item['id'] for item in result['items']], ['r1'])
+    
+    def test_scan_finds_prompt_only_terms(self):
+        """Test that the substring scan matches words that only appear in the prompt"""
+        self._add('r1', 'a.md', '本文档描述了需求范围', prompt='请重点关注安全风险')
+        # Legacy row with its prompt stored inline
+        self.cursor.execute("INSERT INTO ai_analysis_files VALUES ('file-r2', 'b.md', 'md', 100)")
+        self.cursor.execute(
+            "INSERT INTO ai_analysis_results (id, file_id, analysis_text, text_encoding, prompt_used) "
+            "VALUES ('r2', 'file-r2', '其他内容', 'plain', '旧版安全提示词')"
+        )
+        
+        result = self.index.search(self.conn, '安全')
+        
+        self.assertEqual(result['mode'], 'scan')
+        self.assertEqual(sorted(item['id'] for item in result['items']), ['r1', 'r2'])
+        self.index.check(self.cursor)
+    
+    def test_trigger_removes_deleted_results(self):
+        """Test that deleted results disappear from the index"""
+        self._add('r1', 'a.md', 'database migration plan')
+        self.cursor.execute("DELETE FROM ai_analysis_results WHERE id = 'r1'")
+        
+        self.assertEqual(self.index.search(self.conn, 'migration')['items'], [])
+        self.index.check(self.cursor)
+    
+    def test_triggers_follow_updates(self):
+        """Test that text, filename and file deletions keep the index consistent"""
+        self._add('r1', 'draft.md', 'original wording')
+        self._add('r2', 'other.md', 'second analysis')
+        
+        stored_text, encoding = self.storage.encode_text('revised wording ' * 10)
+        self.cursor.execute("UPDATE ai_analysis_results SET analysis_text = ?, text_encoding = ? WHERE id = 'r1'",
+                            (stored_text, encoding))
+        self.cursor.execute("UPDATE ai_analysis_files SET filename = 'final.md' WHERE id = 'file-r1'")
+        # Files deleted before their results
+        self.cursor.execute("DELETE FROM ai_analysis_files WHERE id = 'file-r2'")
+        self.cursor.execute("DELETE FROM ai_analysis_results WHERE id = 'r2'")
+        
+        self.index.check(self.cursor)
+        self.assertEqual(self.index.search(self.conn, 'original')['items'], [])
+        self.assertEqual(len(self.index.search(self.conn, 'revised')['items']), 1)
+        self.assertEqual(len(self.index.search(self.conn, 'final.md')['items']), 1)
+        self.assertEqual(self.index.search(self.conn, 'draft')['items'], [])
+        self.assertEqual(self.index.search(self.conn, 'second')['items'], [])
+    
+    def test_writes_require_decompress_function(self):
+        """Test that writers without the SQL function fail instead of leaving the index stale"""
+        self._add('r1', 'a.md', 'indexed text')
+        self.conn.create_function('decompress_text', 2, None)
+        
+        with self.assertRaises(sqlite3.OperationalError):
+            self.cursor.execute("DELETE FROM ai_analysis_results WHERE id = 'r1'")
+    
+    def test_ranking_prefers_more_matches(self):
+        """Test that results are ordered by relevance"""
+        self._add('r1', 'a.md', 'cache ' + 'filler text ' * 50)
+        self._add('r2', 'b.md', 'cache cache cache invalidation cache')
+        self._add('r3', 'c.md', 'unrelated content')
+        
+        items = self.index.search(self.conn, 'cache')['items']
+        
+        self.assertEqual([item['id'] for item in items], ['r2', 'r1'])
+    
+    def test_short_terms_use_scan(self):
+        """Test that terms shorter than a trigram fall back to a substring scan"""
+        self._add('r1', 'a.md', '本文档描述了需求范围')
+        
+        result = self.index.search(self.conn, '需求')
+        
+        self.assertEqual(result['mode'], 'scan')
+        self.assertIn('<mark>需求</mark>', result['items'][0]['snippet'])
+    
+    def test_unavailable_index_uses_scan(self):
+        """Test that searches without FTS5 scan instead of querying the missing table"""
+        self._add('r1', 'a.md', 'capacity planning notes')
+        self.cursor.execute('DROP TABLE ai_analysis_fts')
+        self.index.available = False
+        
+        result = self.index.search(self.conn, 'capacity planning')
+        
+        self.assertEqual(result['mode'], 'scan')
+        self.assertEqual([item['id'] for item in result['items']], ['r1'])
+        self.assertIn('<mark>capacity</mark>', result['items'][0]['snippet'])
+    
+    def test_snippet_is_html_escaped(self):
+        """Test that snippets cannot inject markup"""
+        self._add('r1', 'a.md', '<script>alert(1)</script> security finding')
+        
+        snippet = self.index.search(self.conn, 'security')['items'][0]['snippet']
+        
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('&lt;/script&gt;', snippet)
+    
+    def test_fts_operators_are_literal(self):
+        """Test that FTS5 syntax in user input does not raise"""
+        self._add('r1', 'a.md', 'plain text')
+        
+        result = self.index.search(self.conn, 'NEAR( "abc OR')
+        
+        self.assertEqual(result['items'], [])
+    
+    def test_rebuild_on_create_backfills(self):
+        """Test that creating the index backfills existing rows"""
+        self._add('r1', 'a.md', 'existing analysis')
+        self.cursor.execute('DROP TABLE ai_analysis_fts')
+        
+        self.index.create(self.cursor)
+        
+        self.assertEqual(len(self.index.search(self.conn, 'existing')['items']), 1)
+    
+    def test_index_stores_no_text_copy(self):
+        """Test that compressed rows are searchable without a plain-text copy in the index"""
+        self._add('r1', 'a.md', '压缩存储的分析正文' * 20)
+        self.cursor.execute("SELECT text_encoding FROM ai_analysis_results WHERE id = 'r1'")
+        self.assertNotEqual(self.cursor.fetchone()[0], 'plain')
+        
+        self.index.rebuild(self.cursor)
+        
+        self.assertEqual(len(self.index.search(self.conn, '分析正文')['items']), 1)
+        self.cursor.execute("SELECT name FROM sqlite_master WHERE name = 'ai_analysis_fts_content'")
+        self.assertIsNone(self.cursor.fetchone())
+    
+    def test_earlier_layout_is_replaced(self):
+        """Test that an index holding its own text copy is recreated"""
+        self._add('r1', 'a.md', 'existing analysis')
+        self.cursor.execute('DROP TABLE ai_analysis_fts')
+        self.cursor.execute('DROP VIEW ai_analysis_fts_source')
+        self.cursor.execute("CREATE VIRTUAL TABLE ai_analysis_fts USING fts5(analysis_text, prompt_used, "
+                            "filename, result_id UNINDEXED, tokenize = 'trigram')")
+        
+        self.index.create(self.cursor)
+        
+        self.cursor.execute("SELECT sql FROM sqlite_master WHERE name = 'ai_analysis_fts'")
+        self.assertIn('content', self.cursor.fetchone()[0])
+        self.assertEqual(len(self.index.search(self.conn, 'existing')['items']), 1)
+    
+    def test_layout_without_prompt_is_replaced(self):
+        """Test that an index created without the prompt column is recreated"""
+        self._add('r1', 'a.md', 'existing analysis', prompt='compliance checklist')
+        self.cursor.execute('DROP TABLE ai_analysis_fts')
+        self.cursor.execute('DROP VIEW ai_analysis_fts_source')
+        self.cursor.execute('''
+            CREATE VIEW ai_analysis_fts_source AS
+            SELECT r.rowid AS result_rowid, r.analysis_text AS analysis_text, f.filename AS filename
+            FROM ai_analysis_results r LEFT JOIN ai_analysis_files f ON f.id = r.file_id
+        ''')
+        self.cursor.execute("CREATE VIRTUAL TABLE ai_analysis_fts USING fts5(analysis_text, filename, "
+                            "content = 'ai_analysis_fts_source', content_rowid = 'result_rowid', "
+                            "tokenize = 'trigram')")
+        
+        self.index.create(self.cursor)
+        
+        self.assertEqual(len(self.index.search(self.conn, 'compliance')['items']), 1)
+        self.cursor.execute("UPDATE ai_analysis_results SET prompt_id = NULL, prompt_used = 'audit notes' "
+                            "WHERE id = 'r1'")
+        self.index.check(self.cursor)
+        self.assertEqual(self.index.search(self.conn, 'compliance')['items'], [])
+        self.assertEqual(len(self.index.search(self.conn, 'audit')['items']), 1)
+    
+    def test_merge_step(self):
+        """Test that incremental merge steps run to completion"""
+        for i in range(50):
+            self._add(f'r{i}', f'{i}.md', f'document number {i} text')
+        
+        steps = 0
+        while self.index.merge(self.cursor, pages=16) and steps < 100:
+            steps += 1
+        
+        self.assertLess(steps, 100)
+        self.assertEqual(len(self.index.search(self.conn, 'document', limit=100)['items']), 50)
+    
+    def test_time_budget(self):
+        """Test that searches exceeding the time budget are interrupted"""
+        for i in range(3000):
+            self._add(f'r{i}', f'{i}.md', 'lorem ipsum ' * 20)
+        self.index.time_budget = -1
+        
+        with self.assertRaises(SearchTimeoutError):
+            self.index.search(self.conn, 'zz')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.mock_siliconflow import MockSiliconFlowServer
+from services.config_manager import ConfigManager
+from services.siliconflow_client import SiliconFlowClient
+
+CONCURRENT_REQUESTS = 200
+
+
+class TestSiliconFlowClientConcurrency(unittest.TestCase):
+    """Stress tests of one shared client used by many threads"""
+    
+    def test_concurrent_analyses(self):
+        """Test hundreds of concurrent analyses all succeed and are all counted"""
+        with MockSiliconFlowServer(latency=0.05, completion_tokens=32) as server:
+            client = SiliconFlowClient('test-key', base_url=server.base_url)
+            client.min_request_interval = 0
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=50) as executor:
+                results = list(executor.map(
+                    lambda index: client.analyze_content(f'文档 {index}'), range(CONCURRENT_REQUESTS)
+                ))
+            elapsed = time.perf_counter() - start
+            served = server.get_stats()
+        
+        self.assertTrue(all(result.success for result in results))
+        self.assertEqual(served['requests'], CONCURRENT_REQUESTS)
+        self.assertEqual(client.get_usage_stats()['requests'], CONCURRENT_REQUESTS)
+        # 200 calls of 50 ms run serially would take 10 s
+        self.assertLess(elapsed, 5.0)
+        self.assertGreater(served['max_in_flight'], 10)
+    
+    def test_rate_limit_spaces_concurrent_requests(self):
+        """Test concurrent callers get distinct start slots at the minimum interval"""
+        client = SiliconFlowClient('test-key')
+        client.min_request_interval = 0.005
+        starts = []
+        lock = threading.Lock()
+        
+        def request(_):
+            client._enforce_rate_limit()
+            with lock:
+                starts.append(time.time())
+        
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            list(executor.map(request, range(64)))
+        
+        starts.sort()
+        self.assertGreaterEqual(starts[-1] - starts[0], 63 * 0.005 * 0.9)
+    
+    def test_sessions_are_per_thread(self):
+        """Test each thread gets its own HTTP session"""
+        client = SiliconFlowClient('test-key')
+        barrier = threading.Barrier(8)
+        
+        def session_id(_):
+            barrier.wait()
+            session = client._session()
+            self.assertIs(client._session(), session)
+            return id(session)
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            sessions = set(executor.map(session_id, range(8)))
+        self.assertEqual(len(sessions), 8)
+
+
+class TestConfigManagerConcurrency(unittest.TestCase):
+    
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.temp_dir, 'config.json')
+        self._write_config(0)
+        self.config_manager = ConfigManager(self.config_file, os.path.join(self.temp_dir, 'test.db'))
+    
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+    
+    def _write_config(self, generation):
+        config = {'siliconflow': {'model': f'model-{generation}', 'max_tokens': generation}}
+        path = self.config_file + '.tmp'
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(config, f)
+        os.replace(path, self.config_file)
+    
+    def test_readers_see_consistent_snapshots(self):
+        """Test readers never see a mix of two configurations while reloads happen"""
+        stop = threading.Event()
+        errors = []
+        
+        def read():
+            while not stop.is_set():
+                config = self.config_manager.get_siliconflow_config()
+                if config['model'] != f"model-{config['max_tokens']}":
+                    errors.append(config)
+                # Returned sections are private copies
+                config['model'] = 'changed'
+        
+        readers = [threading.Thread(target=read) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+        for generation in range(1, 21):
+            self._write_config(generation)
+            self.config_manager.reload()
+        stop.set()
+        for reader in readers:
+            reader.join()
+        
+        self.assertEqual(errors, [])
+        self.assertEqual(self.config_manager.get_siliconflow_config()['model'], 'model-20')
+    
+    def test_snapshot_is_read_only(self):
+        """Test the shared snapshot cannot be modified"""
+        snapshot = self.config_manager._load_config_file()
+        with self.assertRaises(TypeError):
+            snapshot['siliconflow']['model'] = 'other'
+    
+    def test_failed_reload_keeps_snapshot(self):
+        """Test an unparsable file leaves the current configuration in place"""
+        self.assertEqual(self.config_manager.get_siliconflow_config()['model'], 'model-0')
+        with open(self.config_file, 'w', encoding='utf-8') as f:
+            f.write('{ invalid')
+        with self.assertRaises(ValueError):
+            self.config_manager.reload()
+        self.assertEqual(self.config_manager.get_siliconflow_config()['model'], 'model-0')
+
+
+if __name__ == '__main__':
+    unittest.main()
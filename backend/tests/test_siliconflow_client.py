@@ -33,26 +33,35 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(self.client.temperature, 0.7)
         self.assertEqual(self.client.timeout, 60)
     
-    def test_build_analysis_prompt_with_custom_prompt(self):
-        """Test building analysis prompt with custom prompt"""
+    def test_build_messages_with_custom_prompt(self):
+        """Test building messages with custom prompt"""
         content = "Test content"
         custom_prompt = "Custom analysis prompt"
         
-        prompt = self.client._build_analysis_prompt(content, custom_prompt)
+        messages = self.client._build_messages(content, custom_prompt)
         
-        self.assertIn(custom_prompt, prompt)
-        self.assertIn(content, prompt)
-        self.assertIn("以下是需要分析的内容", prompt)
+        self.assertEqual([m["role"] for m in messages], ["system", "user"])
+        self.assertIn(custom_prompt, messages[0]["content"])
+        self.assertNotIn(content, messages[0]["content"])
+        self.assertIn(content, messages[1]["content"])
+        self.assertIn("以下是需要分析的内容", messages[1]["content"])
     
-    def test_build_analysis_prompt_without_custom_prompt(self):
-        """Test building analysis prompt without custom prompt"""
+    def test_build_messages_without_custom_prompt(self):
+        """Test building messages without custom prompt"""
         content = "Test content"
         
-        prompt = self.client._build_analysis_prompt(content)
+        messages = self.client._build_messages(content)
         
-        self.assertIn("请分析以下文档内容", prompt)
-        self.assertIn(content, prompt)
-        self.assertIn("以下是需要分析的内容", prompt)
+        self.assertIn("请分析以下文档内容", messages[0]["content"])
+        self.assertIn(content, messages[1]["content"])
+    
+    def test_build_messages_stable_prefix(self):
+        """Test that the system message does not depend on the document"""
+        first = self.client._build_messages("Document A", "Shared prompt")
+        second = self.client._build_messages("Document B", "Shared prompt")
+        
+        self.assertEqual(first[0], second[0])
+        self.assertNotEqual(first[1], second[1])
     
     def test_build_request_payload(self):
         """Test building request payload"""
@@ -70,6 +79,21 @@ class TestSiliconFlowClient(unittest.TestCase):
         
         self.assertEqual(payload, expected_payload)
     
+    def test_build_request_payload_with_messages(self):
+        """Test building request payload from chat messages"""
+        messages = self.client._build_messages("Test content", "Prompt")
+        
+        payload = self.client._build_request_payload(messages)
+        
+        self.assertEqual(payload["messages"], messages)
+    
+    def test_build_request_payload_overrides(self):
+        """Test per-request model parameters override the client defaults"""
+        payload = self.client._build_request_payload("Test prompt", max_tokens=500, temperature=0)
+        
+        self.assertEqual(payload["max_tokens"], 500)
+        self.assertEqual(payload["temperature"], 0)
+    
     def test_analyze_content_empty_content(self):
         """Test analysis with empty content"""
         result = self.client.analyze_content("")
@@ -86,7 +110,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "")
         self.assertIn("No content provided", result.error_message)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_analyze_content_success(self, mock_post):
         """Test successful content analysis"""
         # Mock successful API response
@@ -122,7 +146,50 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertIsNotNone(result.processing_time)
         self.assertIsNotNone(result.metadata)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
+    def test_analyze_content_structured(self, mock_post):
+        """Test structured mode requests JSON output and validates it"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "choices": [{"message": {"content": json.dumps({
+                "summary": "摘要内容",
+                "key_points": ["要点"],
+                "risks": [{"description": "风险", "severity": "medium"}],
+                "recommendations": []
+            }, ensure_ascii=False)}}],
+            "usage": {"total_tokens": 100}
+        }
+        mock_post.return_value = mock_response
+        
+        result = self.client.analyze_content("Test content", structured=True)
+        
+        payload = mock_post.call_args.kwargs['json']
+        self.assertEqual(payload["response_format"], {"type": "json_object"})
+        self.assertIn("JSON Schema", payload["messages"][0]["content"])
+        self.assertTrue(result.success)
+        self.assertEqual(result.structured["risks"][0]["severity"], "中")
+        self.assertTrue(result.content.startswith("## 摘要\n\n摘要内容"))
+    
+    @patch('services.siliconflow_client.requests.Session.post')
+    def test_analyze_content_structured_invalid(self, mock_post):
+        """Test invalid structured output is kept as text with the validation error"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "choices": [{"message": {"content": "这不是JSON"}}],
+            "usage": {"total_tokens": 100}
+        }
+        mock_post.return_value = mock_response
+        
+        result = self.client.analyze_content("Test content", structured=True)
+        
+        self.assertTrue(result.success)
+        self.assertIsNone(result.structured)
+        self.assertEqual(result.content, "这不是JSON")
+        self.assertIn("structured_error", result.metadata)
+    
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_analyze_content_api_error_401(self, mock_post):
         """Test analysis with 401 authentication error"""
         mock_response = Mock()
@@ -136,7 +203,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "")
         self.assertIn("Authentication failed", result.error_message)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_analyze_content_api_error_429(self, mock_post):
         """Test analysis with 429 rate limit error"""
         mock_response = Mock()
@@ -150,7 +217,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "")
         self.assertIn("Rate limit exceeded", result.error_message)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_analyze_content_api_error_400(self, mock_post):
         """Test analysis with 400 bad request error"""
         mock_response = Mock()
@@ -164,7 +231,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "")
         self.assertIn("Bad request", result.error_message)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_analyze_content_timeout(self, mock_post):
         """Test analysis with timeout error"""
         import requests
@@ -176,7 +243,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "")
         self.assertIn("timeout", result.error_message.lower())
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_analyze_content_connection_error(self, mock_post):
         """Test analysis with connection error"""
         import requests
@@ -188,7 +255,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "")
         self.assertIn("Connection error", result.error_message)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_retry_logic_success_after_failure(self, mock_post):
         """Test retry logic with success after initial failure"""
         # First call fails with 429, second succeeds
@@ -213,6 +280,34 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertEqual(result.content, "Success after retry")
         self.assertEqual(mock_post.call_count, 2)
     
+    def test_handle_api_response_cached_tokens(self):
+        """Test cached prompt tokens are reported and accumulated"""
+        response_data = {
+            "choices": [{"message": {"content": "Result"}}],
+            "usage": {
+                "total_tokens": 300,
+                "prompt_tokens": 200,
+                "prompt_tokens_details": {"cached_tokens": 150}
+            }
+        }
+        
+        result = self.client._handle_api_response(response_data, time.time())
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.cached_tokens, 150)
+        self.assertEqual(result.metadata['cached_tokens'], 150)
+        
+        stats = self.client.get_usage_stats()
+        self.assertEqual(stats['requests'], 1)
+        self.assertEqual(stats['prompt_tokens'], 200)
+        self.assertEqual(stats['cached_tokens'], 150)
+        self.assertEqual(stats['cached_token_ratio'], 0.75)
+    
+    def test_extract_cached_tokens_alternative_field(self):
+        """Test cached token extraction from provider-specific fields"""
+        self.assertEqual(self.client._extract_cached_tokens({"prompt_cache_hit_tokens": 64}), 64)
+        self.assertIsNone(self.client._extract_cached_tokens({"prompt_tokens": 10}))
+    
     def test_extract_error_message_dict_error(self):
         """Test error message extraction from dict error"""
         mock_response = Mock()
@@ -262,7 +357,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertFalse(result.success)
         self.assertIn("Empty response content", result.error_message)
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_test_connection_success(self, mock_post):
         """Test successful connection test"""
         mock_response = Mock()
@@ -278,7 +373,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertIsNone(result['error_message'])
         self.assertIsNotNone(result['response_time'])
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_test_connection_auth_failure(self, mock_post):
         """Test connection test with authentication failure"""
         mock_response = Mock()
@@ -292,7 +387,7 @@ class TestSiliconFlowClient(unittest.TestCase):
         self.assertFalse(result['authentication_valid'])
         self.assertIn("Authentication failed", result['error_message'])
     
-    @patch('services.siliconflow_client.requests.post')
+    @patch('services.siliconflow_client.requests.Session.post')
     def test_test_connection_timeout(self, mock_post):
         """Test connection test with timeout"""
         import requests
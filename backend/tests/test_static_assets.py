@@ -0,0 +1,75 @@
+import unittest
+import tempfile
+import shutil
+import gzip
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.static_assets import StaticAssets
+
+
+class TestStaticAssets(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.root = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.root, 'js'))
+        self._write('js/main.js', 'console.log("研发效能");\n' * 100)
+        self._write('style.css', 'body { margin: 0; }')
+        self._write('index.html', (
+            '<link rel="stylesheet" href="style.css">'
+            '<script src="https://cdn.example.com/chart.js"></script>'
+            "<script src='js/main.js'></script>"
+        ))
+        self.assets = StaticAssets(self.root)
+        self.assets.build()
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        shutil.rmtree(self.root)
+    
+    def _write(self, path, text):
+        with open(os.path.join(self.root, path), 'w', encoding='utf-8') as f:
+            f.write(text)
+    
+    def test_fingerprinted_names_in_html(self):
+        """Test that local references are rewritten and external ones kept"""
+        main = self.assets.url_for('js/main.js')
+        html = self.assets.get('index.html').data.decode('utf-8')
+        
+        self.assertRegex(main, r'^js/main\.[0-9a-f]{12}\.js$')
+        self.assertIn(f"src='{main}'", html)
+        self.assertIn(f'href="{self.assets.url_for("style.css")}"', html)
+        self.assertIn('src="https://cdn.example.com/chart.js"', html)
+        self.assertTrue(self.assets.get(main).fingerprinted)
+        self.assertFalse(self.assets.get('js/main.js').fingerprinted)
+    
+    def test_precompressed_variants(self):
+        """Test gzip variants and negotiation"""
+        asset = self.assets.get(self.assets.url_for('js/main.js'))
+        
+        body, encoding = asset.select('gzip, deflate')
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(gzip.decompress(body), asset.data)
+        self.assertEqual(asset.select('identity'), (asset.data, None))
+        # Files below the size threshold are not precompressed
+        self.assertEqual(self.assets.get(self.assets.url_for('style.css')).encodings, {})
+    
+    def test_refresh_after_change(self):
+        """Test that a modified file gets a new fingerprint"""
+        old_name = self.assets.url_for('js/main.js')
+        self._write('js/main.js', 'console.log("changed");')
+        os.utime(os.path.join(self.root, 'js/main.js'), (1, 1))
+        
+        self.assets.refresh()
+        
+        new_name = self.assets.url_for('js/main.js')
+        self.assertNotEqual(new_name, old_name)
+        self.assertIn(new_name, self.assets.get('index.html').data.decode('utf-8'))
+
+
+if __name__ == '__main__':
+    unittest.main()
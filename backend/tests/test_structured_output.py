@@ -0,0 +1,87 @@
+import unittest
+import json
+import os
+import sys
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services import structured_output
+from services.structured_output import (
+    SchemaValidationError, compile_validator, parse_analysis, render_markdown, validate_analysis, _compile
+)
+
+VALID_ANALYSIS = {
+    'summary': '文档描述了新的发布流程。',
+    'key_points': ['每周发布一次', '引入灰度发布'],
+    'risks': [{'description': '回滚流程未验证', 'severity': '高', 'mitigation': '上线前演练回滚'}],
+    'recommendations': ['补充监控告警']
+}
+
+
+class TestStructuredOutput(unittest.TestCase):
+    
+    def test_parse_valid_output(self):
+        """Test valid JSON output is parsed, including output wrapped in a code fence"""
+        text = json.dumps(VALID_ANALYSIS, ensure_ascii=False)
+        self.assertEqual(parse_analysis(text), VALID_ANALYSIS)
+        self.assertEqual(parse_analysis(f"```json\n{text}\n```"), VALID_ANALYSIS)
+    
+    def test_normalization(self):
+        """Test aliases, omitted lists and unknown keys are normalized"""
+        result = validate_analysis({
+            'summary': '  摘要  ',
+            'risks': [{'description': '风险', 'severity': 'High', 'owner': '张三'}],
+            'extra': 1
+        })
+        self.assertEqual(result, {
+            'summary': '摘要',
+            'key_points': [],
+            'risks': [{'description': '风险', 'severity': '高'}],
+            'recommendations': []
+        })
+    
+    def test_invalid_output(self):
+        """Test invalid output is rejected with the offending field"""
+        invalid = [
+            ('not json', 'valid JSON'),
+            ('[]', 'object'),
+            (json.dumps({'key_points': []}), 'summary'),
+            (json.dumps({**VALID_ANALYSIS, 'summary': ''}), 'summary'),
+            (json.dumps({**VALID_ANALYSIS, 'key_points': 'one'}), 'key_points'),
+            (json.dumps({**VALID_ANALYSIS, 'risks': [{'description': 'x', 'severity': 'unknown'}]}), 'severity'),
+            (json.dumps({**VALID_ANALYSIS, 'recommendations': ['x'] * 51}), 'recommendations')
+        ]
+        for text, field in invalid:
+            with self.assertRaisesRegex(SchemaValidationError, field):
+                parse_analysis(text)
+    
+    def test_builtin_validator(self):
+        """Test the built-in validator independently of the optional fastjsonschema"""
+        check = _compile({
+            'type': 'object',
+            'required': ['items'],
+            'properties': {'items': {'type': 'array', 'items': {'type': 'integer'}}}
+        }, '')
+        check({'items': [1, 2]})
+        with self.assertRaisesRegex(SchemaValidationError, r'items\[\] must be of type integer'):
+            check({'items': [1, True]})
+        
+        self.assertTrue(callable(compile_validator(structured_output.ANALYSIS_SCHEMA)))
+    
+    def test_render_markdown(self):
+        """Test the text rendering contains every section"""
+        text = render_markdown(VALID_ANALYSIS)
+        for expected in ('## 摘要', '- 引入灰度发布', '- [高] 回滚流程未验证（应对：上线前演练回滚）', '## 建议'):
+            self.assertIn(expected, text)
+        self.assertNotIn('## 风险', render_markdown({**VALID_ANALYSIS, 'risks': []}))
+    
+    def test_storage_roundtrip(self):
+        """Test the JSON column helpers"""
+        self.assertIsNone(structured_output.dumps(None))
+        self.assertIsNone(structured_output.loads(None))
+        self.assertEqual(structured_output.loads(structured_output.dumps(VALID_ANALYSIS)), VALID_ANALYSIS)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+import sqlite3
+import csv
+import io
+import os
+import sys
+
+from openpyxl import load_workbook
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.table_export import iter_rows, iter_csv, write_xlsx, iter_file
+
+
+class TestTableExport(unittest.TestCase):
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.conn = sqlite3.connect(':memory:')
+        self.cursor = self.conn.cursor()
+        self.cursor.execute('CREATE TABLE details (person_name TEXT, saturation REAL)')
+        self.rows = [(f'员工{i}', i / 4 if i % 5 else None) for i in range(2500)]
+        self.cursor.executemany('INSERT INTO details VALUES (?, ?)', self.rows)
+    
+    def tearDown(self):
+        """Clean up test fixtures"""
+        self.conn.close()
+    
+    def _rows(self):
+        self.cursor.execute('SELECT person_name, saturation FROM details ORDER BY rowid')
+        return iter_rows(self.cursor, chunk_size=300)
+    
+    def test_iter_rows(self):
+        """Test that chunked fetching yields every row in order"""
+        self.assertEqual(list(self._rows()), self.rows)
+    
+    def test_csv_chunks(self):
+        """Test CSV output with a BOM and one chunk per chunk_rows rows"""
+        chunks = list(iter_csv(['人员名称', '饱和度(%)'], self._rows(), chunk_rows=1000))
+        
+        self.assertEqual(len(chunks), 3)
+        text = b''.join(chunks).decode('utf-8')
+        self.assertTrue(text.startswith('\ufeff人员名称'))
+        
+        records = list(csv.reader(io.StringIO(text.lstrip('\ufeff'))))
+        self.assertEqual(records[0], ['人员名称', '饱和度(%)'])
+        self.assertEqual(len(records), 2501)
+        self.assertEqual(records[1], ['员工0', ''])
+        self.assertEqual(records[2], ['员工1', '0.25'])
+    
+    def test_xlsx_workbook(self):
+        """Test the write-only workbook contents"""
+        output = write_xlsx(['人员名称', '饱和度(%)'], self._rows(), '明细数据')
+        data = b''.join(iter_file(output, chunk_size=4096))
+        
+        self.assertTrue(output.closed)
+        worksheet = load_workbook(io.BytesIO(data), read_only=True)['明细数据']
+        values = list(worksheet.iter_rows(values_only=True))
+        self.assertEqual(values[0], ('人员名称', '饱和度(%)'))
+        # Read-only mode drops trailing empty cells
+        self.assertEqual([row + (None,) * (2 - len(row)) for row in values[1:]], self.rows)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import unittest
+import os
+import sys
+import json
+import tempfile
+from unittest.mock import patch, Mock
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.tracing import (
+    Tracer, JsonlSpanExporter, OTLPJsonExporter, NOOP_SPAN, span, traced,
+    current_span, set_span_attributes, parse_traceparent
+)
+
+
+class ListExporter:
+    """Exporter collecting spans in memory"""
+    
+    def __init__(self):
+        self.spans = []
+    
+    def export(self, spans):
+        self.spans.extend(spans)
+
+
+class TestTracing(unittest.TestCase):
+    
+    def setUp(self):
+        self.exporter = ListExporter()
+        self.tracer = Tracer(self.exporter, sample_rate=1.0)
+    
+    def test_nested_spans(self):
+        """Test child spans are parented to the enclosing span and exported with the trace"""
+        @traced('work')
+        def work():
+            set_span_attributes(pages=3)
+            with span('inner', attempt=1):
+                pass
+        
+        with self.tracer.trace('request', route='/upload') as active:
+            work()
+        self.tracer.flush()
+        
+        spans = {s.name: s for s in self.exporter.spans}
+        self.assertEqual(set(spans), {'request', 'work', 'inner'})
+        self.assertEqual({s.trace_id for s in spans.values()}, {active.trace_id})
+        self.assertIsNone(spans['request'].parent_id)
+        self.assertEqual(spans['work'].parent_id, spans['request'].span_id)
+        self.assertEqual(spans['inner'].parent_id, spans['work'].span_id)
+        self.assertEqual(spans['work'].attributes, {'pages': 3})
+        self.assertEqual(spans['inner'].attributes, {'attempt': 1})
+        self.assertTrue(all(s.end_time >= s.start_time for s in spans.values()))
+        self.assertIs(current_span(), NOOP_SPAN)
+    
+    def test_exception_marks_span_failed(self):
+        """Test an exception leaving a span records the error"""
+        with self.assertRaises(ValueError):
+            with self.tracer.trace('request'):
+                with span('extract'):
+                    raise ValueError('bad pdf')
+        self.tracer.flush()
+        
+        statuses = {s.name: (s.status, s.error) for s in self.exporter.spans}
+        self.assertEqual(statuses['extract'], ('error', 'ValueError: bad pdf'))
+        self.assertEqual(statuses['request'][0], 'error')
+    
+    def test_unsampled_trace_records_nothing(self):
+        """Test unsampled requests get a trace id but spans are no-ops"""
+        tracer = Tracer(self.exporter, sample_rate=0.0)
+        with tracer.trace('request') as active:
+            with span('inner') as inner:
+                self.assertIs(inner, NOOP_SPAN)
+            set_span_attributes(ignored=True)
+        tracer.flush()
+        
+        self.assertFalse(active.sampled)
+        self.assertEqual(len(active.trace_id), 32)
+        self.assertEqual(self.exporter.spans, [])
+        self.assertEqual(tracer.get_stats()['sampled'], 0)
+    
+    def test_no_exporter_disables_sampling(self):
+        """Test a tracer without exporter never samples"""
+        tracer = Tracer(None, sample_rate=1.0)
+        self.assertFalse(tracer.begin('request').sampled)
+        self.assertFalse(tracer.enabled)
+    
+    def test_traceparent(self):
+        """Test incoming traceparent headers keep the trace id and sampled flag"""
+        header = '00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01'
+        self.assertEqual(parse_traceparent(header),
+                         ('4bf92f3577b34da6a3ce929d0e0e4736', '00f067aa0ba902b7', True))
+        self.assertIsNone(parse_traceparent('garbage'))
+        self.assertIsNone(parse_traceparent('00-' + '0' * 32 + '-00f067aa0ba902b7-01'))
+        
+        tracer = Tracer(self.exporter, sample_rate=0.0)
+        active = tracer.begin('request', header)
+        self.assertTrue(active.sampled)
+        self.assertEqual(active.trace_id, '4bf92f3577b34da6a3ce929d0e0e4736')
+        self.assertEqual(active.root.parent_id, '00f067aa0ba902b7')
+        active.end()
+        
+        active = tracer.begin('request', header[:-2] + '00')
+        self.assertFalse(active.sampled)
+    
+    def test_span_limit(self):
+        """Test spans beyond the per-trace limit are dropped"""
+        tracer = Tracer(self.exporter, sample_rate=1.0, max_spans_per_trace=3)
+        with tracer.trace('request'):
+            for _ in range(5):
+                with span('step'):
+                    pass
+        tracer.flush()
+        
+        self.assertEqual(len(self.exporter.spans), 3)
+        self.assertEqual(tracer.get_stats()['dropped_spans'], 3)
+    
+    def test_jsonl_exporter(self):
+        """Test spans are appended as JSON lines"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, 'traces', 'spans.jsonl')
+            tracer = Tracer(JsonlSpanExporter(path), sample_rate=1.0)
+            with tracer.trace('request'):
+                with span('文件', bytes=10):
+                    pass
+            tracer.flush()
+            
+            with open(path, encoding='utf-8') as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual([r['name'] for r in records], ['request', '文件'])
+        self.assertEqual(records[1]['attributes'], {'bytes': 10})
+        self.assertEqual(records[1]['parentSpanId'], records[0]['spanId'])
+    
+    @patch('services.tracing.requests.post')
+    def test_otlp_exporter(self, mock_post):
+        """Test spans are posted in the OTLP/JSON trace format"""
+        mock_post.return_value = Mock(status_code=200)
+        tracer = Tracer(OTLPJsonExporter('http://localhost:4318'), sample_rate=1.0)
+        with tracer.trace('request'):
+            with span('ai_call', attempts=2, model='m', cached=False):
+                pass
+        tracer.flush()
+        
+        url = mock_post.call_args[0][0]
+        body = mock_post.call_args[1]['json']
+        self.assertEqual(url, 'http://localhost:4318/v1/traces')
+        spans = body['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual([s['name'] for s in spans], ['request', 'ai_call'])
+        self.assertNotIn('parentSpanId', spans[0])
+        self.assertEqual(spans[1]['attributes'], [
+            {'key': 'attempts', 'value': {'intValue': '2'}},
+            {'key': 'model', 'value': {'stringValue': 'm'}},
+            {'key': 'cached', 'value': {'boolValue': False}}
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import os
+import sys
+import threading
+import time
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from services.worker_pools import WorkerPools, parse_pool_limits, DEFAULT_POOL_LIMITS
+
+
+class TestWorkerPools(unittest.TestCase):
+    
+    def test_parse_pool_limits(self):
+        """Test pool limit specs"""
+        self.assertEqual(parse_pool_limits(' ai=8, dashboard=16 '), {'ai': 8, 'dashboard': 16})
+        self.assertIn('dashboard', parse_pool_limits(DEFAULT_POOL_LIMITS))
+        for spec in ('ai', 'ai=0', '=3'):
+            with self.assertRaises(ValueError):
+                parse_pool_limits(spec)
+    
+    def test_full_pool_rejects_after_timeout(self):
+        """Test a full pool rejects without affecting other pools"""
+        pools = WorkerPools({'ai': 1, 'dashboard': 1}, queue_timeout=0.05)
+        self.assertEqual(pools.total_limit, 2)
+        self.assertTrue(pools.acquire('ai'))
+        self.assertFalse(pools.acquire('ai'))
+        self.assertTrue(pools.acquire('dashboard', timeout=0))
+        stats = pools.get_stats()
+        self.assertEqual(stats['ai']['rejected'], 1)
+        self.assertEqual(stats['ai']['in_use'], 1)
+        pools.release('ai')
+        pools.release('dashboard')
+        self.assertEqual(pools.get_stats()['ai']['in_use'], 0)
+    
+    def test_waiting_request_gets_released_slot(self):
+        """Test a queued request takes the slot as soon as it is released"""
+        pools = WorkerPools({'ai': 1}, queue_timeout=5)
+        pools.acquire('ai')
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pools.acquire('ai')))
+        waiter.start()
+        time.sleep(0.05)
+        self.assertEqual(pools.get_stats()['ai']['waiting'], 1)
+        pools.release('ai')
+        waiter.join(1)
+        
+        self.assertEqual(acquired, [True])
+        stats = pools.get_stats()['ai']
+        self.assertEqual(stats['admitted'], 2)
+        self.assertEqual(stats['in_use'], 1)
+        self.assertGreater(stats['wait_seconds'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
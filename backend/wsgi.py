@@ -0,0 +1,56 @@
+"""
+Production entry point
+
+Linux/macOS (gunicorn, settings in gunicorn.conf.py):
+    gunicorn -c gunicorn.conf.py wsgi:application
+
+Windows or single process (waitress):
+    python wsgi.py
+
+Importing this module prepares the shared state once: the database schema,
+and the fingerprinted, precompressed static assets. With gunicorn's
+preload_app this happens in the master before the workers are forked, so
+the workers share the loaded assets copy-on-write instead of each building
+them.
+"""
+
+import os
+
+import app as dashboard
+
+
+def prepare():
+    """Create the database and build the static assets"""
+    os.makedirs(os.path.dirname(dashboard.DATABASE_PATH), exist_ok=True)
+    dashboard.init_database()
+    dashboard.static_assets.build()
+
+
+prepare()
+application = dashboard.app
+
+
+def main():
+    try:
+        from waitress import serve
+    except ImportError:
+        raise SystemExit("waitress is not installed (pip install waitress); "
+                         "on Linux use: gunicorn -c gunicorn.conf.py wsgi:application")
+    
+    # One thread per pool slot plus headroom for unpooled requests (pages, static files, /metrics)
+    threads = int(os.environ.get('WEB_THREADS', dashboard.worker_pools.total_limit + 4))
+    serve(
+        application,
+        host=os.environ.get('WEB_HOST', '0.0.0.0'),
+        port=int(os.environ.get('WEB_PORT', '5000')),
+        threads=threads,
+        # Idle keep-alive connections are closed after this many seconds
+        channel_timeout=int(os.environ.get('WEB_KEEPALIVE_TIMEOUT', '120')),
+        connection_limit=int(os.environ.get('WEB_CONNECTION_LIMIT', '1000')),
+        backlog=int(os.environ.get('WEB_BACKLOG', '1024')),
+        ident='efficiency-dashboard'
+    )
+
+
+if __name__ == '__main__':
+    main()
@@ -10,7 +10,9 @@ let totalPages = 1;
 function initAIAnalysis() {
     setupTabs();
     setupFileUpload();
+    setupHistorySearch();
     loadAIConfig();
+    loadPromptTemplates();
     loadUsageStats();
     
     // 如果当前在AI分析页面，加载历史记录
@@ -166,12 +168,31 @@ async function startAnalysis() {
         const formData = new FormData();
         formData.append('file', currentFile);
         
-        // 获取自定义提示词
+        // 分析模板优先于自定义提示词
+        const templateId = document.getElementById('prompt-template').value;
         const customPrompt = document.getElementById('custom-prompt').value.trim();
-        if (customPrompt) {
+        if (templateId) {
+            formData.append('template_id', templateId);
+        } else if (customPrompt) {
             formData.append('custom_prompt', customPrompt);
         }
         
+        // 结构化输出选项
+        const structuredCheckbox = document.getElementById('structured-output');
+        if (structuredCheckbox && structuredCheckbox.checked) {
+            formData.append('structured', 'true');
+        }
+        
+        // 增量分析选项
+        const incrementalCheckbox = document.getElementById('incremental-analysis');
+        if (incrementalCheckbox && incrementalCheckbox.checked) {
+            formData.append('incremental', 'true');
+            const documentKey = document.getElementById('document-key').value.trim();
+            if (documentKey) {
+                formData.append('document_key', documentKey);
+            }
+        }
+        
         // 模拟上传进度
         let progress = 0;
         const progressInterval = setInterval(() => {
@@ -216,6 +237,9 @@ async function startAnalysis() {
         if (result.success) {
             currentAnalysisId = result.analysis_id;
             displayAnalysisResult(result.report);
+            if (result.reused) {
+                showInfo('该文档已按相同模板版本分析过，已直接返回已有结果');
+            }
         } else {
             throw new Error(result.error || '分析失败');
         }
@@ -364,6 +388,71 @@ async function loadAnalysisHistory(page = 1) {
     }
 }
 
+// 设置历史记录全文搜索
+function setupHistorySearch() {
+    const searchInput = document.getElementById('history-search');
+    if (!searchInput) {
+        return;
+    }
+    
+    searchInput.placeholder = '搜索文件名、分析内容或提示词...';
+    
+    let searchTimer = null;
+    searchInput.addEventListener('input', () => {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => searchAnalysisHistory(searchInput.value.trim()), 300);
+    });
+}
+
+// 全文搜索分析历史
+async function searchAnalysisHistory(query) {
+    if (!query) {
+        loadAnalysisHistory(1);
+        return;
+    }
+    
+    const historyList = document.getElementById('history-list');
+    const pagination = document.getElementById('history-pagination');
+    
+    try {
+        const response = await fetch(`/api/ai-analysis/search?q=${encodeURIComponent(query)}&limit=20`);
+        const data = await response.json();
+        
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        
+        pagination.style.display = 'none';
+        
+        if (data.items.length === 0) {
+            historyList.innerHTML = '<div class="empty-state">没有匹配的分析记录</div>';
+            return;
+        }
+        
+        // snippet 由服务端转义，仅包含 <mark> 高亮标签
+        historyList.innerHTML = data.items.map(item => `
+            <div class="history-item">
+                <div class="history-info">
+                    <div class="history-filename">${escapeHtml(item.filename)}</div>
+                    <div class="history-meta">
+                        <span class="file-type">${item.file_type.toUpperCase()}</span>
+                        <span class="file-size">${formatFileSize(item.file_size)}</span>
+                        <span class="analysis-time">${new Date(item.created_at).toLocaleString()}</span>
+                    </div>
+                    <div class="history-snippet">${item.snippet}</div>
+                </div>
+                <div class="history-actions">
+                    <button class="btn-secondary" onclick="viewAnalysisResult('${item.id}')">查看结果</button>
+                    <button class="btn-secondary" onclick="exportReport('html', '${item.id}')">导出</button>
+                </div>
+            </div>
+        `).join('');
+    } catch (error) {
+        console.error('搜索历史记录失败:', error);
+        historyList.innerHTML = '<div class="error-state">搜索失败</div>';
+    }
+}
+
 // 加载历史页面
 function loadHistoryPage(page) {
     if (page >= 1 && page <= totalPages) {
@@ -448,6 +537,28 @@ async function loadAIConfig() {
     }
 }
 
+// 加载分析模板列表
+async function loadPromptTemplates() {
+    try {
+        const response = await fetch('/api/ai-analysis/templates');
+        const data = await response.json();
+        if (!data.success) {
+            return;
+        }
+        
+        const select = document.getElementById('prompt-template');
+        data.templates.forEach(template => {
+            const option = document.createElement('option');
+            option.value = template.id;
+            option.textContent = `${template.name}（v${template.version}）`;
+            option.title = template.description || '';
+            select.appendChild(option);
+        });
+    } catch (error) {
+        console.error('加载分析模板失败:', error);
+    }
+}
+
 // 测试连接
 async function testConnection() {
     const statusIndicator = document.getElementById('connection-status');
@@ -522,6 +633,10 @@ async function loadUsageStats() {
             document.getElementById('total-analyses').textContent = stats.total_analyses;
             document.getElementById('avg-time').textContent = stats.average_processing_time;
             document.getElementById('success-rate').textContent = stats.success_rate;
+            
+            const percentiles = stats.latency_percentiles || {};
+            document.getElementById('latency-p95').textContent = percentiles.p95 ?? '--';
+            document.getElementById('latency-p99').textContent = percentiles.p99 ?? '--';
         }
     } catch (error) {
         console.error('加载统计信息失败:', error);
@@ -547,6 +662,12 @@ function formatFileSize(bytes) {
     return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
 }
 
+function escapeHtml(text) {
+    const div = document.createElement('div');
+    div.textContent = text ?? '';
+    return div.innerHTML;
+}
+
 // 通知系统
 function createNotification(message, type = 'info', duration = 5000) {
     // 创建通知容器（如果不存在）
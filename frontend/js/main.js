@@ -1,6 +1,12 @@
 // API基础URL配置
 const API_BASE_URL = 'http://localhost:5000';
 
+// 排行榜每次加载的条数（服务端Top-K查询）
+const RANKING_LIMIT = 50;
+
+// 明细数据每页条数（服务端游标分页）
+const DETAILS_PAGE_SIZE = 100;
+
 // 主要应用逻辑
 class EfficiencyPlatform {
     constructor() {
@@ -15,6 +21,7 @@ class EfficiencyPlatform {
             department: 'all',
             date: ''
         };
+        this.detailsCursor = null;
         this.init();
     }
 
@@ -42,6 +49,12 @@ class EfficiencyPlatform {
             });
         });
 
+        // 明细数据加载更多
+        const detailsLoadMore = document.getElementById('details-load-more');
+        if (detailsLoadMore) {
+            detailsLoadMore.addEventListener('click', () => this.loadMoreDetails());
+        }
+
         // 排序切换 - 新的独立排行榜
         document.querySelectorAll('.sort-btn').forEach(btn => {
             btn.addEventListener('click', (e) => {
@@ -133,41 +146,83 @@ class EfficiencyPlatform {
     }
 
     async loadInitialData() {
+        // 首屏数据通过聚合接口一次请求获取，失败时回退到逐个接口加载
+        if (await this.loadBootstrap()) {
+            return;
+        }
         await this.loadDepartments();
         await this.loadDashboardData('metrics');
     }
 
+    async loadBootstrap() {
+        try {
+            const params = new URLSearchParams();
+            if (this.filters.department && this.filters.department !== 'all') {
+                params.append('department', this.filters.department);
+            }
+            if (this.filters.date) {
+                params.append('date', this.filters.date);
+            }
+            Object.entries(this.rankingSortOrders).forEach(([type, order]) => {
+                params.append(`${type}_sort`, order);
+            });
+            params.append('ranking_limit', RANKING_LIMIT);
+            params.append('details_limit', DETAILS_PAGE_SIZE);
+            
+            const response = await fetch(`${API_BASE_URL}/api/dashboard/bootstrap?${params.toString()}`);
+            if (!response.ok) {
+                return false;
+            }
+            const data = await response.json();
+            
+            this.updateDepartments(data);
+            this.updateMetrics(data.metrics);
+            Object.entries(data.rankings || {}).forEach(([type, rankings]) => {
+                this.updateSingleRanking(type, { rankings });
+            });
+            this.updateDetails({ details: data.details, pagination: data.detailsPagination });
+            this.updateSettings(data.settings);
+            return true;
+        } catch (error) {
+            console.error('加载首屏数据失败:', error);
+            return false;
+        }
+    }
+
     async loadDepartments() {
         try {
             const response = await fetch(`${API_BASE_URL}/api/departments`);
             const data = await response.json();
-            
-            const departmentFilter = document.getElementById('department-filter');
-            if (departmentFilter && data.departments) {
-                // 清空现有选项
-                departmentFilter.innerHTML = '';
-                
-                // 添加"全部部门"选项
-                const allOption = document.createElement('option');
-                allOption.value = 'all';
-                allOption.textContent = '全部部门';
-                departmentFilter.appendChild(allOption);
-                
-                // 添加其他部门选项
-                data.departments.forEach(dept => {
-                    if (dept !== '全部部门') {
-                        const option = document.createElement('option');
-                        option.value = dept;
-                        option.textContent = dept;
-                        departmentFilter.appendChild(option);
-                    }
-                });
-            }
+            this.updateDepartments(data);
         } catch (error) {
             console.error('加载部门列表失败:', error);
         }
     }
 
+    updateDepartments(data) {
+        const departmentFilter = document.getElementById('department-filter');
+        if (departmentFilter && data.departments) {
+            // 清空现有选项
+            departmentFilter.innerHTML = '';
+            
+            // 添加"全部部门"选项
+            const allOption = document.createElement('option');
+            allOption.value = 'all';
+            allOption.textContent = '全部部门';
+            departmentFilter.appendChild(allOption);
+            
+            // 添加其他部门选项
+            data.departments.forEach(dept => {
+                if (dept !== '全部部门') {
+                    const option = document.createElement('option');
+                    option.value = dept;
+                    option.textContent = dept;
+                    departmentFilter.appendChild(option);
+                }
+            });
+        }
+    }
+
     async loadTabData(tab) {
         switch(tab) {
             case 'dashboard':
@@ -192,6 +247,9 @@ class EfficiencyPlatform {
             if (this.filters.date) {
                 params.append('date', this.filters.date);
             }
+            if (tab === 'details') {
+                params.append('limit', DETAILS_PAGE_SIZE);
+            }
             
             const queryString = params.toString();
             const url = `${API_BASE_URL}/api/dashboard/${tab}${queryString ? '?' + queryString : ''}`;
@@ -240,6 +298,7 @@ class EfficiencyPlatform {
             }
             params.append('type', type);
             params.append('sort', this.rankingSortOrders[type]);
+            params.append('limit', RANKING_LIMIT);
             
             const queryString = params.toString();
             const url = `${API_BASE_URL}/api/dashboard/rankings${queryString ? '?' + queryString : ''}`;
@@ -310,7 +369,7 @@ class EfficiencyPlatform {
                 }
                 
                 rankItem.innerHTML = `
-                    <span class="rank">${index + 1}</span>
+                    <span class="rank">${item.rank || index + 1}</span>
                     <span class="name">${item.name}</span>
                     <span class="value">${valueDisplay}</span>
                 `;
@@ -321,9 +380,42 @@ class EfficiencyPlatform {
         }
     }
 
-    updateDetails(data) {
+    // 加载下一页明细数据
+    async loadMoreDetails() {
+        if (!this.detailsCursor) return;
+        
+        try {
+            const params = new URLSearchParams();
+            if (this.filters.department && this.filters.department !== 'all') {
+                params.append('department', this.filters.department);
+            }
+            if (this.filters.date) {
+                params.append('date', this.filters.date);
+            }
+            params.append('limit', DETAILS_PAGE_SIZE);
+            params.append('cursor', this.detailsCursor);
+            
+            const response = await fetch(`${API_BASE_URL}/api/dashboard/details?${params.toString()}`);
+            const data = await response.json();
+            
+            this.updateDetails(data, true);
+        } catch (error) {
+            console.error('加载更多明细数据失败:', error);
+            this.showErrorMessage('明细数据加载失败，请稍后重试');
+        }
+    }
+
+    updateDetails(data, append = false) {
         const tbody = document.getElementById('details-tbody');
-        tbody.innerHTML = '';
+        if (!append) {
+            tbody.innerHTML = '';
+        }
+        
+        this.detailsCursor = data.pagination ? data.pagination.nextCursor : null;
+        const loadMore = document.getElementById('details-load-more');
+        if (loadMore) {
+            loadMore.style.display = this.detailsCursor ? '' : 'none';
+        }
         
         if (data.details) {
             data.details.forEach(item => {
@@ -353,21 +445,26 @@ class EfficiencyPlatform {
         try {
             const response = await fetch(`${API_BASE_URL}/api/settings`);
             const data = await response.json();
-            
-            const refreshInterval = document.getElementById('refresh-interval');
-            const emailNotifications = document.getElementById('email-notifications');
-            
-            if (refreshInterval && data.refreshInterval) {
-                refreshInterval.value = data.refreshInterval;
-            }
-            if (emailNotifications && data.emailNotifications !== undefined) {
-                emailNotifications.checked = data.emailNotifications;
-            }
+            this.updateSettings(data);
         } catch (error) {
             console.error('加载设置失败:', error);
         }
     }
 
+    updateSettings(data) {
+        if (!data) return;
+        
+        const refreshInterval = document.getElementById('refresh-interval');
+        const emailNotifications = document.getElementById('email-notifications');
+        
+        if (refreshInterval && data.refreshInterval) {
+            refreshInterval.value = data.refreshInterval;
+        }
+        if (emailNotifications && data.emailNotifications !== undefined) {
+            emailNotifications.checked = data.emailNotifications;
+        }
+    }
+
     // 应用筛选条件
     applyFilters() {
         // 重新加载当前标签的数据
@@ -377,6 +474,26 @@ class EfficiencyPlatform {
         this.showSuccessMessage('筛选条件已应用');
     }
 
+    // 导出看板原始数据（CSV/Excel，由浏览器直接流式下载）
+    exportData(table, format) {
+        const params = new URLSearchParams();
+        if (this.filters.department && this.filters.department !== 'all') {
+            params.append('department', this.filters.department);
+        }
+        if (this.filters.date) {
+            params.append('date', this.filters.date);
+        }
+        params.append('format', format);
+        
+        const link = document.createElement('a');
+        link.href = `${API_BASE_URL}/api/dashboard/export/${table}?${params.toString()}`;
+        document.body.appendChild(link);
+        link.click();
+        document.body.removeChild(link);
+        
+        this.showSuccessMessage('正在导出数据...');
+    }
+
     // 下载报告功能
     async downloadReport() {
         try {
@@ -528,6 +645,13 @@ function downloadReport() {
     }
 }
 
+// 全局导出数据函数
+function exportDashboardData(table, format) {
+    if (window.efficiencyPlatform) {
+        window.efficiencyPlatform.exportData(table, format);
+    }
+}
+
 // 重置筛选条件
 function resetFilters() {
     const departmentFilter = document.getElementById('department-filter');